@@ -0,0 +1,161 @@
+"""
+Batch mode: runs main.perform_logical_checks on every mobile geodatabase of a directory or glob pattern
+(one geodatabase per site) in a bounded pool of worker processes, and writes the reports of every site to
+<output>/<site>/ plus a merged summary <output>/batch_summary.json.
+
+Run from the Task2 directory:
+    python cli.py batch "D:\\sites" --output batch_reports --workers 4
+    python cli.py batch "D:\\sites\\*\\*.geodatabase"
+"""
+import copy
+import glob
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+from config import Config
+
+SUMMARY_NAME = "batch_summary.json"
+OK = "ok"
+FAILED = "failed"
+
+
+def find_geodatabases(source: str) -> List[str]:
+    """The .geodatabase files of a directory, or the paths matching a glob pattern, sorted"""
+    pattern = os.path.join(source, "*.geodatabase") if os.path.isdir(source) else source
+    return sorted(glob.glob(pattern))
+
+
+def site_names(paths: List[str]) -> List[str]:
+    """A unique name for every geodatabase, from its file name, usable in file and in_memory names"""
+    names = []
+    for path in paths:
+        base = re.sub(r"\W", "_", os.path.splitext(os.path.basename(path))[0]) or "site"
+        name, counter = base, 1
+        while name in names:
+            name = f"{base}_{counter}"
+            counter += 1
+        names.append(name)
+    return names
+
+
+def run_batch(config: Config, source: str, output_directory: str, workers: int) -> dict:
+    """
+    Checks every geodatabase of `source` with the checks enabled in `config`.
+    Every site runs in its own worker process (a new process per site), with its own accessor and workspace,
+    its own temporary intersect names and its own report directory. A site that fails, or whose worker process
+    crashes, is reported as failed in the summary and does not stop the other sites.
+    Args:
+        config: the configuration, `database_path` is replaced by each geodatabase. It must be picklable
+        source: a directory of .geodatabase files or a glob pattern
+        output_directory: where the site report directories and the summary are written
+        workers: the maximum number of sites checked at the same time
+
+    Returns: the summary, also written to <output_directory>/batch_summary.json
+    """
+    paths = find_geodatabases(source)
+    if not paths:
+        raise ValueError(f"No geodatabases found in {source}")
+    sites = dict(zip(site_names(paths), paths))
+    workers = max(1, min(workers, len(sites)))
+    logging.info(f"Checking {len(sites)} geodatabases with {workers} workers")
+
+    start = time.perf_counter()
+    results = _run_sites(config, sites, output_directory, workers)
+    crashed = [site for site, result in results.items() if result is None]
+    if crashed:
+        # A crashed worker breaks the whole pool: the sites that did not finish are run again one by one,
+        # so that only the site that crashes is lost
+        logging.warning(f"A worker process crashed, checking {len(crashed)} sites again one at a time")
+        for site in crashed:
+            results.update(_run_sites(config, {site: sites[site]}, output_directory, 1))
+
+    site_results = []
+    for site, path in sites.items():
+        result = results[site]
+        if result is None:
+            result = {"site": site, "database_path": path, "status": FAILED, "error": "The worker process crashed"}
+        site_results.append(result)
+    summary = {
+        "sites": len(site_results),
+        "failed": sum(1 for result in site_results if result["status"] == FAILED),
+        "seconds": time.perf_counter() - start,
+        "workers": workers,
+        "invalid": _merge_counts(site_results),
+        "results": site_results,
+    }
+    os.makedirs(output_directory, exist_ok=True)
+    summary_path = os.path.join(output_directory, SUMMARY_NAME)
+    with open(f"{summary_path}.part", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(f"{summary_path}.part", summary_path)
+    logging.info(f"Checked {summary['sites']} geodatabases, {summary['failed']} failed. Summary: {summary_path}")
+    return summary
+
+
+def check_site(config: Config, site: str, database_path: str, report_directory: str) -> dict:
+    """
+    Runs the checks of one site. Runs in a worker process: every error is caught and returned in the result.
+    Returns: the site result (site, database_path, status, seconds and the reports or the error)
+    """
+    from geo_access.factory import create_accessor
+    from main import perform_logical_checks
+
+    start = time.perf_counter()
+    result = {"site": site, "database_path": database_path}
+    try:
+        os.makedirs(report_directory, exist_ok=True)
+        site_config = _site_config(config, database_path, report_directory)
+        accessor = create_accessor(site_config)
+        result["reports"] = perform_logical_checks(site_config, accessor, report_directory, scratch_suffix=site)
+        result["status"] = OK
+    except Exception as ex:
+        logging.error(f"Checking {database_path} failed: {ex}")
+        result.update(status=FAILED, error=f"{type(ex).__name__}: {ex}")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _run_sites(config: Config, sites: Dict[str, str], output_directory: str, workers: int) -> Dict[str, Optional[dict]]:
+    """The result of every site, None for the sites lost with a crashed worker process"""
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        futures = {
+            site: pool.submit(check_site, config, site, path, os.path.join(output_directory, site))
+            for site, path in sites.items()
+        }
+        for site, future in futures.items():
+            try:
+                results[site] = future.result()
+            except BrokenProcessPool:
+                results[site] = None
+    return results
+
+
+def _site_config(config: Config, database_path: str, report_directory: str) -> Config:
+    """
+    The configuration of one site: its geodatabase and, for the settings that keep state between runs, its own files
+    in the report directory. The site runs serially, the parallelism is across sites.
+    """
+    site_config = copy.copy(config)
+    site_config.database_path = database_path
+    site_config.workers = 1
+    site_config.manifest_file = os.path.join(report_directory, os.path.basename(config.manifest_file))
+    if config.checkpoint_file:
+        site_config.checkpoint_file = os.path.join(report_directory, os.path.basename(config.checkpoint_file))
+    if config.feature_store:
+        site_config.feature_store = os.path.join(report_directory, os.path.basename(config.feature_store))
+    return site_config
+
+
+def _merge_counts(site_results: List[dict]) -> Dict[str, int]:
+    """The row count of every report name, summed over the sites"""
+    counts = {}
+    for result in site_results:
+        for name, report in result.get("reports", {}).items():
+            counts[name] = counts.get(name, 0) + report["rows"]
+    return counts
@@ -0,0 +1,79 @@
+"""
+Counts the GeoDataAccessor calls made by a full LogicChecker run for a growing number of rows.
+The counts must stay constant - GUIDs are resolved from one bulk index per layer, not per row.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_accessor_calls
+"""
+import time
+from collections import Counter
+from types import SimpleNamespace
+from logic_checker import LogicChecker
+from geo_access.geo_accessor import GeoDataAccessor
+
+
+class CountingAccessor(GeoDataAccessor):
+    """Fake accessor where every room is logically related to the wrong station"""
+
+    def __init__(self, row_count: int):
+        self.row_count = row_count
+        self.calls = Counter()
+
+    def set_workspace(self, workspace_path):
+        self.calls["set_workspace"] += 1
+
+    def get_count(self, layer):
+        self.calls["get_count"] += 1
+        return 1
+
+    def select_layer_by_attribute(self, layer, where_clause):
+        self.calls["select_layer_by_attribute"] += 1
+        return layer
+
+    def intersect(self, layers, out_fc):
+        self.calls["intersect"] += 1
+        return out_fc
+
+    def delete(self, fc):
+        self.calls["delete"] += 1
+
+    def search_cursor(self, layer, fields, where=None):
+        self.calls["search_cursor"] += 1
+        if fields == ["OBJECTID", "GLOBALID"]:
+            return ((i, f"{layer}-{i}") for i in range(self.row_count))
+        if fields == ["STATION_GUID", "STATION_GUID_1", "FID_Room", "FID_StationDetail"]:
+            return ((f"station-{i}", f"station-{i + 1}", i, i) for i in range(self.row_count))
+        return ((i, i, f"point-{i}") for i in range(self.row_count))
+
+
+def run(row_count: int):
+    config = SimpleNamespace(
+        database_path="benchmark.geodatabase",
+        room_layer_name="Room",
+        room_detail_layer_name="RoomDetail",
+        station_layer_name="Station",
+        station_detail_layer_name="StationDetail",
+    )
+    accessor = CountingAccessor(row_count)
+    checker = LogicChecker(config, accessor)
+
+    start = time.perf_counter()
+    invalid = 0
+    invalid += len(checker.check_room_to_roomdetail_relationships())
+    invalid += len(checker.check_station_to_stationdetail_relationships())
+    invalid += len(checker.check_room_to_station_relationships())
+    elapsed = time.perf_counter() - start
+
+    return accessor.calls, invalid, elapsed
+
+
+def main():
+    print(f"{'rows':>10} {'invalid':>10} {'calls':>6} {'seconds':>9}  breakdown")
+    for row_count in (100, 1_000, 10_000, 100_000):
+        calls, invalid, elapsed = run(row_count)
+        breakdown = ", ".join(f"{name}={count}" for name, count in sorted(calls.items()))
+        print(f"{row_count:>10} {invalid:>10} {sum(calls.values()):>6} {elapsed:>9.3f}  {breakdown}")
+
+
+if __name__ == "__main__":
+    main()
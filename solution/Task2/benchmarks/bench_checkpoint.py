@@ -0,0 +1,160 @@
+"""
+Overhead of the checkpoints on the serial checks: the three checks read without a checkpoint, with the default
+interval and with an interval of 0.1 s, on the in-memory accessor and on a mobile geodatabase. The checkpoints save
+the invalid rows, so the networks have 2 % and 20 % of errors. The modes run in turn, REPEATS times, and every time
+is the best of its runs.
+
+The differences between the modes are close to the run-to-run noise of a shared host, so the CPU time the checkpoints
+add is also timed piece by piece: the ordered read of the intersect in chunks (per intersect row), keeping and
+writing the OBJECTIDs of the invalid rows (per invalid row, as the saves of a long run do) and a save (fsync and
+state). Their sum is given as a share of the CPU time of the checks without a checkpoint, with a save every
+DEFAULT_INTERVAL_SECONDS.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_checkpoint [room_count ...]
+"""
+import gc
+import logging
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import List
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from checkpoint import DEFAULT_INTERVAL_SECONDS, CheckpointedChecker
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL, _chunks
+
+CHECKS = [ROOM_TO_ROOMDETAIL, STATION_TO_STATIONDETAIL, ROOM_TO_STATION]
+REPEATS = 5
+ERROR_RATES = [0.02, 0.2]
+MODES = [("none", None), ("default", DEFAULT_INTERVAL_SECONDS), ("every 0.1 s", 0.1)]
+
+
+def build_config(database_path: str):
+    return network_config(database_path)
+
+
+def run_checks(checker, directory: str, interval_seconds=None) -> int:
+    """The invalid rows of the three checks, without a checkpoint when interval_seconds is None"""
+    if interval_seconds is None:
+        return sum(1 for rows in (checker.iter_room_to_roomdetail_relationships(),
+                                  checker.iter_station_to_stationdetail_relationships(),
+                                  checker.iter_room_to_station_relationships()) for _ in rows)
+    checkpoint = CheckpointedChecker(checker, os.path.join(directory, "checkpoint.json"),
+                                     interval_seconds=interval_seconds)
+    invalid = sum(1 for key in CHECKS for _ in checkpoint.iter_check(key))
+    checkpoint.remove()
+    return invalid
+
+
+def run(config, accessor, interval_seconds=None):
+    """(seconds, invalid rows), without a checkpoint when interval_seconds is None"""
+    checker = LogicChecker(config, accessor)
+    gc.collect()
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        invalid = run_checks(checker, directory, interval_seconds)
+        return time.perf_counter() - start, invalid
+
+
+def best_cpu_seconds(*functions, repeats: int = REPEATS) -> List[float]:
+    """The least CPU time of every function, run in turn `repeats` times"""
+    times = [[] for _ in functions]
+    for _ in range(repeats):
+        for function, function_times in zip(functions, times):
+            gc.collect()
+            start = time.process_time()
+            function()
+            function_times.append(time.process_time() - start)
+    return [min(function_times) for function_times in times]
+
+
+def cpu_costs(config, accessor, directory: str):
+    """
+    The CPU time the checkpoints add, timed piece by piece (best of 10 * REPEATS):
+    (microseconds per intersect row of the ordered read in chunks, microseconds per invalid row to keep and write its
+    OBJECTIDs, milliseconds per save, percent the three add to the checks with the default interval)
+    """
+    checker = LogicChecker(config, accessor)
+    progress = SimpleNamespace(oids=[], finished=lambda oid: None)
+    invalid_rows = list(checker.iter_room_to_station_relationships(progress=progress))
+    invalid_oids = list(zip(progress.oids[::2], progress.oids[1::2]))
+    plain, = best_cpu_seconds(lambda: run_checks(checker, directory))
+
+    intersect_rows = 0
+    for points, polygons in ((config.room_layer_name, config.room_detail_layer_name),
+                             (config.station_layer_name, config.station_detail_layer_name),
+                             (config.room_layer_name, config.station_detail_layer_name)):
+        accessor.intersect([points, polygons], "in_memory\\intersected")
+        intersect_rows += accessor.get_count("in_memory\\intersected")
+    fields = ["STATION_GUID", "STATION_GUID_1", "FID_Room", "FID_StationDetail"]
+    unordered, chunked = best_cpu_seconds(
+        lambda: sum(1 for _ in accessor.search_cursor("in_memory\\intersected", fields)),
+        lambda: sum(1 for rows in _chunks(accessor.search_cursor("in_memory\\intersected", fields, order_by="FID_Room"))
+                    for _ in rows),
+        repeats=10 * REPEATS,
+    )
+    room_station_rows = accessor.get_count("in_memory\\intersected")
+    accessor.delete("in_memory\\intersected")
+
+    checkpoint = CheckpointedChecker(checker, os.path.join(directory, "checkpoint.json"))
+    state = checkpoint.state["checks"].setdefault(ROOM_TO_STATION, {"last_oid": None, "oids_offset": 0, "report": None})
+    with open(checkpoint.oids_path(ROOM_TO_STATION), "ab") as oids_file:
+        def unpack():
+            for room_oid, detail_oid in invalid_oids:
+                pass
+
+        def keep_and_write():
+            oids = []
+            keep = oids.append
+            for room_oid, detail_oid in invalid_oids:
+                keep(room_oid)
+                keep(detail_oid)
+            checkpoint._write_oids(oids_file, oids, room_oid)
+
+        plain_rows, kept_rows = best_cpu_seconds(unpack, keep_and_write, repeats=10 * REPEATS)
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            checkpoint._save_oids(oids_file, [], state, 0)
+        save_seconds = (time.perf_counter() - start) / REPEATS
+    checkpoint.remove()
+
+    read_us = (chunked - unordered) / room_station_rows * 1e6
+    row_us = (kept_rows - plain_rows) / max(len(invalid_rows), 1) * 1e6
+    invalid = run_checks(checker, directory)
+    added = read_us * intersect_rows / 1e6 + row_us * invalid / 1e6
+    return read_us, row_us, save_seconds * 1e3, (added / plain + save_seconds / DEFAULT_INTERVAL_SECONDS) * 100
+
+
+def main():
+    room_counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 400_000]
+    logging.getLogger().addHandler(logging.NullHandler())
+    print(f"{'rooms':>8} {'accessor':>10} {'invalid':>8} {'checkpoint':>12} {'seconds':>8} {'overhead':>9}")
+    for room_count, error_rate in ((room_count, error_rate) for room_count in room_counts for error_rate in ERROR_RATES):
+        network = generate_network(NetworkSpec(stations=room_count // 100, rooms_per_station=100, error_rate=error_rate))
+        with tempfile.TemporaryDirectory() as directory:
+            database_path = os.path.join(directory, "network.geodatabase")
+            network.save_mobile_geodatabase(database_path)
+            backends = [("memory", build_config(":memory:"), network.to_memory_accessor),
+                        ("mobile_gdb", build_config(database_path), MobileGeodatabaseAccessor)]
+            for backend, config, create_accessor in backends:
+                times = {}
+                for _ in range(REPEATS):
+                    for name, interval_seconds in MODES:
+                        seconds, invalid = run(config, create_accessor(), interval_seconds)
+                        times[name] = min(seconds, times.get(name, seconds))
+                baseline = times["none"]
+                for name, _ in MODES:
+                    seconds = times[name]
+                    print(f"{room_count:>8} {backend:>10} {invalid:>8} {name:>12} {seconds:>8.2f} "
+                          f"{(seconds / baseline - 1) * 100:>8.1f}%")
+                read_us, row_us, save_ms, overhead = cpu_costs(config, create_accessor(), directory)
+                print(f"{'':>8} {backend:>10} CPU time: ordered read {read_us:.3f} us/intersect row, "
+                      f"rows {row_us:.3f} us/invalid row, save {save_ms:.1f} ms: {overhead:.2f}% with the default "
+                      f"interval")
+
+
+if __name__ == "__main__":
+    main()
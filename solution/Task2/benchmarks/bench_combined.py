@@ -0,0 +1,79 @@
+"""
+Compares the three separate intersect-based checks with the single-pass check_all_relationships
+on the in-memory accessor. The single pass should cost about as much as one check.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_combined [room_count ...]
+"""
+import random
+import sys
+import time
+from benchmarks.synthetic_network import network_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from logic_checker import LogicChecker
+
+GRID = 40
+CELL = 100.0
+
+
+def build_accessor(room_count: int, seed: int = 1) -> InMemoryAccessor:
+    """A grid of stations with rooms (and 1x1 room details) inside, 1% of the rooms related to the wrong station"""
+    rng = random.Random(seed)
+    accessor = InMemoryAccessor()
+    fields = ["OBJECTID", "GLOBALID", "SHAPE"]
+
+    stations, details = [], []
+    for i in range(GRID * GRID):
+        x, y = (i % GRID) * CELL, (i // GRID) * CELL
+        stations.append((i + 1, f"{{S-{i}}}", (x + 1, y + 1)))
+        details.append((i + 1, f"{{SD-{i}}}", f"{{S-{i}}}", _square(x, y, CELL)))
+    accessor.add_layer("main.Station", fields, stations, POINT)
+    accessor.add_layer("main.StationDetail", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], details, POLYGON)
+
+    rooms, room_details = [], []
+    for i in range(room_count):
+        column, row = rng.randrange(GRID), rng.randrange(GRID)
+        station = row * GRID + column
+        if rng.random() < 0.01:
+            station = (station + 1) % (GRID * GRID)
+        x, y = column * CELL + rng.uniform(2, CELL - 2), row * CELL + rng.uniform(2, CELL - 2)
+        rooms.append((i + 1, f"{{R-{i}}}", f"{{S-{station}}}", (x, y)))
+        room_details.append((i + 1, f"{{RD-{i}}}", f"{{R-{i}}}", _square(x - 0.5, y - 0.5, 1)))
+    accessor.add_layer("main.Room", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], rooms, POINT)
+    accessor.add_layer("main.RoomDetail", ["OBJECTID", "GLOBALID", "ROOM_GUID", "SHAPE"], room_details, POLYGON)
+    return accessor
+
+
+def _square(x, y, size):
+    return [[(x, y), (x, y + size), (x + size, y + size), (x + size, y), (x, y)]]
+
+
+def run(room_count: int):
+    config = network_config()
+
+    checker = LogicChecker(config, build_accessor(room_count))
+    start = time.perf_counter()
+    checker.check_room_to_station_relationships()
+    single = time.perf_counter() - start
+    checker.check_room_to_roomdetail_relationships()
+    checker.check_station_to_stationdetail_relationships()
+    separate = time.perf_counter() - start
+
+    checker = LogicChecker(config, build_accessor(room_count))
+    start = time.perf_counter()
+    checker.check_all_relationships(check_rooms=True, check_stations=True)
+    combined = time.perf_counter() - start
+
+    return single, separate, combined
+
+
+def main():
+    room_counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'rooms':>10} {'one check s':>12} {'three checks s':>15} {'combined s':>11}")
+    for room_count in room_counts:
+        single, separate, combined = run(room_count)
+        print(f"{room_count:>10} {single:>12.2f} {separate:>15.2f} {combined:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Transforms the room points and room detail polygons of a synthetic network from EPSG:4326 to EPSG:3857 once per
+point (transform_point without numpy, as a reprojection inside a per-feature loop) and once per coordinate column
+(transform_geometries, as the ReprojectingAccessor does per cursor batch), with and without numpy.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_crs [room_count ...]
+"""
+import gc
+import sys
+import time
+from unittest.mock import patch
+from benchmarks.synthetic_network import NetworkSpec, generate_network
+from spatial import crs
+from spatial.crs import CrsTransformer, get_transformer
+
+
+def per_point(transformer: CrsTransformer, geometries) -> list:
+    transformed = []
+    for geometry in geometries:
+        if isinstance(geometry[0], (int, float)):
+            transformed.append(transformer.transform_point(*geometry))
+        else:
+            transformed.append([[transformer.transform_point(x, y) for x, y in ring] for ring in geometry])
+    return transformed
+
+
+def run(geometries, mode: str) -> float:
+    numpy = crs.np if mode == "columns" else None  # one point at a time is faster without numpy
+    with patch.object(crs, "np", numpy):
+        transformer = CrsTransformer(crs.WGS84, crs.WEB_MERCATOR)
+        start = time.perf_counter()
+        if mode == "per point":
+            per_point(transformer, geometries)
+        else:
+            transformer.transform_geometries(geometries)
+        return time.perf_counter() - start
+
+
+def main():
+    room_counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    to_wgs84 = get_transformer(crs.WEB_MERCATOR, crs.WGS84)
+    print(f"{'rooms':>9} {'points':>9} {'mode':>18} {'seconds':>8} {'ns/point':>9}")
+    for room_count in room_counts:
+        network = generate_network(NetworkSpec(stations=room_count // 100, rooms_per_station=100))
+        geometries = to_wgs84.transform_geometries([row[-1] for layer in ("main.Room", "main.RoomDetail")
+                                                    for row in network.layers[layer]])
+        # The collector would otherwise traverse the whole network on every pass, whatever the mode
+        gc.freeze()
+        points = sum(1 if isinstance(geometry[0], float) else sum(len(ring) for ring in geometry)
+                     for geometry in geometries)
+        for mode in ("per point", "columns, no numpy", "columns"):
+            elapsed = run(geometries, mode)
+            print(f"{room_count:>9} {points:>9} {mode:>18} {elapsed:>8.2f} {elapsed / points * 1e9:>9.0f}")
+        del network, geometries
+        gc.unfreeze()
+
+
+if __name__ == "__main__":
+    main()
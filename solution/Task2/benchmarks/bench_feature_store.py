@@ -0,0 +1,73 @@
+"""
+Memory per million rooms and check time of the combined checks on Python tuples (LogicChecker.check_all_relationships)
+against the memory-mapped feature store (store_checker.StoreChecker).
+The features are read from a mobile geodatabase, so every row and geometry is a new Python object as with arcpy.
+The tuple memory is what tracemalloc sees while the features are held, the store memory is the size of its file
+(its pages are shared with every process that maps it).
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_feature_store [room_count ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.run_suite import network_spec
+from benchmarks.synthetic_network import generate_network, network_config
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+from store_checker import StoreChecker, store_layers, write_feature_store
+
+
+def run(room_count: int) -> dict:
+    network = generate_network(network_spec(room_count))
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "network.geodatabase")
+        network.save_mobile_geodatabase(database_path)
+        accessor = MobileGeodatabaseAccessor()
+        config = network_config(database_path, feature_store=os.path.join(directory, "features.gfst"))
+        checker = LogicChecker(config, accessor)
+
+        tracemalloc.start()
+        features = [checker._read_features(layer, fields) for layer, fields in store_layers(config, True, True).items()]
+        tuple_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del features
+
+        start = time.perf_counter()
+        expected = checker.check_all_relationships(True, True)
+        tuple_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store = write_feature_store(config, accessor, True, True)
+        write_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        results = StoreChecker(config, store).check_all_relationships(True, True)
+        store_seconds = time.perf_counter() - start
+        store_bytes = store.size
+        accessor.connection.close()
+        del store  # unmaps the file before the directory is removed
+
+    assert all(results[key] == expected[key] for key in (ROOM_TO_STATION, ROOM_TO_ROOMDETAIL, STATION_TO_STATIONDETAIL))
+    per_million = 1_000_000 / network.spec.room_count / 2 ** 20
+    return {
+        "tuple_mb_per_million": tuple_bytes * per_million,
+        "store_mb_per_million": store_bytes * per_million,
+        "tuple_seconds": tuple_seconds,
+        "write_seconds": write_seconds,
+        "store_seconds": store_seconds,
+    }
+
+
+def main():
+    room_counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print(f"{'rooms':>10} {'tuples MB/1M':>13} {'store MB/1M':>12} {'tuples s':>9} {'write s':>8} {'store s':>8}")
+    for room_count in room_counts:
+        result = run(room_count)
+        print(f"{room_count:>10} {result['tuple_mb_per_million']:>13.1f} {result['store_mb_per_million']:>12.1f} "
+              f"{result['tuple_seconds']:>9.2f} {result['write_seconds']:>8.2f} {result['store_seconds']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
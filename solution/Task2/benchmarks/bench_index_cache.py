@@ -0,0 +1,79 @@
+"""
+Cost of a polygon index with the index cache against a plain rebuild, end to end: the layer version, then the load of
+a cached entry (hit) or the build and store of a new one (miss). The polygon layers are read from a JSON workspace and
+a mobile geodatabase, so their versions are file versions, and from layers added in memory, which need the content
+hash. The network has 10k StationDetails and 100k RoomDetails of 33 vertices. Every time is the best of REPEATS runs.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_index_cache [stations]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+from benchmarks.synthetic_network import NetworkSpec, generate_network
+from geo_access.memory_accessor import InMemoryAccessor
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from spatial.index_cache import IndexCache
+from spatial.join import PolygonIndex, PolygonSet
+
+REPEATS = 3
+LAYERS = ["main.StationDetail", "main.RoomDetail"]
+
+
+def best(function) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    stations = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    logging.getLogger().addHandler(logging.NullHandler())
+    network = generate_network(NetworkSpec(stations=stations, rooms_per_station=10, vertices_per_side=8))
+    print(f"{'workspace':>10} {'layer':>18} {'index':>8} {'rebuild s':>10} {'miss s':>8} {'hit s':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "network.json")
+        network.save_json(json_path)
+        gdb_path = os.path.join(directory, "network.geodatabase")
+        network.save_mobile_geodatabase(gdb_path)
+
+        def json_accessor(cache):
+            accessor = InMemoryAccessor(index_cache=cache)
+            accessor.set_workspace(json_path)
+            return accessor
+
+        def gdb_accessor(cache):
+            accessor = MobileGeodatabaseAccessor(index_cache=cache)
+            accessor.set_workspace(gdb_path)
+            return accessor
+
+        def memory_accessor(cache):
+            accessor = network.to_memory_accessor()
+            accessor.index_cache = cache
+            return accessor
+
+        workspaces = [("json", json_accessor, False), ("mobile_gdb", gdb_accessor, False),
+                      ("in memory", memory_accessor, True)]
+        for use_numpy in [False, True] if PolygonSet is not None else [False]:
+            for name, create_accessor, content_hash in workspaces:
+                cache_directory = os.path.join(directory, "cache")
+                accessor = create_accessor(IndexCache(cache_directory, content_hash=content_hash))
+                for layer in LAYERS:
+                    polygons = [row[0] for row in accessor.geometry_cursor(layer, []) if row[0] is not None]
+                    rebuild = best(lambda: PolygonIndex(polygons, use_numpy))
+                    miss = best(lambda: (accessor.index_cache.clear(), accessor.polygon_index(layer, polygons, use_numpy)))
+                    hit = best(lambda: accessor.polygon_index(layer, polygons, use_numpy))
+                    print(f"{name:>10} {layer:>18} {'numpy' if use_numpy else 'strtree':>8} {rebuild:>10.3f} "
+                          f"{miss:>8.3f} {hit:>8.4f}")
+                if isinstance(accessor, MobileGeodatabaseAccessor):
+                    accessor.connection.close()
+                accessor.index_cache.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Overhead per logged row of the DEBUG "Invalid ..." messages: the combined checks run with logging off (INFO),
+with the previous synchronous handlers and a Formatter created per record, with the queue pipeline, and with the
+queue pipeline sampling one in 100 per-row messages. The console output goes to os.devnull.
+"checks" is the time until the checks return, "total" also waits for the queued records to be written.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_logging [room_count ...]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from logic_checker import LogicChecker
+from utils.log_format import CustomFormatter, configure_logging, stop_logging
+
+CONFIG = network_config()
+MODES = ["off", "synchronous", "queue", "queue 1/100"]
+
+
+class PerRecordFormatter(CustomFormatter):
+    """The formatter before the queue pipeline: a new Formatter for every record"""
+
+    def format(self, record):
+        return logging.Formatter(self.FORMATS.get(record.levelno, self.format_str)).format(record)
+
+
+def configure(mode: str, log_file: str, console):
+    root = logging.getLogger()
+    if mode == "off":
+        root.setLevel(logging.INFO)
+    elif mode == "synchronous":
+        root.setLevel(logging.DEBUG)
+        console_handler = logging.StreamHandler(console)
+        console_handler.setFormatter(PerRecordFormatter())
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter(CustomFormatter.format_str))
+        root.addHandler(console_handler)
+        root.addHandler(file_handler)
+    else:
+        with patch("sys.stdout", console):
+            configure_logging(log_file, "DEBUG", sample_rate=100 if mode == "queue 1/100" else 1)
+
+
+def reset():
+    stop_logging()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(logging.NullHandler())  # without handlers, logging.debug adds a stderr handler
+
+
+def run(network, mode: str):
+    """(checks seconds, total seconds, invalid rows)"""
+    checker = LogicChecker(CONFIG, network.to_memory_accessor())
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as console:
+        configure(mode, os.path.join(directory, "log.txt"), console)
+        start = time.perf_counter()
+        results = checker.check_all_relationships(True, True)
+        checks = time.perf_counter() - start
+        reset()
+        total = time.perf_counter() - start
+    return checks, total, sum(len(entries) for entries in results.values())
+
+
+def main():
+    room_counts = [int(arg) for arg in sys.argv[1:]] or [20_000, 100_000]
+    reset()
+    print(f"{'rooms':>8} {'invalid':>8} {'mode':>12} {'checks s':>9} {'total s':>8} {'us/row':>7}")
+    for room_count in room_counts:
+        network = generate_network(NetworkSpec(stations=room_count // 100, rooms_per_station=100, error_rate=0.2))
+        baseline = None
+        for mode in MODES:
+            checks, total, invalid = run(network, mode)
+            baseline = total if baseline is None else baseline
+            overhead = (total - baseline) / invalid * 1e6
+            print(f"{room_count:>8} {invalid:>8} {mode:>12} {checks:>9.2f} {total:>8.2f} {overhead:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
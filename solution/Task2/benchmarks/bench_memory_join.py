@@ -0,0 +1,61 @@
+"""
+Times the room-to-station check on the in-memory accessor (STR tree join, no arcpy).
+Stations are a grid of square StationDetails, rooms are random points, 1% of them related to the wrong station.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_memory_join [room_count ...]
+"""
+import random
+import sys
+import time
+from benchmarks.synthetic_network import network_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from logic_checker import LogicChecker
+
+GRID = 40
+CELL = 100.0
+
+
+def build_accessor(room_count: int, seed: int = 1) -> InMemoryAccessor:
+    rng = random.Random(seed)
+    accessor = InMemoryAccessor()
+
+    details = []
+    for i in range(GRID * GRID):
+        x, y = (i % GRID) * CELL, (i // GRID) * CELL
+        ring = [(x, y), (x, y + CELL), (x + CELL, y + CELL), (x + CELL, y), (x, y)]
+        details.append((i + 1, f"{{SD-{i}}}", f"{{S-{i}}}", [ring]))
+    accessor.add_layer("main.StationDetail", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], details, POLYGON)
+
+    rooms = []
+    for i in range(room_count):
+        column, row = rng.randrange(GRID), rng.randrange(GRID)
+        station = row * GRID + column
+        if rng.random() < 0.01:
+            station = (station + 1) % (GRID * GRID)
+        point = (column * CELL + rng.uniform(1, CELL - 1), row * CELL + rng.uniform(1, CELL - 1))
+        rooms.append((i + 1, f"{{R-{i}}}", f"{{S-{station}}}", point))
+    accessor.add_layer("main.Room", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], rooms, POINT)
+    return accessor
+
+
+def run(room_count: int):
+    config = network_config()
+    accessor = build_accessor(room_count)
+    checker = LogicChecker(config, accessor)
+
+    start = time.perf_counter()
+    invalid = checker.check_room_to_station_relationships()
+    return len(invalid), time.perf_counter() - start
+
+
+def main():
+    room_counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'rooms':>10} {'invalid':>8} {'seconds':>8}")
+    for room_count in room_counts:
+        invalid, elapsed = run(room_count)
+        print(f"{room_count:>10} {invalid:>8} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Scaling benchmark of the parallel room-to-station check for 1, 2, 4 and 8 workers on an in-memory workspace.
+Every worker loads the workspace itself, the same way it would open its own geodatabase connection.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_parallel [room_count]
+"""
+import os
+import sys
+import tempfile
+import time
+from benchmarks.bench_combined import build_accessor
+from benchmarks.synthetic_network import network_config
+from geo_access.memory_accessor import InMemoryAccessor
+from logic_checker import LogicChecker
+from parallel_checker import check_room_to_station_relationships_parallel
+
+
+def main():
+    room_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "workspace.json")
+        build_accessor(room_count).save(path)
+        config = network_config(path, accessor="memory", index_cache=False, edit_date_field=None)
+
+        start = time.perf_counter()
+        expected = LogicChecker(config, InMemoryAccessor()).check_room_to_station_relationships()
+        serial = time.perf_counter() - start
+        print(f"{room_count} rooms, {os.cpu_count()} CPUs, serial check {serial:.2f} s")
+
+        print(f"{'workers':>8} {'seconds':>8} {'speedup':>8}")
+        for workers in (1, 2, 4, 8):
+            start = time.perf_counter()
+            result = check_room_to_station_relationships_parallel(config, workers)
+            elapsed = time.perf_counter() - start
+            assert result == expected
+            print(f"{workers:>8} {elapsed:>8.2f} {serial / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Microbenchmark of the vectorized NumPy point in polygon kernel against the per-feature path
+(STR tree candidates + one point_in_polygon call per candidate).
+Polygons are a 40x40 grid of StationDetail-like squares, every 10th replaced by a general (rotated) polygon.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_pip_kernel [point_count ...]
+"""
+import random
+import sys
+import time
+import numpy as np
+from spatial.join import build_polygon_index, point_in_polygon_join
+from spatial.pip_kernel import PolygonSet
+
+GRID = 40
+CELL = 100.0
+
+
+def build_polygons():
+    polygons = []
+    for i in range(GRID * GRID):
+        x, y = (i % GRID) * CELL, (i // GRID) * CELL
+        if i % 10:
+            polygons.append([[(x, y), (x, y + CELL), (x + CELL, y + CELL), (x + CELL, y), (x, y)]])
+        else:
+            half = CELL / 2
+            polygons.append([[(x + half, y), (x + CELL, y + half), (x + half, y + CELL), (x, y + half), (x + half, y)]])
+    return polygons
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    point_counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    polygons = build_polygons()
+    rng = random.Random(3)
+
+    print(f"{'points':>10} {'per-feature s':>14} {'kernel s':>9} {'speedup':>8}  pairs")
+    for point_count in point_counts:
+        points = [(rng.uniform(0, GRID * CELL), rng.uniform(0, GRID * CELL)) for _ in range(point_count)]
+        array = np.array(points)
+
+        index = build_polygon_index(polygons)
+        slow_pairs, slow = timed(lambda: list(point_in_polygon_join(points, polygons, index)))
+        polygon_set = PolygonSet(polygons)
+        (point_positions, _), fast = timed(lambda: polygon_set.pairs(array))
+
+        assert len(slow_pairs) == len(point_positions)
+        print(f"{point_count:>10} {slow:>14.3f} {fast:>9.3f} {slow / fast:>7.1f}x  {len(point_positions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Output size and write/read time of the report formats.
+The report rows are random room GUIDs with the current and correct station GUIDs drawn from 1600 stations.
+Formats with a missing optional package (zstandard, pyarrow) are skipped.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_report_formats [row_count ...]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from utils.columnar_writer import read_columnar
+from utils.ndjson_writer import read_ndjson
+from utils.report_factory import REPORT_FORMATS, create_report_writer
+
+HEADER = ["RoomId", "CurrentStationId", "CorrectStationId"]
+STATIONS = 1600
+
+
+def guid(rng: random.Random) -> str:
+    return f"{{{str(uuid.UUID(int=rng.getrandbits(128), version=4)).upper()}}}"
+
+
+def build_rows(row_count: int, seed: int = 1):
+    rng = random.Random(seed)
+    stations = [guid(rng) for _ in range(STATIONS)]
+    return [(guid(rng), rng.choice(stations), rng.choice(stations)) for _ in range(row_count)]
+
+
+def read_report(report_format: str, path: str) -> int:
+    if report_format == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return sum(1 for _ in csv.reader(f)) - 1
+    if report_format.startswith("ndjson"):
+        return sum(1 for _ in read_ndjson(path))
+    if report_format == "columnar":
+        _, columns = read_columnar(path)
+        return len(columns[HEADER[0]])
+    import pyarrow.parquet as pq
+    return pq.read_table(path).num_rows
+
+
+def main():
+    row_counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print(f"{'rows':>10} {'format':>11} {'MB':>8} {'write s':>8} {'read s':>8}")
+    for row_count in row_counts:
+        rows = build_rows(row_count)
+        with tempfile.TemporaryDirectory() as directory:
+            for report_format in REPORT_FORMATS:
+                try:
+                    writer = create_report_writer(report_format, directory)
+                    start = time.perf_counter()
+                    path = writer.generate_report("invalid_relations", HEADER, iter(rows))
+                except ImportError:
+                    print(f"{row_count:>10} {report_format:>11} {'skipped, optional package missing':>26}")
+                    continue
+                written = time.perf_counter() - start
+                start = time.perf_counter()
+                assert read_report(report_format, path) == row_count
+                read = time.perf_counter() - start
+                size = os.path.getsize(path) / 2 ** 20
+                print(f"{row_count:>10} {report_format:>11} {size:>8.1f} {written:>8.2f} {read:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Cost of adding relationship rules: the three relationship checks of the network declared as rules, repeated with
+other names up to 12 rules, run by one planned RuleEngine and by one RuleEngine per rule (a layer read, a polygon
+index and a join per rule). Every time is the best of REPEATS runs.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_rules [room_count ...]
+"""
+import gc
+import logging
+import sys
+import time
+from types import SimpleNamespace
+from benchmarks.synthetic_network import NetworkSpec, generate_network
+from rule_engine import Rule, RuleEngine
+
+REPEATS = 3
+RULE_COUNTS = [1, 3, 6, 12]
+BASE_RULES = [
+    ("room_station", "main.Room", "main.StationDetail", "main.Station__Room", "main.Station__StationDetail"),
+    ("room_detail", "main.Room", "main.RoomDetail", "main.Room__RoomDetail", None),
+    ("station_detail", "main.Station", "main.StationDetail", "main.Station__StationDetail", None),
+]
+CONFIG = SimpleNamespace(database_path=":memory:")
+
+
+def build_rules(count: int):
+    rules = []
+    for position in range(count):
+        name, point_layer, polygon_layer, relationship, via = BASE_RULES[position % len(BASE_RULES)]
+        rules.append(Rule(f"{name}_{position // len(BASE_RULES)}", point_layer, polygon_layer, relationship, via=via))
+    return rules
+
+
+def run(network, rules, planned: bool) -> float:
+    """The seconds of the checks, without building the accessors"""
+    if planned:
+        runs = [(RuleEngine(CONFIG, network.to_memory_accessor()), rules)]
+    else:
+        runs = [(RuleEngine(CONFIG, network.to_memory_accessor()), [rule]) for rule in rules]
+    gc.collect()
+    start = time.perf_counter()
+    for engine, engine_rules in runs:
+        engine.check(engine_rules)
+    return time.perf_counter() - start
+
+
+def main():
+    room_counts = [int(arg) for arg in sys.argv[1:]] or [100_000]
+    logging.getLogger().addHandler(logging.NullHandler())
+    print(f"{'rooms':>8} {'rules':>6} {'planned s':>10} {'per rule s':>11} {'separate s':>11}")
+    for room_count in room_counts:
+        network = generate_network(NetworkSpec(stations=room_count // 100, rooms_per_station=100, error_rate=0.02))
+        for rule_count in RULE_COUNTS:
+            rules = build_rules(rule_count)
+            planned = min(run(network, rules, True) for _ in range(REPEATS))
+            separate = min(run(network, rules, False) for _ in range(REPEATS))
+            print(f"{room_count:>8} {rule_count:>6} {planned:>10.2f} {planned / rule_count:>11.3f} {separate:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Peak Python memory of writing the room-to-station report from the list check against the generator check.
+Every room is related to the wrong station, so the report has as many rows as there are rooms.
+
+Run from the Task2 directory:
+    python -m benchmarks.bench_streaming_csv [room_count ...]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.synthetic_network import network_config
+from logic_checker import LogicChecker
+from utils.csv_generator import CsvGenerator
+from benchmarks.bench_memory_join import build_accessor
+
+
+def run(room_count: int, streaming: bool):
+    config = network_config()
+    accessor = build_accessor(room_count)
+    for i, room in enumerate(accessor.layers["main.Room"].rows):
+        accessor.layers["main.Room"].rows[i] = (room[0], room[1], "{S-wrong}", room[3])
+    checker = LogicChecker(config, accessor)
+    checker.get_guid_index(config.room_layer_name)
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = checker.iter_room_to_station_relationships() if streaming else checker.check_room_to_station_relationships()
+        CsvGenerator(directory).generate_csv("invalid_relations", ["RoomId", "CurrentStationId", "CorrectStationId"], rows)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    room_counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 200_000]
+    print(f"{'rooms':>10} {'mode':>10} {'seconds':>8} {'peak MB':>8}")
+    for room_count in room_counts:
+        for streaming in (False, True):
+            elapsed, peak = run(room_count, streaming)
+            mode = "generator" if streaming else "list"
+            print(f"{room_count:>10} {mode:>10} {elapsed:>8.2f} {peak / 2 ** 20:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+End-to-end benchmark suite: runs every LogicChecker check on synthetic networks (benchmarks.synthetic_network)
+and writes wall time, peak RSS and accessor call counts as JSON, so that runs can be diffed across commits.
+Every case runs in a fresh process, so the peak RSS of one case does not leak into the next.
+The feature_store case runs the combined checks on a memory-mapped feature store (store_checker) and also
+reports the time to write the store and its size per million rooms.
+
+Run from the Task2 directory:
+    python -m benchmarks.run_suite --rooms 1000 100000 1000000 --output results.json
+    python -m benchmarks.run_suite --rooms 100000 --compare results.json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from geo_access.instrumented_accessor import InstrumentedAccessor
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+from store_checker import StoreChecker, write_feature_store
+
+CHECKS = [ROOM_TO_STATION, ROOM_TO_ROOMDETAIL, STATION_TO_STATIONDETAIL, "combined", "feature_store"]
+ACCESSORS = ["memory", "mobile_gdb"]
+ROOMS_PER_STATION = 100
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, None where the resource module is missing (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def network_spec(room_count: int, seed: int = 1) -> NetworkSpec:
+    stations = max(1, math.ceil(room_count / ROOMS_PER_STATION))
+    return NetworkSpec(stations=stations, rooms_per_station=room_count // stations, error_rate=0.01,
+                       overlap_rate=0.1, nested_rate=0.05, seed=seed)
+
+
+def run_case(room_count: int, check: str, accessor_name: str = "memory", seed: int = 1) -> dict:
+    """Builds the network and runs one check on it. Meant to run in its own process"""
+    network = generate_network(network_spec(room_count, seed))
+    with tempfile.TemporaryDirectory() as directory:
+        if accessor_name == "memory":
+            accessor, database_path = network.to_memory_accessor(), ":memory:"
+        else:
+            from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+            database_path = os.path.join(directory, "network.geodatabase")
+            network.save_mobile_geodatabase(database_path)
+            accessor = MobileGeodatabaseAccessor()
+        dataset_rss = peak_rss_mb()
+
+        config = network_config(database_path, feature_store=os.path.join(directory, "features.gfst"))
+        instrumented = InstrumentedAccessor(accessor)
+        checker = LogicChecker(config, instrumented)
+        store_stats = {}
+        start = time.perf_counter()
+        if check == "combined":
+            invalid = {name: len(rows) for name, rows in checker.check_all_relationships(True, True).items()}
+        elif check == "feature_store":
+            store = write_feature_store(config, instrumented, True, True)
+            store_stats = {"store_write_seconds": time.perf_counter() - start,
+                           "store_mb_per_million_rooms": store.size / 2 ** 20 * 1_000_000 / network.spec.room_count}
+            start = time.perf_counter()
+            results = StoreChecker(config, store).check_all_relationships(True, True)
+            invalid = {name: len(rows) for name, rows in results.items()}
+            del store
+        else:
+            invalid = {check: len(getattr(checker, f"check_{check}_relationships")())}
+        wall_seconds = time.perf_counter() - start
+        if accessor_name != "memory":
+            accessor.connection.close()
+
+    expected = {name: network.expected_invalid[name] for name in invalid}
+    return {
+        "rooms": network.spec.room_count,
+        "check": check,
+        "accessor": accessor_name,
+        "wall_seconds": wall_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "dataset_rss_mb": dataset_rss,
+        "invalid": invalid,
+        "correct": invalid == expected,
+        **store_stats,
+        "accessor_calls": {
+            name: {"calls": stats["calls"], "rows": stats["rows"], "total_seconds": stats["total_seconds"]}
+            for name, stats in instrumented.summary()["methods"].items()
+        },
+    }
+
+
+def run_suite(room_counts: List[int], checks: List[str], accessor_name: str, seed: int = 1) -> dict:
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for room_count in room_counts:
+        for check in checks:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_case, room_count, check, accessor_name, seed).result()
+            results.append(result)
+            print(f"{result['rooms']:>10} {check:>25} {result['wall_seconds']:>9.2f} s "
+                  f"{result['peak_rss_mb'] or 0:>9.1f} MB {'ok' if result['correct'] else 'WRONG RESULT'}")
+    return {"environment": environment(), "results": results}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy_version,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(previous: dict, current: dict) -> List[str]:
+    """One line per case present in both runs, with the wall time and peak RSS ratios (current / previous)"""
+    def key(result):
+        return result["rooms"], result["check"], result["accessor"]
+
+    before: Dict[tuple, dict] = {key(result): result for result in previous["results"]}
+    lines = []
+    for result in current["results"]:
+        old = before.get(key(result))
+        if old is None:
+            continue
+        time_ratio = result["wall_seconds"] / old["wall_seconds"] if old["wall_seconds"] else float("inf")
+        rss_ratio = (result["peak_rss_mb"] / old["peak_rss_mb"]
+                     if result["peak_rss_mb"] and old["peak_rss_mb"] else float("nan"))
+        lines.append(f"{result['rooms']:>10} {result['check']:>25} time x{time_ratio:.2f} rss x{rss_ratio:.2f}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Runs the LogicChecker benchmark suite")
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--checks", nargs="+", choices=CHECKS, default=CHECKS)
+    parser.add_argument("--accessor", choices=ACCESSORS, default="memory")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="a previous output file to compare with")
+    args = parser.parse_args(argv)
+
+    print(f"{'rooms':>10} {'check':>25} {'wall':>11} {'peak RSS':>12}")
+    report = run_suite(args.rooms, args.checks, args.accessor, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results were saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"Compared with {args.compare} ({previous['environment'].get('commit')}):")
+        print("\n".join(compare(previous, report)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Synthetic station/room networks at configurable scale, for benchmarks and regression tests.
+
+Stations are laid out on a grid of CELL x CELL cells. Every station has a StationDetail covering its cell
+(with extra collinear vertices on the sides, as digitized borders have), a station point and
+`rooms_per_station` rooms with a 1x1 RoomDetail around each. Optionally:
+    - overlap_rate: the share of StationDetails whose border grows OVERLAP units into the neighbouring cells
+    - nested_rate: the share of stations with a nested station (own point and StationDetail) in the middle of the cell
+    - error_rate: the share of rooms, room details and station details related to the wrong feature
+
+Rooms are never placed in an overlap or near a border and the RoomDetails never overlap, so the number of
+invalid rows every check must report is known in advance (Network.expected_invalid).
+The GUID fields are the foreign keys of the Station__Room, Room__RoomDetail and Station__StationDetail
+relationship classes, which are written with the layers.
+
+Write a network for the mobile geodatabase or the in-memory accessor from the Task2 directory:
+    python -m benchmarks.synthetic_network out.geodatabase --stations 1000 --rooms-per-station 100
+    python -m benchmarks.synthetic_network out.json --stations 100 --error-rate 0.05 --nested-rate 0.1
+"""
+import argparse
+import math
+import random
+import sqlite3
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+from geo_access.gdb_geometry import encode_shape_buffer
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from geo_access.relationship_class import RelationshipClass
+from logic_checker import ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+
+CELL = 100.0
+OVERLAP = 10.0
+NESTED_MIN, NESTED_SIZE = 35.0, 30.0
+ROOM_SLOT, ROOM_JITTER = 2.0, 0.4
+
+LAYER_FIELDS = {
+    "main.Station": ["OBJECTID", "GLOBALID", "SHAPE"],
+    "main.StationDetail": ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"],
+    "main.Room": ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"],
+    "main.RoomDetail": ["OBJECTID", "GLOBALID", "ROOM_GUID", "SHAPE"],
+}
+GEOMETRY_TYPES = {"main.Station": POINT, "main.StationDetail": POLYGON, "main.Room": POINT, "main.RoomDetail": POLYGON}
+RELATIONSHIP_CLASSES = [
+    RelationshipClass(f"main.{origin}__{destination}", f"main.{origin}", f"main.{destination}",
+                      "esriRelCardinalityOneToMany", "GLOBALID", foreign_key)
+    for origin, destination, foreign_key in [("Station", "Room", "STATION_GUID"), ("Room", "RoomDetail", "ROOM_GUID"),
+                                             ("Station", "StationDetail", "STATION_GUID")]
+]
+
+
+def network_config(database_path: str = InMemoryAccessor.MEMORY_WORKSPACE, relationships: bool = False,
+                   **values) -> SimpleNamespace:
+    """
+    The configuration the checkers read for the layers of a network in `database_path`: the layer names, with
+    `relationships` the relationship class names, and any other `values`
+    """
+    config = SimpleNamespace(
+        database_path=database_path,
+        room_layer_name="main.Room",
+        room_detail_layer_name="main.RoomDetail",
+        station_layer_name="main.Station",
+        station_detail_layer_name="main.StationDetail",
+    )
+    if relationships:
+        config.station_room_relationship = "main.Station__Room"
+        config.room_roomdetail_relationship = "main.Room__RoomDetail"
+        config.station_stationdetail_relationship = "main.Station__StationDetail"
+    vars(config).update(values)
+    return config
+
+
+@dataclass
+class NetworkSpec:
+    stations: int = 100
+    rooms_per_station: int = 10
+    error_rate: float = 0.01
+    overlap_rate: float = 0.0
+    nested_rate: float = 0.0
+    vertices_per_side: int = 4
+    seed: int = 1
+
+    @property
+    def room_count(self) -> int:
+        return self.stations * self.rooms_per_station
+
+
+@dataclass
+class Network:
+    spec: NetworkSpec
+    layers: Dict[str, List[tuple]]
+    # Invalid rows each check must report, keyed by the LogicChecker result keys
+    expected_invalid: Dict[str, int] = field(default_factory=dict)
+
+    def to_memory_accessor(self, use_numpy: bool = True) -> InMemoryAccessor:
+        accessor = InMemoryAccessor(use_numpy)
+        for name, rows in self.layers.items():
+            accessor.add_layer(name, LAYER_FIELDS[name], rows, GEOMETRY_TYPES[name])
+        for relationship in RELATIONSHIP_CLASSES:
+            accessor.add_relationship_class(relationship)
+        return accessor
+
+    def save_json(self, path: str) -> None:
+        """Writes the network as an InMemoryAccessor workspace"""
+        self.to_memory_accessor().save(path)
+
+    def save_mobile_geodatabase(self, path: str) -> None:
+        """Writes the network as a SQLite file with shape buffer geometries, readable by MobileGeodatabaseAccessor"""
+        connection = sqlite3.connect(path)
+        try:
+            for name, rows in self.layers.items():
+                table = name.split(".")[-1]
+                fields = LAYER_FIELDS[name]
+                columns = ", ".join(f"{column} {_column_type(column)}" for column in fields)
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+                connection.execute(f"CREATE TABLE {table} ({columns})")
+                connection.executemany(
+                    f"INSERT INTO {table} VALUES ({', '.join('?' for _ in fields)})",
+                    (row[:-1] + (encode_shape_buffer(row[-1]),) for row in rows),
+                )
+            connection.execute("DROP TABLE IF EXISTS GDB_Items")
+            connection.execute("CREATE TABLE GDB_Items (ObjectID INTEGER PRIMARY KEY, Name TEXT, Definition TEXT)")
+            connection.executemany(
+                "INSERT INTO GDB_Items (Name, Definition) VALUES (?, ?)",
+                ((relationship.name, relationship.to_definition()) for relationship in RELATIONSHIP_CLASSES),
+            )
+            connection.commit()
+        finally:
+            connection.close()
+
+
+def generate_network(spec: NetworkSpec) -> Network:
+    rng = random.Random(spec.seed)
+    columns = math.ceil(math.sqrt(spec.stations))
+    extension = OVERLAP if spec.overlap_rate > 0 else 0.0
+    slots = _room_slots(extension + 1.0, avoid_nested_border=spec.nested_rate > 0)
+    if spec.rooms_per_station > len(slots):
+        raise ValueError(f"At most {len(slots)} rooms per station fit in a cell")
+    expected = {ROOM_TO_STATION: 0, ROOM_TO_ROOMDETAIL: 0, STATION_TO_STATIONDETAIL: 0}
+
+    stations, details, rooms, room_details = [], [], [], []
+
+    def add_station(point, min_x, min_y, size):
+        """Adds a station and its StationDetail. Returns the station GUID and the STATION_GUID of the detail"""
+        station_guid = _guid(rng)
+        stations.append((len(stations) + 1, station_guid, point))
+        related = station_guid
+        if rng.random() < spec.error_rate:
+            related = _guid(rng)
+            expected[STATION_TO_STATIONDETAIL] += 1
+        details.append((len(details) + 1, _guid(rng), related, [_ring(min_x, min_y, size, spec.vertices_per_side)]))
+        return station_guid, related
+
+    for i in range(spec.stations):
+        x, y = (i % columns) * CELL, (i // columns) * CELL
+        grow = extension if rng.random() < spec.overlap_rate else 0.0
+        station, station_detail = add_station((x + 25.0, y + 25.0), x - grow, y - grow, CELL + 2 * grow)
+        nested = None
+        if rng.random() < spec.nested_rate:
+            nested, nested_detail = add_station((x + 50.0, y + 50.0), x + NESTED_MIN, y + NESTED_MIN, NESTED_SIZE)
+            if station_detail != nested:
+                # The nested station point is also inside the StationDetail of the cell
+                expected[STATION_TO_STATIONDETAIL] += 1
+
+        for sx, sy in rng.sample(slots, spec.rooms_per_station):
+            px, py = sx + rng.uniform(-ROOM_JITTER, ROOM_JITTER), sy + rng.uniform(-ROOM_JITTER, ROOM_JITTER)
+            in_nested = nested is not None and _in_nested(px, py)
+            # STATION_GUID of every StationDetail the room is inside (what the intersect reports as geometrical)
+            geometrical = [station_detail, nested_detail] if in_nested else [station_detail]
+            related = nested if in_nested else station
+            if rng.random() < spec.error_rate:
+                related = _guid(rng)
+            expected[ROOM_TO_STATION] += sum(1 for station_guid in geometrical if station_guid != related)
+
+            room_guid = _guid(rng)
+            rooms.append((len(rooms) + 1, room_guid, related, (x + px, y + py)))
+            detail_room = room_guid
+            if rng.random() < spec.error_rate:
+                detail_room = _guid(rng)
+                expected[ROOM_TO_ROOMDETAIL] += 1
+            ring = _ring(x + px - 0.5, y + py - 0.5, 1.0, 1)
+            room_details.append((len(room_details) + 1, _guid(rng), detail_room, [ring]))
+
+    layers = {"main.Station": stations, "main.StationDetail": details, "main.Room": rooms, "main.RoomDetail": room_details}
+    return Network(spec, layers, expected)
+
+
+def _room_slots(margin: float, avoid_nested_border: bool) -> List[Tuple[float, float]]:
+    """
+    Centers of the ROOM_SLOT x ROOM_SLOT squares a room can be placed in: away from the overlaps and from the
+    nested StationDetail border. One room per slot, so the 1x1 RoomDetails never overlap.
+    """
+    count = int((CELL - 2 * margin) // ROOM_SLOT)
+    centers = [margin + ROOM_SLOT * (k + 0.5) for k in range(count)]
+    return [(cx, cy) for cy in centers for cx in centers
+            if not avoid_nested_border or not _near_nested_border(cx, cy)]
+
+
+def _in_nested(px: float, py: float) -> bool:
+    return NESTED_MIN < px < NESTED_MIN + NESTED_SIZE and NESTED_MIN < py < NESTED_MIN + NESTED_SIZE
+
+
+def _near_nested_border(cx: float, cy: float) -> bool:
+    distance = ROOM_SLOT / 2 + ROOM_JITTER
+    low, high = NESTED_MIN, NESTED_MIN + NESTED_SIZE
+    outer = low - distance < cx < high + distance and low - distance < cy < high + distance
+    inner = low + distance < cx < high - distance and low + distance < cy < high - distance
+    return outer and not inner
+
+
+def _ring(min_x: float, min_y: float, size: float, vertices_per_side: int) -> List[Tuple[float, float]]:
+    """A closed clockwise square ring with `vertices_per_side` vertices on every side"""
+    corners = [(min_x, min_y), (min_x, min_y + size), (min_x + size, min_y + size), (min_x + size, min_y)]
+    ring = []
+    for (x0, y0), (x1, y1) in zip(corners, corners[1:] + corners[:1]):
+        for step in range(vertices_per_side):
+            t = step / vertices_per_side
+            ring.append((x0 + (x1 - x0) * t, y0 + (y1 - y0) * t))
+    ring.append(ring[0])
+    return ring
+
+
+def _guid(rng: random.Random) -> str:
+    digits = f"{rng.getrandbits(128):032X}"
+    return f"{{{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}}}"
+
+
+def _column_type(column: str) -> str:
+    return {"OBJECTID": "INTEGER PRIMARY KEY", "SHAPE": "BLOB"}.get(column, "TEXT")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes a synthetic station/room network")
+    parser.add_argument("output", help="a .json file (InMemoryAccessor workspace) or a .geodatabase file (SQLite)")
+    parser.add_argument("--stations", type=int, default=NetworkSpec.stations)
+    parser.add_argument("--rooms-per-station", type=int, default=NetworkSpec.rooms_per_station)
+    parser.add_argument("--error-rate", type=float, default=NetworkSpec.error_rate)
+    parser.add_argument("--overlap-rate", type=float, default=NetworkSpec.overlap_rate)
+    parser.add_argument("--nested-rate", type=float, default=NetworkSpec.nested_rate)
+    parser.add_argument("--vertices-per-side", type=int, default=NetworkSpec.vertices_per_side)
+    parser.add_argument("--seed", type=int, default=NetworkSpec.seed)
+    args = parser.parse_args()
+
+    spec = NetworkSpec(args.stations, args.rooms_per_station, args.error_rate, args.overlap_rate,
+                       args.nested_rate, args.vertices_per_side, args.seed)
+    network = generate_network(spec)
+    if args.output.endswith(".json"):
+        network.save_json(args.output)
+    else:
+        network.save_mobile_geodatabase(args.output)
+    print(f"Wrote {spec.room_count} rooms in {spec.stations} stations to {args.output}, "
+          f"expected invalid rows: {network.expected_invalid}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import json
+import logging
+import marshal
+import os
+import time
+from typing import Iterator, List, Optional, Tuple
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, STATION_TO_STATIONDETAIL
+
+CHECKPOINT_VERSION = 2
+# The least time between two checkpoint writes
+DEFAULT_INTERVAL_SECONDS = 60.0
+# The OBJECTID files hold a marshal record (a list of ints) per checkpoint, in version 2 of the format: the references
+# of the later versions only slow down the writes of ints shared with the layers
+OIDS_MARSHAL_VERSION = 2
+OIDS_FORMAT = f"marshal {OIDS_MARSHAL_VERSION}"
+
+
+class CheckpointedChecker:
+    """
+    Runs the serial checks of a LogicChecker so that a failed run can be resumed. Every check reads its intersect
+    by increasing point OBJECTID and reports an OBJECTID it finished every PROGRESS_ROWS intersect rows (see the
+    `progress` of the LogicChecker iter_ methods). At most every `interval_seconds`, on such a report, the point and
+    polygon OBJECTIDs of the invalid rows found since the last checkpoint are appended to an OBJECTID file next to the
+    checkpoint (see OIDS_FORMAT), the file is flushed, and the checkpoint is replaced with the last finished OBJECTID
+    and the size of the OBJECTID file of every check. Keeping two ints per invalid row is several times cheaper than
+    encoding its GUIDs.
+    A check that ends saves nothing: its rows are in its report, and a check whose report was written is not run
+    again. A resumed run truncates the OBJECTID files of the other checks to the saved sizes, yields the saved rows
+    again (their GUIDs are read with LogicChecker.relationships_of_oids) and checks only the points after the saved
+    OBJECTID, with one selection and one intersect.
+
+    The checkpoint is a JSON file:
+        {"version": 2, "oids_format": "marshal 2", "database_path": ...,
+         "checks": {check key: {"last_oid": 1234, "oids_offset": 5678, "report": null}}}
+    """
+
+    def __init__(self, checker: LogicChecker, checkpoint_path: str, resume: bool = False,
+                 interval_seconds: float = DEFAULT_INTERVAL_SECONDS):
+        self.checker = checker
+        self.checkpoint_path = checkpoint_path
+        self.interval_seconds = interval_seconds
+        self.state = self._load() if resume else None
+        if self.state is None:
+            self.state = {"version": CHECKPOINT_VERSION, "oids_format": OIDS_FORMAT,
+                          "database_path": checker.config.database_path, "checks": {}}
+        self._saved_at = time.monotonic()
+
+    def oids_path(self, key: str) -> str:
+        return f"{self.checkpoint_path}.{key}.oids"
+
+    def finished_report(self, key: str) -> Optional[dict]:
+        """The path and row count of the report of a check finished before the resume, None if it must (still) run"""
+        report = self.state["checks"].get(key, {}).get("report")
+        return report if report is not None and os.path.exists(report["path"]) else None
+
+    def report_written(self, key: str, report: dict) -> None:
+        """Saves that the report of a check is complete, so a resumed run does not write it again"""
+        self.state["checks"][key]["report"] = report
+        self._save()
+
+    def iter_check(self, key: str) -> Iterator[Tuple]:
+        """
+        The invalid rows of a check, in the format of the LogicChecker iter_ methods: the rows saved before the
+        resume, then the rows of the points after the checkpoint
+        """
+        state = self.state["checks"].setdefault(key, {"last_oid": None, "oids_offset": 0, "report": None})
+        oids_path = self.oids_path(key)
+        with open(oids_path, "ab") as oids_file:
+            # OBJECTIDs after the saved size were written after the last checkpoint, their points are checked again
+            oids_file.truncate(state["oids_offset"])
+        saved_oids = self._saved_oids(oids_path)
+        if saved_oids:
+            yield from self.checker.relationships_of_oids(key, saved_oids)
+
+        logging.info(f"Running the {key} check after OBJECTID {state['last_oid']}")
+        with open(oids_path, "ab") as oids_file:
+            progress = _CheckProgress(self, oids_file, state)
+            # The rows go straight from the checker to the caller, the progress only keeps their OBJECTIDs
+            yield from self._check_rows(key, state["last_oid"], progress)
+
+    def remove(self) -> None:
+        """Deletes the checkpoint and the rows files, once every report is written"""
+        for path in [self.checkpoint_path] + [self.oids_path(key) for key in self.state["checks"]]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _check_rows(self, key: str, after_oid: Optional[int], progress: "_CheckProgress") -> Iterator[Tuple]:
+        if key == ROOM_TO_ROOMDETAIL:
+            return self.checker.iter_room_to_roomdetail_relationships(after_oid, progress)
+        if key == STATION_TO_STATIONDETAIL:
+            return self.checker.iter_station_to_stationdetail_relationships(after_oid, progress)
+        return self.checker.iter_room_to_station_relationships(after_oid, progress)
+
+    @staticmethod
+    def _write_oids(oids_file, oids: List[int], last_oid: int) -> None:
+        """Writes the OBJECTIDs of the points up to `last_oid` and removes them from `oids`"""
+        # The OBJECTIDs of the point read last, at the end of the list, wait for a later checkpoint
+        end = len(oids)
+        while end and oids[end - 2] > last_oid:
+            end -= 2
+        marshal.dump(oids[:end], oids_file, OIDS_MARSHAL_VERSION)
+        del oids[:end]
+
+    def _save_oids(self, oids_file, oids: List[int], state: dict, last_oid: int) -> None:
+        """The OBJECTIDs must be on disk before the checkpoint that counts them"""
+        self._write_oids(oids_file, oids, last_oid)
+        oids_file.flush()
+        os.fsync(oids_file.fileno())
+        state["oids_offset"] = oids_file.tell()
+        state["last_oid"] = last_oid
+        self._save()
+
+    def _save(self) -> None:
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.state))
+        os.replace(temporary_path, self.checkpoint_path)
+        self._saved_at = time.monotonic()
+        logging.debug(f"Checkpoint saved to {self.checkpoint_path}")
+
+    def _load(self) -> Optional[dict]:
+        if not os.path.exists(self.checkpoint_path):
+            logging.info(f"No checkpoint {self.checkpoint_path}, starting from the beginning")
+            return None
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.loads(f.read())
+        if (state.get("version") != CHECKPOINT_VERSION or state.get("oids_format") != OIDS_FORMAT
+                or state.get("database_path") != self.checker.config.database_path):
+            logging.info(f"Checkpoint {self.checkpoint_path} belongs to another database or version, ignoring it")
+            return None
+        logging.info(f"Resuming from checkpoint {self.checkpoint_path}")
+        return state
+
+    @staticmethod
+    def _saved_oids(oids_path: str) -> List[int]:
+        oids = []
+        with open(oids_path, "rb") as oids_file:
+            while True:
+                try:
+                    oids += marshal.load(oids_file)
+                except EOFError:
+                    return oids
+
+
+class _CheckProgress:
+    """
+    The `progress` of a check run by CheckpointedChecker.iter_check: the checker appends the OBJECTIDs of the invalid
+    rows to `oids`, and a checkpoint is saved on the first finished OBJECTID reported `interval_seconds` after the last
+    one
+    """
+
+    def __init__(self, checkpoint: CheckpointedChecker, oids_file, state: dict):
+        self.oids: List[int] = []
+        self._checkpoint = checkpoint
+        self._oids_file = oids_file
+        self._state = state
+
+    def finished(self, oid: int) -> None:
+        """Every point up to `oid` is checked and the OBJECTIDs of its invalid rows are in `oids`"""
+        checkpoint = self._checkpoint
+        if time.monotonic() >= checkpoint._saved_at + checkpoint.interval_seconds:
+            checkpoint._save_oids(self._oids_file, self.oids, self._state, oid)
@@ -0,0 +1,165 @@
+"""
+Command line interface. Every subcommand imports the modules it needs only when it runs, so `--help` and
+validate-config start without numpy, the checkers or arcpy, and arcpy is imported only by a check that uses
+the arcpy accessor.
+
+Run from the Task2 directory:
+    python cli.py validate-config [--config config.json]
+    python cli.py check [--config config.json]
+    python cli.py batch <directory or glob> [--output batch_reports] [--workers N] [--config config.json]
+    python cli.py serve [--config config.json]       (the check service, see service.py)
+    python cli.py benchmark [--rooms 1000 100000 ...]   (the arguments of benchmarks.run_suite)
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+from config import Config
+
+LOG_LEVELS = ("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET")
+
+
+def validate_config(config: Config) -> List[str]:
+    """The problems of a configuration that would stop a check, without importing the selected accessor"""
+    from geo_access.factory import accessor_registry, find_accessor
+    from utils.report_factory import REPORT_FORMATS
+
+    problems = []
+    if find_accessor(config) is None:
+        problems.append(f"Unknown accessor '{config.accessor}'. Expected one of {', '.join(accessor_registry(config))}")
+    if config.report_format not in REPORT_FORMATS:
+        problems.append(f"Unknown report format '{config.report_format}'. Expected one of {', '.join(REPORT_FORMATS)}")
+    if str(config.log_level).upper() not in LOG_LEVELS:
+        problems.append(f"Unknown log level '{config.log_level}'. Expected one of {', '.join(LOG_LEVELS)}")
+    if config.workers < 1:
+        problems.append(f"workers must be at least 1, got {config.workers}")
+    if getattr(config, "tile_memory_mb", None) is not None and config.tile_memory_mb <= 0:
+        problems.append(f"tile_memory_mb must be positive, got {config.tile_memory_mb}")
+    if getattr(config, "checkpoint_seconds", 0) < 0:
+        problems.append(f"checkpoint_seconds must not be negative, got {config.checkpoint_seconds}")
+    if getattr(config, "log_queue_size", 1) < 1:
+        problems.append(f"log_queue_size must be at least 1, got {config.log_queue_size}")
+    if getattr(config, "log_sample_rate", 1) < 0:
+        problems.append(f"log_sample_rate must be 0 or more, got {config.log_sample_rate}")
+    problems.extend(_crs_problems(config))
+    problems.extend(_rule_problems(config))
+    if config.database_path != ":memory:" and not os.path.exists(config.database_path):
+        problems.append(f"The database {config.database_path} does not exist")
+    return problems
+
+
+def _crs_problems(config: Config) -> List[str]:
+    """The problems of `layer_crs` and `target_crs`. spatial.crs (and numpy) is only imported when they are set"""
+    layer_crs = getattr(config, "layer_crs", None) or {}
+    if not layer_crs:
+        return []
+    from geo_access.reprojecting_accessor import target_crs_of
+    from spatial.crs import get_transformer, normalize_crs
+    target_crs = target_crs_of(config)
+    if target_crs is None:
+        return [f"target_crs is needed when layer_crs has no CRS for {config.station_detail_layer_name}"]
+    problems = []
+    for layer, crs in layer_crs.items():
+        try:
+            get_transformer(crs, target_crs)
+        except Exception as ex:  # pyproj raises its own CRSError for unknown CRSs
+            problems.append(f"The CRS of {layer} cannot be transformed: {ex}")
+    reprojected = any(normalize_crs(crs) != normalize_crs(target_crs) for crs in layer_crs.values())
+    if reprojected and not any(getattr(config, name, None) for name in
+                               ("combined_checks", "tile_memory_mb", "feature_store", "relationship_checks")):
+        problems.append("The intersect checks do not reproject the layers of layer_crs: set combined_checks or "
+                        "tile_memory_mb")
+    return problems
+
+
+def _rule_problems(config: Config) -> List[str]:
+    """The problems of `rules`. rule_engine (and numpy) is only imported when they are set"""
+    if not getattr(config, "rules", None):
+        return []
+    from rule_engine import load_rules
+    try:
+        load_rules(config)
+    except ValueError as ex:
+        return [str(ex)]
+    return []
+
+
+def validate_config_command(args: argparse.Namespace) -> int:
+    try:
+        config = Config.from_file(args.config)
+    except (OSError, ValueError, TypeError) as ex:  # json.JSONDecodeError is a ValueError, unknown keys a TypeError
+        print(f"{args.config} cannot be read: {ex}")
+        return 1
+    problems = validate_config(config)
+    for problem in problems:
+        print(problem)
+    if not problems:
+        print(f"{args.config} is valid")
+    return 1 if problems else 0
+
+
+def check_command(args: argparse.Namespace) -> int:
+    import main
+    return main.main(args.config, args.resume)
+
+
+def batch_command(args: argparse.Namespace) -> int:
+    from batch_runner import run_batch
+    from utils.log_format import configure_logging
+    config = Config.from_file(args.config)
+    configure_logging(config.log_file, config.log_level, config.log_queue_size, config.log_sample_rate,
+                      config.log_max_mb, config.log_backup_count, config.log_drop_when_full)
+    summary = run_batch(config, args.source, args.output, args.workers or config.workers)
+    print(f"Checked {summary['sites']} geodatabases, {summary['failed']} failed. Reports: {args.output}")
+    return 1 if summary["failed"] else 0
+
+
+def serve_command(args: argparse.Namespace) -> int:
+    import service
+    service.main(args.config)
+    return 0
+
+
+def benchmark_command(args: argparse.Namespace) -> int:
+    from benchmarks import run_suite
+    run_suite.main(args.suite_arguments)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Checks the Room/Station relationships of a geodatabase")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    validate = subcommands.add_parser("validate-config", help="checks the configuration file without running anything")
+    validate.add_argument("--config", default="config.json")
+    validate.set_defaults(run=validate_config_command)
+
+    check = subcommands.add_parser("check", help="runs the checks enabled in the configuration file")
+    check.add_argument("--config", default="config.json")
+    check.add_argument("--resume", action="store_true", help="continue a failed run from its checkpoint_file")
+    check.set_defaults(run=check_command)
+
+    batch = subcommands.add_parser("batch", help="checks every geodatabase of a directory or glob pattern")
+    batch.add_argument("source", help="a directory of .geodatabase files or a glob pattern")
+    batch.add_argument("--output", default="batch_reports", help="the directory of the site reports and the summary")
+    batch.add_argument("--workers", type=int, help="sites checked at the same time, `workers` of the config by default")
+    batch.add_argument("--config", default="config.json")
+    batch.set_defaults(run=batch_command)
+
+    serve = subcommands.add_parser("serve", help="runs the check service on service_host:service_port")
+    serve.add_argument("--config", default="config.json")
+    serve.set_defaults(run=serve_command)
+
+    benchmark = subcommands.add_parser("benchmark", help="runs the benchmark suite (benchmarks.run_suite)")
+    benchmark.add_argument("suite_arguments", nargs=argparse.REMAINDER)
+    benchmark.set_defaults(run=benchmark_command)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
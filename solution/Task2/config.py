@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Dict, List, Optional
 import json
 import os
 
@@ -14,6 +15,60 @@ class Config:
     room_detail_layer_name: str
     station_layer_name: str
     station_detail_layer_name: str
+    # Background logging (see utils.log_format.configure_logging)
+    log_queue_size: int = 10000
+    # One in log_sample_rate of the per-row messages is logged, 1 for full logging
+    log_sample_rate: int = 100
+    log_max_mb: Optional[float] = None
+    log_backup_count: int = 5
+    # Drop the records that do not fit in a full log queue instead of waiting (see BoundedQueueHandler)
+    log_drop_when_full: bool = False
+    accessor: str = "arcpy"
+    # Extra accessor backends, name -> "module:class" (see geo_access.factory)
+    accessor_plugins: Optional[Dict[str, str]] = None
+    cursor_batch_size: int = 10000
+    fetch_chunk_size: int = 1000
+    st_geometry_extension: Optional[str] = None
+    combined_checks: bool = False
+    workers: int = 1
+    incremental: bool = False
+    manifest_file: str = "manifest.json"
+    # Checkpoint of the serial checks, written at most every checkpoint_seconds (see checkpoint.CheckpointedChecker)
+    checkpoint_file: Optional[str] = None
+    checkpoint_seconds: float = 60.0
+    edit_date_field: Optional[str] = None
+    report_format: str = "csv"
+    instrumentation_file: Optional[str] = None
+    profile_file: Optional[str] = None
+    index_cache: bool = False
+    index_cache_dir: Optional[str] = None
+    index_cache_max_mb: int = 512
+    index_cache_invalidate: bool = False
+    # Key the cached indexes of layers without a workspace file or edit dates by a hash of every vertex (slower than a
+    # rebuild, see spatial.index_cache.layer_fingerprint)
+    index_cache_content_hash: bool = False
+    feature_store: Optional[str] = None
+    # CRS of the layers, e.g. {"main.Room": "EPSG:4326"}, and the CRS the checks run in, by default the StationDetail
+    # CRS. Layers that are not listed are in the target CRS (see geo_access.reprojecting_accessor)
+    layer_crs: Optional[Dict[str, str]] = None
+    target_crs: Optional[str] = None
+    # Tiled out-of-core mode: the memory budget in MB of the features of one tile (see tiled_checker)
+    tile_memory_mb: Optional[float] = None
+    service_host: str = "127.0.0.1"
+    service_port: Optional[int] = 8765
+    service_socket: Optional[str] = None
+    service_poll_seconds: float = 2.0
+    relationship_checks: bool = False
+    # Topology pre-pass of the polygon layers, and one station per room inside several StationDetails (see topology_checker)
+    topology_checks: bool = False
+    sliver_ratio: float = 0.05
+    station_room_relationship: str = "main.Station__Room"
+    room_roomdetail_relationship: str = "main.Room__RoomDetail"
+    station_stationdetail_relationship: str = "main.Station__StationDetail"
+    # Declarative relationship rules, e.g. [{"name": "equipment_in_room", "point_layer": "main.Equipment",
+    # "polygon_layer": "main.RoomDetail", "relationship": "main.Room__Equipment", "via": "main.Room__RoomDetail"}]
+    # (see rule_engine.Rule)
+    rules: Optional[List[Dict[str, str]]] = None
 
     @classmethod
     def from_file(cls, file_path="config.json"):
@@ -1,8 +1,14 @@
 import arcpy
-from geo_access.geo_accessor import GeoDataAccessor
+from geo_access.geo_accessor import DEFAULT_FETCH_CHUNK_SIZE, GeoDataAccessor, oid_chunks
+from geo_access.relationship_class import RelationshipClass
 
 
 class ArcpyAccessor(GeoDataAccessor):
+    def __init__(self):
+        # The feature layers made by select_layer_by_attribute, the only names release_selection deletes
+        self._selections = set()
+        self._selection_counter = 0
+
     def intersect(self, layers, out_fc):
         arcpy.analysis.Intersect(
             in_features=layers,
@@ -13,11 +19,37 @@ class ArcpyAccessor(GeoDataAccessor):
         )
         return out_fc
 
-    def search_cursor(self, layer, fields, where=None):
-        with arcpy.da.SearchCursor(layer, fields, where_clause=where) as sc:
+    def search_cursor(self, layer, fields, where=None, order_by=None):
+        sql_clause = (None, f"ORDER BY {order_by}") if order_by else (None, None)
+        with arcpy.da.SearchCursor(layer, fields, where_clause=where, sql_clause=sql_clause) as sc:
             for row in sc:
                 yield row
 
+    def geometry_cursor(self, layer, fields, where=None, bbox=None):
+        # The bbox is applied by the geodatabase with its spatial index (spatial_filter needs ArcGIS Pro 3.2+)
+        spatial_filter = {}
+        if bbox is not None:
+            spatial_filter = {"spatial_filter": arcpy.Extent(*bbox).polygon, "spatial_relationship": "ENVELOPE_INTERSECTS"}
+        with arcpy.da.SearchCursor(layer, ["SHAPE@"] + list(fields), where_clause=where, **spatial_filter) as sc:
+            for row in sc:
+                yield (_to_coordinates(row[0]),) + tuple(row[1:])
+
+    def extent(self, layer):
+        extent = arcpy.Describe(layer).extent
+        return None if extent is None else (extent.XMin, extent.YMin, extent.XMax, extent.YMax)
+
+    def fetch_by_oids(self, layer, oids, fields, chunk_size=DEFAULT_FETCH_CHUNK_SIZE):
+        # The OID field is not always named OBJECTID (e.g. FID in shapefiles)
+        oid_field = arcpy.AddFieldDelimiters(layer, arcpy.Describe(layer).OIDFieldName)
+        fields = [fields] if isinstance(fields, str) else list(fields)
+        rows = {}
+        for chunk in oid_chunks(oids, chunk_size):
+            where = f"{oid_field} IN ({', '.join(map(str, chunk))})"
+            with arcpy.da.SearchCursor(layer, ["OID@"] + fields, where_clause=where) as sc:
+                for row in sc:
+                    rows[row[0]] = tuple(row[1:])
+        return rows
+
     def delete(self, fc):
         arcpy.management.Delete(fc)
 
@@ -29,4 +61,54 @@ class ArcpyAccessor(GeoDataAccessor):
         return int(result[0])
 
     def select_layer_by_attribute(self, layer: str, where_clause: str) -> str:
-        return arcpy.management.SelectLayerByAttribute(layer, where_clause=where_clause)
+        # A named feature layer, so that releasing it never touches the feature class it is made on
+        self._selection_counter += 1
+        selection = f"{layer.split('.')[-1]}_selection_{self._selection_counter}"
+        arcpy.management.MakeFeatureLayer(layer, selection, where_clause)
+        self._selections.add(selection)
+        return selection
+
+    def release_selection(self, selection: str) -> None:
+        if selection not in self._selections:
+            raise ValueError(f"'{selection}' is not a selection of this accessor, it is not deleted")
+        arcpy.management.Delete(selection)
+        self._selections.discard(selection)
+
+    def relationship_classes(self):
+        classes = {}
+        for child in arcpy.da.Describe(arcpy.env.workspace)["children"]:
+            if child["dataType"] != "RelationshipClass":
+                continue
+            # Key tuples are (field name, role, ...) with the roles OriginPrimary, OriginForeign, DestinationPrimary...
+            keys = {key[1]: key[0] for key in child["originClassKeys"] + child["destinationClassKeys"]}
+            classes[child["name"]] = RelationshipClass(
+                name=child["name"],
+                origin=child["originClassNames"][0],
+                destination=child["destinationClassNames"][0],
+                cardinality=child["cardinality"],
+                origin_primary_key=keys.get("OriginPrimary"),
+                origin_foreign_key=keys.get("OriginForeign"),
+                is_attributed=child["isAttributed"],
+                destination_primary_key=keys.get("DestinationPrimary"),
+                destination_foreign_key=keys.get("DestinationForeign"),
+            )
+        return classes
+
+
+def _to_coordinates(shape):
+    """arcpy PointGeometry -> (x, y), arcpy Polygon -> list of rings (inner rings are separated by None in a part)"""
+    if shape is None:
+        return None
+    if shape.type == "point":
+        return shape.firstPoint.X, shape.firstPoint.Y
+    rings = []
+    for part in shape:
+        ring = []
+        for point in part:
+            if point is None:
+                rings.append(ring)
+                ring = []
+            else:
+                ring.append((point.X, point.Y))
+        rings.append(ring)
+    return rings
@@ -0,0 +1,75 @@
+import importlib
+import os
+from typing import Dict, Optional
+from config import Config
+from geo_access.geo_accessor import GeoDataAccessor
+from spatial.index_cache import IndexCache
+
+# The built-in backends, as "module:class". Nothing is imported until a backend is selected,
+# so arcpy is imported only when `accessor` is "arcpy"
+ACCESSORS = {
+    "arcpy": "geo_access.arcpy_accessor:ArcpyAccessor",
+    "memory": "geo_access.memory_accessor:InMemoryAccessor",
+    "mobile_gdb": "geo_access.mobile_gdb_accessor:MobileGeodatabaseAccessor",
+}
+# Installed packages can add backends as entry points of this group, e.g. in their pyproject.toml:
+#     [project.entry-points."gis_checker.accessors"]
+#     postgis = "my_package.postgis_accessor:PostgisAccessor"
+ENTRY_POINT_GROUP = "gis_checker.accessors"
+
+
+def accessor_registry(config: Config) -> Dict[str, str]:
+    """
+    Every available backend name -> "module:class": the built-in backends, the installed entry points of
+    ENTRY_POINT_GROUP and `accessor_plugins` of the config, later ones replacing earlier ones with the same name
+    """
+    registry = dict(ACCESSORS)
+    registry.update(_entry_points())
+    registry.update(getattr(config, "accessor_plugins", None) or {})
+    return registry
+
+
+def find_accessor(config: Config) -> Optional[str]:
+    """
+    The "module:class" of the backend selected with `accessor` in the config, None if it is not registered.
+    The entry points are only scanned for names that are neither in the config nor built in.
+    """
+    plugins = getattr(config, "accessor_plugins", None) or {}
+    target = plugins.get(config.accessor) or ACCESSORS.get(config.accessor)
+    return target if target is not None else _entry_points().get(config.accessor)
+
+
+def create_accessor(config: Config) -> GeoDataAccessor:
+    """
+    Creates the accessor selected with `accessor` in the config. Its module is imported here, and the accessor is
+    created with its `from_config(config)` class method when it has one, without arguments otherwise.
+    When `layer_crs` puts layers in different CRSs, it is wrapped in a ReprojectingAccessor.
+    """
+    target = find_accessor(config)
+    if target is None:
+        raise ValueError(f"Unknown accessor '{config.accessor}'. Expected one of {', '.join(accessor_registry(config))}")
+    module_name, _, class_name = target.partition(":")
+    accessor_class = getattr(importlib.import_module(module_name), class_name)
+    from_config = getattr(accessor_class, "from_config", None)
+    accessor = from_config(config) if from_config is not None else accessor_class()
+    if not getattr(config, "layer_crs", None):
+        return accessor
+    from geo_access.reprojecting_accessor import ReprojectingAccessor
+    return ReprojectingAccessor.wrap(accessor, config)
+
+
+def create_index_cache(config: Config) -> Optional[IndexCache]:
+    """
+    The spatial index cache, if enabled with `index_cache`. It lives in `index_cache_dir`,
+    by default the index_cache directory next to the log file.
+    """
+    if not getattr(config, "index_cache", False):
+        return None
+    directory = config.index_cache_dir or os.path.join(os.path.dirname(os.path.abspath(config.log_file)), "index_cache")
+    return IndexCache(directory, config.index_cache_max_mb * 2 ** 20, config.index_cache_invalidate,
+                      getattr(config, "index_cache_content_hash", False))
+
+
+def _entry_points() -> Dict[str, str]:
+    from importlib.metadata import entry_points
+    return {entry_point.name: entry_point.value for entry_point in entry_points(group=ENTRY_POINT_GROUP)}
@@ -0,0 +1,224 @@
+import logging
+import mmap
+import os
+import re
+from array import array
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Dict, List, Optional, Sequence, Tuple
+from geo_access.geo_accessor import GeoDataAccessor
+from geo_access.memory_accessor import POINT, POLYGON
+from spatial.geometry import PackedPolygons
+from spatial.index_cache import read_entry, write_entry
+from utils.columnar_writer import GUID_PATTERN, GUID_SIZE, bytes_to_guid, guid_to_bytes
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the GUID columns are compared row by row without it
+    np = None
+
+MAGIC = b"GFST1\n"
+# Rows read from the accessor and converted at once
+CHUNK_SIZE = 10000
+GUID_LENGTH = 38
+_GUID_SEPARATORS = str.maketrans("", "", "{}-")
+
+
+class GuidColumn:
+    """
+    A GUID field stored as 16 bytes per row. Values that do not round-trip through 16 bytes (None, lower-case or
+    malformed GUIDs) are kept as they are in `irregular`, keyed by row, and their bytes are zero.
+    """
+
+    def __init__(self, data=None, irregular: Optional[Dict[int, Optional[str]]] = None):
+        self.data = array("B") if data is None else data
+        self.irregular = {} if irregular is None else irregular
+
+    def append(self, value: Optional[str]) -> None:
+        if isinstance(value, str) and GUID_PATTERN.fullmatch(value):
+            self.data.frombytes(guid_to_bytes(value))
+        else:
+            self.irregular[len(self)] = value
+            self.data.frombytes(bytes(GUID_SIZE))
+
+    def extend(self, values: List[Optional[str]]) -> None:
+        """Appends the values, converted with a single regular expression match when they are all GUIDs"""
+        try:
+            joined = "".join(values)
+        except TypeError:  # None values
+            joined = None
+        # Every value has the length of a GUID, so the run can only match when every value matches on its own
+        if (joined is not None and all(len(value) == GUID_LENGTH for value in values)
+                and _guid_run(len(values)).fullmatch(joined)):
+            self.data.frombytes(bytes.fromhex(joined.translate(_GUID_SEPARATORS)))
+        else:
+            for value in values:
+                self.append(value)
+
+    def __len__(self) -> int:
+        return len(self.data) // GUID_SIZE
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        if row in self.irregular:
+            return self.irregular[row]
+        return bytes_to_guid(bytes(self.data[row * GUID_SIZE:(row + 1) * GUID_SIZE]))
+
+    def differ(self, rows: Sequence[int], other: "GuidColumn", other_rows: Sequence[int]) -> List[int]:
+        """The positions k where self[rows[k]] != other[other_rows[k]], compared without decoding the GUIDs"""
+        if np is None:
+            return [k for k, (row, other_row) in enumerate(zip(rows, other_rows))
+                    if self._key(row) != other._key(other_row)]
+
+        rows, other_rows = np.asarray(rows, dtype=np.int64), np.asarray(other_rows, dtype=np.int64)
+        different = (self._words()[rows] != other._words()[other_rows]).any(axis=1)
+        if self.irregular or other.irregular:
+            special = (np.isin(rows, np.fromiter(self.irregular, dtype=np.int64))
+                       | np.isin(other_rows, np.fromiter(other.irregular, dtype=np.int64)))
+            for k in np.flatnonzero(special).tolist():
+                different[k] = self._key(int(rows[k])) != other._key(int(other_rows[k]))
+        return np.flatnonzero(different).tolist()
+
+    def _key(self, row: int):
+        """The irregular value or the 16 bytes of the row, equal exactly when the GUID strings are equal"""
+        if row in self.irregular:
+            return self.irregular[row]
+        return bytes(self.data[row * GUID_SIZE:(row + 1) * GUID_SIZE])
+
+    def _words(self) -> "np.ndarray":
+        return np.frombuffer(self.data, dtype=np.uint64).reshape(-1, 2)
+
+
+@dataclass
+class StoredLayer:
+    """
+    The features of one layer in flat buffers: int64 OBJECTIDs, float64 coordinates (x, y per vertex), for polygons
+    int32 ring and polygon offsets (see spatial.geometry.PackedPolygons), and one GuidColumn per GUID field.
+    """
+    name: str
+    geometry_type: Optional[str] = None
+    oids: Sequence[int] = field(default_factory=lambda: array("q"))
+    coordinates: Sequence[float] = field(default_factory=lambda: array("d"))
+    ring_offsets: Sequence[int] = field(default_factory=lambda: array("i", [0]))
+    polygon_offsets: Sequence[int] = field(default_factory=lambda: array("i", [0]))
+    guids: Dict[str, GuidColumn] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.oids)
+
+    def extend(self, rows: List[tuple]) -> None:
+        """Appends geometry_cursor rows: (geometry, OBJECTID, the GUID fields in the order of `guids`)"""
+        if not rows:
+            return
+        if self.geometry_type is None:
+            self.geometry_type = POINT if isinstance(rows[0][0][0], (int, float)) else POLYGON
+        self.oids.extend(row[1] for row in rows)
+        if self.geometry_type == POINT:
+            self.coordinates.extend(chain.from_iterable(row[0] for row in rows))
+        else:
+            polygons = self.polygons()
+            for row in rows:
+                polygons.append(row[0])
+        for position, column in enumerate(self.guids.values(), start=2):
+            column.extend([row[position] for row in rows])
+
+    def points(self, start: int = 0, stop: Optional[int] = None):
+        """The points of rows start:stop, an (N, 2) array on the mapped buffer with numpy, (x, y) tuples without"""
+        stop = len(self) if stop is None else stop
+        if np is not None:
+            return np.frombuffer(self.coordinates, dtype=np.float64).reshape(-1, 2)[start:stop]
+        coordinates = self.coordinates[2 * start:2 * stop]
+        return list(zip(coordinates[0::2], coordinates[1::2]))
+
+    def polygons(self) -> PackedPolygons:
+        return PackedPolygons(self.coordinates, self.ring_offsets, self.polygon_offsets)
+
+    def to_arrays(self) -> Tuple[dict, Dict[str, Sequence]]:
+        meta = {
+            "geometry_type": self.geometry_type,
+            "guid_fields": list(self.guids),
+            "irregular": {name: list(column.irregular.items()) for name, column in self.guids.items()},
+        }
+        arrays = {"oids": self.oids, "coordinates": self.coordinates}
+        if self.geometry_type == POLYGON:
+            arrays.update(ring_offsets=self.ring_offsets, polygon_offsets=self.polygon_offsets)
+        arrays.update({f"guid:{name}": column.data for name, column in self.guids.items()})
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, name: str, meta: dict, arrays: Dict[str, Sequence]) -> "StoredLayer":
+        guids = {
+            field_name: GuidColumn(arrays[f"guid:{field_name}"], dict(meta["irregular"][field_name]))
+            for field_name in meta["guid_fields"]
+        }
+        layer = cls(name, meta["geometry_type"], arrays["oids"], arrays["coordinates"], guids=guids)
+        if layer.geometry_type == POLYGON:
+            layer.ring_offsets, layer.polygon_offsets = arrays["ring_offsets"], arrays["polygon_offsets"]
+        return layer
+
+
+class FeatureStore:
+    """
+    Room/Station features in a single memory-mapped file, instead of a Python tuple per feature and per vertex.
+    Opening a store maps the file and does not read it: the layer buffers are memoryviews of the mapping, so
+    several processes opening the same file share its pages through the OS page cache.
+
+    The file has the entry format of spatial.index_cache (a JSON header and 8-byte aligned arrays),
+    with one set of arrays per layer, named "<layer>/<array>".
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        meta, arrays = read_entry(self._mapped, MAGIC)
+        self.layers: Dict[str, StoredLayer] = {}
+        for name, layer_meta in meta["layers"].items():
+            prefix = f"{name}/"
+            layer_arrays = {key[len(prefix):]: value for key, value in arrays.items() if key.startswith(prefix)}
+            self.layers[name] = StoredLayer.from_arrays(name, layer_meta, layer_arrays)
+        logging.debug(f"Opened feature store {path} with layers {list(self.layers)}")
+
+    @classmethod
+    def write(cls, path: str, accessor: GeoDataAccessor, layers: Dict[str, List[str]]) -> "FeatureStore":
+        """
+        Reads the layers with the accessor's geometry_cursor into a new store file and opens it.
+        Rows without a geometry are skipped, the same as in LogicChecker.check_all_relationships.
+        Args:
+            path: the store file. It's replaced atomically if it exists
+            accessor: an accessor with the workspace already set
+            layers: the GUID fields to store for every layer (OBJECTID and the geometry are always stored)
+
+        Returns: the opened store
+        """
+        meta = {"layers": {}}
+        arrays = {}
+        for name, guid_fields in layers.items():
+            layer = StoredLayer(name, guids={field_name: GuidColumn() for field_name in guid_fields})
+            rows = accessor.geometry_cursor(name, ["OBJECTID"] + list(guid_fields))
+            while True:
+                chunk = list(islice(rows, CHUNK_SIZE))
+                if not chunk:
+                    break
+                layer.extend([row for row in chunk if row[0] is not None])
+            meta["layers"][name], layer_arrays = layer.to_arrays()
+            arrays.update({f"{name}/{key}": value for key, value in layer_arrays.items()})
+            logging.debug(f"Read {len(layer)} features from layer '{name}' into the feature store")
+
+        size = write_entry(path, meta, arrays, MAGIC)
+        logging.debug(f"Wrote feature store {path} ({size} bytes)")
+        return cls(path)
+
+    def layer(self, name: str) -> StoredLayer:
+        try:
+            return self.layers[name]
+        except KeyError:
+            raise KeyError(f"Layer '{name}' does not exist in the feature store {self.path}") from None
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+
+def _guid_run(count: int) -> "re.Pattern":
+    """A pattern matching `count` concatenated GUIDs, e.g. the values of a whole chunk"""
+    return re.compile(f"(?:{GUID_PATTERN.pattern}){{{count}}}")
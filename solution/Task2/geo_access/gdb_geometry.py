@@ -0,0 +1,162 @@
+import struct
+from typing import List, Tuple, Union
+from spatial.geometry import BBox, geometry_bbox
+
+Point = Tuple[float, float]
+Polygon = List[List[Point]]
+Geometry = Union[Point, Polygon]
+
+# Esri shape buffer types (low byte of the shape type)
+_SHAPE_POINT_TYPES = {1, 11, 21, 52}
+_SHAPE_POLYGON_TYPES = {5, 15, 19, 25, 31, 51}
+
+_WKB_POINT = 1
+_WKB_POLYGON = 3
+_WKB_MULTIPOLYGON = 6
+
+
+def decode_geometry(blob: bytes) -> Geometry:
+    """
+    Decodes a geometry blob read from a geodatabase SHAPE column.
+    Supported encodings are WKB (ISO and extended), GeoPackage binary and the Esri shape buffer.
+    Z and M values are dropped.
+    Args:
+        blob: the raw bytes of the SHAPE column
+
+    Returns: (x, y) for a point, a list of rings (lists of (x, y)) for a polygon
+
+    """
+    blob = bytes(blob)
+    if blob[:2] == b"GP":
+        return _decode_gpkg(blob)
+    try:
+        geometry, end = _decode_wkb(blob, 0)
+        if end == len(blob):
+            return geometry
+    except (struct.error, ValueError, IndexError):
+        pass
+    return _decode_shape_buffer(blob)
+
+
+def decode_envelope(blob: bytes) -> BBox:
+    """
+    The (min_x, min_y, max_x, max_y) envelope of a geometry blob. It is read from the header of Esri shape buffers
+    and of GeoPackage blobs that store one, without decoding the coordinates; other blobs are decoded.
+    """
+    blob = bytes(blob)
+    if blob[:2] == b"GP":
+        flags = blob[3]
+        if (flags >> 1) & 0b111:
+            min_x, max_x, min_y, max_y = struct.unpack_from("<4d" if flags & 1 else ">4d", blob, 8)
+            return min_x, min_y, max_x, max_y
+    elif _is_shape_buffer(blob):
+        base_type = struct.unpack_from("<i", blob, 0)[0] & 0xFF
+        if base_type in _SHAPE_POINT_TYPES:
+            x, y = struct.unpack_from("<2d", blob, 4)
+            return x, y, x, y
+        if base_type in _SHAPE_POLYGON_TYPES:
+            return struct.unpack_from("<4d", blob, 4)
+    return geometry_bbox(decode_geometry(blob))
+
+
+def encode_shape_buffer(geometry: Geometry) -> bytes:
+    """Encodes a point or polygon as an Esri shape buffer (the reverse of decode_geometry)"""
+    if isinstance(geometry, tuple):
+        return struct.pack("<idd", 1, geometry[0], geometry[1])
+
+    points = [point for ring in geometry for point in ring]
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    parts = []
+    offset = 0
+    for ring in geometry:
+        parts.append(offset)
+        offset += len(ring)
+    header = struct.pack("<i4d2i", 5, min(xs), min(ys), max(xs), max(ys), len(geometry), len(points))
+    return (header + struct.pack(f"<{len(parts)}i", *parts)
+            + struct.pack(f"<{len(points) * 2}d", *(value for point in points for value in point)))
+
+
+def _is_shape_buffer(blob: bytes) -> bool:
+    """
+    True for the blobs decode_geometry reads as a shape buffer without trying WKB first: WKB starts with its
+    byte order (0 or 1) and a 2D shape buffer point (type 1, 20 bytes) is one byte shorter than a WKB point
+    """
+    return blob[0] not in (0, 1) or (len(blob) == 20 and blob[:4] == b"\x01\x00\x00\x00")
+
+
+def _decode_gpkg(blob: bytes) -> Geometry:
+    flags = blob[3]
+    envelope_sizes = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+    envelope = (flags >> 1) & 0b111
+    if envelope not in envelope_sizes:
+        raise ValueError(f"Invalid GeoPackage envelope indicator {envelope}")
+    geometry, _ = _decode_wkb(blob, 8 + envelope_sizes[envelope])
+    return geometry
+
+
+def _decode_wkb(blob: bytes, offset: int):
+    byte_order = blob[offset]
+    if byte_order not in (0, 1):
+        raise ValueError("Not a WKB geometry")
+    endian = "<" if byte_order == 1 else ">"
+    (geometry_type,) = struct.unpack_from(f"{endian}I", blob, offset + 1)
+    offset += 5
+
+    dimensions = 2
+    if geometry_type & 0x20000000:  # EWKB with SRID
+        offset += 4
+    if geometry_type & 0x80000000:
+        dimensions += 1
+    if geometry_type & 0x40000000:
+        dimensions += 1
+    geometry_type &= 0x0FFFFFFF
+    if geometry_type >= 1000:
+        extra_dimensions = {1: 1, 2: 1, 3: 2}.get(geometry_type // 1000)
+        if extra_dimensions is None:
+            raise ValueError(f"Unsupported WKB geometry type {geometry_type}")
+        dimensions += extra_dimensions
+        geometry_type %= 1000
+
+    if geometry_type == _WKB_POINT:
+        x, y = struct.unpack_from(f"{endian}2d", blob, offset)
+        return (x, y), offset + 8 * dimensions
+    if geometry_type == _WKB_POLYGON:
+        return _decode_wkb_rings(blob, offset, endian, dimensions)
+    if geometry_type == _WKB_MULTIPOLYGON:
+        (count,) = struct.unpack_from(f"{endian}I", blob, offset)
+        offset += 4
+        rings = []
+        for _ in range(count):
+            polygon, offset = _decode_wkb(blob, offset)
+            rings.extend(polygon)
+        return rings, offset
+    raise ValueError(f"Unsupported WKB geometry type {geometry_type}")
+
+
+def _decode_wkb_rings(blob: bytes, offset: int, endian: str, dimensions: int):
+    (ring_count,) = struct.unpack_from(f"{endian}I", blob, offset)
+    offset += 4
+    rings = []
+    for _ in range(ring_count):
+        (point_count,) = struct.unpack_from(f"{endian}I", blob, offset)
+        offset += 4
+        values = struct.unpack_from(f"{endian}{point_count * dimensions}d", blob, offset)
+        offset += 8 * point_count * dimensions
+        rings.append([(values[i], values[i + 1]) for i in range(0, len(values), dimensions)])
+    return rings, offset
+
+
+def _decode_shape_buffer(blob: bytes) -> Geometry:
+    (shape_type,) = struct.unpack_from("<i", blob, 0)
+    base_type = shape_type & 0xFF
+    if base_type in _SHAPE_POINT_TYPES:
+        return struct.unpack_from("<2d", blob, 4)
+    if base_type in _SHAPE_POLYGON_TYPES:
+        part_count, point_count = struct.unpack_from("<2i", blob, 36)
+        parts = struct.unpack_from(f"<{part_count}i", blob, 44)
+        values = struct.unpack_from(f"<{point_count * 2}d", blob, 44 + 4 * part_count)
+        points = [(values[i], values[i + 1]) for i in range(0, len(values), 2)]
+        bounds = list(parts) + [point_count]
+        return [points[bounds[i]:bounds[i + 1]] for i in range(part_count)]
+    raise ValueError(f"Unsupported shape type {shape_type}")
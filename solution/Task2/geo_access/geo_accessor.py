@@ -1,4 +1,9 @@
-from typing import List, Tuple, Union, Optional
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Union, Optional
+from geo_access.relationship_class import RelationshipClass
+from spatial.geometry import BBox, bbox_union, geometry_bbox
+
+# OBJECTIDs per query of fetch_by_oids. Oracle allows at most 1000 values in an IN list
+DEFAULT_FETCH_CHUNK_SIZE = 1000
 
 
 class GeoDataAccessor:
@@ -23,10 +28,95 @@ class GeoDataAccessor:
         pass
 
     def search_cursor(self, layer: str, fields: Union[List[str], str],
-                      where: Optional[str] = None) -> List[Tuple]:
-        """Return rows from a layer"""
+                      where: Optional[str] = None, order_by: Optional[str] = None) -> List[Tuple]:
+        """Return rows from a layer. With `order_by`, sorted by that field by the data source"""
+        pass
+
+    def geometry_cursor(self, layer: str, fields: List[str], where: Optional[str] = None,
+                        bbox: Optional[BBox] = None) -> Iterator[Tuple]:
+        """Return rows from a layer with the geometry as plain coordinates in front of the fields:
+        (x, y) for points, a list of rings (lists of (x, y)) for polygons.
+        With a `bbox` (min_x, min_y, max_x, max_y), only the features whose envelope intersects it"""
         pass
 
+    def extent(self, layer: str) -> Optional[BBox]:
+        """
+        The (min_x, min_y, max_x, max_y) envelope of all features of a layer, None if it has no geometries.
+        Computed with one geometry_cursor pass that keeps no rows.
+        """
+        extent = None
+        for row in self.geometry_cursor(layer, []):
+            if row[0] is not None:
+                bbox = geometry_bbox(row[0])
+                extent = bbox if extent is None else bbox_union(extent, bbox)
+        return extent
+
+    def polygon_index(self, layer: str, polygons: Sequence, use_numpy: bool = True):
+        """
+        The spatial.join.PolygonIndex of the polygons of a whole layer (its geometry_cursor geometries).
+        Backends with an index cache load it from the cache while the layer is unchanged (see InMemoryAccessor),
+        the others build it.
+        """
+        from spatial.join import PolygonIndex  # numpy is imported by the checks that join, not by every accessor user
+        return PolygonIndex(polygons, use_numpy)
+
+    def fetch_by_oids(self, layer: str, oids: Iterable[int], fields: Union[List[str], str],
+                      chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE) -> Dict[int, Tuple]:
+        """
+        Returns the fields of a set of features with one query per `chunk_size` OBJECTIDs
+        (a search_cursor filtered with OBJECTID IN (...)) instead of one query per feature.
+        Args:
+            layer: the path to a layer
+            oids: the OBJECTIDs of the features, in any order and with duplicates
+            fields: the fields to return
+            chunk_size: the number of OBJECTIDs per query
+
+        Returns: the values of `fields` of every found feature, keyed by OBJECTID. Missing OBJECTIDs are left out
+        """
+        fields = [fields] if isinstance(fields, str) else list(fields)
+        rows = {}
+        for chunk in oid_chunks(oids, chunk_size):
+            where = f"OBJECTID IN ({', '.join(map(str, chunk))})"
+            for row in self.search_cursor(layer, ["OBJECTID"] + fields, where=where):
+                rows[row[0]] = tuple(row[1:])
+        return rows
+
     def delete(self, fc: str) -> None:
         """Delete a feature class"""
-        pass
\ No newline at end of file
+        pass
+
+    def release_selection(self, selection: str) -> None:
+        """Release a layer returned by select_layer_by_attribute. The data the selection was made on is kept"""
+        pass
+
+    def relationship_classes(self) -> Dict[str, RelationshipClass]:
+        """Return the definitions of the workspace's relationship classes, keyed by name"""
+        pass
+
+    def relationship_pairs(self, relationship: RelationshipClass) -> Iterator[Tuple[str, str]]:
+        """
+        Returns the related keys of a relationship class.
+        Args:
+            relationship: the relationship class definition
+
+        Returns:
+            (origin key, destination key) for every related pair. The origin key is the value of the
+            origin primary key (e.g. the station GLOBALID). The destination key is the value of the destination
+            primary key for attributed relationships and the GLOBALID of the destination feature otherwise.
+        """
+        if relationship.is_attributed:
+            table, fields = relationship.name, [relationship.origin_foreign_key, relationship.destination_foreign_key]
+        else:
+            table, fields = relationship.destination, [relationship.origin_foreign_key, "GLOBALID"]
+        for origin_key, destination_key in self.search_cursor(table, fields):
+            if origin_key is not None:
+                yield origin_key, destination_key
+
+
+def oid_chunks(oids: Iterable[int], chunk_size: int) -> Iterator[List[int]]:
+    """The distinct OBJECTIDs in ascending order, `chunk_size` at a time"""
+    if chunk_size < 1:
+        raise ValueError(f"The chunk size must be at least 1, got {chunk_size}")
+    oids = sorted({int(oid) for oid in oids})
+    for start in range(0, len(oids), chunk_size):
+        yield oids[start:start + chunk_size]
@@ -0,0 +1,143 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from geo_access.geo_accessor import DEFAULT_FETCH_CHUNK_SIZE, GeoDataAccessor
+from geo_access.relationship_class import RelationshipClass
+from spatial.geometry import BBox
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    total_seconds: float = 0.0
+    rows: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def record(self, seconds: float, rows: int = 0) -> None:
+        self.calls += 1
+        self.total_seconds += seconds
+        self.rows += rows
+        self.latencies.append(seconds)
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "rows": self.rows,
+            "total_seconds": self.total_seconds,
+            "p50_seconds": percentile(latencies, 50),
+            "p95_seconds": percentile(latencies, 95),
+            "p99_seconds": percentile(latencies, 99),
+            "max_seconds": latencies[-1] if latencies else 0.0,
+        }
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class InstrumentedAccessor(GeoDataAccessor):
+    """
+    Wraps any GeoDataAccessor and records, per method, the number of calls, the latencies and
+    the rows yielded by the cursors. The time of a cursor is the time spent inside the wrapped cursor
+    while it is iterated, not the time the consumer spends on the rows.
+    Attributes the interface does not define (e.g. add_layer) are passed through untimed.
+    """
+
+    def __init__(self, accessor: GeoDataAccessor):
+        self.accessor = accessor
+        self.stats: Dict[str, CallStats] = {}
+        self._started = time.perf_counter()
+
+    def __getattr__(self, name):
+        return getattr(self.accessor, name)
+
+    def set_workspace(self, workspace_path: str) -> None:
+        return self._timed("set_workspace", self.accessor.set_workspace, workspace_path)
+
+    def get_count(self, layer: str) -> int:
+        return self._timed("get_count", self.accessor.get_count, layer)
+
+    def select_layer_by_attribute(self, layer: str, where_clause: str) -> str:
+        return self._timed("select_layer_by_attribute", self.accessor.select_layer_by_attribute, layer, where_clause)
+
+    def intersect(self, layers: List[str], out_fc: str) -> str:
+        return self._timed("intersect", self.accessor.intersect, layers, out_fc)
+
+    def search_cursor(self, layer: str, fields: Union[List[str], str],
+                      where: Optional[str] = None, order_by: Optional[str] = None) -> Iterator[Tuple]:
+        return self._timed_rows("search_cursor", self.accessor.search_cursor, layer, fields, where=where,
+                                order_by=order_by)
+
+    def geometry_cursor(self, layer: str, fields: List[str], where: Optional[str] = None,
+                        bbox: Optional[BBox] = None) -> Iterator[Tuple]:
+        return self._timed_rows("geometry_cursor", self.accessor.geometry_cursor, layer, fields, where=where, bbox=bbox)
+
+    def extent(self, layer: str) -> Optional[BBox]:
+        return self._timed("extent", self.accessor.extent, layer)
+
+    def polygon_index(self, layer: str, polygons: Sequence, use_numpy: bool = True):
+        return self._timed("polygon_index", self.accessor.polygon_index, layer, polygons, use_numpy)
+
+    def fetch_by_oids(self, layer: str, oids: Iterable[int], fields: Union[List[str], str],
+                      chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE) -> Dict[int, Tuple]:
+        return self._timed("fetch_by_oids", self.accessor.fetch_by_oids, layer, oids, fields, chunk_size)
+
+    def delete(self, fc: str) -> None:
+        return self._timed("delete", self.accessor.delete, fc)
+
+    def release_selection(self, selection: str) -> None:
+        return self._timed("release_selection", self.accessor.release_selection, selection)
+
+    def relationship_classes(self) -> Dict[str, RelationshipClass]:
+        return self._timed("relationship_classes", self.accessor.relationship_classes)
+
+    def summary(self) -> dict:
+        """The statistics of every called method, keyed by method name, plus the wall time since creation"""
+        return {
+            "wall_seconds": time.perf_counter() - self._started,
+            "accessor": type(self.accessor).__name__,
+            "methods": {name: stats.summary() for name, stats in sorted(self.stats.items())},
+        }
+
+    def write_summary(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def _stats(self, name: str) -> CallStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = CallStats()
+        return stats
+
+    def _timed(self, name: str, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._stats(name).record(time.perf_counter() - start)
+
+    def _timed_rows(self, name: str, method, *args, **kwargs) -> Iterator[Tuple]:
+        clock = time.perf_counter
+        start = clock()
+        rows = iter(method(*args, **kwargs))
+        elapsed = clock() - start
+        count = 0
+        try:
+            while True:
+                start = clock()
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    elapsed += clock() - start
+                    return
+                elapsed += clock() - start
+                count += 1
+                yield row
+        finally:
+            self._stats(name).record(elapsed, count)
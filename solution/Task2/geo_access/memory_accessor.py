@@ -0,0 +1,310 @@
+import json
+import logging
+from dataclasses import asdict, dataclass
+from itertools import islice
+from operator import itemgetter, lt
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from geo_access.factory import create_index_cache
+from geo_access.geo_accessor import DEFAULT_FETCH_CHUNK_SIZE, GeoDataAccessor
+from geo_access.relationship_class import RelationshipClass
+from geo_access.where_clause import compile_where
+from spatial.geometry import BBox, bbox_intersects, geometry_bbox
+from spatial.index_cache import IndexCache, file_version, layer_fingerprint
+from spatial.join import PolygonIndex, cached_polygon_index
+
+POINT = "POINT"
+POLYGON = "POLYGON"
+
+# Geometry tokens accepted by search_cursor in place of the SHAPE field (as in arcpy)
+_FIELD_ALIASES = {"OID@": "OBJECTID", "SHAPE@": "SHAPE", "SHAPE@XY": "SHAPE"}
+
+
+@dataclass
+class MemoryLayer:
+    """
+    A feature class or table held in memory.
+    Points are stored as (x, y) in the SHAPE field, polygons as a list of rings, each a list of (x, y).
+    """
+    fields: List[str]
+    rows: List[tuple]
+    geometry_type: Optional[str] = None
+    source: Optional[str] = None
+    # A field the rows are known to be sorted by (ascending, without NULLs): search_cursor does not sort them again
+    ordered_by: Optional[str] = None
+
+    def field_position(self, field: str) -> int:
+        name = _FIELD_ALIASES.get(field.upper(), field).upper()
+        for position, layer_field in enumerate(self.fields):
+            if layer_field.upper() == name:
+                return position
+        raise KeyError(f"Field '{field}' does not exist in layer '{self.source}'")
+
+
+class InMemoryAccessor(GeoDataAccessor):
+    """
+    GeoDataAccessor without arcpy. Layers are held in memory and `intersect` is a point in polygon
+    join done with the vectorized NumPy kernel (spatial.pip_kernel) when numpy is installed, or with a packed
+    STR tree + exact point in polygon tests otherwise. The output of `intersect` has the
+    same field names as arcpy's Intersect (FID_<layer>, duplicate field names suffixed with _1),
+    so LogicChecker works on it unchanged.
+
+    The workspace is a JSON file in the format written by `save`. The special workspace ":memory:"
+    keeps only the layers added with `add_layer` and the relationship classes added with `add_relationship_class`.
+
+    With an `index_cache`, the polygon indexes are saved to disk and memory-mapped by later runs, as long as the
+    layer's version is unchanged: the modification time and size of the workspace file it was loaded from, for layers
+    added with `add_layer` their row count and latest `edit_date_field` value, else (with the cache's content_hash) a
+    hash of their OBJECTIDs and geometries. Other layers, such as selections and intersect outputs, are not cached.
+    """
+
+    MEMORY_WORKSPACE = ":memory:"
+
+    def __init__(self, use_numpy: bool = True, index_cache: Optional[IndexCache] = None,
+                 edit_date_field: Optional[str] = None):
+        self.layers: Dict[str, MemoryLayer] = {}
+        self.relationships: Dict[str, RelationshipClass] = {}
+        self.use_numpy = use_numpy
+        self.index_cache = index_cache
+        self.edit_date_field = edit_date_field
+        self._polygon_indexes: Dict[str, PolygonIndex] = {}
+        # The layers added with add_layer -> the workspace file they were loaded from, None for the others
+        self._source_files: Dict[str, Optional[str]] = {}
+        self._selection_counter = 0
+
+    @classmethod
+    def from_config(cls, config) -> "InMemoryAccessor":
+        return cls(index_cache=create_index_cache(config), edit_date_field=config.edit_date_field)
+
+    def add_layer(self, name: str, fields: List[str], rows: Sequence[Sequence],
+                  geometry_type: Optional[str] = None) -> None:
+        """
+        Registers a layer. `fields` must contain OBJECTID, feature classes must also contain SHAPE.
+        """
+        if geometry_type == POINT:
+            shape = [field.upper() for field in fields].index("SHAPE")
+            rows = [tuple(row[:shape]) + (tuple(row[shape]),) + tuple(row[shape + 1:]) for row in rows]
+        else:
+            rows = [tuple(row) for row in rows]
+        self.layers[name] = MemoryLayer(list(fields), rows, geometry_type, _base_name(name), _oid_order(fields, rows))
+        self._polygon_indexes.pop(name, None)
+        self._source_files[name] = None
+        logging.debug(f"Added in-memory layer '{name}' with {len(rows)} rows")
+
+    def add_relationship_class(self, relationship: RelationshipClass) -> None:
+        """Registers a relationship class. Its pairs are read from the layers by `relationship_pairs`"""
+        self.relationships[relationship.name] = relationship
+
+    def load(self, path: str) -> None:
+        """Load all layers and relationship classes from a JSON file written by `save`"""
+        with open(path, "r", encoding="utf-8") as f:
+            content = json.load(f)
+        for name, layer in content["layers"].items():
+            self.add_layer(name, layer["fields"], layer["rows"], layer.get("geometry_type"))
+            self._source_files[name] = path
+        for relationship in content.get("relationships", []):
+            self.add_relationship_class(RelationshipClass(**relationship))
+
+    def save(self, path: str) -> None:
+        """Write all layers and relationship classes to a JSON file"""
+        content = {
+            "layers": {
+                name: {"geometry_type": layer.geometry_type, "fields": layer.fields, "rows": layer.rows}
+                for name, layer in self.layers.items()
+            },
+            "relationships": [asdict(relationship) for relationship in self.relationships.values()],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(content, f)
+
+    def set_workspace(self, workspace_path: str) -> None:
+        if workspace_path != self.MEMORY_WORKSPACE:
+            self.load(workspace_path)
+
+    def get_count(self, layer: str) -> int:
+        return len(self._get_layer(layer).rows)
+
+    def select_layer_by_attribute(self, layer: str, where_clause: str) -> str:
+        source = self._get_layer(layer)
+        predicate = compile_where(where_clause, source.fields)
+        self._selection_counter += 1
+        selection_name = f"{layer}_selection_{self._selection_counter}"
+        self.layers[selection_name] = MemoryLayer(
+            source.fields, [row for row in source.rows if predicate(row)], source.geometry_type, source.source,
+            source.ordered_by
+        )
+        return selection_name
+
+    def intersect(self, layers: List[str], out_fc: str) -> str:
+        inputs = [self._get_layer(layer) for layer in layers]
+        geometry_types = [layer.geometry_type for layer in inputs]
+        if sorted(geometry_types) != [POINT, POLYGON]:
+            raise ValueError(f"Intersect supports exactly one point and one polygon layer, got {geometry_types}")
+
+        point_first = geometry_types[0] == POINT
+        point_name, polygon_name = layers if point_first else reversed(layers)
+        point_layer, polygon_layer = (inputs if point_first else reversed(inputs))
+
+        point_shape = point_layer.field_position("SHAPE")
+        polygon_shape = polygon_layer.field_position("SHAPE")
+        points = [row[point_shape] for row in point_layer.rows]
+        polygons = [row[polygon_shape] for row in polygon_layer.rows]
+
+        out_fields = ["OBJECTID"]
+        for layer in inputs:
+            out_fields.append(_unique_name(f"FID_{layer.source}", out_fields))
+            if layer is point_layer:
+                point_fid = out_fields[-1]
+            out_fields.extend(_unique_name(field, out_fields) for field in _attribute_fields(layer))
+        out_fields.append("SHAPE")
+
+        point_positions = _attribute_positions(point_layer)
+        polygon_positions = _attribute_positions(polygon_layer)
+
+        out_rows = []
+        for point_pos, polygon_pos in self._join(polygon_name, points, polygons):
+            point_row = point_layer.rows[point_pos]
+            polygon_row = polygon_layer.rows[polygon_pos]
+            point_values = tuple(point_row[position] for position in point_positions)
+            polygon_values = tuple(polygon_row[position] for position in polygon_positions)
+            values = point_values + polygon_values if point_first else polygon_values + point_values
+            out_rows.append((len(out_rows) + 1,) + values + (points[point_pos],))
+
+        # The join pairs are ordered by point position: the rows follow the order of the point layer
+        ordered_by = point_fid if point_layer.ordered_by == "OBJECTID" else None
+        self.layers[out_fc] = MemoryLayer(out_fields, out_rows, POINT, _base_name(out_fc), ordered_by)
+        logging.debug(f"Intersected {point_name} with {polygon_name}: {len(out_rows)} rows")
+        return out_fc
+
+    def geometry_cursor(self, layer: str, fields: List[str], where: Optional[str] = None,
+                        bbox: Optional[BBox] = None):
+        rows = self.search_cursor(layer, ["SHAPE"] + list(fields), where)
+        if bbox is None:
+            return rows
+        return (row for row in rows if row[0] is not None and bbox_intersects(geometry_bbox(row[0]), bbox))
+
+    def search_cursor(self, layer: str, fields: Union[List[str], str], where: Optional[str] = None,
+                      order_by: Optional[str] = None):
+        """
+        With `order_by`, the held rows are sorted by reference, NULLs first as in SQL, and the projected rows are still
+        streamed
+        """
+        source = self._get_layer(layer)
+        if isinstance(fields, str):
+            fields = [fields]
+        positions = [source.field_position(field) for field in fields]
+        if len(positions) == 1:
+            position = positions[0]
+            project = lambda row: (row[position],)
+        else:
+            project = itemgetter(*positions)
+
+        rows = source.rows
+        if where:
+            rows = filter(compile_where(where, source.fields), rows)
+        if order_by and order_by != source.ordered_by:
+            order_position = source.field_position(order_by)
+            rows = list(rows)
+            try:
+                rows.sort(key=itemgetter(order_position))
+            except TypeError:  # NULLs cannot be compared with values
+                rows.sort(key=lambda row: (row[order_position] is not None, row[order_position]))
+        yield from map(project, rows)
+
+    def fetch_by_oids(self, layer: str, oids: Iterable[int], fields: Union[List[str], str],
+                      chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE) -> Dict[int, Tuple]:
+        """A single pass over the rows: the layer is already in memory, so every chunk would repeat the same scan"""
+        source = self._get_layer(layer)
+        fields = [fields] if isinstance(fields, str) else list(fields)
+        oid_position = source.field_position("OBJECTID")
+        positions = [source.field_position(field) for field in fields]
+        wanted = {int(oid) for oid in oids}
+        return {
+            row[oid_position]: tuple(row[position] for position in positions)
+            for row in source.rows if row[oid_position] in wanted
+        }
+
+    def delete(self, fc: str) -> None:
+        self.layers.pop(fc, None)
+        self._polygon_indexes.pop(fc, None)
+        self._source_files.pop(fc, None)
+
+    def release_selection(self, selection: str) -> None:
+        self.delete(selection)
+
+    def relationship_classes(self) -> Dict[str, RelationshipClass]:
+        return dict(self.relationships)
+
+    def _get_layer(self, layer: str) -> MemoryLayer:
+        try:
+            return self.layers[layer]
+        except KeyError:
+            raise KeyError(f"Layer '{layer}' does not exist in the in-memory workspace") from None
+
+    def polygon_index(self, layer: str, polygons, use_numpy: bool = True) -> PolygonIndex:
+        """The PolygonIndex of the polygons of a layer, from the index cache while the layer version is unchanged"""
+        version = self._layer_version(layer) if self.index_cache is not None else None
+        return cached_polygon_index(polygons, self.index_cache, version, use_numpy)
+
+    def _layer_version(self, layer: str) -> Optional[dict]:
+        """What identifies the content of a layer for the index cache (see the class docstring), None if nothing does"""
+        if layer not in self._source_files:
+            return None
+        path = self._source_files[layer]
+        if path is not None:
+            return {"layer": layer, **file_version(path)}
+        source = self.layers[layer]
+        upper_fields = [field.upper() for field in source.fields]
+        if self.edit_date_field and self.edit_date_field.upper() in upper_fields:
+            position = source.field_position(self.edit_date_field)
+            edit_dates = [str(row[position]) for row in source.rows if row[position] is not None]
+            return {"layer": layer, "row_count": len(source.rows), "max_edit_date": max(edit_dates, default=None)}
+        if self.index_cache.content_hash:
+            return {"layer": layer, **layer_fingerprint(source.rows, source.field_position("SHAPE"),
+                                                        source.field_position("OBJECTID"))}
+        return None
+
+    def _join(self, polygon_name: str, points, polygons):
+        """The index of a polygon layer is built once and reused by every intersect on that layer"""
+        index = self._polygon_indexes.get(polygon_name)
+        if index is None:
+            index = self._polygon_indexes[polygon_name] = self.polygon_index(polygon_name, polygons, self.use_numpy)
+        return index.join(points)
+
+
+def _attribute_fields(layer: MemoryLayer) -> List[str]:
+    return [field for field in layer.fields if field.upper() not in ("OBJECTID", "SHAPE")]
+
+
+def _attribute_positions(layer: MemoryLayer) -> List[int]:
+    """Positions of the values written to an intersect output: OBJECTID (as FID) first, then every attribute"""
+    return [layer.field_position("OBJECTID")] + [
+        position for position, field in enumerate(layer.fields) if field.upper() not in ("OBJECTID", "SHAPE")
+    ]
+
+
+def _oid_order(fields: Sequence[str], rows: List[tuple]) -> Optional[str]:
+    """"OBJECTID" when the rows are sorted by OBJECTID (see MemoryLayer.ordered_by), else None"""
+    upper_fields = [field.upper() for field in fields]
+    if "OBJECTID" not in upper_fields:
+        return None
+    oids = list(map(itemgetter(upper_fields.index("OBJECTID")), rows))
+    try:
+        return "OBJECTID" if all(map(lt, oids, islice(oids, 1, None))) else None
+    except TypeError:  # NULL OBJECTIDs
+        return None
+
+
+def _base_name(layer: str) -> str:
+    """main.Room -> Room, in_memory\\intersected -> intersected"""
+    return layer.replace("\\", "/").split("/")[-1].split(".")[-1]
+
+
+def _unique_name(field: str, existing: List[str]) -> str:
+    """Suffixes duplicate field names with _1, _2... the way arcpy does in tool outputs"""
+    taken = {name.upper() for name in existing}
+    name = field
+    suffix = 0
+    while name.upper() in taken:
+        suffix += 1
+        name = f"{field}_{suffix}"
+    return name
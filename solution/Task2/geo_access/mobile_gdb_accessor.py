@@ -0,0 +1,255 @@
+import logging
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from geo_access.factory import create_index_cache
+from geo_access.gdb_geometry import decode_envelope, decode_geometry
+from geo_access.geo_accessor import DEFAULT_FETCH_CHUNK_SIZE, GeoDataAccessor
+from geo_access.memory_accessor import InMemoryAccessor, MemoryLayer, POINT, POLYGON, _FIELD_ALIASES, _base_name
+from geo_access.relationship_class import RelationshipClass
+from spatial.geometry import BBox, bbox_intersects, bbox_union
+from spatial.index_cache import IndexCache, file_version
+
+
+class MobileGeodatabaseAccessor(InMemoryAccessor):
+    """
+    GeoDataAccessor reading an Esri Mobile Geodatabase (.geodatabase) directly with sqlite3, without arcpy.
+    Feature classes are read from the SQLite tables and streamed in batches with `fetchmany`.
+    Intersect outputs and selections are kept in memory and joined by the InMemoryAccessor engine.
+
+    The SHAPE blobs are decoded in Python (WKB, GeoPackage binary or Esri shape buffer). Geometries stored in
+    Esri's compressed ST_Geometry format need Esri's stgeometry_sqlite extension: pass its path as
+    `st_geometry_extension` and the blobs are converted with ST_AsBinary in SQL.
+    The cached polygon indexes of the tables are keyed by the modification time and size of the geodatabase file and
+    of its write-ahead log: any write to the geodatabase rebuilds them.
+    """
+
+    def __init__(self, batch_size: int = 10000, st_geometry_extension: Optional[str] = None,
+                 index_cache: Optional[IndexCache] = None, edit_date_field: Optional[str] = None):
+        super().__init__(index_cache=index_cache, edit_date_field=edit_date_field)
+        self.batch_size = batch_size
+        self.st_geometry_extension = st_geometry_extension
+        self.connection: Optional[sqlite3.Connection] = None
+        self.workspace_path: Optional[str] = None
+        self._tables: Dict[str, List[str]] = {}
+        self._loaded_sources = set()
+        self._envelope_indexes: Dict[str, Tuple[str, Optional[BBox]]] = {}
+
+    @classmethod
+    def from_config(cls, config) -> "MobileGeodatabaseAccessor":
+        return cls(config.cursor_batch_size, config.st_geometry_extension, create_index_cache(config),
+                   config.edit_date_field)
+
+    def set_workspace(self, workspace_path: str) -> None:
+        if self.connection is not None:
+            self.connection.close()
+        self.connection = sqlite3.connect(f"file:{workspace_path}?mode=ro", uri=True)
+        self.workspace_path = workspace_path
+        if self.st_geometry_extension:
+            self.connection.enable_load_extension(True)
+            self.connection.load_extension(self.st_geometry_extension)
+        self._tables.clear()
+        # The tables and indexes loaded from the previous geodatabase would otherwise hide the tables of this one
+        for layer in self._loaded_sources:
+            self.layers.pop(layer, None)
+            self._source_files.pop(layer, None)
+        self._polygon_indexes.clear()
+        self._loaded_sources.clear()
+        self._envelope_indexes.clear()
+        logging.debug(f"Opened mobile geodatabase {workspace_path}")
+
+    def get_count(self, layer: str) -> int:
+        if not self._is_source(layer):
+            return super().get_count(layer)
+        (count,) = self.connection.execute(f"SELECT COUNT(*) FROM {_quote_table(layer)}").fetchone()
+        return count
+
+    def select_layer_by_attribute(self, layer: str, where_clause: str) -> str:
+        if not self._is_source(layer):
+            return super().select_layer_by_attribute(layer, where_clause)
+        self._selection_counter += 1
+        selection_name = f"{layer}_selection_{self._selection_counter}"
+        self.layers[selection_name] = self._read_table(layer, where_clause)
+        return selection_name
+
+    def search_cursor(self, layer: str, fields: Union[List[str], str], where: Optional[str] = None,
+                      order_by: Optional[str] = None):
+        if not self._is_source(layer):
+            yield from super().search_cursor(layer, fields, where, order_by)
+            return
+        yield from self._source_rows(layer, [fields] if isinstance(fields, str) else fields, where,
+                                     order_by=order_by)
+
+    def geometry_cursor(self, layer: str, fields: List[str], where: Optional[str] = None,
+                        bbox: Optional[BBox] = None):
+        """
+        With a bbox, source tables are filtered in SQL with their envelope index (see _envelope_index),
+        so only the rows near the bbox are read and decoded
+        """
+        if bbox is None or not self._is_source(layer):
+            return super().geometry_cursor(layer, fields, where, bbox)
+        return self._source_rows(layer, ["SHAPE"] + list(fields), where, bbox)
+
+    def extent(self, layer: str) -> Optional[BBox]:
+        """Source tables: the extent computed while their envelope index is built"""
+        if not self._is_source(layer):
+            return super().extent(layer)
+        return self._envelope_index(layer)[1]
+
+    def _envelope_index(self, layer: str) -> Tuple[str, Optional[BBox]]:
+        """
+        The envelope index of a source table, built the first time a bbox or extent query needs it: a SQLite R*Tree
+        in the temp schema (rowid -> envelope), filled with one pass over the table that reads the envelopes from the
+        headers of the SHAPE blobs (see gdb_geometry.decode_envelope). It lives until the workspace is closed.
+        Returns: the name of the R*Tree table and the extent of the layer
+        """
+        index = self._envelope_indexes.get(layer)
+        if index is None:
+            table = f"temp.{_quote(f'envelopes_{len(self._envelope_indexes) + 1}')}"
+            self.connection.execute(f"CREATE VIRTUAL TABLE {table} USING rtree(id, min_x, max_x, min_y, max_y)")
+            extent = None
+            cursor = self.connection.execute(f"SELECT rowid, {self._shape_expression()} FROM {_quote_table(layer)}")
+            try:
+                while True:
+                    batch = cursor.fetchmany(self.batch_size)
+                    if not batch:
+                        break
+                    envelopes = []
+                    for rowid, blob in batch:
+                        if blob is not None:
+                            min_x, min_y, max_x, max_y = bbox = decode_envelope(blob)
+                            envelopes.append((rowid, min_x, max_x, min_y, max_y))
+                            extent = bbox if extent is None else bbox_union(extent, bbox)
+                    self.connection.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?)", envelopes)
+            finally:
+                cursor.close()
+            index = self._envelope_indexes[layer] = (table, extent)
+            logging.debug(f"Built the envelope index of '{layer}'")
+        return index
+
+    def _source_rows(self, layer: str, fields: List[str], where: Optional[str] = None, bbox: Optional[BBox] = None,
+                     order_by: Optional[str] = None):
+        """
+        The rows of a source table, streamed in batches. With a bbox, the rows whose SHAPE envelope intersects it,
+        with `order_by`, sorted by SQLite
+        """
+        columns = [_FIELD_ALIASES.get(field.upper(), field) for field in fields]
+        shape_positions = [position for position, column in enumerate(columns) if column.upper() == "SHAPE"]
+        select = ", ".join(self._shape_expression() if column.upper() == "SHAPE" else _quote(column) for column in columns)
+        sql = f"SELECT {select} FROM {_quote_table(layer)}"
+        conditions, parameters = [], []
+        if bbox is not None:
+            # The R*Tree stores 32-bit floats rounded outwards: it may return a few more rows, checked exactly below
+            conditions.append(f"rowid IN (SELECT id FROM {self._envelope_index(layer)[0]} "
+                              f"WHERE max_x >= ? AND min_x <= ? AND max_y >= ? AND min_y <= ?)")
+            min_x, min_y, max_x, max_y = bbox
+            parameters = [min_x, max_x, min_y, max_y]
+        if where:
+            conditions.append(f"({where})")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if order_by:
+            sql += f" ORDER BY {_quote(_FIELD_ALIASES.get(order_by.upper(), order_by))}"
+
+        cursor = self.connection.execute(sql, parameters)
+        try:
+            while True:
+                batch = cursor.fetchmany(self.batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    if bbox is not None:
+                        blob = row[shape_positions[0]]
+                        if blob is None or not bbox_intersects(decode_envelope(blob), bbox):
+                            continue
+                    if shape_positions:
+                        row = list(row)
+                        for position in shape_positions:
+                            if row[position] is not None:
+                                row[position] = decode_geometry(row[position])
+                        row = tuple(row)
+                    yield row
+        finally:
+            cursor.close()
+
+    def fetch_by_oids(self, layer: str, oids: Iterable[int], fields: Union[List[str], str],
+                      chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE) -> Dict[int, Tuple]:
+        """Source tables are queried with OBJECTID IN (...) chunks, which SQLite answers from the primary key"""
+        if not self._is_source(layer):
+            return super().fetch_by_oids(layer, oids, fields, chunk_size)
+        return GeoDataAccessor.fetch_by_oids(self, layer, oids, fields, chunk_size)
+
+    def delete(self, fc: str) -> None:
+        super().delete(fc)
+        self._loaded_sources.discard(fc)
+
+    def relationship_classes(self) -> Dict[str, RelationshipClass]:
+        """Reads the definitions of all relationship classes from the GDB_Items table"""
+        rows = self.connection.execute(
+            "SELECT Name, Definition FROM GDB_Items WHERE Definition LIKE '%<DERelationshipClassInfo%'"
+        ).fetchall()
+        return {name: RelationshipClass.from_definition(name, definition) for name, definition in rows}
+
+    def _get_layer(self, layer: str) -> MemoryLayer:
+        """Source tables are loaded into memory the first time an intersect or selection needs them"""
+        if layer not in self.layers and self._is_source(layer):
+            self.layers[layer] = self._read_table(layer)
+            self._loaded_sources.add(layer)
+            logging.debug(f"Loaded {len(self.layers[layer].rows)} rows of '{layer}' into memory")
+        return super()._get_layer(layer)
+
+    def _read_table(self, layer: str, where: Optional[str] = None) -> MemoryLayer:
+        """
+        The rows of a source table as a MemoryLayer, sorted by OBJECTID: the OBJECTID of a geodatabase table is its
+        INTEGER PRIMARY KEY, which SQLite reads in order without sorting
+        """
+        fields = self._table_fields(layer)
+        ordered_by = "OBJECTID" if "OBJECTID" in (field.upper() for field in fields) else None
+        rows = list(self.search_cursor(layer, fields, where=where, order_by=ordered_by))
+        return MemoryLayer(fields, rows, _geometry_type(fields, rows), _base_name(layer), ordered_by)
+
+    def _layer_version(self, layer: str) -> Optional[dict]:
+        if not self._is_source(layer):
+            return super()._layer_version(layer)
+        version = {"layer": layer, **file_version(self.workspace_path)}
+        wal_path = f"{self.workspace_path}-wal"
+        if os.path.exists(wal_path):
+            version["wal"] = file_version(wal_path)
+        return version
+
+    def _is_source(self, layer: str) -> bool:
+        if layer in self.layers and layer not in self._loaded_sources:
+            return False
+        return self.connection is not None and bool(self._table_fields(layer))
+
+    def _table_fields(self, layer: str) -> List[str]:
+        fields = self._tables.get(layer)
+        if fields is None:
+            schema, _, table = layer.rpartition(".")
+            pragma = f"PRAGMA {_quote(schema)}.table_info({_quote(table)})" if schema else f"PRAGMA table_info({_quote(table)})"
+            fields = [row[1] for row in self.connection.execute(pragma)]
+            self._tables[layer] = fields
+        return fields
+
+    def _shape_expression(self) -> str:
+        return "ST_AsBinary(SHAPE)" if self.st_geometry_extension else "SHAPE"
+
+
+def _geometry_type(fields: List[str], rows: List[tuple]) -> Optional[str]:
+    upper_fields = [field.upper() for field in fields]
+    if "SHAPE" not in upper_fields:
+        return None
+    shape = upper_fields.index("SHAPE")
+    for row in rows:
+        if row[shape] is not None:
+            return POINT if isinstance(row[shape], tuple) else POLYGON
+    return None
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _quote_table(layer: str) -> str:
+    """main.Room -> "main"."Room" """
+    return ".".join(_quote(part) for part in layer.split("."))
@@ -0,0 +1,71 @@
+import xml.etree.ElementTree as ElementTree
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class RelationshipClass:
+    """
+    Definition of a geodatabase relationship class.
+    For simple (non-attributed) relationships the destination table holds `origin_foreign_key`,
+    which contains the `origin_primary_key` value of the related origin feature.
+    Attributed (many-to-many) relationships have their own table named after the relationship class
+    with both `origin_foreign_key` and `destination_foreign_key`.
+    """
+    name: str
+    origin: str
+    destination: str
+    cardinality: str
+    origin_primary_key: str
+    origin_foreign_key: str
+    is_attributed: bool = False
+    destination_primary_key: Optional[str] = None
+    destination_foreign_key: Optional[str] = None
+
+    @classmethod
+    def from_definition(cls, name: str, definition: str) -> "RelationshipClass":
+        """Parses the DERelationshipClassInfo XML stored in the GDB_Items table"""
+        root = ElementTree.fromstring(definition)
+
+        def text(tag):
+            element = root.find(f".//{tag}")
+            return element.text if element is not None else None
+
+        keys = {}
+        for key in root.iter("RelationshipClassKey"):
+            keys[key.findtext("KeyRole")] = key.findtext("ObjectKeyName")
+
+        return cls(
+            name=name,
+            origin=text("OriginClassNames/Name"),
+            destination=text("DestinationClassNames/Name"),
+            cardinality=text("Cardinality"),
+            origin_primary_key=keys.get("esriRelKeyRoleOriginPrimary"),
+            origin_foreign_key=keys.get("esriRelKeyRoleOriginForeign"),
+            is_attributed=(text("IsAttributed") or "false").lower() == "true",
+            destination_primary_key=keys.get("esriRelKeyRoleDestinationPrimary"),
+            destination_foreign_key=keys.get("esriRelKeyRoleDestinationForeign"),
+        )
+
+    def to_definition(self) -> str:
+        """The DERelationshipClassInfo XML read by `from_definition`"""
+        root = ElementTree.Element("DERelationshipClassInfo")
+        ElementTree.SubElement(root, "Name").text = self.name
+        ElementTree.SubElement(root, "Cardinality").text = self.cardinality
+        ElementTree.SubElement(root, "IsAttributed").text = str(self.is_attributed).lower()
+        for tag, class_name in (("OriginClassNames", self.origin), ("DestinationClassNames", self.destination)):
+            ElementTree.SubElement(ElementTree.SubElement(root, tag), "Name").text = class_name
+        keys = {
+            "OriginClassKeys": [(self.origin_primary_key, "esriRelKeyRoleOriginPrimary"),
+                                (self.origin_foreign_key, "esriRelKeyRoleOriginForeign")],
+            "DestinationClassKeys": [(self.destination_primary_key, "esriRelKeyRoleDestinationPrimary"),
+                                     (self.destination_foreign_key, "esriRelKeyRoleDestinationForeign")],
+        }
+        for tag, class_keys in keys.items():
+            element = ElementTree.SubElement(root, tag)
+            for field_name, role in class_keys:
+                if field_name is not None:
+                    key = ElementTree.SubElement(element, "RelationshipClassKey")
+                    ElementTree.SubElement(key, "ObjectKeyName").text = field_name
+                    ElementTree.SubElement(key, "KeyRole").text = role
+        return ElementTree.tostring(root, encoding="unicode")
@@ -0,0 +1,125 @@
+import logging
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from geo_access.geo_accessor import DEFAULT_FETCH_CHUNK_SIZE, GeoDataAccessor
+from geo_access.relationship_class import RelationshipClass
+from spatial.crs import CrsTransformer, get_transformer, normalize_crs
+from spatial.geometry import BBox, bbox_intersects, geometry_bbox
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+class ReprojectingAccessor(GeoDataAccessor):
+    """
+    Wraps any GeoDataAccessor and gives the geometries of every layer in one target CRS: geometry_cursor rows are read
+    `batch_size` at a time and all the coordinates of a batch are transformed with one call (see spatial.crs),
+    before they reach the spatial joins. Layers missing from `layer_crs` are already in the target CRS.
+    The intersect of the backends does not reproject, so it is refused for layers in different CRSs: the combined,
+    tiled, feature store and relationship class checks read the layers with geometry_cursor instead.
+    Attributes the interface does not define (e.g. add_layer) are passed through.
+    """
+
+    def __init__(self, accessor: GeoDataAccessor, layer_crs: Dict[str, str], target_crs: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.accessor = accessor
+        self.target_crs = normalize_crs(target_crs)
+        self.layer_crs = {layer: normalize_crs(crs) for layer, crs in layer_crs.items()}
+        self.batch_size = batch_size
+
+    @classmethod
+    def wrap(cls, accessor: GeoDataAccessor, config) -> GeoDataAccessor:
+        """The accessor wrapped when `layer_crs` of the config has a layer outside the target CRS, else the accessor"""
+        layer_crs = getattr(config, "layer_crs", None) or {}
+        target_crs = target_crs_of(config)
+        if target_crs is None or all(normalize_crs(crs) == normalize_crs(target_crs) for crs in layer_crs.values()):
+            return accessor
+        return cls(accessor, layer_crs, target_crs, getattr(config, "cursor_batch_size", DEFAULT_BATCH_SIZE))
+
+    def __getattr__(self, name):
+        return getattr(self.accessor, name)
+
+    def transformer(self, layer: str) -> Optional[CrsTransformer]:
+        """The transformer of a layer to the target CRS, None for a layer already in the target CRS"""
+        source = self.layer_crs.get(layer, self.target_crs)
+        return None if source == self.target_crs else get_transformer(source, self.target_crs)
+
+    def set_workspace(self, workspace_path: str) -> None:
+        return self.accessor.set_workspace(workspace_path)
+
+    def get_count(self, layer: str) -> int:
+        return self.accessor.get_count(layer)
+
+    def select_layer_by_attribute(self, layer: str, where_clause: str) -> str:
+        return self.accessor.select_layer_by_attribute(layer, where_clause)
+
+    def intersect(self, layers: List[str], out_fc: str) -> str:
+        crs = {self.layer_crs.get(layer, self.target_crs) for layer in layers}
+        if len(crs) > 1:
+            raise ValueError(f"Cannot intersect {', '.join(layers)}: their CRSs {', '.join(sorted(crs))} differ. "
+                             f"Use combined_checks or tile_memory_mb")
+        return self.accessor.intersect(layers, out_fc)
+
+    def search_cursor(self, layer: str, fields: Union[List[str], str],
+                      where: Optional[str] = None, order_by: Optional[str] = None) -> Iterator[Tuple]:
+        return self.accessor.search_cursor(layer, fields, where=where, order_by=order_by)
+
+    def geometry_cursor(self, layer: str, fields: List[str], where: Optional[str] = None,
+                        bbox: Optional[BBox] = None) -> Iterator[Tuple]:
+        transformer = self.transformer(layer)
+        if transformer is None:
+            return self.accessor.geometry_cursor(layer, fields, where=where, bbox=bbox)
+        return self._reprojected_rows(layer, fields, where, bbox, transformer)
+
+    def extent(self, layer: str) -> Optional[BBox]:
+        transformer = self.transformer(layer)
+        if transformer is None:
+            return self.accessor.extent(layer)
+        return GeoDataAccessor.extent(self, layer)
+
+    def polygon_index(self, layer: str, polygons: Sequence, use_numpy: bool = True):
+        """The index cache of the wrapped accessor keys the stored coordinates: reprojected layers are only built"""
+        if self.transformer(layer) is None:
+            return self.accessor.polygon_index(layer, polygons, use_numpy)
+        return GeoDataAccessor.polygon_index(self, layer, polygons, use_numpy)
+
+    def fetch_by_oids(self, layer: str, oids: Iterable[int], fields: Union[List[str], str],
+                      chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE) -> Dict[int, Tuple]:
+        return self.accessor.fetch_by_oids(layer, oids, fields, chunk_size)
+
+    def delete(self, fc: str) -> None:
+        return self.accessor.delete(fc)
+
+    def release_selection(self, selection: str) -> None:
+        return self.accessor.release_selection(selection)
+
+    def relationship_classes(self) -> Dict[str, RelationshipClass]:
+        return self.accessor.relationship_classes()
+
+    def _reprojected_rows(self, layer: str, fields: List[str], where: Optional[str], bbox: Optional[BBox],
+                          transformer: CrsTransformer) -> Iterator[Tuple]:
+        source_bbox = None
+        if bbox is not None:
+            # The envelope of the bbox in the layer's CRS holds every candidate, the exact filter runs on the result
+            source_bbox = get_transformer(self.target_crs, transformer.source).transform_bbox(bbox)
+            if source_bbox is None:
+                return
+        rows = iter(self.accessor.geometry_cursor(layer, fields, where=where, bbox=source_bbox))
+        count = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            geometries = transformer.transform_geometries([row[0] for row in batch])
+            for geometry, row in zip(geometries, batch):
+                if bbox is None or (geometry is not None and bbox_intersects(geometry_bbox(geometry), bbox)):
+                    yield (geometry,) + tuple(row[1:])
+            count += len(batch)
+        logging.debug(f"Transformed {count} geometries of layer '{layer}' from {transformer.source} to {self.target_crs}")
+
+
+def target_crs_of(config) -> Optional[str]:
+    """The CRS the checks run in: `target_crs` of the config, by default the CRS of the StationDetail layer"""
+    target_crs = getattr(config, "target_crs", None)
+    if target_crs is None:
+        target_crs = (getattr(config, "layer_crs", None) or {}).get(config.station_detail_layer_name)
+    return target_crs
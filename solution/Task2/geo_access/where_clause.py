@@ -0,0 +1,158 @@
+import operator
+import re
+from typing import Callable, Dict, List, Tuple
+
+Predicate = Callable[[tuple], bool]
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | '(?P<string>(?:[^']|'')*)'
+      | (?P<op><>|!=|<=|>=|=|<|>)
+      | (?P<punct>[(),])
+      | (?P<word>[A-Za-z_][A-Za-z0-9_.]*)
+    )""", re.VERBOSE)
+
+_KEYWORDS = {"AND", "OR", "NOT", "IN", "IS", "NULL"}
+
+_OPERATORS = {
+    "=": operator.eq,
+    "<>": operator.ne,
+    "!=": operator.ne,
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+}
+
+
+def _tokenize(where: str) -> List[Tuple[str, object]]:
+    tokens = []
+    position = 0
+    where = where.rstrip()
+    while position < len(where):
+        match = _TOKEN_RE.match(where, position)
+        if not match:
+            raise ValueError(f"Invalid where clause near '{where[position:]}'")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "number":
+            tokens.append(("literal", float(value) if "." in value else int(value)))
+        elif kind == "string":
+            tokens.append(("literal", value.replace("''", "'")))
+        elif kind == "word" and value.upper() in _KEYWORDS:
+            tokens.append(("keyword", value.upper()))
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens, field_positions: Dict[str, int]):
+        self.tokens = tokens
+        self.position = 0
+        self.field_positions = field_positions
+
+    def peek(self, kind, value=None):
+        if self.position >= len(self.tokens):
+            return False
+        token_kind, token_value = self.tokens[self.position]
+        return token_kind == kind and (value is None or token_value == value)
+
+    def take(self, kind, value=None):
+        if not self.peek(kind, value):
+            found = self.tokens[self.position][1] if self.position < len(self.tokens) else "end of clause"
+            raise ValueError(f"Invalid where clause: expected {value or kind}, found '{found}'")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token[1]
+
+    def parse(self) -> Predicate:
+        predicate = self.parse_or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Invalid where clause: unexpected '{self.tokens[self.position][1]}'")
+        return predicate
+
+    def parse_or(self) -> Predicate:
+        predicates = [self.parse_and()]
+        while self.peek("keyword", "OR"):
+            self.take("keyword", "OR")
+            predicates.append(self.parse_and())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda row: any(predicate(row) for predicate in predicates)
+
+    def parse_and(self) -> Predicate:
+        predicates = [self.parse_not()]
+        while self.peek("keyword", "AND"):
+            self.take("keyword", "AND")
+            predicates.append(self.parse_not())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda row: all(predicate(row) for predicate in predicates)
+
+    def parse_not(self) -> Predicate:
+        if self.peek("keyword", "NOT"):
+            self.take("keyword", "NOT")
+            predicate = self.parse_not()
+            return lambda row: not predicate(row)
+        if self.peek("punct", "("):
+            self.take("punct", "(")
+            predicate = self.parse_or()
+            self.take("punct", ")")
+            return predicate
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> Predicate:
+        field = self.take("word")
+        position = self.field_positions.get(field.upper())
+        if position is None:
+            raise ValueError(f"Unknown field '{field}' in where clause")
+
+        if self.peek("keyword", "IS"):
+            self.take("keyword", "IS")
+            negate = self.peek("keyword", "NOT")
+            if negate:
+                self.take("keyword", "NOT")
+            self.take("keyword", "NULL")
+            if negate:
+                return lambda row: row[position] is not None
+            return lambda row: row[position] is None
+
+        negate = self.peek("keyword", "NOT")
+        if negate:
+            self.take("keyword", "NOT")
+        if self.peek("keyword", "IN"):
+            self.take("keyword", "IN")
+            self.take("punct", "(")
+            values = {self.take("literal")}
+            while self.peek("punct", ","):
+                self.take("punct", ",")
+                values.add(self.take("literal"))
+            self.take("punct", ")")
+            if negate:
+                return lambda row: row[position] is not None and row[position] not in values
+            return lambda row: row[position] in values
+        if negate:
+            raise ValueError("Invalid where clause: NOT must be followed by IN")
+
+        compare = _OPERATORS[self.take("op")]
+        value = self.take("literal")
+        return lambda row: row[position] is not None and compare(row[position], value)
+
+
+def compile_where(where: str, fields: List[str]) -> Predicate:
+    """
+    Compiles a SQL-like where clause (the subset used with arcpy cursors) into a row predicate.
+    Supports comparisons, IN / NOT IN lists, IS [NOT] NULL, AND / OR / NOT and parentheses.
+    Field names are case-insensitive, the same as in a geodatabase.
+    Args:
+        where: the where clause, e.g. "OBJECTID IN (1, 2) AND STATION_GUID IS NOT NULL"
+        fields: the field names of the rows the predicate will be called with
+
+    Returns: a function that returns True for the rows matching the clause
+
+    """
+    field_positions = {field.upper(): position for position, field in enumerate(fields)}
+    return _Parser(_tokenize(where), field_positions).parse()
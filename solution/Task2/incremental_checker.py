@@ -0,0 +1,134 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+from logic_checker import LogicChecker
+from spatial.geometry import geometry_bytes
+
+MANIFEST_VERSION = 2
+
+
+class IncrementalChecker:
+    """
+    Incremental room-to-station check. A run manifest stores, for every Room and StationDetail, its GLOBALID,
+    OBJECTID and a fingerprint, together with the report of the run. The next run only re-checks:
+        - new or changed rooms
+        - rooms inside new or changed StationDetails
+        - rooms whose previous entries point to a changed or deleted StationDetail
+    and merges the result into the previous report. Without a manifest the run is a full check.
+
+    The fingerprint is a hash of the attributes the check depends on plus either the geometry or, when
+    `edit_date_field` is set (e.g. the editor tracking field last_edited_date), the edit date.
+    With edit dates no geometry is read for unchanged features.
+    """
+
+    def __init__(self, checker: LogicChecker, manifest_path: str, edit_date_field: Optional[str] = None):
+        self.checker = checker
+        self.accessor = checker.accessor
+        self.config = checker.config
+        self.manifest_path = manifest_path
+        self.edit_date_field = edit_date_field
+
+    def check_room_to_station_relationships(self) -> List[Tuple]:
+        """
+        Returns: the full report (previous entries + re-checked ones), in the format of
+        LogicChecker.check_room_to_station_relationships
+
+        """
+        rooms = self._snapshot(self.config.room_layer_name)
+        details = self._snapshot(self.config.station_detail_layer_name)
+        manifest = self._load_manifest()
+
+        if manifest is None:
+            logging.info("No run manifest found, checking all rooms")
+            entries = self._to_report_entries(self.checker.check_room_to_station_subset(), details)
+        else:
+            entries = self._check_changes(manifest, rooms, details)
+
+        entries.sort(key=lambda entry: (rooms[entry[0]][0], details[entry[1]][0]))
+        self._save_manifest(rooms, details, entries)
+        return [tuple(entry[2:]) for entry in entries]
+
+    def _check_changes(self, manifest: dict, rooms: Dict[str, list], details: Dict[str, list]) -> List[list]:
+        previous_rooms, previous_details = manifest["rooms"], manifest["station_details"]
+        changed_rooms = {guid for guid, room in rooms.items() if previous_rooms.get(guid) != room[1]}
+        changed_details = {guid for guid, detail in details.items() if previous_details.get(guid) != detail[1]}
+        stale_details = changed_details | (previous_details.keys() - details.keys())
+
+        recheck_rooms = changed_rooms | {
+            entry[0] for entry in manifest["report"] if entry[1] in stale_details and entry[0] in rooms
+        }
+        logging.info(
+            f"Incremental check: {len(changed_rooms)} changed rooms, {len(stale_details)} changed station details, "
+            f"{len(recheck_rooms)} rooms to re-check"
+        )
+
+        kept = [entry for entry in manifest["report"]
+                if entry[0] in rooms and entry[0] not in recheck_rooms and entry[1] not in stale_details]
+        rechecked = self.checker.check_room_to_station_subset(room_oids={rooms[guid][0] for guid in recheck_rooms})
+        in_changed_details = self.checker.check_room_to_station_subset(
+            station_detail_oids={details[guid][0] for guid in changed_details}
+        )
+
+        entries = kept + self._to_report_entries(rechecked, details)
+        entries += [entry for entry in self._to_report_entries(in_changed_details, details)
+                    if entry[0] not in recheck_rooms]
+        return entries
+
+    def _snapshot(self, layer: str) -> Dict[str, list]:
+        """GLOBALID -> [OBJECTID, fingerprint] for every feature of the layer"""
+        snapshot = {}
+        if self.edit_date_field:
+            rows = self.accessor.search_cursor(layer, ["OBJECTID", "GLOBALID", "STATION_GUID", self.edit_date_field])
+        else:
+            rows = self.accessor.geometry_cursor(layer, ["OBJECTID", "GLOBALID", "STATION_GUID"])
+        for row in rows:
+            if self.edit_date_field:
+                oid, guid, station_guid, changed_by = row
+            else:
+                changed_by, oid, guid, station_guid = row
+            changed_by = repr(changed_by).encode("utf-8") if self.edit_date_field else geometry_bytes(changed_by)
+            fingerprint = hashlib.blake2b(repr(station_guid).encode("utf-8") + changed_by, digest_size=8).hexdigest()
+            snapshot[guid] = [oid, fingerprint]
+        return snapshot
+
+    def _to_report_entries(self, subset_entries, details: Dict[str, list]) -> List[list]:
+        """(room OID, detail OID, entry) -> [room GUID, detail GUID, room GUID, logical, geometrical]"""
+        detail_guids = {detail[0]: guid for guid, detail in details.items()}
+        return [[entry[0], detail_guids[fid_detail], *entry] for _, fid_detail, entry in subset_entries]
+
+    def _load_manifest(self) -> Optional[dict]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.loads(f.read())
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("database_path") != self.config.database_path:
+            logging.info(f"Run manifest {self.manifest_path} belongs to another database or version, ignoring it")
+            return None
+        for key in ("rooms", "station_details"):
+            columns = manifest[key]
+            manifest[key] = dict(zip(columns["guids"], columns["fingerprints"]))
+        return manifest
+
+    def _save_manifest(self, rooms: Dict[str, list], details: Dict[str, list], entries: List[list]) -> None:
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "database_path": self.config.database_path,
+            "rooms": _to_columns(rooms),
+            "station_details": _to_columns(details),
+            "report": entries,
+        }
+        temporary_path = f"{self.manifest_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(manifest))
+        os.replace(temporary_path, self.manifest_path)
+
+
+def _to_columns(snapshot: Dict[str, list]) -> dict:
+    """GLOBALIDs and fingerprints as two columns, much faster to (de)serialize than one list per feature"""
+    return {
+        "guids": list(snapshot),
+        "fingerprints": [feature[1] for feature in snapshot.values()],
+    }
+
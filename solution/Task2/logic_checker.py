@@ -1,17 +1,46 @@
 import logging
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from config import Config
-from geo_access.geo_accessor import GeoDataAccessor
+from geo_access.geo_accessor import DEFAULT_FETCH_CHUNK_SIZE, GeoDataAccessor
+from spatial.geometry import polygon_area
+from spatial.join import PolygonIndex
+from topology_checker import choose_station_detail
+
+ROOM_TO_STATION = "room_to_station"
+ROOM_TO_ROOMDETAIL = "room_to_roomdetail"
+STATION_TO_STATIONDETAIL = "station_to_stationdetail"
+# Intersect rows read between two progress reports of a resumable check (see the `progress` of the iter_ methods)
+PROGRESS_ROWS = 10000
 
 
 class LogicChecker:
 
-    def __init__(self, config: Config, geo_accessor: GeoDataAccessor):
+    def __init__(self, config: Config, geo_accessor: GeoDataAccessor, scratch_suffix: Optional[str] = None):
+        """
+        Args:
+            config: the configuration
+            geo_accessor: the accessor of the workspace `config.database_path`
+            scratch_suffix: appended to the names of the temporary intersects, so that checkers of several workspaces
+                sharing the in_memory workspace do not overwrite each other's outputs
+        """
         self.config = config
         self.accessor = geo_accessor
+        self.scratch_suffix = scratch_suffix
+        self._guid_indexes: Dict[str, Dict[int, str]] = {}
+        self._subset_counter = 0
+        # Set from the topology pre-pass (TopologyChecker.check_all_topology): the STATION_GUID chosen for every room
+        # inside several StationDetails, by room OBJECTID. When set, such a room is compared only with its chosen
+        # station instead of once per StationDetail containing it
+        self.station_choices: Optional[Dict[int, str]] = None
 
         self.accessor.set_workspace(config.database_path)
         logging.debug(f"LogicChecker initialized with workspace: {config.database_path}")
 
+    def scratch_name(self, name: str) -> str:
+        """The name of a temporary output in the in_memory workspace"""
+        return f"in_memory\\{name}_{self.scratch_suffix}" if self.scratch_suffix else f"in_memory\\{name}"
+
     def get_layer_count(self, layer: str) -> int:
         count = self.accessor.get_count(layer)
         logging.debug(f"Layer '{layer}' contains {count} features")
@@ -20,7 +49,7 @@ class LogicChecker:
     def _check_point_to_poly_relationship(self, point_layer, poly_layer, intersect_target_fields):
         """
         Checks if the logical relationship between a point and polygon classes is correct
-        (Room-RoomDetail) or (Station-StationDetail)
+        (Room-RoomDetail) or (Station-StationDetail). The list version of _iter_point_to_poly_relationship.
         Args:
             point_layer: the point layer (Room/Station)
             poly_layer: the polygon layer (RoomDetail/StationDetail)
@@ -37,32 +66,68 @@ class LogicChecker:
             the actual id of the point inside the polygon (geometrically)
             )
         """
+        return list(self._iter_point_to_poly_relationship(point_layer, poly_layer, intersect_target_fields))
+
+    def _iter_point_to_poly_relationship(self, point_layer, poly_layer, intersect_target_fields,
+                                         after_oid: Optional[int] = None, progress=None) -> Iterator[Tuple]:
+        """
+        Generator version of _check_point_to_poly_relationship: yields the incorrect relationships
+        while the intersect is read, so they can be written without keeping them in memory.
+        The temporary intersect is deleted when the generator is exhausted or closed.
+        With `after_oid`, only the points with a larger OBJECTID are checked. With a `progress`, the intersect is read
+        by increasing point OBJECTID, so that a run can be resumed after the last OBJECTID it finished
+        (see checkpoint.CheckpointedChecker): the point and polygon OBJECTIDs of every relationship are also appended
+        to the `progress.oids` list (see relationships_of_oids), and every PROGRESS_ROWS intersect rows, valid or not,
+        `progress.finished(oid)` is called with an OBJECTID whose relationships, and those of the points before it,
+        were all yielded. The OBJECTIDs of the point read last, after it, may already be in `progress.oids`.
+        """
         logging.debug(
-            f"Checking point-to-polygon relationship: point={point_layer}, poly={poly_layer}"
+            f"Checking point-to-polygon relationship: point={point_layer}, poly={poly_layer}, after_oid={after_oid}"
         )
-        invalid_entries = []
-
-        intersected = "in_memory\\intersected"
-        self.accessor.intersect([point_layer, poly_layer], intersected)
+        points = self._points_after(point_layer, after_oid)
+        intersected = self.scratch_name("intersected")
+        self.accessor.intersect([points, poly_layer], intersected)
         logging.debug(f"Intersect created at {intersected}")
 
-        for row in self.accessor.search_cursor(intersected, intersect_target_fields):
-            fid_point, fid_poly, point_guid_logical = row
-            point_guid_geometrical = self.get_guid(point_layer, f"OBJECTID = {fid_point}")
-            if point_guid_logical != point_guid_geometrical:
-                poly_guid = self.get_guid(poly_layer, f"OBJECTID = {fid_poly}")
-                entry = (poly_guid, point_guid_logical, point_guid_geometrical)
-                invalid_entries.append(entry)
-                logging.debug(
-                    f"Invalid relationship found: poly_guid={poly_guid}, "
-                    f"logical_point_guid={point_guid_logical}, "
-                    f"geometrical_point_guid={point_guid_geometrical}"
-                )
-
-        self.accessor.delete(intersected)
-        logging.debug(f"Deleted temporary intersect {intersected}")
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        try:
+            if progress is None:
+                chunks = [self.accessor.search_cursor(intersected, intersect_target_fields)]
+            else:
+                chunks = _chunks(self.accessor.search_cursor(intersected, intersect_target_fields,
+                                                             order_by=intersect_target_fields[0]))
+                keep = progress.oids.append
+            for rows in chunks:
+                for row in rows:
+                    fid_point, fid_poly, point_guid_logical = row
+                    point_guid_geometrical = self.get_guid_by_oid(point_layer, fid_point)
+                    if point_guid_logical != point_guid_geometrical:
+                        poly_guid = self.get_guid_by_oid(poly_layer, fid_poly)
+                        if debug:
+                            logging.debug(
+                                f"Invalid relationship found: poly_guid={poly_guid}, "
+                                f"logical_point_guid={point_guid_logical}, "
+                                f"geometrical_point_guid={point_guid_geometrical}"
+                            )
+                        entry = poly_guid, point_guid_logical, point_guid_geometrical
+                        if progress is not None:
+                            keep(fid_point)
+                            keep(fid_poly)
+                        yield entry
+                if progress is not None:
+                    # The rows of the point read last may continue in the next chunk
+                    progress.finished(fid_point - 1)
+        finally:
+            self.accessor.delete(intersected)
+            if points != point_layer:
+                self.accessor.release_selection(points)
+            logging.debug(f"Deleted temporary intersect {intersected}")
 
-        return invalid_entries
+    def _points_after(self, point_layer: str, after_oid: Optional[int]) -> str:
+        """The point layer, or a selection of its points after `after_oid` (released by the caller)"""
+        if after_oid is None:
+            return point_layer
+        return self.accessor.select_layer_by_attribute(point_layer, f"OBJECTID > {after_oid}")
 
     def get_guid(self, layer: str, where: str) -> str:
         """
@@ -86,6 +151,63 @@ class LogicChecker:
             logging.debug(f"Resolved GUID={guid} from layer={layer}")
             return guid
 
+    def get_guid_index(self, layer: str) -> Dict[int, str]:
+        """
+        Reads the OBJECTID -> GLOBALID mapping of a layer with a single cursor pass.
+        The mapping is built once per layer and shared by all checks of this checker.
+        Args:
+            layer: the path to a layer
+
+        Returns: a dict with the GUID of every feature in the layer, keyed by OBJECTID
+
+        """
+        index = self._guid_indexes.get(layer)
+        if index is None:
+            index = {oid: guid for oid, guid in self.accessor.search_cursor(layer, ["OBJECTID", "GLOBALID"])}
+            self._guid_indexes[layer] = index
+            logging.debug(f"Built GUID index for layer '{layer}' with {len(index)} features")
+        return index
+
+    def get_guid_by_oid(self, layer: str, oid: int) -> str:
+        """
+
+        Args:
+            layer: the path to a layer
+            oid: the OBJECTID of the feature
+
+        Returns: the GUID of the feature, resolved from the layer's GUID index
+
+        """
+        guid = self.get_guid_index(layer).get(oid)
+        if guid is None:
+            raise RuntimeError(f"Expected exactly 1 feature for OBJECTID = {oid} in {layer}")
+        return guid
+
+    def get_guids_by_oids(self, layer: str, oids: Iterable[int]) -> Dict[int, str]:
+        """
+        The GUIDs of a set of features: from the layer's GUID index when it is already built, otherwise
+        read with chunked OBJECTID IN (...) queries (GeoDataAccessor.fetch_by_oids) instead of reading the whole layer.
+        Args:
+            layer: the path to a layer
+            oids: the OBJECTIDs of the features
+
+        Returns: the GUID of every feature, keyed by OBJECTID
+
+        """
+        oids = set(oids)
+        index = self._guid_indexes.get(layer)
+        if index is not None:
+            guids = {oid: index[oid] for oid in oids if oid in index}
+        else:
+            chunk_size = getattr(self.config, "fetch_chunk_size", DEFAULT_FETCH_CHUNK_SIZE)
+            rows = self.accessor.fetch_by_oids(layer, oids, ["GLOBALID"], chunk_size)
+            guids = {oid: row[0] for oid, row in rows.items()}
+            logging.debug(f"Fetched {len(guids)} GUIDs from layer '{layer}' in chunks of {chunk_size}")
+        missing = oids - guids.keys()
+        if missing:
+            raise RuntimeError(f"Expected exactly 1 feature for OBJECTID = {min(missing)} in {layer}")
+        return guids
+
     def check_room_to_roomdetail_relationships(self):
         return self._check_point_to_poly_relationship(
             self.config.room_layer_name,
@@ -100,6 +222,26 @@ class LogicChecker:
             ["FID_Station", "FID_StationDetail", "STATION_GUID"]
         )
 
+    def iter_room_to_roomdetail_relationships(self, after_oid: Optional[int] = None,
+                                              progress=None) -> Iterator[Tuple]:
+        return self._iter_point_to_poly_relationship(
+            self.config.room_layer_name,
+            self.config.room_detail_layer_name,
+            ["FID_Room", "FID_RoomDetail", "ROOM_GUID"],
+            after_oid,
+            progress
+        )
+
+    def iter_station_to_stationdetail_relationships(self, after_oid: Optional[int] = None,
+                                                    progress=None) -> Iterator[Tuple]:
+        return self._iter_point_to_poly_relationship(
+            self.config.station_layer_name,
+            self.config.station_detail_layer_name,
+            ["FID_Station", "FID_StationDetail", "STATION_GUID"],
+            after_oid,
+            progress
+        )
+
     def check_room_to_station_relationships(self):
         """
         The main logical check of the task. For every room that is contained inside a station polygon,
@@ -111,30 +253,284 @@ class LogicChecker:
         correct (geometrically) station guid
         )
 
+        """
+        return list(self.iter_room_to_station_relationships())
+
+    def iter_room_to_station_relationships(self, after_oid: Optional[int] = None,
+                                           progress=None) -> Iterator[Tuple]:
+        """
+        Generator version of check_room_to_station_relationships: yields the incorrect results while the
+        intersect is read. The temporary intersect is deleted when the generator is exhausted or closed.
+        `after_oid` and `progress` are the same as for the point-to-polygon checks, with the room OBJECTIDs.
         """
         logging.debug(
             f"Checking room-to-station relationships: room_layer={self.config.room_layer_name}, "
-            f"station_detail_layer={self.config.station_detail_layer_name}"
+            f"station_detail_layer={self.config.station_detail_layer_name}, after_oid={after_oid}"
         )
-        invalid_entries = []
-
-        intersected = "in_memory\\intersected"
-        self.accessor.intersect([self.config.room_layer_name, self.config.station_detail_layer_name], intersected)
+        room_layer = self.config.room_layer_name
+        rooms = self._points_after(room_layer, after_oid)
+        intersected = self.scratch_name("intersected")
+        self.accessor.intersect([rooms, self.config.station_detail_layer_name], intersected)
         logging.debug(f"Intersect created at {intersected}")
 
-        for row in self.accessor.search_cursor(intersected, ["STATION_GUID", "STATION_GUID_1", "FID_Room"]):
-            logical_station_id, geometrical_station_id, fid_room = row
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        try:
+            fields = ["STATION_GUID", "STATION_GUID_1", "FID_Room", "FID_StationDetail"]
+            if progress is None:
+                chunks = [self.accessor.search_cursor(intersected, fields)]
+            else:
+                chunks = _chunks(self.accessor.search_cursor(intersected, fields, order_by="FID_Room"))
+                keep = progress.oids.append
+            for rows in chunks:
+                for row in rows:
+                    logical_station_id, geometrical_station_id, fid_room, fid_station_detail = row
+                    if self._is_discarded(fid_room, geometrical_station_id):
+                        continue
+                    if logical_station_id != geometrical_station_id:
+                        room_guid = self.get_guid_by_oid(self.config.room_layer_name, fid_room)
+                        if debug:
+                            logging.debug(
+                                f"Invalid room-station relationship: room_guid={room_guid}, "
+                                f"logical_station={logical_station_id}, "
+                                f"geometrical_station={geometrical_station_id}"
+                            )
+                        entry = room_guid, logical_station_id, geometrical_station_id
+                        if progress is not None:
+                            keep(fid_room)
+                            keep(fid_station_detail)
+                        yield entry
+                if progress is not None:
+                    progress.finished(fid_room - 1)
+        finally:
+            self.accessor.delete(intersected)
+            if rooms != room_layer:
+                self.accessor.release_selection(rooms)
+            logging.debug(f"Deleted temporary intersect {intersected}")
+
+    def relationships_of_oids(self, key: str, oids: List[int]) -> List[Tuple]:
+        """
+        The relationships a check appended to its `progress` (see _iter_point_to_poly_relationship), read again from
+        their OBJECTIDs with chunked OBJECTID IN (...) queries (GeoDataAccessor.fetch_by_oids).
+        Args:
+            key: ROOM_TO_ROOMDETAIL, STATION_TO_STATIONDETAIL or ROOM_TO_STATION
+            oids: the point OBJECTID and the polygon OBJECTID of every relationship, one after the other
+
+        Returns: the relationships in the format and the order of the iter_ method of the check
+
+        """
+        config = self.config
+        pairs = list(zip(oids[::2], oids[1::2]))
+        point_oids = {point_oid for point_oid, _ in pairs}
+        polygon_oids = {polygon_oid for _, polygon_oid in pairs}
+        if key == ROOM_TO_STATION:
+            rooms = self._fetch_rows(config.room_layer_name, point_oids, ["GLOBALID", "STATION_GUID"])
+            details = self._fetch_rows(config.station_detail_layer_name, polygon_oids, ["STATION_GUID"])
+            return [rooms[room_oid] + details[detail_oid] for room_oid, detail_oid in pairs]
+        if key == ROOM_TO_ROOMDETAIL:
+            point_layer, polygon_layer, guid_field = config.room_layer_name, config.room_detail_layer_name, "ROOM_GUID"
+        else:
+            point_layer, polygon_layer, guid_field = (config.station_layer_name, config.station_detail_layer_name,
+                                                      "STATION_GUID")
+        # The logical GUID of a point-to-polygon relationship is a field of the polygon
+        points = self._fetch_rows(point_layer, point_oids, ["GLOBALID"])
+        polygons = self._fetch_rows(polygon_layer, polygon_oids, ["GLOBALID", guid_field])
+        return [polygons[polygon_oid] + points[point_oid] for point_oid, polygon_oid in pairs]
+
+    def check_room_to_station_subset(self, room_oids: Optional[Iterable[int]] = None,
+                                     station_detail_oids: Optional[Iterable[int]] = None) -> List[Tuple[int, int, Tuple]]:
+        """
+        The room-to-station check limited to a subset of the rooms and/or StationDetail polygons
+        (a shard of a parallel run or the changed features of an incremental run).
+        Args:
+            room_oids: the OBJECTIDs of the rooms to check. All rooms if None
+            station_detail_oids: the OBJECTIDs of the StationDetail polygons to check against. All if None
+
+        Returns:
+            (room OBJECTID, StationDetail OBJECTID, invalid entry) for every invalid room in the subset,
+            sorted by the two OBJECTIDs so that subsets can be merged in a deterministic order.
+            The entries have the format of check_room_to_station_relationships.
+        """
+        layers = []
+        for layer, oids in ((self.config.room_layer_name, room_oids),
+                            (self.config.station_detail_layer_name, station_detail_oids)):
+            if oids is None:
+                layers.append(layer)
+                continue
+            oids = sorted(oids)
+            if not oids:
+                return []
+            oid_list = ", ".join(str(oid) for oid in oids)
+            layers.append(self.accessor.select_layer_by_attribute(layer, f"OBJECTID IN ({oid_list})"))
+
+        self._subset_counter += 1
+        intersected = self.scratch_name(f"intersected_subset_{self._subset_counter}")
+        self.accessor.intersect(layers, intersected)
+
+        invalid_rows = []
+        fields = ["STATION_GUID", "STATION_GUID_1", "FID_Room", "FID_StationDetail"]
+        for logical_station_id, geometrical_station_id, fid_room, fid_detail in self.accessor.search_cursor(intersected, fields):
+            if self._is_discarded(fid_room, geometrical_station_id):
+                continue
             if logical_station_id != geometrical_station_id:
-                room_guid = self.get_guid(self.config.room_layer_name, f"OBJECTID = {fid_room}")
-                entry = (room_guid, logical_station_id, geometrical_station_id)
-                invalid_entries.append(entry)
-                logging.debug(
-                    f"Invalid room-station relationship: room_guid={room_guid}, "
-                    f"logical_station={logical_station_id}, "
-                    f"geometrical_station={geometrical_station_id}"
-                )
+                invalid_rows.append((fid_room, fid_detail, logical_station_id, geometrical_station_id))
+        # Only the GUIDs of the invalid rooms are read, in batches
+        room_guids = self.get_guids_by_oids(self.config.room_layer_name, {row[0] for row in invalid_rows})
+        invalid_entries = [(fid_room, fid_detail, (room_guids[fid_room], logical_station_id, geometrical_station_id))
+                           for fid_room, fid_detail, logical_station_id, geometrical_station_id in invalid_rows]
 
         self.accessor.delete(intersected)
-        logging.debug(f"Deleted temporary intersect {intersected}")
+        for layer in layers:
+            if layer not in (self.config.room_layer_name, self.config.station_detail_layer_name):
+                self.accessor.release_selection(layer)
+        invalid_entries.sort(key=lambda entry: entry[:2])
+        logging.debug(f"Room-station subset check found {len(invalid_entries)} invalid rooms")
+        return invalid_entries
+
+    def check_all_relationships(self, check_rooms: bool = False, check_stations: bool = False) -> Dict[str, List[Tuple]]:
+        """
+        Runs the room-to-station check and the optional point-to-polygon checks in a single pass.
+        Every layer is read once with the accessor's geometry_cursor and every polygon layer is indexed once:
+        the Room points are joined with both StationDetail and RoomDetail, and the StationDetail index
+        is shared by the room-to-station and station-to-stationdetail checks. No intersect outputs are created.
+        Args:
+            check_rooms: also check the Room-RoomDetail relationships
+            check_stations: also check the Station-StationDetail relationships
+
+        Returns:
+            The invalid entries of every enabled check, keyed by ROOM_TO_STATION, ROOM_TO_ROOMDETAIL and
+            STATION_TO_STATIONDETAIL, in the same formats as the single check methods
+        """
+        logging.debug(f"Running combined checks: rooms={check_rooms}, stations={check_stations}")
+        rooms = self._read_features(self.config.room_layer_name, ["GLOBALID", "STATION_GUID"])
+        station_details = self._read_features(self.config.station_detail_layer_name, ["GLOBALID", "STATION_GUID"])
+        room_details = None
+        if check_rooms:
+            room_details = self._read_features(self.config.room_detail_layer_name, ["GLOBALID", "ROOM_GUID"])
+        stations = self._read_features(self.config.station_layer_name, ["GLOBALID"]) if check_stations else None
+        # Whole layers: their indexes come from the accessor, which may have them in its index cache
+        station_index = self.accessor.polygon_index(self.config.station_detail_layer_name,
+                                                    [detail[0] for detail in station_details])
+        room_detail_index = None
+        if room_details is not None:
+            room_detail_index = self.accessor.polygon_index(self.config.room_detail_layer_name,
+                                                            [detail[0] for detail in room_details])
+        return self.check_features(rooms, station_details, room_details, stations, station_index, room_detail_index)
 
+    def check_features(self, rooms: List[Tuple], station_details: List[Tuple], room_details: Optional[List[Tuple]] = None,
+                       stations: Optional[List[Tuple]] = None, station_index: Optional[PolygonIndex] = None,
+                       room_detail_index: Optional[PolygonIndex] = None) -> Dict[str, List[Tuple]]:
+        """
+        The checks of check_all_relationships on already read geometry_cursor rows (e.g. the features of one tile).
+        Args:
+            rooms: (point, GLOBALID, STATION_GUID) rows
+            station_details: (polygon, GLOBALID, STATION_GUID) rows
+            room_details: (polygon, GLOBALID, ROOM_GUID) rows. The Room-RoomDetail check runs only if they are given
+            stations: (point, GLOBALID) rows. The Station-StationDetail check runs only if they are given
+            station_index: an index over the station_details polygons, built here if missing
+            room_detail_index: an index over the room_details polygons, built here if missing
+
+        Returns: the invalid entries of every check that ran, in the format of check_all_relationships
+        """
+        room_points = [room[0] for room in rooms]
+        if station_index is None:
+            station_index = PolygonIndex([detail[0] for detail in station_details])
+        pairs = station_index.join(room_points)
+        if self.station_choices is not None:
+            pairs = _resolve_ambiguous_rooms(pairs, station_details)
+
+        results = {ROOM_TO_STATION: []}
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        for room_pos, detail_pos in pairs:
+            _, room_guid, logical_station_id = rooms[room_pos]
+            geometrical_station_id = station_details[detail_pos][2]
+            if logical_station_id != geometrical_station_id:
+                results[ROOM_TO_STATION].append((room_guid, logical_station_id, geometrical_station_id))
+                if debug:
+                    logging.debug(
+                        f"Invalid room-station relationship: room_guid={room_guid}, "
+                        f"logical_station={logical_station_id}, "
+                        f"geometrical_station={geometrical_station_id}"
+                    )
+
+        if room_details is not None:
+            if room_detail_index is None:
+                room_detail_index = PolygonIndex([detail[0] for detail in room_details])
+            results[ROOM_TO_ROOMDETAIL] = self._invalid_point_to_poly(
+                rooms, room_points, room_details, room_detail_index
+            )
+
+        if stations is not None:
+            results[STATION_TO_STATIONDETAIL] = self._invalid_point_to_poly(
+                stations, [station[0] for station in stations], station_details, station_index
+            )
+
+        return results
+
+    def _is_discarded(self, fid_room: int, geometrical_station_id: str) -> bool:
+        """True for an intersect row of a room inside several StationDetails with a station that was not chosen"""
+        if self.station_choices is None:
+            return False
+        chosen = self.station_choices.get(fid_room)
+        return chosen is not None and chosen != geometrical_station_id
+
+    def _fetch_rows(self, layer: str, oids: Set[int], fields: List[str]) -> Dict[int, Tuple]:
+        chunk_size = getattr(self.config, "fetch_chunk_size", DEFAULT_FETCH_CHUNK_SIZE)
+        rows = self.accessor.fetch_by_oids(layer, oids, fields, chunk_size)
+        missing = oids - rows.keys()
+        if missing:
+            raise RuntimeError(f"Expected exactly 1 feature for OBJECTID = {min(missing)} in {layer}")
+        return rows
+
+    def _read_features(self, layer: str, fields: List[str]) -> List[Tuple]:
+        features = [row for row in self.accessor.geometry_cursor(layer, fields) if row[0] is not None]
+        logging.debug(f"Read {len(features)} features from layer '{layer}'")
+        return features
+
+    @staticmethod
+    def _invalid_point_to_poly(points, point_coordinates, polygons, polygon_index: PolygonIndex) -> List[Tuple]:
+        """
+        Same result as _check_point_to_poly_relationship, computed from already read features.
+        `points` rows are (geometry, GLOBALID, ...), `polygons` rows are (geometry, GLOBALID, logical point GUID)
+        """
+        invalid_entries = []
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        for point_pos, poly_pos in polygon_index.join(point_coordinates):
+            point_guid_geometrical = points[point_pos][1]
+            _, poly_guid, point_guid_logical = polygons[poly_pos]
+            if point_guid_logical != point_guid_geometrical:
+                invalid_entries.append((poly_guid, point_guid_logical, point_guid_geometrical))
+                if debug:
+                    logging.debug(
+                        f"Invalid relationship found: poly_guid={poly_guid}, "
+                        f"logical_point_guid={point_guid_logical}, "
+                        f"geometrical_point_guid={point_guid_geometrical}"
+                    )
         return invalid_entries
+
+
+def _resolve_ambiguous_rooms(pairs: Iterable[Tuple[int, int]], station_details: List[Tuple]) -> Iterator[Tuple[int, int]]:
+    """
+    The (room position, StationDetail position) pairs of a join, keeping for a room inside several StationDetails only
+    the one chosen by the topology rule (topology_checker.choose_station_detail)
+    """
+    details_by_room: Dict[int, List[int]] = {}
+    for room_pos, detail_pos in pairs:
+        details_by_room.setdefault(room_pos, []).append(detail_pos)
+    for room_pos, detail_positions in details_by_room.items():
+        if len(detail_positions) > 1:
+            detail_positions = [choose_station_detail(
+                (polygon_area(station_details[detail_pos][0]), station_details[detail_pos][1], detail_pos)
+                for detail_pos in detail_positions
+            )]
+        for detail_pos in detail_positions:
+            yield room_pos, detail_pos
+
+
+def _chunks(rows: Iterable[Tuple]) -> Iterator[Iterator[Tuple]]:
+    """
+    The rows in chunks of PROGRESS_ROWS rows, none of them empty. The chunks are read lazily, without copying the rows
+    into lists: every chunk must be read to its end before the next one is taken
+    """
+    rows = iter(rows)
+    for first in rows:
+        yield chain((first,), islice(rows, PROGRESS_ROWS - 1))
@@ -1,62 +1,208 @@
-from logic_checker import LogicChecker
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
 from config import Config
-from geo_access.arcpy_accessor import ArcpyAccessor
+from checkpoint import CheckpointedChecker
+from geo_access.factory import create_accessor
+from geo_access.instrumented_accessor import InstrumentedAccessor
+from incremental_checker import IncrementalChecker
+from parallel_checker import check_feature_store_parallel, check_room_to_station_relationships_parallel
+from relationship_checker import (RelationshipChecker, ROOM_TO_ROOMDETAIL_ANOMALIES, ROOM_TO_STATION_ANOMALIES,
+                                  STATION_TO_STATIONDETAIL_ANOMALIES)
+from rule_engine import RULE_REPORT_FIELDS, RuleEngine, load_rules
+from store_checker import StoreChecker, write_feature_store
+from tiled_checker import TiledChecker
+from topology_checker import TOPOLOGY_REPORT, TopologyChecker
 from utils.log_format import configure_logging
-from utils.csv_generator import CsvGenerator
+from utils.report_factory import create_report_writer
+from utils.report_writer import CountingRows
+import cProfile
 import logging
 import os
+from typing import Dict, Optional
 
+# Report name and fields of the anomalies found by the relationship class checks
+ANOMALY_REPORTS = {
+    ROOM_TO_STATION_ANOMALIES: (
+        "room_station_anomalies", ["RoomId", "Anomaly", "CurrentStationId", "CorrectStationId"]
+    ),
+    ROOM_TO_ROOMDETAIL_ANOMALIES: (
+        "room_detail_anomalies", ["PointDetail_GUID", "Anomaly", "Point_GUID_logical", "Point_GUID_geometric"]
+    ),
+    STATION_TO_STATIONDETAIL_ANOMALIES: (
+        "station_detail_anomalies", ["StationDetail_GUID", "Anomaly", "Point_GUID_logical", "Point_GUID_geometric"]
+    ),
+}
 
-def perform_logical_checks(config):
-    checker = LogicChecker(config, ArcpyAccessor())
-    csv = CsvGenerator(os.path.dirname(__file__))
 
-    if config.check_rooms_relationships:
-        logging.info("Checking room to room detail relations...")
-        invalid_entries = checker.check_room_to_roomdetail_relationships()
+def perform_logical_checks(config, accessor, report_directory: Optional[str] = None,
+                           scratch_suffix: Optional[str] = None, resume: bool = False) -> Dict[str, dict]:
+    """
+    Runs the checks enabled in the config and writes their reports.
+    Args:
+        config: the configuration
+        accessor: the accessor of the workspace `config.database_path`
+        report_directory: the directory of the reports, the directory of this file by default
+        scratch_suffix: a suffix for the names of the temporary intersects (see LogicChecker)
+        resume: continue from the checkpoint `checkpoint_file` of a failed run (see CheckpointedChecker)
 
-        logging.info("Saving the result to a CSV file")
-        csv_path = csv.generate_csv(
+    Returns: the path and the row count of every written report, keyed by report name
+    """
+    checker = LogicChecker(config, accessor, scratch_suffix)
+    report_writer = create_report_writer(config.report_format, report_directory or os.path.dirname(__file__))
+    reports = {}
+
+    serial = not (config.feature_store or config.relationship_checks or config.tile_memory_mb or config.combined_checks
+                  or config.incremental or config.workers > 1)
+    checkpoint = None
+    if config.checkpoint_file and serial:
+        checkpoint = CheckpointedChecker(checker, config.checkpoint_file, resume, config.checkpoint_seconds)
+    elif config.checkpoint_file or resume:
+        logging.warning("Checkpoints are written by the serial checks only, this run cannot be resumed")
+
+    def write_report(name, header_row, rows, key: Optional[str] = None) -> str:
+        # The report of a check finished before a resume is not written again
+        finished = checkpoint.finished_report(key) if checkpoint and key else None
+        if finished is not None:
+            logging.info(f"The {key} check finished before the resume, its report is {finished['path']}")
+            reports[name] = finished
+            return finished["path"]
+        rows = CountingRows(rows)
+        path = report_writer.generate_report(name, header_row, rows)
+        reports[name] = {"path": path, "rows": rows.count}
+        if checkpoint and key:
+            checkpoint.report_written(key, reports[name])
+        return path
+
+    if config.topology_checks:
+        logging.info("Checking the topology of the polygon layers...")
+        topology_issues, checker.station_choices = TopologyChecker(config, accessor).check_all_topology()
+        report_path = write_report(*TOPOLOGY_REPORT, topology_issues)
+        logging.info(f"{len(topology_issues)} topology issues were saved to {report_path}")
+        parallel = config.workers > 1 and not (config.tile_memory_mb or config.combined_checks or config.incremental)
+        if config.feature_store or config.relationship_checks or parallel:
+            logging.warning("Rooms inside several StationDetails are resolved by the serial, incremental, combined "
+                            "and tiled checks only")
+
+    if config.feature_store:
+        logging.info(f"Reading the layers into the feature store {config.feature_store}...")
+        store = write_feature_store(config, accessor, config.check_rooms_relationships, config.check_stations_relationships)
+        logging.info("Checking all relations on the feature store...")
+        if config.workers > 1:
+            results = check_feature_store_parallel(config, config.workers, config.check_rooms_relationships,
+                                                   config.check_stations_relationships)
+        else:
+            results = StoreChecker(config, store).check_all_relationships(config.check_rooms_relationships,
+                                                                          config.check_stations_relationships)
+    elif config.relationship_checks:
+        logging.info("Checking all relations with the relationship classes...")
+        results = RelationshipChecker(config, accessor).check_all_relationships(config.check_rooms_relationships,
+                                                                                config.check_stations_relationships)
+    elif config.tile_memory_mb:
+        logging.info(f"Checking all relations in tiles of at most {config.tile_memory_mb} MB...")
+        tiled_checker = TiledChecker(checker, config.tile_memory_mb)
+        results = tiled_checker.check_all_relationships(config.check_rooms_relationships,
+                                                        config.check_stations_relationships)
+    elif config.combined_checks:
+        logging.info("Checking all relations in a single pass...")
+        results = checker.check_all_relationships(config.check_rooms_relationships, config.check_stations_relationships)
+    else:
+        # The serial checks are generators: they run while their CSV file is written
+        results = {}
+        if config.check_rooms_relationships:
+            logging.info("Checking room to room detail relations...")
+            results[ROOM_TO_ROOMDETAIL] = checkpoint.iter_check(ROOM_TO_ROOMDETAIL) if checkpoint \
+                else checker.iter_room_to_roomdetail_relationships()
+
+        if config.check_stations_relationships:
+            logging.info("Checking station to station detail relations...")
+            results[STATION_TO_STATIONDETAIL] = checkpoint.iter_check(STATION_TO_STATIONDETAIL) if checkpoint \
+                else checker.iter_station_to_stationdetail_relationships()
+
+        logging.info("Checking the room to station geometric relations...")
+        if checkpoint:
+            results[ROOM_TO_STATION] = checkpoint.iter_check(ROOM_TO_STATION)
+        elif config.incremental:
+            incremental_checker = IncrementalChecker(checker, config.manifest_file, config.edit_date_field)
+            results[ROOM_TO_STATION] = incremental_checker.check_room_to_station_relationships()
+        elif config.workers > 1:
+            results[ROOM_TO_STATION] = check_room_to_station_relationships_parallel(config, config.workers)
+        else:
+            results[ROOM_TO_STATION] = checker.iter_room_to_station_relationships()
+
+    if ROOM_TO_ROOMDETAIL in results:
+        logging.info(f"Saving the result to a {config.report_format} report")
+        report_path = write_report(
             "invalid_room_relations",
             ["PointDetail_GUID", "Point_GUID_logical", "Point_GUID_geometric"],
-            invalid_entries
+            results[ROOM_TO_ROOMDETAIL],
+            ROOM_TO_ROOMDETAIL
         )
-        logging.info(f"The data with invalid room to room detail relations was saved to {csv_path}")
+        logging.info(f"The data with invalid room to room detail relations was saved to {report_path}")
 
-    if config.check_stations_relationships:
-        logging.info("Checking station to station detail relations...")
-        invalid_entries = checker.check_station_to_stationdetail_relationships()
-
-        logging.info("Saving the result to a CSV file")
-        csv_path = csv.generate_csv(
+    if STATION_TO_STATIONDETAIL in results:
+        logging.info(f"Saving the result to a {config.report_format} report")
+        report_path = write_report(
             "invalid_station_relations",
             ["StationDetail_GUID", "Point_GUID_logical", "Point_GUID_geometric"],
-            invalid_entries
+            results[STATION_TO_STATIONDETAIL],
+            STATION_TO_STATIONDETAIL
         )
-        logging.info(f"The data with invalid station to station detail relations was saved to {csv_path}")
+        logging.info(f"The data with invalid station to station detail relations was saved to {report_path}")
 
-    logging.info("Checking the room to station geometric relations...")
-    invalid_relations = checker.check_room_to_station_relationships()
+    for key, (report_name, fields) in ANOMALY_REPORTS.items():
+        if key in results:
+            report_path = write_report(report_name, fields, results[key])
+            logging.info(f"{len(results[key])} relationship anomalies were saved to {report_path}")
 
-    logging.info("Saving the result to a CSV file")
-    csv_path = csv.generate_csv(
+    logging.info(f"Saving the result to a {config.report_format} report")
+    report_path = write_report(
         "invalid_relations",
         ["RoomId", "CurrentStationId", "CorrectStationId"],
-        invalid_relations
+        results[ROOM_TO_STATION],
+        ROOM_TO_STATION
     )
-    logging.info(f"The data with invalid room to station relations was saved to {csv_path}")
+    logging.info(f"The data with invalid room to station relations was saved to {report_path}")
+
+    if getattr(config, "rules", None):
+        logging.info("Checking the relationship rules...")
+        for name, rows in RuleEngine(config, accessor).check(load_rules(config)).items():
+            report_path = write_report(name, RULE_REPORT_FIELDS, rows)
+            logging.info(f"{len(rows)} findings of rule '{name}' were saved to {report_path}")
+    if checkpoint:
+        checkpoint.remove()
+    return reports
 
 
-def main():
-    config = Config.from_file()
-    configure_logging(config.log_file, config.log_level)
+def main(config_file: str = "config.json", resume: bool = False) -> int:
+    """Runs the checks of the configuration file. Returns the exit status: 0 on success, 1 when the run failed"""
+    config = Config.from_file(config_file)
+    configure_logging(config.log_file, config.log_level, config.log_queue_size, config.log_sample_rate,
+                      config.log_max_mb, config.log_backup_count, config.log_drop_when_full)
+    accessor = None
+    profiler = cProfile.Profile() if config.profile_file else None
     try:
         logging.info("Start processing...")
-        perform_logical_checks(config)
+        accessor = create_accessor(config)
+        if config.instrumentation_file:
+            accessor = InstrumentedAccessor(accessor)
+        if profiler:
+            profiler.enable()
+        perform_logical_checks(config, accessor, resume=resume)
         logging.info("Process finished successfully")
+        return 0
     except Exception as ex:
         logging.error(f"An error occurred: {ex}")
+        if config.checkpoint_file and os.path.exists(config.checkpoint_file):
+            logging.info(f"Run the check with --resume to continue from the checkpoint {config.checkpoint_file}")
+        return 1
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(config.profile_file)
+            logging.info(f"cProfile statistics were saved to {config.profile_file}")
+        if isinstance(accessor, InstrumentedAccessor):
+            accessor.write_summary(config.instrumentation_file)
+            logging.info(f"Accessor timings were saved to {config.instrumentation_file}")
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+import heapq
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+from config import Config
+from geo_access.factory import create_accessor
+from geo_access.feature_store import FeatureStore
+from logic_checker import LogicChecker
+from store_checker import StoreChecker
+
+# The checker of the current worker process, created once by the pool initializer
+_worker_checker = None
+
+
+def check_room_to_station_relationships_parallel(config: Config, workers: int) -> List[Tuple]:
+    """
+    Parallel version of LogicChecker.check_room_to_station_relationships.
+    The StationDetail polygons are split into one shard of consecutive OBJECTIDs per worker. Every shard is checked
+    in a ProcessPoolExecutor worker that opens its own accessor (its own workspace/connection) once, and the results
+    are merged by room and StationDetail OBJECTID, so the output doesn't depend on the worker count.
+    Args:
+        config: the configuration. It's passed to the workers, so it must be picklable
+        workers: the number of worker processes
+
+    Returns: the invalid entries, in the format of check_room_to_station_relationships
+
+    """
+    accessor = create_accessor(config)
+    accessor.set_workspace(config.database_path)
+    oids = sorted(oid for (oid,) in accessor.search_cursor(config.station_detail_layer_name, ["OBJECTID"]))
+    shards = split_into_shards(oids, workers)
+    logging.debug(f"Checking {len(oids)} station details in {len(shards)} shards with {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,)) as pool:
+        shard_results = list(pool.map(_check_shard, shards))
+
+    return [entry for _, _, entry in heapq.merge(*shard_results, key=lambda result: result[:2])]
+
+
+def check_feature_store_parallel(config: Config, workers: int, check_rooms: bool = False,
+                                 check_stations: bool = False) -> Dict[str, List[Tuple]]:
+    """
+    Parallel version of StoreChecker.check_all_relationships on the already written store `config.feature_store`.
+    The rooms are split into one range per worker. Every worker maps the same store file, so the features are
+    shared through the OS page cache instead of being pickled to the workers or read again from the workspace.
+    The results are concatenated in room order, the same order as the serial check.
+    The Station-StationDetail check is small and runs in the first shard only.
+    """
+    room_count = len(FeatureStore(config.feature_store).layer(config.room_layer_name))
+    shards = split_into_shards(range(room_count), workers) or [range(0)]
+    logging.debug(f"Checking {room_count} rooms of the feature store in {len(shards)} shards with {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_store_worker, initargs=(config,)) as pool:
+        shard_results = list(pool.map(_check_store_shard, shards, [check_rooms] * len(shards),
+                                      [check_stations and i == 0 for i in range(len(shards))]))
+
+    results = {}
+    for shard_result in shard_results:
+        for key, entries in shard_result.items():
+            results.setdefault(key, []).extend(entries)
+    return results
+
+
+def split_into_shards(oids: List[int], shard_count: int) -> List[List[int]]:
+    """Splits the sorted OBJECTIDs (or a range) into at most `shard_count` contiguous shards of (almost) equal size"""
+    shard_count = max(1, min(shard_count, len(oids)))
+    size, remainder = divmod(len(oids), shard_count)
+    shards = []
+    start = 0
+    for i in range(shard_count):
+        end = start + size + (1 if i < remainder else 0)
+        shards.append(oids[start:end])
+        start = end
+    return [shard for shard in shards if shard]
+
+
+def _init_worker(config: Config) -> None:
+    global _worker_checker
+    _worker_checker = LogicChecker(config, create_accessor(config))
+
+
+def _check_shard(station_detail_oids: List[int]):
+    return _worker_checker.check_room_to_station_subset(station_detail_oids=station_detail_oids)
+
+
+def _init_store_worker(config: Config) -> None:
+    global _worker_checker
+    _worker_checker = StoreChecker(config, FeatureStore(config.feature_store))
+
+
+def _check_store_shard(rooms: range, check_rooms: bool, check_stations: bool) -> Dict[str, List[Tuple]]:
+    return _worker_checker.check_all_relationships(check_rooms, check_stations, rooms)
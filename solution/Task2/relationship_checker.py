@@ -0,0 +1,208 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from config import Config
+from geo_access.geo_accessor import GeoDataAccessor
+from geo_access.relationship_class import RelationshipClass
+from logic_checker import ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+
+ROOM_TO_STATION_ANOMALIES = "room_to_station_anomalies"
+ROOM_TO_ROOMDETAIL_ANOMALIES = "room_to_roomdetail_anomalies"
+STATION_TO_STATIONDETAIL_ANOMALIES = "station_to_stationdetail_anomalies"
+
+# Anomaly kinds: a destination feature without any related origin, and one related to several origins
+# although the cardinality allows only one
+UNRELATED = "unrelated"
+MANY_TO_ONE = "many_to_one"
+
+_NO_ORIGINS: List[str] = []
+
+
+class RelationshipIndex:
+    """
+    The pairs of a relationship class in a hash index: destination key -> keys of the related origins
+    (e.g. room GLOBALID -> station GLOBALIDs), so the logical link of a feature is a dictionary lookup.
+    """
+
+    def __init__(self, relationship: RelationshipClass, pairs: Iterable[Tuple[str, str]]):
+        self.relationship = relationship
+        self.origins: Dict[str, List[str]] = {}
+        for origin_key, destination_key in pairs:
+            origins = self.origins.get(destination_key)
+            if origins is None:
+                self.origins[destination_key] = [origin_key]
+            else:
+                origins.append(origin_key)
+
+    def __len__(self) -> int:
+        return len(self.origins)
+
+    @property
+    def origin_key(self) -> str:
+        """The origin field whose values are the origin keys"""
+        return self.relationship.origin_primary_key
+
+    @property
+    def destination_key(self) -> str:
+        """The destination field whose values are the destination keys (see GeoDataAccessor.relationship_pairs)"""
+        return self.relationship.destination_primary_key if self.relationship.is_attributed else "GLOBALID"
+
+    @property
+    def allows_many_origins(self) -> bool:
+        return (self.relationship.cardinality or "").endswith("ManyToMany")
+
+    def related(self, destination_key: Optional[str]) -> List[str]:
+        """The keys of the origins related to a destination feature"""
+        return self.origins.get(destination_key, _NO_ORIGINS)
+
+
+class RelationshipChecker:
+    """
+    The checks of LogicChecker.check_all_relationships with the logical links read from the relationship classes
+    Station__Room, Room__RoomDetail and Station__StationDetail instead of the GUID fields an intersect copies.
+    Every relationship class is read once into a RelationshipIndex, every layer is read once with geometry_cursor
+    and joined with the polygon indexes.
+
+    Features whose relationship is missing or breaks the cardinality are not compared: they are reported as
+    anomalies, (GLOBALID, UNRELATED or MANY_TO_ONE, the related origin keys joined by ';' or None, the key of the
+    origin found by the spatial join), one entry per containing polygon and a single entry with None outside all.
+    """
+
+    def __init__(self, config: Config, accessor: GeoDataAccessor):
+        self.config = config
+        self.accessor = accessor
+        self._relationship_classes: Optional[Dict[str, RelationshipClass]] = None
+        self._indexes: Dict[str, RelationshipIndex] = {}
+
+    def relationship_class(self, name: str) -> RelationshipClass:
+        """The definition of a relationship class, the definitions are read from the accessor on first use"""
+        if self._relationship_classes is None:
+            self._relationship_classes = self.accessor.relationship_classes() or {}
+        try:
+            return self._relationship_classes[name]
+        except KeyError:
+            raise KeyError(f"Relationship class '{name}' does not exist in the workspace") from None
+
+    def relationship_index(self, name: str) -> RelationshipIndex:
+        """The index of a relationship class, read from the accessor on first use"""
+        index = self._indexes.get(name)
+        if index is None:
+            relationship = self.relationship_class(name)
+            index = self._indexes[name] = RelationshipIndex(relationship, self.accessor.relationship_pairs(relationship))
+            logging.debug(f"Read {len(index)} related features of relationship class '{name}'")
+        return index
+
+    def check_all_relationships(self, check_rooms: bool = False, check_stations: bool = False) -> Dict[str, List[Tuple]]:
+        """
+        Args:
+            check_rooms: also check the Room-RoomDetail relationships
+            check_stations: also check the Station-StationDetail relationships
+
+        Returns:
+            The invalid entries of every enabled check, keyed by ROOM_TO_STATION, ROOM_TO_ROOMDETAIL and
+            STATION_TO_STATIONDETAIL, in the same formats as the LogicChecker checks, and the anomalies of the rooms,
+            room details and station details keyed by ROOM_TO_STATION_ANOMALIES, ROOM_TO_ROOMDETAIL_ANOMALIES and
+            STATION_TO_STATIONDETAIL_ANOMALIES
+        """
+        config = self.config
+        logging.debug(f"Running relationship class checks: rooms={check_rooms}, stations={check_stations}")
+        station_rooms = self.relationship_index(config.station_room_relationship)
+        station_station_details = self.relationship_index(config.station_stationdetail_relationship)
+        room_fields = [station_rooms.destination_key]
+        if check_rooms:
+            room_room_details = self.relationship_index(config.room_roomdetail_relationship)
+            room_fields.append(room_room_details.origin_key)
+
+        rooms, room_positions = self._read_features(config.room_layer_name, room_fields)
+        room_points = [room[0] for room in rooms]
+        station_details, detail_positions = self._read_features(config.station_detail_layer_name,
+                                                                [station_station_details.destination_key])
+        station_index = self.accessor.polygon_index(config.station_detail_layer_name,
+                                                    [detail[0] for detail in station_details])
+
+        # The station of every StationDetail, None when the detail has no single station (its own anomaly)
+        detail_key = detail_positions[station_station_details.destination_key]
+        detail_stations = []
+        for detail in station_details:
+            stations = station_station_details.related(detail[detail_key])
+            detail_stations.append(stations[0] if len(stations) == 1 else None)
+
+        results = {}
+        results[ROOM_TO_STATION], results[ROOM_TO_STATION_ANOMALIES] = self._check_destinations(
+            station_rooms, rooms, room_positions[station_rooms.destination_key],
+            ((room_pos, detail_stations[detail_pos]) for room_pos, detail_pos in station_index.join(room_points))
+        )
+
+        if check_rooms:
+            room_details, positions = self._read_features(config.room_detail_layer_name,
+                                                          [room_room_details.destination_key])
+            room_detail_index = self.accessor.polygon_index(config.room_detail_layer_name,
+                                                            [detail[0] for detail in room_details])
+            room_key = room_positions[room_room_details.origin_key]
+            results[ROOM_TO_ROOMDETAIL], results[ROOM_TO_ROOMDETAIL_ANOMALIES] = self._check_destinations(
+                room_room_details, room_details, positions[room_room_details.destination_key],
+                ((detail_pos, rooms[room_pos][room_key]) for room_pos, detail_pos in room_detail_index.join(room_points))
+            )
+
+        if check_stations:
+            stations, positions = self._read_features(config.station_layer_name, [station_station_details.origin_key])
+            station_key = positions[station_station_details.origin_key]
+            pairs = station_index.join([station[0] for station in stations])
+            results[STATION_TO_STATIONDETAIL], results[STATION_TO_STATIONDETAIL_ANOMALIES] = self._check_destinations(
+                station_station_details, station_details, detail_key,
+                ((detail_pos, stations[station_pos][station_key]) for station_pos, detail_pos in pairs)
+            )
+
+        return results
+
+    @staticmethod
+    def _check_destinations(index: RelationshipIndex, destinations: Sequence[Tuple], key_position: int,
+                            pairs: Iterable[Tuple[int, Optional[str]]],
+                            allows_many: Optional[bool] = None) -> Tuple[List[Tuple], List[Tuple]]:
+        """
+        Compares the logical and the geometrical origins of the destination features of a relationship class.
+        Args:
+            index: the relationship class
+            destinations: (geometry, GLOBALID, ...) rows of the destination layer
+            key_position: the position of the relationship's destination key in the rows
+            pairs: (destination position, key of an origin found by the spatial join)
+            allows_many: whether a destination may have several origins, by default from the relationship's cardinality
+
+        Returns:
+            The invalid entries (GLOBALID, logical origin key, geometrical origin key) in the order of `pairs`
+            and the anomalies in the order of `destinations`
+        """
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        allows_many = index.allows_many_origins if allows_many is None else allows_many
+        invalid_entries = []
+        anomaly_origins: Dict[int, List[Optional[str]]] = {}
+        for position, geometrical in pairs:
+            logical = index.related(destinations[position][key_position])
+            if len(logical) == 1 or (logical and allows_many):
+                if geometrical not in logical:
+                    entry = (destinations[position][1], ";".join(logical), geometrical)
+                    invalid_entries.append(entry)
+                    if debug:
+                        logging.debug(
+                            f"Invalid {index.relationship.name} relationship: guid={entry[0]}, "
+                            f"logical={entry[1]}, geometrical={entry[2]}"
+                        )
+            else:
+                anomaly_origins.setdefault(position, []).append(geometrical)
+
+        anomalies = []
+        for position, destination in enumerate(destinations):
+            logical = index.related(destination[key_position])
+            if len(logical) == 1 or (logical and allows_many):
+                continue
+            kind = MANY_TO_ONE if logical else UNRELATED
+            for geometrical in anomaly_origins.get(position, [None]):
+                anomalies.append((destination[1], kind, ";".join(logical) or None, geometrical))
+        logging.debug(f"{index.relationship.name}: {len(invalid_entries)} invalid entries, {len(anomalies)} anomalies")
+        return invalid_entries, anomalies
+
+    def _read_features(self, layer: str, key_fields: List[str]) -> Tuple[List[Tuple], Dict[str, int]]:
+        """(geometry, GLOBALID, key fields...) rows with a geometry, and the position of every field in the rows"""
+        fields = list(dict.fromkeys(["GLOBALID"] + key_fields))
+        features = [row for row in self.accessor.geometry_cursor(layer, fields) if row[0] is not None]
+        logging.debug(f"Read {len(features)} features from layer '{layer}'")
+        return features, {field_name: position for position, field_name in enumerate(fields, start=1)}
@@ -0,0 +1,242 @@
+import dataclasses
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import Config
+from geo_access.geo_accessor import GeoDataAccessor
+from geo_access.relationship_class import RelationshipClass
+from relationship_checker import RelationshipChecker, RelationshipIndex
+
+CARDINALITIES = ("OneToOne", "OneToMany", "ManyToMany")
+# Issue of a rule's report row whose logical origin differs from the geometrical one. The anomalies of a rule are the
+# UNRELATED and MANY_TO_ONE kinds of relationship_checker, and ONE_TO_MANY
+MISMATCH = "mismatch"
+# A destination whose origin is related to other destinations too, although the rule expects OneToOne
+ONE_TO_MANY = "one_to_many"
+RULE_REPORT_FIELDS = ["GLOBALID", "Issue", "Logical", "Geometric"]
+
+# The name of a rule is the name of its report
+_RULE_NAME = re.compile(r"^[A-Za-z0-9_.\-]+$")
+
+
+@dataclass
+class Rule:
+    """
+    An entry of the `rules` of the config: the points of `point_layer` inside the polygons of `polygon_layer` must be
+    related by the relationship class `relationship`. One of the two layers is its destination, the other one is its
+    origin or is related to its origin by the relationship class `via` (a StationDetail is related to its station by
+    Station__StationDetail). `cardinality` is OneToOne, OneToMany or ManyToMany, by default the one of the
+    relationship class: ManyToMany allows several origins per destination, OneToOne one destination per origin.
+    """
+    name: str
+    point_layer: str
+    polygon_layer: str
+    relationship: str
+    cardinality: Optional[str] = None
+    via: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "Rule":
+        """The rule of a `rules` entry, ValueError for a missing or unknown key, a bad name or cardinality"""
+        if not isinstance(values, dict):
+            raise ValueError(f"A rule must be an object, got {values!r}")
+        fields = [field.name for field in dataclasses.fields(cls)]
+        unknown = [key for key in values if key not in fields]
+        if unknown:
+            raise ValueError(f"Unknown keys {', '.join(unknown)} in rule {values.get('name')!r}. "
+                             f"Expected {', '.join(fields)}")
+        missing = [field.name for field in dataclasses.fields(cls)
+                   if field.default is dataclasses.MISSING and not values.get(field.name)]
+        if missing:
+            raise ValueError(f"Rule {values.get('name')!r} needs {', '.join(missing)}")
+        rule = cls(**values)
+        if not _RULE_NAME.match(rule.name):
+            raise ValueError(f"The rule name '{rule.name}' is also its report name: use letters, digits, '.', '_' or '-'")
+        if rule.cardinality is not None:
+            cardinality = normalize_cardinality(rule.cardinality)
+            if cardinality not in CARDINALITIES:
+                raise ValueError(f"Unknown cardinality '{rule.cardinality}' in rule '{rule.name}'. "
+                                 f"Expected one of {', '.join(CARDINALITIES)}")
+            rule.cardinality = cardinality
+        return rule
+
+
+def normalize_cardinality(cardinality: str) -> str:
+    """OneToMany for OneToMany and esriRelCardinalityOneToMany"""
+    return cardinality[len("esriRelCardinality"):] if cardinality.startswith("esriRelCardinality") else cardinality
+
+
+def load_rules(config: Config) -> List[Rule]:
+    """The rules of the config, ValueError for an invalid rule or two rules with the same name"""
+    rules = [Rule.from_dict(values) for values in getattr(config, "rules", None) or []]
+    names = Counter(rule.name for rule in rules)
+    duplicates = [name for name, count in names.items() if count > 1]
+    if duplicates:
+        raise ValueError(f"Rule names must be unique, found {', '.join(duplicates)} several times")
+    return rules
+
+
+@dataclass
+class PlannedRule:
+    """A rule resolved against its relationship classes"""
+    rule: Rule
+    relationship: RelationshipClass
+    destination_layer: str
+    origin_layer: str
+    cardinality: str
+    via: Optional[RelationshipClass] = None
+
+
+@dataclass
+class RulePlan:
+    """
+    The shared work of a set of rules: every layer is read once with the fields of all its rules, every polygon layer
+    is indexed once and every (point layer, polygon layer) pair is joined once for all its rules
+    """
+    layer_fields: Dict[str, List[str]]
+    polygon_layers: List[str]
+    joins: Dict[Tuple[str, str], List[PlannedRule]]
+
+    def describe(self) -> str:
+        return (f"{sum(len(rules) for rules in self.joins.values())} rules: {len(self.layer_fields)} layer reads, "
+                f"{len(self.polygon_layers)} polygon indexes, {len(self.joins)} spatial joins")
+
+
+class RuleEngine(RelationshipChecker):
+    """
+    Runs the relationship rules of the config. A point and a polygon are related geometrically when the point is
+    inside the polygon. The plan groups the rules by layers, so adding a rule on layers another rule already uses only
+    adds its comparison, not a layer read or a join.
+
+    The report of a rule has a row per finding, (GLOBALID, issue, logical, geometric): the MISMATCH of a destination
+    whose related origin keys (joined by ';') do not contain the one found by the spatial join, and the anomalies as in
+    RelationshipChecker, with ONE_TO_MANY for the OneToOne rules.
+    """
+
+    def __init__(self, config: Config, accessor: GeoDataAccessor):
+        super().__init__(config, accessor)
+        self._features: Dict[str, List[Tuple]] = {}
+        self._positions: Dict[str, Dict[str, int]] = {}
+
+    def plan(self, rules: Sequence[Rule]) -> RulePlan:
+        """The plan of the rules, KeyError for a missing relationship class, ValueError for a rule it does not fit"""
+        layer_fields: Dict[str, List[str]] = {}
+        polygon_layers: List[str] = []
+        joins: Dict[Tuple[str, str], List[PlannedRule]] = {}
+        for rule in rules:
+            planned = self._resolve(rule)
+            for layer in (rule.point_layer, rule.polygon_layer):
+                layer_fields.setdefault(layer, [])
+            self._add_destination_fields(layer_fields[planned.destination_layer], planned.relationship)
+            if planned.via is None:
+                layer_fields[planned.origin_layer].append(planned.relationship.origin_primary_key)
+            else:
+                self._add_destination_fields(layer_fields[planned.origin_layer], planned.via)
+            if rule.polygon_layer not in polygon_layers:
+                polygon_layers.append(rule.polygon_layer)
+            joins.setdefault((rule.point_layer, rule.polygon_layer), []).append(planned)
+        layer_fields = {layer: list(dict.fromkeys(fields)) for layer, fields in layer_fields.items()}
+        return RulePlan(layer_fields, polygon_layers, joins)
+
+    def check(self, rules: Sequence[Rule]) -> Dict[str, List[Tuple]]:
+        """The report rows of every rule, keyed by rule name, in the order of `rules`"""
+        plan = self.plan(rules)
+        logging.info(f"Rule plan: {plan.describe()}")
+        for layer, fields in plan.layer_fields.items():
+            self._features[layer], self._positions[layer] = self._read_features(layer, fields)
+        polygon_indexes = {layer: self.accessor.polygon_index(layer, [feature[0] for feature in self._features[layer]])
+                           for layer in plan.polygon_layers}
+
+        results = {}
+        for (point_layer, polygon_layer), planned_rules in plan.joins.items():
+            pairs = list(polygon_indexes[polygon_layer].join([feature[0] for feature in self._features[point_layer]]))
+            logging.debug(f"Joined {point_layer} with {polygon_layer}: {len(pairs)} pairs")
+            for planned in planned_rules:
+                results[planned.rule.name] = self._check_rule(planned, pairs, point_layer)
+                logging.info(f"Rule '{planned.rule.name}': {len(results[planned.rule.name])} findings")
+        return {rule.name: results[rule.name] for rule in rules}
+
+    def _resolve(self, rule: Rule) -> PlannedRule:
+        relationship = self.relationship_class(rule.relationship)
+        layers = (rule.point_layer, rule.polygon_layer)
+        if relationship.destination not in layers:
+            raise ValueError(f"Rule '{rule.name}': neither {rule.point_layer} nor {rule.polygon_layer} is the "
+                             f"destination {relationship.destination} of {relationship.name}")
+        destination_layer = relationship.destination
+        origin_layer = rule.polygon_layer if destination_layer == rule.point_layer else rule.point_layer
+        if destination_layer == origin_layer:
+            raise ValueError(f"Rule '{rule.name}': the point and the polygon layer must differ")
+
+        via = None
+        if rule.via:
+            via = self.relationship_class(rule.via)
+            if via.origin != relationship.origin or via.destination != origin_layer:
+                raise ValueError(f"Rule '{rule.name}': {via.name} must relate {relationship.origin} to {origin_layer}")
+        elif relationship.origin != origin_layer:
+            raise ValueError(f"Rule '{rule.name}': {origin_layer} is not the origin {relationship.origin} of "
+                             f"{relationship.name}, set `via` to the relationship class that relates them")
+        cardinality = rule.cardinality or normalize_cardinality(relationship.cardinality or "OneToMany")
+        return PlannedRule(rule, relationship, destination_layer, origin_layer, cardinality, via)
+
+    @staticmethod
+    def _add_destination_fields(fields: List[str], relationship: RelationshipClass) -> None:
+        """The destination key, and the foreign key the index is built from when the relationship is not attributed"""
+        fields.append(relationship.destination_primary_key if relationship.is_attributed else "GLOBALID")
+        if not relationship.is_attributed:
+            fields.append(relationship.origin_foreign_key)
+
+    def _index(self, relationship: RelationshipClass) -> RelationshipIndex:
+        """
+        The index of a relationship class. The foreign keys of a relationship class that is not attributed are fields
+        of its destination layer, which the plan reads anyway, so only attributed ones read their table
+        """
+        index = self._indexes.get(relationship.name)
+        if index is None:
+            if relationship.is_attributed or relationship.destination not in self._features:
+                return self.relationship_index(relationship.name)
+            features = self._features[relationship.destination]
+            foreign_key = self._positions[relationship.destination][relationship.origin_foreign_key]
+            index = self._indexes[relationship.name] = RelationshipIndex(
+                relationship, ((feature[foreign_key], feature[1]) for feature in features
+                               if feature[foreign_key] is not None)
+            )
+            logging.debug(f"Indexed {len(index)} related features of relationship class '{relationship.name}'")
+        return index
+
+    def _origin_keys(self, planned: PlannedRule) -> List[Optional[str]]:
+        """The origin key of every feature of the origin layer, None for a `via` feature without a single origin"""
+        features = self._features[planned.origin_layer]
+        positions = self._positions[planned.origin_layer]
+        if planned.via is None:
+            key = positions[planned.relationship.origin_primary_key]
+            return [feature[key] for feature in features]
+        via = self._index(planned.via)
+        key = positions[via.destination_key]
+        origin_keys = []
+        for feature in features:
+            origins = via.related(feature[key])
+            origin_keys.append(origins[0] if len(origins) == 1 else None)
+        return origin_keys
+
+    def _check_rule(self, planned: PlannedRule, pairs: List[Tuple[int, int]], point_layer: str) -> List[Tuple]:
+        index = self._index(planned.relationship)
+        origin_keys = self._origin_keys(planned)
+        destinations = self._features[planned.destination_layer]
+        key_position = self._positions[planned.destination_layer][index.destination_key]
+        if planned.destination_layer == point_layer:
+            destination_pairs = ((point_pos, origin_keys[polygon_pos]) for point_pos, polygon_pos in pairs)
+        else:
+            destination_pairs = ((polygon_pos, origin_keys[point_pos]) for point_pos, polygon_pos in pairs)
+        invalid_entries, anomalies = self._check_destinations(index, destinations, key_position, destination_pairs,
+                                                              planned.cardinality == "ManyToMany")
+        rows = [(guid, MISMATCH, logical, geometrical) for guid, logical, geometrical in invalid_entries]
+        rows.extend(anomalies)
+        if planned.cardinality == "OneToOne":
+            destination_counts = Counter(origin for origins in index.origins.values() for origin in origins)
+            for destination in destinations:
+                origins = index.related(destination[key_position])
+                if len(origins) == 1 and destination_counts[origins[0]] > 1:
+                    rows.append((destination[1], ONE_TO_MANY, origins[0], None))
+        return rows
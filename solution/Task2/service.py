@@ -0,0 +1,307 @@
+"""
+Long-running check service: keeps the accessor, the features and the spatial indexes in memory and answers
+check requests over a local HTTP API (TCP on service_host:service_port and/or a Unix socket at service_socket).
+
+    GET /health                                 the state of the service
+    GET /check/station?guid={...}               rooms related to the station or inside its StationDetail
+    GET /check/bbox?min_x=&min_y=&max_x=&max_y= rooms inside the box
+    GET /report                                 all checks enabled in the configuration
+
+Run from the Task2 directory:
+    python cli.py serve [--config config.json]
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from config import Config
+from geo_access.factory import create_accessor
+from geo_access.geo_accessor import GeoDataAccessor
+from logic_checker import LogicChecker
+from spatial.geometry import polygon_bbox
+from spatial.join import PolygonIndex
+from spatial.strtree import STRtree
+from utils.log_format import configure_logging
+
+ROOM_TO_STATION_FIELDS = ["RoomId", "CurrentStationId", "CorrectStationId"]
+MAX_REQUEST_LINE = 8192
+
+
+class RequestError(Exception):
+    """An invalid request, answered with the given HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class ServiceState:
+    """Everything read from one version of the workspace. Replaced as a whole when the workspace changes"""
+    checker: LogicChecker
+    rooms: List[Tuple]  # (point, GLOBALID, STATION_GUID)
+    station_details: List[Tuple]  # (polygon, GLOBALID, STATION_GUID)
+    station_index: PolygonIndex
+    room_index: STRtree
+    # Read only for the checks enabled in the configuration, for /report
+    room_details: Optional[List[Tuple]] = None  # (polygon, GLOBALID, ROOM_GUID)
+    room_detail_index: Optional[PolygonIndex] = None
+    stations: Optional[List[Tuple]] = None  # (point, GLOBALID)
+    rooms_by_station: Dict[str, List[int]] = field(default_factory=dict)
+    details_by_station: Dict[str, List[int]] = field(default_factory=dict)
+    source_mtime: Optional[float] = None
+    loaded_at: float = 0.0
+
+
+class CheckService:
+    """
+    Serves the room-to-station checks from a warm ServiceState. Every accessor and checker call runs on a single
+    worker thread (accessor connections, e.g. sqlite3 and arcpy, must stay on one thread), so the event loop only
+    parses requests and keeps answering /health while a check or a reload is running.
+    The workspace is polled every `poll_seconds` and reloaded when its modification time changes.
+    """
+
+    def __init__(self, config: Config, accessor: Optional[GeoDataAccessor] = None, poll_seconds: float = 2.0):
+        self.config = config
+        self.poll_seconds = poll_seconds
+        self._accessor = accessor
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checker")
+        self._state: Optional[ServiceState] = None
+        self._servers: List[asyncio.AbstractServer] = []
+        self._poll_task: Optional[asyncio.Task] = None
+
+    @property
+    def state(self) -> ServiceState:
+        if self._state is None:
+            raise RuntimeError("The service is not started")
+        return self._state
+
+    async def start(self, host: Optional[str] = None, port: Optional[int] = None,
+                    socket_path: Optional[str] = None) -> None:
+        """Loads the workspace and starts listening. Returns when the servers are ready"""
+        self._state = await self._run(self._load)
+        if port is not None:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+            self._servers.append(server)
+            logging.info(f"Check service listening on {server.sockets[0].getsockname()}")
+        if socket_path:
+            server = await asyncio.start_unix_server(self._handle_connection, socket_path)
+            self._servers.append(server)
+            logging.info(f"Check service listening on {socket_path}")
+        if self.poll_seconds:
+            self._poll_task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._poll_task:
+            self._poll_task.cancel()
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        self._executor.shutdown(wait=True)
+
+    @property
+    def port(self) -> Optional[int]:
+        """The TCP port, e.g. when the service was started on port 0"""
+        for server in self._servers:
+            address = server.sockets[0].getsockname()
+            if isinstance(address, tuple):
+                return address[1]
+        return None
+
+    async def reload_if_changed(self) -> bool:
+        """Reloads the workspace if it changed since it was loaded. Requests in flight finish on the old state"""
+        mtime = _source_mtime(self.config.database_path)
+        if mtime is None or mtime == self.state.source_mtime:
+            return False
+        logging.info(f"Workspace {self.config.database_path} changed, reloading")
+        self._state = await self._run(self._load)
+        return True
+
+    async def handle(self, method: str, target: str) -> Tuple[int, dict]:
+        """Answers one request. Returns the HTTP status and the JSON body"""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if method != "GET":
+            raise RequestError(405, f"Method {method} is not allowed")
+        if url.path == "/health":
+            state = self.state
+            return 200, {"status": "ok", "rooms": len(state.rooms), "station_details": len(state.station_details),
+                         "loaded_at": state.loaded_at}
+
+        start = time.perf_counter()
+        state = self.state
+        if url.path == "/check/station":
+            guid = query.get("guid")
+            if not guid:
+                raise RequestError(400, "Missing the guid parameter")
+            entries = await self._run(self.check_station, state, guid)
+        elif url.path == "/check/bbox":
+            try:
+                box = [float(query[name]) for name in ("min_x", "min_y", "max_x", "max_y")]
+            except (KeyError, ValueError):
+                raise RequestError(400, "Expected numeric min_x, min_y, max_x and max_y parameters") from None
+            entries = await self._run(self.check_bbox, state, *box)
+        elif url.path == "/report":
+            results = await self._run(self.report, state)
+            return 200, {"invalid": results, "elapsed_ms": (time.perf_counter() - start) * 1000}
+        else:
+            raise RequestError(404, f"Unknown path {url.path}")
+        return 200, {
+            "fields": ROOM_TO_STATION_FIELDS,
+            "invalid": entries,
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+        }
+
+    def check_station(self, state: ServiceState, station_guid: str) -> List[Tuple]:
+        """Invalid rooms among the rooms related to the station and the rooms inside its StationDetails"""
+        positions = set(state.rooms_by_station.get(station_guid, []))
+        for detail_pos in state.details_by_station.get(station_guid, []):
+            positions.update(state.room_index.query(*polygon_bbox(state.station_details[detail_pos][0])))
+        return self._check_rooms(state, sorted(positions))
+
+    def check_bbox(self, state: ServiceState, min_x: float, min_y: float, max_x: float, max_y: float) -> List[Tuple]:
+        """Invalid rooms inside the box (touching counts)"""
+        return self._check_rooms(state, sorted(state.room_index.query(min_x, min_y, max_x, max_y)))
+
+    @staticmethod
+    def report(state: ServiceState) -> Dict[str, List[Tuple]]:
+        """The checks enabled in the configuration, on the features and indexes of the state"""
+        return state.checker.check_features(state.rooms, state.station_details, state.room_details, state.stations,
+                                            state.station_index, state.room_detail_index)
+
+    @staticmethod
+    def _check_rooms(state: ServiceState, room_positions: List[int]) -> List[Tuple]:
+        """The room-to-station check of the given rooms, in the format and order of LogicChecker"""
+        invalid_entries = []
+        points = [state.rooms[position][0] for position in room_positions]
+        for point_pos, detail_pos in state.station_index.join(points):
+            _, room_guid, logical_station_id = state.rooms[room_positions[point_pos]]
+            geometrical_station_id = state.station_details[detail_pos][2]
+            if logical_station_id != geometrical_station_id:
+                invalid_entries.append((room_guid, logical_station_id, geometrical_station_id))
+        return invalid_entries
+
+    def _load(self) -> ServiceState:
+        """Reads the workspace and builds the indexes. Runs on the worker thread"""
+        start = time.perf_counter()
+        mtime = _source_mtime(self.config.database_path)
+        if self._accessor is None:
+            self._accessor = create_accessor(self.config)
+        checker = LogicChecker(self.config, self._accessor)
+        rooms = checker._read_features(self.config.room_layer_name, ["GLOBALID", "STATION_GUID"])
+        details = checker._read_features(self.config.station_detail_layer_name, ["GLOBALID", "STATION_GUID"])
+        room_details = room_detail_index = stations = None
+        if self.config.check_rooms_relationships:
+            room_details = checker._read_features(self.config.room_detail_layer_name, ["GLOBALID", "ROOM_GUID"])
+            room_detail_index = self._accessor.polygon_index(self.config.room_detail_layer_name,
+                                                             [detail[0] for detail in room_details])
+        if self.config.check_stations_relationships:
+            stations = checker._read_features(self.config.station_layer_name, ["GLOBALID"])
+
+        state = ServiceState(
+            checker=checker,
+            rooms=rooms,
+            station_details=details,
+            station_index=self._accessor.polygon_index(self.config.station_detail_layer_name,
+                                                       [detail[0] for detail in details]),
+            room_index=STRtree([(x, y, x, y) for (x, y), _, _ in rooms]),
+            room_details=room_details,
+            room_detail_index=room_detail_index,
+            stations=stations,
+            source_mtime=mtime,
+            loaded_at=time.time(),
+        )
+        for position, (_, _, station_guid) in enumerate(rooms):
+            state.rooms_by_station.setdefault(station_guid, []).append(position)
+        for position, (_, _, station_guid) in enumerate(details):
+            state.details_by_station.setdefault(station_guid, []).append(position)
+        logging.info(f"Loaded {len(rooms)} rooms and {len(details)} station details "
+                     f"in {time.perf_counter() - start:.2f} s")
+        return state
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.reload_if_changed()
+            except Exception as ex:
+                logging.error(f"Reloading the workspace failed, serving the previous state: {ex}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            if not request_line or len(request_line) > MAX_REQUEST_LINE:
+                return
+            while (await reader.readline()).strip():  # the headers are not used
+                pass
+            try:
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                status, body = await self.handle(method, target)
+            except RequestError as ex:
+                status, body = ex.status, {"error": str(ex)}
+            except ValueError:
+                status, body = 400, {"error": "Malformed request line"}
+            except Exception as ex:
+                logging.error(f"Request {request_line!r} failed: {ex}")
+                status, body = 500, {"error": str(ex)}
+            _write_response(writer, status, body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _write_response(writer: asyncio.StreamWriter, status: int, body: dict) -> None:
+    content = json.dumps(body).encode("utf-8")
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}.get(status, "Error")
+    writer.write(
+        f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(content)}\r\nConnection: close\r\n\r\n".encode("latin-1") + content
+    )
+
+
+def _source_mtime(path: str) -> Optional[float]:
+    """
+    Latest modification time of the workspace: of the file and its SQLite -wal file, or of every file in a
+    file geodatabase directory. None for the in-memory workspace or a missing path
+    """
+    try:
+        if os.path.isdir(path):
+            return max((entry.stat().st_mtime for entry in os.scandir(path) if entry.is_file()), default=None)
+        mtimes = [os.path.getmtime(candidate) for candidate in (path, f"{path}-wal") if os.path.exists(candidate)]
+        return max(mtimes, default=None)
+    except OSError:
+        return None
+
+
+async def serve(config: Config) -> None:
+    service = CheckService(config, poll_seconds=config.service_poll_seconds)
+    await service.start(config.service_host, config.service_port, config.service_socket)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.stop()
+
+
+def main(config_file: str = "config.json"):
+    config = Config.from_file(config_file)
+    configure_logging(config.log_file, config.log_level, config.log_queue_size, config.log_sample_rate,
+                      config.log_max_mb, config.log_backup_count, config.log_drop_when_full)
+    try:
+        asyncio.run(serve(config))
+    except KeyboardInterrupt:
+        logging.info("Check service stopped")
+
+
+if __name__ == "__main__":
+    main()
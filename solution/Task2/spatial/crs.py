@@ -0,0 +1,167 @@
+import math
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union
+from spatial.geometry import BBox
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the built-in transforms then loop over the coordinates
+    np = None
+try:
+    from pyproj import Transformer
+except ImportError:  # pyproj is optional, only the built-in transforms are available without it
+    Transformer = None
+
+WGS84 = "EPSG:4326"
+WEB_MERCATOR = "EPSG:3857"
+# Radius of the Web Mercator sphere
+EARTH_RADIUS = 6378137.0
+# The latitudes of Web Mercator stop at +-85.05112878 degrees, where the projection is a square
+MAX_MERCATOR_LATITUDE = math.degrees(2 * math.atan(math.exp(math.pi)) - math.pi / 2)
+# Points per edge of an envelope transformed with transform_bbox, as the edges of an envelope are curves in the other CRS
+BBOX_EDGE_POINTS = 21
+
+Coordinates = Union[Sequence[float], "np.ndarray"]
+
+
+def normalize_crs(crs: Union[str, int]) -> str:
+    """
+    "EPSG:4326" for 4326, "4326", "epsg:4326". Other authorities are kept as they are, e.g. "ESRI:102100"
+    """
+    text = str(crs).strip()
+    if text.isdigit():
+        return f"EPSG:{text}"
+    authority, separator, code = text.partition(":")
+    return f"{authority.upper()}:{code}" if separator else text
+
+
+class CrsTransformer:
+    """
+    Transforms whole coordinate columns from one CRS to another with one call (x is the longitude / easting).
+    EPSG:4326 <-> EPSG:3857 are built in and vectorized with numpy when it is installed, every other pair needs pyproj.
+    Use get_transformer, which creates one transformer per (source, target) pair.
+    """
+
+    def __init__(self, source: str, target: str):
+        self.source = source
+        self.target = target
+        self._proj = None
+        if source == target:
+            self._builtin = _identity
+        elif (source, target) == (WGS84, WEB_MERCATOR):
+            self._builtin = _wgs84_to_web_mercator
+        elif (source, target) == (WEB_MERCATOR, WGS84):
+            self._builtin = _web_mercator_to_wgs84
+        elif Transformer is not None:
+            self._builtin = None
+            self._proj = Transformer.from_crs(source, target, always_xy=True)
+        else:
+            raise ValueError(f"Transforming {source} to {target} needs pyproj, only {WGS84} <-> {WEB_MERCATOR} are built in")
+
+    def transform(self, xs: Coordinates, ys: Coordinates) -> Tuple[List[float], List[float]]:
+        """The transformed coordinates of the points (xs[i], ys[i]), as lists of floats"""
+        if self._proj is not None:
+            xs, ys = self._proj.transform(xs, ys)
+        else:
+            xs, ys = self._builtin(xs, ys)
+        return _to_list(xs), _to_list(ys)
+
+    def transform_point(self, x: float, y: float) -> Tuple[float, float]:
+        """One point: the per-point transform, for the coordinates that are not read as columns"""
+        if self._proj is not None:
+            return self._proj.transform(x, y)
+        xs, ys = self._builtin([x], [y])
+        return float(xs[0]), float(ys[0])
+
+    def transform_geometries(self, geometries: Sequence) -> List:
+        """
+        Transforms geometry_cursor geometries, points (x, y) and polygons (lists of rings), with one transform of all
+        their coordinates. None geometries are kept
+        """
+        coordinates = []
+        for geometry in geometries:
+            if geometry is None:
+                continue
+            if isinstance(geometry[0], (int, float)):
+                coordinates.append(geometry)
+            else:
+                for ring in geometry:
+                    coordinates.extend(ring)
+        if not coordinates:
+            return list(geometries)
+        xs, ys = zip(*coordinates)
+        points = list(zip(*self.transform(xs, ys)))
+
+        transformed = []
+        position = 0
+        for geometry in geometries:
+            if geometry is None:
+                transformed.append(None)
+            elif isinstance(geometry[0], (int, float)):
+                transformed.append(points[position])
+                position += 1
+            else:
+                rings = []
+                for ring in geometry:
+                    end = position + len(ring)
+                    rings.append(points[position:end])
+                    position = end
+                transformed.append(rings)
+        return transformed
+
+    def transform_bbox(self, bbox: BBox) -> Optional[BBox]:
+        """
+        The envelope in the target CRS of an envelope of the source CRS. Its edges are transformed with
+        BBOX_EDGE_POINTS points each, as they are curves in the target CRS
+        """
+        min_x, min_y, max_x, max_y = bbox
+        steps = [i / (BBOX_EDGE_POINTS - 1) for i in range(BBOX_EDGE_POINTS)]
+        edge_xs = [min_x + (max_x - min_x) * step for step in steps]
+        edge_ys = [min_y + (max_y - min_y) * step for step in steps]
+        xs = edge_xs + edge_xs + [min_x] * len(edge_ys) + [max_x] * len(edge_ys)
+        ys = [min_y] * len(edge_xs) + [max_y] * len(edge_xs) + edge_ys + edge_ys
+        xs, ys = self.transform(xs, ys)
+        points = [(x, y) for x, y in zip(xs, ys) if math.isfinite(x) and math.isfinite(y)]
+        if not points:
+            return None
+        return (min(x for x, _ in points), min(y for _, y in points),
+                max(x for x, _ in points), max(y for _, y in points))
+
+
+def get_transformer(source: Union[str, int], target: Union[str, int]) -> CrsTransformer:
+    """The transformer of a (source, target) pair, created once: creating a pyproj transformer is slow"""
+    return _cached_transformer(normalize_crs(source), normalize_crs(target))
+
+
+@lru_cache(maxsize=None)
+def _cached_transformer(source: str, target: str) -> CrsTransformer:
+    return CrsTransformer(source, target)
+
+
+def _identity(xs, ys):
+    return xs, ys
+
+
+def _wgs84_to_web_mercator(xs, ys):
+    if np is not None:
+        longitudes = np.radians(np.asarray(xs, dtype=float))
+        latitudes = np.radians(np.clip(np.asarray(ys, dtype=float), -MAX_MERCATOR_LATITUDE, MAX_MERCATOR_LATITUDE))
+        return EARTH_RADIUS * longitudes, EARTH_RADIUS * np.log(np.tan(math.pi / 4 + latitudes / 2))
+    return ([EARTH_RADIUS * math.radians(x) for x in xs],
+            [EARTH_RADIUS * math.log(math.tan(math.pi / 4 + math.radians(_clip_latitude(y)) / 2)) for y in ys])
+
+
+def _web_mercator_to_wgs84(xs, ys):
+    if np is not None:
+        xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+        return np.degrees(xs / EARTH_RADIUS), np.degrees(2 * np.arctan(np.exp(ys / EARTH_RADIUS)) - math.pi / 2)
+    return ([math.degrees(x / EARTH_RADIUS) for x in xs],
+            [math.degrees(2 * math.atan(math.exp(y / EARTH_RADIUS)) - math.pi / 2) for y in ys])
+
+
+def _clip_latitude(latitude: float) -> float:
+    return max(-MAX_MERCATOR_LATITUDE, min(MAX_MERCATOR_LATITUDE, latitude))
+
+
+def _to_list(values) -> List[float]:
+    return values.tolist() if hasattr(values, "tolist") else [float(value) for value in values]
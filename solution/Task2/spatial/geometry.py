@@ -0,0 +1,153 @@
+import math
+import struct
+from array import array
+from itertools import chain
+from typing import List, Sequence, Tuple
+
+Point = Tuple[float, float]
+Ring = Sequence[Point]
+BBox = Tuple[float, float, float, float]
+
+
+def polygon_bbox(rings: Sequence[Ring]) -> BBox:
+    """Return the (min_x, min_y, max_x, max_y) envelope of a polygon"""
+    xs = [x for ring in rings for x, _ in ring]
+    ys = [y for ring in rings for _, y in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def geometry_bbox(geometry) -> BBox:
+    """Return the (min_x, min_y, max_x, max_y) envelope of a point (x, y) or a polygon (list of rings)"""
+    if isinstance(geometry[0], (int, float)):
+        return geometry[0], geometry[1], geometry[0], geometry[1]
+    return polygon_bbox(geometry)
+
+
+def bbox_intersects(a: BBox, b: BBox) -> bool:
+    """True if two envelopes overlap or touch"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def bbox_union(a: BBox, b: BBox) -> BBox:
+    """The envelope of two envelopes"""
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def polygon_area(rings: Sequence[Ring]) -> float:
+    """
+    The area of a polygon with the shoelace formula. Holes are wound opposite to the outer ring (clockwise outer
+    rings in Esri geometries), so their signed areas are subtracted
+    """
+    signed = 0.0
+    for ring in rings:
+        x_prev, y_prev = ring[-1]
+        for x_cur, y_cur in ring:
+            signed += x_prev * y_cur - x_cur * y_prev
+            x_prev, y_prev = x_cur, y_cur
+    return abs(signed) / 2
+
+
+def polygon_perimeter(rings: Sequence[Ring]) -> float:
+    """The total length of the rings of a polygon"""
+    length = 0.0
+    for ring in rings:
+        x_prev, y_prev = ring[-1]
+        for x_cur, y_cur in ring:
+            length += math.hypot(x_cur - x_prev, y_cur - y_prev)
+            x_prev, y_prev = x_cur, y_cur
+    return length
+
+
+def point_on_boundary(x: float, y: float, rings: Sequence[Ring]) -> bool:
+    """True if the point lies on an edge of the polygon"""
+    for ring in rings:
+        x_prev, y_prev = ring[-1]
+        for x_cur, y_cur in ring:
+            if ((y_prev <= y <= y_cur or y_cur <= y <= y_prev)
+                    and (x_prev <= x <= x_cur or x_cur <= x <= x_prev)
+                    and (x_cur - x_prev) * (y - y_prev) == (y_cur - y_prev) * (x - x_prev)):
+                return True
+            x_prev, y_prev = x_cur, y_cur
+    return False
+
+
+def point_in_polygon(x: float, y: float, rings: Sequence[Ring]) -> bool:
+    """
+    Crossing-number point in polygon test over all rings of a polygon (outer ring + holes).
+    A point on the boundary of any ring is considered inside, the same way arcpy's Intersect
+    returns points that touch a polygon.
+    Args:
+        x: the x coordinate of the point
+        y: the y coordinate of the point
+        rings: the rings of the polygon. They may be open or closed (first vertex repeated)
+
+    Returns: True if the point is inside or on the boundary of the polygon
+
+    """
+    inside = False
+    for ring in rings:
+        x_prev, y_prev = ring[-1]
+        for x_cur, y_cur in ring:
+            if ((y_prev <= y <= y_cur or y_cur <= y <= y_prev)
+                    and (x_prev <= x <= x_cur or x_cur <= x <= x_prev)
+                    and (x_cur - x_prev) * (y - y_prev) == (y_cur - y_prev) * (x - x_prev)):
+                return True
+            if (y_cur > y) != (y_prev > y):
+                x_cross = x_prev + (y - y_prev) * (x_cur - x_prev) / (y_cur - y_prev)
+                if x < x_cross:
+                    inside = not inside
+            x_prev, y_prev = x_cur, y_cur
+    return inside
+
+
+def geometry_bytes(geometry) -> bytes:
+    """Coordinates of a point or polygon packed as little-endian doubles, rings separated by b"|" (for hashing)"""
+    if not geometry:
+        return b""
+    if isinstance(geometry[0], (int, float)):
+        return struct.pack(f"<{len(geometry)}d", *geometry)
+    return b"|".join(geometry_bytes(part) for part in geometry)
+
+
+class PackedPolygons(Sequence):
+    """
+    Polygons held in three flat buffers instead of nested lists of tuples:
+        - coordinates: float64 x, y pairs of every vertex of every ring
+        - ring_offsets: int32, ring r holds the vertices ring_offsets[r]:ring_offsets[r + 1]
+        - polygon_offsets: int32, polygon p holds the rings polygon_offsets[p]:polygon_offsets[p + 1]
+    The buffers may be arrays, numpy arrays or memoryviews (e.g. of a memory-mapped file). Indexing returns the
+    rings of a polygon as lists of (x, y), so the sequence can be used wherever a list of polygons is expected.
+    """
+
+    def __init__(self, coordinates=None, ring_offsets=None, polygon_offsets=None):
+        self.coordinates = array("d") if coordinates is None else coordinates
+        self.ring_offsets = array("i", [0]) if ring_offsets is None else ring_offsets
+        self.polygon_offsets = array("i", [0]) if polygon_offsets is None else polygon_offsets
+
+    @classmethod
+    def pack(cls, polygons: Sequence[Sequence[Ring]]) -> "PackedPolygons":
+        packed = cls()
+        for rings in polygons:
+            packed.append(rings)
+        return packed
+
+    def append(self, rings: Sequence[Ring]) -> None:
+        """Adds a polygon. Only for packed polygons backed by arrays. Raises OverflowError above 2^31 vertices"""
+        for ring in rings:
+            self.coordinates.extend(chain.from_iterable(ring))
+            self.ring_offsets.append(len(self.coordinates) // 2)
+        self.polygon_offsets.append(len(self.ring_offsets) - 1)
+
+    def __len__(self) -> int:
+        return len(self.polygon_offsets) - 1
+
+    def __getitem__(self, position: int) -> List[List[Point]]:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("polygon index out of range")
+        rings = []
+        for ring in range(self.polygon_offsets[position], self.polygon_offsets[position + 1]):
+            ring_coordinates = self.coordinates[2 * self.ring_offsets[ring]:2 * self.ring_offsets[ring + 1]]
+            rings.append(list(zip(ring_coordinates[0::2], ring_coordinates[1::2])))
+        return rings
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Optional, Sequence, Tuple
+from spatial.geometry import geometry_bytes
+
+MAGIC = b"GIDX1\n"
+EXTENSION = ".idx"
+ALIGNMENT = 8
+
+# struct format of every array that can be stored, by numpy dtype (kind + item size) or array typecode
+_NUMPY_FORMATS = {"f8": "d", "i8": "q", "i4": "i", "b1": "?", "u1": "B"}
+_ARRAY_FORMATS = {"d": "d", "q": "q", "i": "i", "B": "B"}
+
+
+def file_version(path: str) -> dict:
+    """What identifies the content of a workspace file cheaply: its path, modification time and size"""
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def layer_fingerprint(rows: Sequence[tuple], shape_position: int, oid_position: int,
+                      edit_date_position: Optional[int] = None) -> dict:
+    """
+    What identifies the content of a layer: the row count, the latest edit date (when the layer has
+    editor tracking) and a hash of every OBJECTID and geometry, in row order.
+    Hashing every vertex costs more than building the index, so it is only the opt-in key (IndexCache.content_hash)
+    of layers that no file_version or edit date identifies.
+    """
+    content = hashlib.blake2b(digest_size=16)
+    max_edit_date = None
+    for row in rows:
+        content.update(struct.pack("<q", row[oid_position]))
+        content.update(geometry_bytes(row[shape_position]))
+        if edit_date_position is not None and row[edit_date_position] is not None:
+            edit_date = str(row[edit_date_position])
+            max_edit_date = edit_date if max_edit_date is None else max(max_edit_date, edit_date)
+    return {"row_count": len(rows), "max_edit_date": max_edit_date, "content_hash": content.hexdigest()}
+
+
+class IndexCache:
+    """
+    On-disk cache of spatial indexes (spatial.join.PolygonIndex), keyed by a version of the indexed layer that is
+    cheap to get: the file_version of its workspace, or its row count and latest edit date (see
+    spatial.join.cached_polygon_index). With `content_hash`, layers without either are keyed by layer_fingerprint.
+    The indexes of whole layers are cached: the intersects of the accessor and every check that reads a whole layer
+    through GeoDataAccessor.polygon_index (combined, relationship class, rule and service checks). The feature store,
+    whose file is written again by every run, and the tiles of the tiled mode, which index parts of layers, build
+    their indexes.
+    Every entry is one file: MAGIC, a uint32 length + JSON header (scalar attributes and array layout),
+    then the flat arrays, 8-byte aligned. Entries are memory-mapped on load, so the arrays are not copied
+    or rebuilt. When the files exceed `max_bytes`, the least recently used entries are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 2 ** 20, invalidate: bool = False,
+                 content_hash: bool = False):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+        os.makedirs(self.directory, exist_ok=True)
+        if invalidate:
+            self.clear()
+
+    @staticmethod
+    def key(fingerprint: dict) -> str:
+        encoded = json.dumps(fingerprint, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def load(self, key: str) -> Optional[Tuple[dict, Dict[str, memoryview]]]:
+        """
+        Returns: the scalar attributes and the arrays (memoryviews of the mapped file) of the entry,
+        None if there is no valid entry for the key
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            meta, arrays = read_entry(mapped)
+        except (ValueError, KeyError, struct.error, TypeError):
+            logging.warning(f"Removing invalid index cache entry {path}")
+            mapped.close()
+            self._remove(path)
+            return None
+        os.utime(path)
+        logging.debug(f"Loaded cached index {key}")
+        return meta, arrays
+
+    def store(self, key: str, meta: dict, arrays: Dict[str, object]) -> None:
+        """Writes an entry (atomically) and evicts the least recently used entries above max_bytes"""
+        path = self._path(key)
+        size = write_entry(path, meta, arrays)
+        logging.debug(f"Stored index {key} ({size} bytes)")
+        self._evict(keep=path)
+
+    def clear(self) -> None:
+        for path in self._entries():
+            self._remove(path)
+
+    def _evict(self, keep: str) -> None:
+        entries = sorted(self._entries(), key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            size = os.path.getsize(path)
+            if self._remove(path):
+                total -= size
+                logging.debug(f"Evicted cached index {path}")
+
+    def _entries(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(EXTENSION)]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{EXTENSION}")
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:  # e.g. still mapped by another process on Windows
+            return False
+
+
+def write_entry(path: str, meta: dict, arrays: Dict[str, object], magic: bytes = MAGIC) -> int:
+    """
+    Writes scalar attributes and flat arrays (array.array, numpy arrays) in the entry format, atomically
+    (through a .part file). Also used by geo_access.feature_store. Returns the size of the file
+    """
+    temporary_path = f"{path}.part"
+    header = {"byteorder": sys.byteorder, "meta": meta, "arrays": {}}
+    buffers = []
+    offset = 0
+    for name, values in arrays.items():
+        data = memoryview(values).cast("B")
+        header["arrays"][name] = {"format": _format(values), "offset": offset, "size": len(data)}
+        buffers.append(data)
+        offset += _aligned(len(data))
+
+    encoded_header = json.dumps(header).encode("utf-8")
+    data_start = _aligned(len(magic) + 4 + len(encoded_header))
+    with open(temporary_path, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<I", len(encoded_header)))
+        f.write(encoded_header)
+        f.write(b"\0" * (data_start - f.tell()))
+        for data in buffers:
+            f.write(data)
+            f.write(b"\0" * (_aligned(len(data)) - len(data)))
+    os.replace(temporary_path, path)
+    return data_start + offset
+
+
+def read_entry(mapped: mmap.mmap, magic: bytes = MAGIC) -> Tuple[dict, Dict[str, memoryview]]:
+    """The scalar attributes and the arrays of a mapped entry, as memoryviews of the mapping (no copies)"""
+    if mapped[:len(magic)] != magic:
+        raise ValueError(f"Expected a file starting with {magic!r}")
+    (header_size,) = struct.unpack_from("<I", mapped, len(magic))
+    header_start = len(magic) + 4
+    header = json.loads(mapped[header_start:header_start + header_size])
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError("Index cache entry written on a machine with another byte order")
+
+    data_start = _aligned(header_start + header_size)
+    view = memoryview(mapped)
+    arrays = {}
+    for name, layout in header["arrays"].items():
+        start = data_start + layout["offset"]
+        if start + layout["size"] > len(mapped):
+            raise ValueError("Truncated index cache entry")
+        arrays[name] = view[start:start + layout["size"]].cast(layout["format"])
+    return header["meta"], arrays
+
+
+def _format(values) -> str:
+    dtype = getattr(values, "dtype", None)
+    if dtype is not None:
+        return _NUMPY_FORMATS[f"{dtype.kind}{dtype.itemsize}"]
+    return _ARRAY_FORMATS[values.typecode]
+
+
+def _aligned(size: int) -> int:
+    return -(-size // ALIGNMENT) * ALIGNMENT
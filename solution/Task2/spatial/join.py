@@ -0,0 +1,111 @@
+import logging
+from typing import Iterator, Optional, Sequence, Tuple
+from spatial.geometry import Point, Ring, point_in_polygon, polygon_bbox
+from spatial.index_cache import IndexCache
+from spatial.strtree import STRtree
+
+try:
+    from spatial.pip_kernel import PolygonSet
+except ImportError:  # numpy is optional, the STR tree join is used without it
+    PolygonSet = None
+
+
+def build_polygon_index(polygons: Sequence[Sequence[Ring]]) -> STRtree:
+    """Bulk load an STR tree over the envelopes of the polygons"""
+    return STRtree([polygon_bbox(rings) for rings in polygons])
+
+
+def point_in_polygon_join(points: Sequence[Point], polygons: Sequence[Sequence[Ring]],
+                          index: Optional[STRtree] = None) -> Iterator[Tuple[int, int]]:
+    """
+    Spatial join between points and polygons: candidates come from the STR tree, every candidate
+    is confirmed with an exact point in polygon test.
+    Args:
+        points: the (x, y) coordinates of the points
+        polygons: the rings of every polygon
+        index: an already built index over `polygons`. It's built on the fly if missing
+
+    Returns:
+        (point position, polygon position) for every point inside (or on the boundary of) a polygon.
+        Pairs are ordered by point and then by polygon position, one pair per containing polygon.
+    """
+    if index is None:
+        index = build_polygon_index(polygons)
+
+    for point_pos, (x, y) in enumerate(points):
+        candidates = sorted(index.query(x, y, x, y))
+        for poly_pos in candidates:
+            if point_in_polygon(x, y, polygons[poly_pos]):
+                yield point_pos, poly_pos
+
+
+class PolygonIndex:
+    """
+    Spatial index of one polygon layer, built once and joined with any number of point sets.
+    Uses the vectorized NumPy kernel when numpy is installed and the STR tree join otherwise.
+    """
+
+    def __init__(self, polygons: Sequence[Sequence[Ring]], use_numpy: bool = True):
+        self.polygons = polygons
+        self.use_numpy = use_numpy and PolygonSet is not None
+        self._index = PolygonSet(polygons) if self.use_numpy else build_polygon_index(polygons)
+
+    def to_arrays(self) -> Tuple[dict, dict]:
+        """The state of the index as scalar attributes and flat arrays (see spatial.index_cache)"""
+        meta, arrays = self._index.to_arrays()
+        return {"kind": "numpy" if self.use_numpy else "strtree", **meta}, arrays
+
+    @classmethod
+    def from_arrays(cls, polygons: Sequence[Sequence[Ring]], meta: dict, arrays: dict) -> "PolygonIndex":
+        """Rebuilds an index saved with to_arrays over the same polygons, without building it again"""
+        index = cls.__new__(cls)
+        index.polygons = polygons
+        meta = dict(meta)
+        index.use_numpy = meta.pop("kind") == "numpy"
+        if index.use_numpy:
+            index._index = PolygonSet.from_arrays(meta, arrays)
+        else:
+            index._index = STRtree.from_arrays(meta, arrays)
+        return index
+
+    def join(self, points: Sequence[Point]) -> Iterator[Tuple[int, int]]:
+        """(point position, polygon position) pairs, the same as point_in_polygon_join"""
+        if self.use_numpy:
+            point_positions, polygon_positions = self._index.pairs(points)
+            return zip(point_positions.tolist(), polygon_positions.tolist())
+        return point_in_polygon_join(points, self.polygons, self._index)
+
+    def pairs(self, points: Sequence[Point], point_offset: int = 0) -> Tuple[Sequence[int], Sequence[int]]:
+        """
+        The pairs of `join` as two sequences (numpy arrays with the NumPy kernel, lists otherwise):
+        the point positions, shifted by `point_offset` (the position of points[0] in its layer), and the polygon positions
+        """
+        if self.use_numpy:
+            point_positions, polygon_positions = self._index.pairs(points)
+            return point_positions + point_offset, polygon_positions
+        pairs = list(point_in_polygon_join(points, self.polygons, self._index))
+        return [point_pos + point_offset for point_pos, _ in pairs], [poly_pos for _, poly_pos in pairs]
+
+
+def cached_polygon_index(polygons: Sequence[Sequence[Ring]], cache: Optional[IndexCache], version: Optional[dict],
+                         use_numpy: bool = True) -> PolygonIndex:
+    """
+    The PolygonIndex of the polygons of a layer, memory-mapped from the cache when an index of the same layer version
+    and polygon count was stored, otherwise built and stored.
+    Args:
+        polygons: the polygons of the layer
+        cache: the index cache, the index is only built without one
+        version: what identifies the content of the layer (e.g. index_cache.file_version of its workspace and its
+            name). The index is only built without one: a layer nothing cheap identifies is not cached
+        use_numpy: use the NumPy kernel when numpy is installed
+    """
+    if cache is None or version is None:
+        return PolygonIndex(polygons, use_numpy)
+    key = cache.key({**version, "polygons": len(polygons), "use_numpy": use_numpy and PolygonSet is not None})
+    cached = cache.load(key)
+    if cached is not None:
+        return PolygonIndex.from_arrays(polygons, *cached)
+    index = PolygonIndex(polygons, use_numpy)
+    cache.store(key, *index.to_arrays())
+    logging.debug(f"Cached the index of {len(polygons)} polygons as {key}")
+    return index
@@ -0,0 +1,232 @@
+import math
+from typing import Dict, Sequence, Tuple
+import numpy as np
+from spatial.geometry import PackedPolygons, Ring
+
+
+class PolygonSet:
+    """
+    Vectorized point in polygon over a whole polygon layer.
+
+    Candidate (point, polygon) pairs come from a uniform grid over the polygon envelopes, so every point is only
+    compared with the polygons of its grid cell. Axis-aligned rectangles (most Room/StationDetail borders) are
+    decided by the envelope comparison alone, every other polygon goes through a crossing-number test vectorized
+    over all candidate (point, edge) combinations.
+    Points on the boundary are inside, the same as spatial.geometry.point_in_polygon and arcpy's Intersect.
+
+    The set is built from the flat buffers of spatial.geometry.PackedPolygons (lists of rings are packed first),
+    so a memory-mapped feature store is indexed without creating a tuple per vertex.
+    """
+
+    # Arrays saved by to_arrays, restored (e.g. memory-mapped from spatial.index_cache) by from_arrays
+    ARRAYS = ("min_x", "min_y", "max_x", "max_y", "is_rectangle", "_cell_start", "_cell_polygons",
+              "_edge_offsets", "_edge_values")
+    # Candidate (point, edge) rows tested at once by _contains, bounds the temporary arrays to some tens of MB
+    CHUNK_EDGES = 2 ** 20
+
+    def __init__(self, polygons: Sequence[Sequence[Ring]]):
+        packed = polygons if isinstance(polygons, PackedPolygons) else PackedPolygons.pack(polygons)
+        vertices = np.asarray(packed.coordinates, dtype=np.float64).reshape(-1, 2)
+        ring_offsets = np.asarray(packed.ring_offsets, dtype=np.int64)
+        polygon_offsets = np.asarray(packed.polygon_offsets, dtype=np.int64)
+        self.count = len(polygon_offsets) - 1
+
+        vertex_starts = ring_offsets[polygon_offsets[:-1]]
+        vertex_counts = ring_offsets[polygon_offsets[1:]] - vertex_starts
+        if (vertex_counts == 0).any():
+            raise ValueError("Polygons must have at least one vertex")
+        self._build_bounds(vertices, vertex_starts)
+        self._find_rectangles(vertices, vertex_starts, vertex_counts, np.diff(polygon_offsets))
+        self._build_edges(vertices, ring_offsets, vertex_counts)
+        self._build_grid()
+
+    def to_arrays(self) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """The scalar attributes and the flat arrays of the set, enough to rebuild it without the polygons"""
+        meta = {name: getattr(self, name) for name in ("count", "origin_x", "origin_y", "cell_size", "columns", "rows")}
+        return meta, {name: getattr(self, name).reshape(-1) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, meta: dict, arrays: Dict[str, np.ndarray]) -> "PolygonSet":
+        """Rebuilds a set saved with to_arrays. The arrays (or buffers, e.g. memoryviews) are not copied"""
+        polygon_set = cls.__new__(cls)
+        for name, value in meta.items():
+            setattr(polygon_set, name, value)
+        for name in cls.ARRAYS:
+            setattr(polygon_set, name, np.asarray(arrays[name]))
+        polygon_set._edge_values = polygon_set._edge_values.reshape(-1, 4)
+        return polygon_set
+
+    def _build_bounds(self, vertices: np.ndarray, vertex_starts: np.ndarray) -> None:
+        if not self.count:
+            self.min_x = self.min_y = self.max_x = self.max_y = np.zeros(0, dtype=np.float64)
+            return
+        self.min_x, self.min_y = (np.minimum.reduceat(vertices[:, axis], vertex_starts) for axis in (0, 1))
+        self.max_x, self.max_y = (np.maximum.reduceat(vertices[:, axis], vertex_starts) for axis in (0, 1))
+
+    def _find_rectangles(self, vertices: np.ndarray, vertex_starts: np.ndarray, vertex_counts: np.ndarray,
+                         ring_counts: np.ndarray) -> None:
+        """Axis-aligned rectangles: single rings with 4 corners (+ the closing vertex), with a non-zero area"""
+        self.is_rectangle = np.zeros(self.count, dtype=bool)
+        candidates = np.flatnonzero((ring_counts == 1) & ((vertex_counts == 4) | (vertex_counts == 5)))
+        if not len(candidates):
+            return
+        corners = vertices[vertex_starts[candidates, None] + np.arange(4)]
+        edges = np.roll(corners, -1, axis=1) - corners
+        vertical, horizontal = edges[:, :, 0] == 0, edges[:, :, 1] == 0
+        rectangle = (
+            (vertical[:, 0] & horizontal[:, 1] & vertical[:, 2] & horizontal[:, 3])
+            | (horizontal[:, 0] & vertical[:, 1] & horizontal[:, 2] & vertical[:, 3])
+        )
+        rectangle &= ((self.max_x[candidates] > self.min_x[candidates])
+                      & (self.max_y[candidates] > self.min_y[candidates]))
+        closed = vertex_counts[candidates] == 5
+        closing = vertices[vertex_starts[candidates[closed]] + 4]
+        rectangle[closed] &= (closing == corners[closed, 0]).all(axis=1)
+        self.is_rectangle[candidates] = rectangle
+
+    def _build_edges(self, vertices: np.ndarray, ring_offsets: np.ndarray, vertex_counts: np.ndarray) -> None:
+        """
+        (x_prev, y_prev, x_cur, y_cur) of every edge of the polygons that are not rectangles, including the edge
+        from the last vertex of a ring to the first: polygon p owns rows _edge_offsets[p]:_edge_offsets[p + 1]
+        """
+        edge_counts = np.where(self.is_rectangle, 0, vertex_counts)
+        self._edge_offsets = np.concatenate(([0], np.cumsum(edge_counts)))
+
+        previous = np.arange(len(vertices)) - 1
+        ring_starts, ring_ends = ring_offsets[:-1], ring_offsets[1:]
+        non_empty = ring_ends > ring_starts
+        previous[ring_starts[non_empty]] = ring_ends[non_empty] - 1
+
+        polygon_of_vertex = np.repeat(np.arange(self.count), vertex_counts)
+        general = np.flatnonzero(~self.is_rectangle[polygon_of_vertex])
+        self._edge_values = np.hstack((vertices[previous[general]], vertices[general]))
+
+    def _build_grid(self) -> None:
+        if not self.count:
+            self.origin_x = self.origin_y = 0.0
+            self.cell_size = 1.0
+            self.columns = self.rows = 1
+            self._cell_start = np.zeros(2, dtype=np.int64)
+            self._cell_polygons = np.zeros(0, dtype=np.int64)
+            return
+
+        self.origin_x, self.origin_y = float(self.min_x.min()), float(self.min_y.min())
+        width = float(self.max_x.max()) - self.origin_x
+        height = float(self.max_y.max()) - self.origin_y
+
+        # Cells about the size of a typical polygon, with at most ~4 cells per polygon in total
+        cell_size = float(np.median(np.maximum(self.max_x - self.min_x, self.max_y - self.min_y)))
+        cell_size = max(cell_size, math.sqrt(width * height / (4 * self.count)), 1e-9)
+        self.cell_size = cell_size
+        self.columns = max(1, math.ceil(width / cell_size))
+        self.rows = max(1, math.ceil(height / cell_size))
+
+        column_from, row_from = self._cell_coordinates(self.min_x, self.min_y)
+        column_to, row_to = self._cell_coordinates(self.max_x, self.max_y)
+        widths = column_to - column_from + 1
+        cell_counts = widths * (row_to - row_from + 1)
+
+        polygons = np.repeat(np.arange(self.count), cell_counts)
+        local = np.arange(len(polygons)) - np.repeat(np.cumsum(cell_counts) - cell_counts, cell_counts)
+        cells = ((row_from[polygons] + local // widths[polygons]) * self.columns
+                 + column_from[polygons] + local % widths[polygons])
+
+        order = np.argsort(cells, kind="stable")
+        self._cell_polygons = polygons[order]
+        self._cell_start = np.searchsorted(cells[order], np.arange(self.columns * self.rows + 1))
+
+    def _cell_coordinates(self, x: np.ndarray, y: np.ndarray):
+        column = np.floor((x - self.origin_x) / self.cell_size).astype(np.int64)
+        row = np.floor((y - self.origin_y) / self.cell_size).astype(np.int64)
+        return np.clip(column, 0, self.columns - 1), np.clip(row, 0, self.rows - 1)
+
+    def pairs(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All (point, polygon) containment pairs.
+        Args:
+            points: float array with shape (N, 2)
+
+        Returns: two int arrays (point positions, polygon positions), ordered by point and then by polygon
+
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        x, y = points[:, 0], points[:, 1]
+        if not self.count or not len(points):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        in_grid = np.flatnonzero(
+            (x >= self.origin_x) & (x <= self.origin_x + self.columns * self.cell_size)
+            & (y >= self.origin_y) & (y <= self.origin_y + self.rows * self.cell_size)
+        )
+        column, row = self._cell_coordinates(x[in_grid], y[in_grid])
+        cells = row * self.columns + column
+        starts = self._cell_start[cells]
+        counts = self._cell_start[cells + 1] - starts
+
+        point_positions = np.repeat(in_grid, counts)
+        local = np.arange(len(point_positions)) - np.repeat(np.cumsum(counts) - counts, counts)
+        polygon_positions = self._cell_polygons[np.repeat(starts, counts) + local]
+
+        px, py = x[point_positions], y[point_positions]
+        keep = ((px >= self.min_x[polygon_positions]) & (px <= self.max_x[polygon_positions])
+                & (py >= self.min_y[polygon_positions]) & (py <= self.max_y[polygon_positions]))
+        point_positions, polygon_positions = point_positions[keep], polygon_positions[keep]
+
+        general = np.flatnonzero(~self.is_rectangle[polygon_positions])
+        if len(general):
+            inside = self._contains(x, y, point_positions[general], polygon_positions[general])
+            keep = np.ones(len(point_positions), dtype=bool)
+            keep[general[~inside]] = False
+            point_positions, polygon_positions = point_positions[keep], polygon_positions[keep]
+
+        order = np.lexsort((polygon_positions, point_positions))
+        return point_positions[order], polygon_positions[order]
+
+    def locate(self, points: np.ndarray) -> np.ndarray:
+        """
+        The containing polygon of every point: the lowest polygon position when several contain it, -1 for none.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        result = np.full(len(points), -1, dtype=np.int64)
+        point_positions, polygon_positions = self.pairs(points)
+        located, first = np.unique(point_positions, return_index=True)
+        result[located] = polygon_positions[first]
+        return result
+
+    def _contains(self, x: np.ndarray, y: np.ndarray, point_positions: np.ndarray,
+                  polygon_positions: np.ndarray) -> np.ndarray:
+        """Crossing-number test of the candidate pairs, in chunks of about CHUNK_EDGES (point, edge) rows"""
+        edge_starts = self._edge_offsets[polygon_positions]
+        edge_counts = self._edge_offsets[polygon_positions + 1] - edge_starts
+        chunk_ends = np.cumsum(edge_counts)
+        result = np.empty(len(point_positions), dtype=bool)
+        first = 0
+        while first < len(point_positions):
+            limit = chunk_ends[first] - edge_counts[first] + self.CHUNK_EDGES
+            last = max(first + 1, int(np.searchsorted(chunk_ends, limit, side="right")))
+            members = slice(first, last)
+            result[members] = self._contains_chunk(x[point_positions[members]], y[point_positions[members]],
+                                                   edge_starts[members], edge_counts[members])
+            first = last
+        return result
+
+    def _contains_chunk(self, x: np.ndarray, y: np.ndarray, edge_starts: np.ndarray,
+                        edge_counts: np.ndarray) -> np.ndarray:
+        """One row per (pair, edge of the pair's polygon), reduced back to one result per pair"""
+        row_starts = np.cumsum(edge_counts) - edge_counts
+        edge_rows = np.repeat(edge_starts - row_starts, edge_counts) + np.arange(int(edge_counts.sum()))
+        x_prev, y_prev, x_cur, y_cur = self._edge_values[edge_rows].T
+        px, py = np.repeat(x, edge_counts), np.repeat(y, edge_counts)
+
+        boundary = ((((y_prev <= py) & (py <= y_cur)) | ((y_cur <= py) & (py <= y_prev)))
+                    & (((x_prev <= px) & (px <= x_cur)) | ((x_cur <= px) & (px <= x_prev)))
+                    & ((x_cur - x_prev) * (py - y_prev) == (y_cur - y_prev) * (px - x_prev)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = x_prev + (py - y_prev) * (x_cur - x_prev) / (y_cur - y_prev)
+        crossing = ((y_cur > py) != (y_prev > py)) & (px < x_cross)
+        return np.logical_xor.reduceat(crossing, row_starts) | np.logical_or.reduceat(boundary, row_starts)
+
+
+def locate_points(points: np.ndarray, polygons: Sequence[Sequence[Ring]]) -> np.ndarray:
+    """Index of the containing polygon for every point (N, 2), -1 where none contains it"""
+    return PolygonSet(polygons).locate(points)
@@ -0,0 +1,117 @@
+import math
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Sequence, Tuple
+from spatial.geometry import BBox
+
+
+class STRtree:
+    """
+    Packed (static) R-tree, bulk loaded with the Sort-Tile-Recursive algorithm.
+
+    All nodes live in flat arrays: the first `count` nodes are the leaves (one per item, in STR order),
+    followed by every parent level up to the root. A node's box is stored as 4 consecutive floats in `boxes`.
+    For a leaf `indices` holds the position of the item in the input sequence, for a parent node it holds
+    the position of its first child. This keeps the tree compact and cheap to serialize.
+    """
+
+    def __init__(self, boxes: Sequence[BBox], node_capacity: int = 16):
+        if node_capacity < 2:
+            raise ValueError("node_capacity must be at least 2")
+        self.node_capacity = node_capacity
+        self.count = len(boxes)
+        self.boxes = array("d")
+        self.indices = array("q")
+        self.level_bounds: List[int] = []
+        if self.count:
+            self._build(boxes)
+
+    def _build(self, boxes: Sequence[BBox]) -> None:
+        capacity = self.node_capacity
+        order = self._str_order(boxes, capacity)
+
+        for item in order:
+            self.boxes.extend(boxes[item])
+            self.indices.append(item)
+        self.level_bounds.append(self.count)
+
+        level_start = 0
+        while self.level_bounds[-1] - level_start > 1:
+            level_end = self.level_bounds[-1]
+            for child in range(level_start, level_end, capacity):
+                last = min(child + capacity, level_end)
+                child_boxes = self.boxes[child * 4:last * 4]
+                self.boxes.extend((
+                    min(child_boxes[0::4]),
+                    min(child_boxes[1::4]),
+                    max(child_boxes[2::4]),
+                    max(child_boxes[3::4]),
+                ))
+                self.indices.append(child)
+            level_start = level_end
+            self.level_bounds.append(len(self.indices))
+
+    def to_arrays(self) -> Tuple[dict, Dict[str, array]]:
+        """The scalar attributes and the flat node arrays of the tree"""
+        meta = {"node_capacity": self.node_capacity, "count": self.count, "level_bounds": self.level_bounds}
+        return meta, {"boxes": self.boxes, "indices": self.indices}
+
+    @classmethod
+    def from_arrays(cls, meta: dict, arrays: Dict[str, Sequence]) -> "STRtree":
+        """
+        Rebuilds a tree saved with to_arrays. `boxes` and `indices` can be any indexable sequence
+        of floats/ints, e.g. memoryviews of a memory-mapped file (see spatial.index_cache)
+        """
+        tree = cls.__new__(cls)
+        tree.node_capacity = meta["node_capacity"]
+        tree.count = meta["count"]
+        tree.level_bounds = list(meta["level_bounds"])
+        tree.boxes = arrays["boxes"]
+        tree.indices = arrays["indices"]
+        return tree
+
+    @staticmethod
+    def _str_order(boxes: Sequence[BBox], capacity: int) -> List[int]:
+        """Sort the items into vertical slices by x center, then by y center inside every slice"""
+        leaf_count = math.ceil(len(boxes) / capacity)
+        slice_size = capacity * math.ceil(math.sqrt(leaf_count))
+
+        by_x = sorted(range(len(boxes)), key=lambda i: boxes[i][0] + boxes[i][2])
+        order = []
+        for start in range(0, len(by_x), slice_size):
+            vertical_slice = by_x[start:start + slice_size]
+            vertical_slice.sort(key=lambda i: boxes[i][1] + boxes[i][3])
+            order.extend(vertical_slice)
+        return order
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Iterator[int]:
+        """Yield the input positions of all items whose box intersects the given box (touching counts)"""
+        if not self.count:
+            return
+        boxes, indices, bounds = self.boxes, self.indices, self.level_bounds
+        capacity, count = self.node_capacity, self.count
+
+        root = len(indices) - 1
+        start = root * 4
+        if boxes[start] > max_x or boxes[start + 1] > max_y or boxes[start + 2] < min_x or boxes[start + 3] < min_y:
+            return
+        if root < count:
+            yield indices[root]
+            return
+
+        stack = [root]
+        while stack:
+            first_child = indices[stack.pop()]
+            last_child = min(first_child + capacity, bounds[bisect_right(bounds, first_child)])
+            for child in range(first_child, last_child):
+                start = child * 4
+                if boxes[start] > max_x or boxes[start + 1] > max_y or boxes[start + 2] < min_x or boxes[start + 3] < min_y:
+                    continue
+                if child < count:
+                    yield indices[child]
+                else:
+                    stack.append(child)
+
+    def query_point(self, x: float, y: float) -> Iterator[int]:
+        """Yield the input positions of all items whose box contains the point"""
+        return self.query(x, y, x, y)
@@ -0,0 +1,52 @@
+from typing import Iterator, Sequence, Tuple
+from spatial.geometry import Point
+
+Segment = Tuple[Point, Point]
+
+
+def orientation(a: Point, b: Point, c: Point) -> int:
+    """1 if a, b, c turn counter-clockwise, -1 if clockwise, 0 if they are collinear"""
+    cross = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (cross > 0) - (cross < 0)
+
+
+def segments_intersect(a: Segment, b: Segment) -> bool:
+    """True if the segments share at least one point (touching and collinear overlaps count)"""
+    (p1, p2), (q1, q2) = a, b
+    o1, o2 = orientation(p1, p2, q1), orientation(p1, p2, q2)
+    o3, o4 = orientation(q1, q2, p1), orientation(q1, q2, p2)
+    if o1 != o2 and o3 != o4:
+        return True
+    return ((o1 == 0 and _on_segment(p1, p2, q1)) or (o2 == 0 and _on_segment(p1, p2, q2))
+            or (o3 == 0 and _on_segment(q1, q2, p1)) or (o4 == 0 and _on_segment(q1, q2, p2)))
+
+
+def segments_cross(a: Segment, b: Segment) -> bool:
+    """True if the segments cross at a single point inside both of them (not at an end point, not collinear)"""
+    (p1, p2), (q1, q2) = a, b
+    o1, o2 = orientation(p1, p2, q1), orientation(p1, p2, q2)
+    o3, o4 = orientation(q1, q2, p1), orientation(q1, q2, p2)
+    return o1 * o2 < 0 and o3 * o4 < 0
+
+
+def intersecting_pairs(segments: Sequence[Segment]) -> Iterator[Tuple[int, int]]:
+    """
+    The (i, j), i < j, positions of every pair of intersecting segments.
+    A sweep line moves over x: the segments are visited by their min x, and each one is only compared with the
+    active segments whose x range reaches it and whose y range overlaps it, instead of with every other segment.
+    """
+    order = sorted(range(len(segments)), key=lambda position: min(segments[position][0][0], segments[position][1][0]))
+    active = []
+    for position in order:
+        (x1, y1), (x2, y2) = segments[position]
+        min_x, min_y, max_y = min(x1, x2), min(y1, y2), max(y1, y2)
+        active = [entry for entry in active if entry[0] >= min_x]
+        for other_max_x, other_min_y, other_max_y, other in active:
+            if other_min_y <= max_y and min_y <= other_max_y and segments_intersect(segments[other], segments[position]):
+                yield min(other, position), max(other, position)
+        active.append((max(x1, x2), min_y, max_y, position))
+
+
+def _on_segment(p: Point, q: Point, r: Point) -> bool:
+    """True if r, collinear with p and q, lies between them"""
+    return min(p[0], q[0]) <= r[0] <= max(p[0], q[0]) and min(p[1], q[1]) <= r[1] <= max(p[1], q[1])
@@ -0,0 +1,119 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from geo_access.feature_store import FeatureStore, StoredLayer
+from geo_access.geo_accessor import GeoDataAccessor
+from logic_checker import ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+from spatial.join import PolygonIndex
+
+
+def store_layers(config: Config, check_rooms: bool, check_stations: bool) -> Dict[str, List[str]]:
+    """The layers and GUID fields the checks read from a feature store"""
+    layers = {
+        config.room_layer_name: ["GLOBALID", "STATION_GUID"],
+        config.station_detail_layer_name: ["GLOBALID", "STATION_GUID"],
+    }
+    if check_rooms:
+        layers[config.room_detail_layer_name] = ["GLOBALID", "ROOM_GUID"]
+    if check_stations:
+        layers[config.station_layer_name] = ["GLOBALID"]
+    return layers
+
+
+def write_feature_store(config: Config, accessor: GeoDataAccessor, check_rooms: bool = False,
+                        check_stations: bool = False) -> FeatureStore:
+    """Reads every layer the checks need into the feature store file `config.feature_store` and opens it"""
+    return FeatureStore.write(config.feature_store, accessor, store_layers(config, check_rooms, check_stations))
+
+
+class StoreChecker:
+    """
+    The checks of LogicChecker.check_all_relationships, run on the buffers of a FeatureStore: the points are joined
+    with the polygon indexes directly from the mapped coordinates and the GUIDs are compared as 16-byte values.
+    Only the invalid rows are decoded to GUID strings, so the results have the same format and order as the
+    LogicChecker checks.
+    """
+
+    def __init__(self, config: Config, store: FeatureStore, use_numpy: bool = True):
+        self.config = config
+        self.store = store
+        self.use_numpy = use_numpy
+        self._polygon_indexes: Dict[str, PolygonIndex] = {}
+
+    def check_all_relationships(self, check_rooms: bool = False, check_stations: bool = False,
+                                rooms: Optional[range] = None) -> Dict[str, List[Tuple]]:
+        """
+        Args:
+            check_rooms: also check the Room-RoomDetail relationships
+            check_stations: also check the Station-StationDetail relationships
+            rooms: the positions of the rooms to check (a shard of a parallel run). All rooms if None
+
+        Returns:
+            The invalid entries of every enabled check, keyed by ROOM_TO_STATION, ROOM_TO_ROOMDETAIL and
+            STATION_TO_STATIONDETAIL, in the same formats as the LogicChecker checks
+        """
+        room_layer = self.store.layer(self.config.room_layer_name)
+        station_details = self.store.layer(self.config.station_detail_layer_name)
+        rooms = range(len(room_layer)) if rooms is None else rooms
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+        results = {ROOM_TO_STATION: []}
+        room_guids, logical_stations = room_layer.guids["GLOBALID"], room_layer.guids["STATION_GUID"]
+        geometrical_stations = station_details.guids["STATION_GUID"]
+        for room, detail in self._invalid_pairs(room_layer, rooms, "STATION_GUID", station_details, "STATION_GUID"):
+            entry = (room_guids[room], logical_stations[room], geometrical_stations[detail])
+            results[ROOM_TO_STATION].append(entry)
+            if debug:
+                logging.debug(
+                    f"Invalid room-station relationship: room_guid={entry[0]}, "
+                    f"logical_station={entry[1]}, geometrical_station={entry[2]}"
+                )
+
+        if check_rooms:
+            room_details = self.store.layer(self.config.room_detail_layer_name)
+            results[ROOM_TO_ROOMDETAIL] = self._invalid_point_to_poly(room_layer, rooms, room_details, "ROOM_GUID")
+
+        if check_stations:
+            stations = self.store.layer(self.config.station_layer_name)
+            results[STATION_TO_STATIONDETAIL] = self._invalid_point_to_poly(
+                stations, range(len(stations)), station_details, "STATION_GUID"
+            )
+
+        counts = {key: len(value) for key, value in results.items()}
+        logging.debug(f"Feature store checks found {counts} invalid entries")
+        return results
+
+    def _invalid_point_to_poly(self, points: StoredLayer, rows: range, polygons: StoredLayer,
+                               point_field: str) -> List[Tuple]:
+        """
+        Same result as LogicChecker._check_point_to_poly_relationship: the polygon's `point_field` is compared
+        with the GLOBALID of the point inside it
+        """
+        invalid_entries = []
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        point_guids = points.guids["GLOBALID"]
+        polygon_guids, logical_points = polygons.guids["GLOBALID"], polygons.guids[point_field]
+        for point, polygon in self._invalid_pairs(points, rows, "GLOBALID", polygons, point_field):
+            entry = (polygon_guids[polygon], logical_points[polygon], point_guids[point])
+            invalid_entries.append(entry)
+            if debug:
+                logging.debug(
+                    f"Invalid relationship found: poly_guid={entry[0]}, "
+                    f"logical_point_guid={entry[1]}, geometrical_point_guid={entry[2]}"
+                )
+        return invalid_entries
+
+    def _invalid_pairs(self, points: StoredLayer, rows: range, point_field: str, polygons: StoredLayer,
+                       polygon_field: str) -> List[Tuple[int, int]]:
+        """(point row, polygon row) of every point inside a polygon where the two GUID fields differ"""
+        index = self._polygon_index(polygons)
+        point_rows, polygon_rows = index.pairs(points.points(rows.start, rows.stop), rows.start)
+        different = points.guids[point_field].differ(point_rows, polygons.guids[polygon_field], polygon_rows)
+        return [(int(point_rows[k]), int(polygon_rows[k])) for k in different]
+
+    def _polygon_index(self, layer: StoredLayer) -> PolygonIndex:
+        """Every polygon layer is indexed once per checker, from the mapped buffers"""
+        index = self._polygon_indexes.get(layer.name)
+        if index is None:
+            index = self._polygon_indexes[layer.name] = PolygonIndex(layer.polygons(), self.use_numpy)
+        return index
@@ -0,0 +1,24 @@
+"""Geometries and layers shared by the tests"""
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+
+STATION_FIELDS = ["OBJECTID", "GLOBALID", "SHAPE"]
+STATION_DETAIL_FIELDS = ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"]
+
+
+def square(min_x, min_y, size):
+    """A square polygon as a list of rings, in the format of geometry_cursor"""
+    return [[(min_x, min_y), (min_x, min_y + size), (min_x + size, min_y + size), (min_x + size, min_y), (min_x, min_y)]]
+
+
+def two_stations():
+    """(stations, station details) of two stations side by side: S-A in SD-A (0, 0, 20), S-B in SD-B (20, 0, 20)"""
+    stations = [(1, "{S-A}", (5, 5)), (2, "{S-B}", (25, 5))]
+    details = [(1, "{SD-A}", "{S-A}", square(0, 0, 20)), (2, "{SD-B}", "{S-B}", square(20, 0, 20))]
+    return stations, details
+
+
+def add_two_stations(accessor: InMemoryAccessor) -> None:
+    """Adds the main.Station and main.StationDetail layers of two_stations"""
+    stations, details = two_stations()
+    accessor.add_layer("main.Station", STATION_FIELDS, stations, POINT)
+    accessor.add_layer("main.StationDetail", STATION_DETAIL_FIELDS, details, POLYGON)
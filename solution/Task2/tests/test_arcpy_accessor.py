@@ -0,0 +1,46 @@
+import importlib
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call, patch
+from benchmarks.synthetic_network import network_config
+from logic_checker import LogicChecker
+
+CONFIG = network_config("Task2.gdb")
+
+
+class TestArcpyAccessor(unittest.TestCase):
+    """The calls made to arcpy, with a mock in place of the module"""
+
+    def setUp(self):
+        self.arcpy = MagicMock()
+        modules = patch.dict(sys.modules, {"arcpy": self.arcpy})
+        modules.start()
+        self.addCleanup(modules.stop)
+        sys.modules.pop("geo_access.arcpy_accessor", None)
+        self.accessor = importlib.import_module("geo_access.arcpy_accessor").ArcpyAccessor()
+
+    def test_selection_is_a_named_layer(self):
+        """Test a selection is a feature layer of its own, and only such layers are released"""
+        selection = self.accessor.select_layer_by_attribute("main.Room", "OBJECTID > 5")
+        self.arcpy.management.MakeFeatureLayer.assert_called_once_with("main.Room", selection, "OBJECTID > 5")
+        self.assertNotEqual(selection, "main.Room")
+
+        with self.assertRaises(ValueError):
+            self.accessor.release_selection("main.Room")
+        self.arcpy.management.Delete.assert_not_called()
+        self.accessor.release_selection(selection)
+        self.arcpy.management.Delete.assert_called_once_with(selection)
+
+    def test_resumed_check_deletes_only_its_outputs(self):
+        """Test a resumed check deletes its intersect and its selection layer, never the source feature class"""
+        checker = LogicChecker(CONFIG, self.accessor)
+        progress = SimpleNamespace(oids=[], finished=lambda oid: None)
+        self.assertEqual(list(checker.iter_room_to_station_relationships(after_oid=5, progress=progress)), [])
+        selection = self.arcpy.management.MakeFeatureLayer.call_args.args[1]
+        self.assertEqual(self.arcpy.management.Delete.call_args_list,
+                         [call(checker.scratch_name("intersected")), call(selection)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+from batch_runner import SUMMARY_NAME, find_geodatabases, run_batch, site_names
+from benchmarks.synthetic_network import NetworkSpec, generate_network
+from config import Config
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from logic_checker import ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+
+REPORTS = {
+    ROOM_TO_STATION: "invalid_relations",
+    ROOM_TO_ROOMDETAIL: "invalid_room_relations",
+    STATION_TO_STATIONDETAIL: "invalid_station_relations",
+}
+
+
+class CrashingAccessor(MobileGeodatabaseAccessor):
+    """A mobile geodatabase accessor whose worker process dies on the geodatabases named crash*"""
+
+    @classmethod
+    def from_config(cls, config):
+        if os.path.basename(config.database_path).startswith("crash"):
+            os._exit(1)
+        return super().from_config(config)
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sites = os.path.join(self.directory.name, "sites")
+        self.output = os.path.join(self.directory.name, "reports")
+        os.makedirs(self.sites)
+        self.networks = {}
+        for seed, name in enumerate(("north", "south")):
+            network = generate_network(NetworkSpec(stations=4, rooms_per_station=30, error_rate=0.1, seed=seed))
+            network.save_mobile_geodatabase(os.path.join(self.sites, f"{name}.geodatabase"))
+            self.networks[name] = network
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build_config(self, **values):
+        return Config(**{
+            "database_path": "", "check_rooms_relationships": True, "check_stations_relationships": True,
+            "log_file": os.path.join(self.directory.name, "log.txt"), "log_level": "INFO",
+            "room_layer_name": "main.Room", "room_detail_layer_name": "main.RoomDetail",
+            "station_layer_name": "main.Station", "station_detail_layer_name": "main.StationDetail",
+            "accessor": "mobile_gdb", **values,
+        })
+
+    def test_find_geodatabases(self):
+        """Test a directory and a glob pattern give the same sorted geodatabases, with unique site names"""
+        paths = find_geodatabases(self.sites)
+        self.assertEqual([os.path.basename(path) for path in paths], ["north.geodatabase", "south.geodatabase"])
+        self.assertEqual(find_geodatabases(os.path.join(self.sites, "*.geodatabase")), paths)
+        self.assertEqual(site_names(["a/site 1.geodatabase", "b/site 1.geodatabase"]), ["site_1", "site_1_1"])
+
+    def test_every_site_is_reported(self):
+        """Test every site gets its own reports and a broken site is reported without stopping the others"""
+        with open(os.path.join(self.sites, "broken.geodatabase"), "wb") as f:
+            f.write(b"not a geodatabase")
+        summary = run_batch(self.build_config(), self.sites, self.output, workers=2)
+
+        with open(os.path.join(self.output, SUMMARY_NAME), encoding="utf-8") as f:
+            self.assertEqual(json.load(f), summary)
+        self.assertEqual((summary["sites"], summary["failed"], summary["workers"]), (3, 1, 2))
+        results = {result["site"]: result for result in summary["results"]}
+        self.assertEqual(results["broken"]["status"], "failed")
+        for name, network in self.networks.items():
+            reports = results[name]["reports"]
+            self.assertEqual(results[name]["status"], "ok")
+            for key, report_name in REPORTS.items():
+                self.assertEqual(reports[report_name]["rows"], network.expected_invalid[key])
+                self.assertEqual(os.path.dirname(reports[report_name]["path"]), os.path.join(self.output, name))
+                self.assertTrue(os.path.exists(reports[report_name]["path"]))
+        self.assertEqual(summary["invalid"]["invalid_relations"],
+                         sum(network.expected_invalid[ROOM_TO_STATION] for network in self.networks.values()))
+
+    def test_crashed_worker(self):
+        """Test a worker process that dies loses only its own site"""
+        with open(os.path.join(self.sites, "crash.geodatabase"), "wb") as f:
+            f.write(b"")
+        config = self.build_config(accessor="crashing",
+                                   accessor_plugins={"crashing": f"{__name__}:CrashingAccessor"})
+        summary = run_batch(config, self.sites, self.output, workers=2)
+
+        statuses = {result["site"]: result["status"] for result in summary["results"]}
+        self.assertEqual(statuses, {"crash": "failed", "north": "ok", "south": "ok"})
+        self.assertEqual(summary["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from benchmarks.synthetic_network import NetworkSpec, generate_network
+from checkpoint import CheckpointedChecker
+from config import Config
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL, _chunks
+from main import perform_logical_checks
+
+REPORTS = ["invalid_room_relations", "invalid_station_relations", "invalid_relations"]
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = generate_network(NetworkSpec(stations=10, rooms_per_station=40, error_rate=0.2, seed=3))
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpoint_path = os.path.join(self.directory.name, "checkpoint.json")
+        # Several progress reports per check on the small network
+        progress_rows = patch("logic_checker.PROGRESS_ROWS", 25)
+        progress_rows.start()
+        self.addCleanup(progress_rows.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build_config(self, **values):
+        return Config(**{
+            "database_path": ":memory:", "check_rooms_relationships": True, "check_stations_relationships": True,
+            "log_file": os.path.join(self.directory.name, "log.txt"), "log_level": "INFO",
+            "room_layer_name": "main.Room", "room_detail_layer_name": "main.RoomDetail",
+            "station_layer_name": "main.Station", "station_detail_layer_name": "main.StationDetail",
+            "accessor": "memory", "checkpoint_file": self.checkpoint_path, "checkpoint_seconds": 0.0, **values,
+        })
+
+    def run_checks(self, name, resume=False, **values):
+        report_directory = os.path.join(self.directory.name, name)
+        os.makedirs(report_directory, exist_ok=True)
+        reports = perform_logical_checks(self.build_config(**values), self.network.to_memory_accessor(),
+                                         report_directory, resume=resume)
+        contents = {}
+        for report_name, report in reports.items():
+            with open(report["path"], "r", encoding="utf-8") as f:
+                contents[report_name] = f.read()
+        return reports, contents
+
+    def test_resume_after_failure(self):
+        """Test a resumed run writes the same reports as an uninterrupted one, checking only the rooms after the checkpoint"""
+        _, expected = self.run_checks("uninterrupted")
+        _, unchecked = self.run_checks("no_checkpoint", checkpoint_file=None)
+        for name in REPORTS:
+            self.assertEqual(sorted(expected[name].splitlines()), sorted(unchecked[name].splitlines()))
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+        original = LogicChecker.iter_room_to_station_relationships
+        calls = []
+
+        def failing_check(checker, after_oid=None, progress=None):
+            calls.append(after_oid)
+            for count, row in enumerate(original(checker, after_oid, progress)):
+                if count == 20:
+                    raise RuntimeError("Expected exactly 1 feature for OBJECTID = 1 in main.Room")
+                yield row
+
+        with patch.object(LogicChecker, "iter_room_to_station_relationships", failing_check):
+            with self.assertRaises(RuntimeError):
+                self.run_checks("resumed")
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            last_oid = json.loads(f.read())["checks"][ROOM_TO_STATION]["last_oid"]
+        self.assertIsNotNone(last_oid)
+
+        calls.clear()
+        with patch.object(LogicChecker, "iter_room_to_station_relationships",
+                          lambda checker, after_oid=None, progress=None: calls.append(after_oid) or
+                          original(checker, after_oid, progress)):
+            reports, resumed = self.run_checks("resumed", resume=True)
+        self.assertEqual(resumed, expected)
+        self.assertEqual(calls, [last_oid])
+        # The reports finished before the failure are kept, not written again
+        self.assertEqual(sorted(os.listdir(os.path.join(self.directory.name, "resumed"))),
+                         sorted(f"{name}.csv" for name in REPORTS))
+        self.assertEqual(reports["invalid_relations"]["rows"], len(expected["invalid_relations"].splitlines()) - 1)
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_rows_after_the_checkpoint_are_dropped(self):
+        """Test the rows written after the last checkpoint, before a failure, are not reported twice"""
+        config = self.build_config()
+        expected = list(CheckpointedChecker(LogicChecker(config, self.network.to_memory_accessor()),
+                                            os.path.join(self.directory.name, "full.json"),
+                                            interval_seconds=0.0).iter_check(ROOM_TO_STATION))
+        self.assertGreater(len(expected), 4)
+
+        checkpointed = CheckpointedChecker(LogicChecker(config, self.network.to_memory_accessor()),
+                                           self.checkpoint_path, interval_seconds=0.0)
+        original = CheckpointedChecker._save_oids
+        saves = []
+
+        def failing_save(checkpoint, oids_file, oids, state, last_oid):
+            saves.append(last_oid)
+            if len(saves) == 3:
+                checkpoint._write_oids(oids_file, oids, last_oid)
+                oids_file.flush()
+                raise RuntimeError("the process was killed")
+            original(checkpoint, oids_file, oids, state, last_oid)
+
+        with patch.object(CheckpointedChecker, "_save_oids", failing_save), self.assertRaises(RuntimeError):
+            list(checkpointed.iter_check(ROOM_TO_STATION))
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            saved = json.loads(f.read())["checks"][ROOM_TO_STATION]
+        self.assertEqual(saved["last_oid"], saves[1])
+        self.assertGreater(os.path.getsize(checkpointed.oids_path(ROOM_TO_STATION)), saved["oids_offset"])
+
+        resumed = CheckpointedChecker(LogicChecker(config, self.network.to_memory_accessor()),
+                                      self.checkpoint_path, resume=True, interval_seconds=0.0)
+        self.assertEqual(list(resumed.iter_check(ROOM_TO_STATION)), expected)
+
+    def test_valid_points_advance_the_checkpoint(self):
+        """Test the checkpoint moves forward over points without invalid rows"""
+        network = generate_network(NetworkSpec(stations=10, rooms_per_station=40, error_rate=0.0, seed=3))
+        checkpointed = CheckpointedChecker(LogicChecker(self.build_config(), network.to_memory_accessor()),
+                                           self.checkpoint_path, interval_seconds=0.0)
+        original = CheckpointedChecker._save_oids
+        saves = []
+
+        def recording_save(checkpoint, oids_file, oids, state, last_oid):
+            saves.append(last_oid)
+            original(checkpoint, oids_file, oids, state, last_oid)
+
+        with patch.object(CheckpointedChecker, "_save_oids", recording_save):
+            self.assertEqual(list(checkpointed.iter_check(ROOM_TO_ROOMDETAIL)), [])
+        self.assertGreater(len(saves), 10)
+        self.assertEqual(saves, sorted(set(saves)))
+        # The last room (400) may have more rows after the last chunk
+        self.assertEqual(saves[-1], 399)
+
+    def test_oids_of_the_point_read_last_wait(self):
+        """Test a checkpoint keeps the OBJECTIDs of the points after the finished one for a later checkpoint"""
+        self.assertEqual([list(chunk) for chunk in _chunks(range(60))],
+                         [list(range(25)), list(range(25, 50)), list(range(50, 60))])
+        oids = [1, 10, 2, 11, 3, 12, 3, 13]
+        path = os.path.join(self.directory.name, "oids")
+        with open(path, "wb") as oids_file:
+            CheckpointedChecker._write_oids(oids_file, oids, 2)
+        self.assertEqual(oids, [3, 12, 3, 13])
+        self.assertEqual(CheckpointedChecker._saved_oids(path), [1, 10, 2, 11])
+
+    def test_relationships_of_oids(self):
+        """Test the rows read again from the OBJECTIDs kept by a progress are the rows the check yielded"""
+        network = generate_network(NetworkSpec(stations=30, rooms_per_station=10, error_rate=0.3, overlap_rate=0.5,
+                                               nested_rate=0.5))
+        checker = LogicChecker(self.build_config(), network.to_memory_accessor())
+        for key, check in ((ROOM_TO_ROOMDETAIL, checker.iter_room_to_roomdetail_relationships),
+                           (STATION_TO_STATIONDETAIL, checker.iter_station_to_stationdetail_relationships),
+                           (ROOM_TO_STATION, checker.iter_room_to_station_relationships)):
+            with self.subTest(key=key):
+                progress = SimpleNamespace(oids=[], finished=lambda oid: None)
+                rows = list(check(progress=progress))
+                self.assertTrue(rows)
+                self.assertEqual(checker.relationships_of_oids(key, progress.oids), rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
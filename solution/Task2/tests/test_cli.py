@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from cli import main, validate_config
+from geo_access.factory import accessor_registry, create_accessor
+from geo_access.memory_accessor import InMemoryAccessor
+
+TASK2_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Imports of the interpreter itself, before the script runs
+STARTUP_IMPORTS = {"_frozen_importlib_external", "zipimport", "encodings", "_signal", "io", "site", "_codecs",
+                   "codecs", "abc", "os", "stat", "_collections_abc", "posixpath", "genericpath", "_sitebuiltins"}
+
+
+def build_config(**values):
+    config = {
+        "database_path": ":memory:",
+        "check_rooms_relationships": False,
+        "check_stations_relationships": False,
+        "log_file": "log.txt",
+        "log_level": "INFO",
+        "room_layer_name": "main.Room",
+        "room_detail_layer_name": "main.RoomDetail",
+        "station_layer_name": "main.Station",
+        "station_detail_layer_name": "main.StationDetail",
+        "accessor": "memory",
+        "report_format": "csv",
+        "workers": 1,
+    }
+    config.update(values)
+    return config
+
+
+def import_times(*args):
+    """module -> cumulative import time in microseconds of the top-level imports of `python -X importtime cli.py`"""
+    process = subprocess.run([sys.executable, "-X", "importtime", "cli.py", *args], cwd=TASK2_DIRECTORY,
+                             capture_output=True, text=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times, process
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_config(self, **values):
+        path = os.path.join(self.directory.name, "config.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(build_config(**values), f)
+        return path
+
+    def test_startup_does_not_import_the_backends(self):
+        """Test --help and validate-config start in well under 100 ms without numpy, the checkers or arcpy"""
+        for args in (["--help"], ["validate-config", "--config", self.write_config()]):
+            with self.subTest(args=args[0]):
+                times, process = import_times(*args)
+                self.assertEqual(process.returncode, 0, process.stdout + process.stderr)
+                self.assertTrue({"numpy", "arcpy", "logic_checker", "main"}.isdisjoint(times))
+                own = sum(cumulative for name, cumulative in times.items() if name not in STARTUP_IMPORTS)
+                self.assertLess(own, 100_000)
+
+    def test_validate_config(self):
+        """Test the problems of a configuration are reported without importing the accessor"""
+        path = self.write_config(accessor="postgis", report_format="xml", workers=0)
+        self.assertEqual(main(["validate-config", "--config", path]), 1)
+        config = SimpleNamespace(**build_config(accessor="postgis", report_format="xml", workers=0))
+        self.assertEqual(len(validate_config(config)), 3)
+        self.assertEqual(main(["validate-config", "--config", self.write_config()]), 0)
+        self.assertEqual(main(["validate-config", "--config", self.write_config(unknown_key=1)]), 1)
+
+    def test_check_exit_status(self):
+        """Test a check that fails, here on a missing workspace, exits with a non-zero status"""
+        config = self.write_config(database_path=os.path.join(self.directory.name, "missing.json"),
+                                   log_file=os.path.join(self.directory.name, "log.txt"))
+        process = subprocess.run([sys.executable, "cli.py", "check", "--config", config], cwd=TASK2_DIRECTORY,
+                                 capture_output=True, text=True)
+        self.assertEqual(process.returncode, 1, process.stderr)
+
+    def test_accessor_plugins(self):
+        """Test an accessor registered in the configuration is imported and created by name"""
+        config = SimpleNamespace(**build_config(
+            accessor="plugin", accessor_plugins={"plugin": "geo_access.memory_accessor:InMemoryAccessor"},
+            index_cache=False, edit_date_field=None,
+        ))
+        self.assertIn("plugin", accessor_registry(config))
+        self.assertEqual(validate_config(config), [])
+        self.assertIsInstance(create_accessor(config), InMemoryAccessor)
+
+
+if __name__ == "__main__":
+    unittest.main()
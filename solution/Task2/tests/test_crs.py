@@ -0,0 +1,113 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from benchmarks.synthetic_network import GEOMETRY_TYPES, LAYER_FIELDS, NetworkSpec, generate_network, network_config
+from cli import validate_config
+from geo_access.memory_accessor import InMemoryAccessor
+from geo_access.reprojecting_accessor import ReprojectingAccessor
+from logic_checker import LogicChecker
+from spatial import crs
+from spatial.crs import CrsTransformer, get_transformer, normalize_crs
+from tiled_checker import TiledChecker
+
+# (longitude, latitude) -> Web Mercator (x, y)
+CONTROL_POINTS = [
+    ((0.0, 0.0), (0.0, 0.0)),
+    ((180.0, 0.0), (20037508.342789244, 0.0)),
+    ((10.0, 50.0), (1113194.9079327357, 6446275.841017158)),
+    ((-180.0, -crs.MAX_MERCATOR_LATITUDE), (-20037508.342789244, -20037508.342789244)),
+    ((0.0, crs.MAX_MERCATOR_LATITUDE), (0.0, 20037508.342789244)),
+]
+CONFIG = network_config(
+    layer_crs={"main.Room": "EPSG:4326", "main.RoomDetail": "4326", "main.StationDetail": "EPSG:3857"},
+)
+
+
+class TestCrs(unittest.TestCase):
+
+    def test_control_points(self):
+        """Test the built-in transforms against known EPSG:4326 / EPSG:3857 coordinates, with and without numpy"""
+        for numpy in (crs.np, None):
+            with self.subTest(numpy=numpy is not None), patch.object(crs, "np", numpy):
+                forward, inverse = CrsTransformer("EPSG:4326", "EPSG:3857"), CrsTransformer("EPSG:3857", "EPSG:4326")
+                xs, ys = forward.transform([lon for (lon, _), _ in CONTROL_POINTS], [lat for (_, lat), _ in CONTROL_POINTS])
+                for x, y, (_, expected) in zip(xs, ys, CONTROL_POINTS):
+                    self.assertAlmostEqual(x, expected[0], places=3)
+                    self.assertAlmostEqual(y, expected[1], places=3)
+                for (lon_lat, mercator) in CONTROL_POINTS:
+                    lon, lat = inverse.transform_point(*mercator)
+                    self.assertAlmostEqual(lon, lon_lat[0], places=9)
+                    self.assertAlmostEqual(lat, lon_lat[1], places=9)
+
+    def test_transformers(self):
+        """Test one transformer is kept per CRS pair and unsupported pairs need pyproj"""
+        self.assertEqual(normalize_crs(4326), "EPSG:4326")
+        self.assertEqual(normalize_crs(" epsg:3857"), "EPSG:3857")
+        self.assertIs(get_transformer("4326", "EPSG:3857"), get_transformer("EPSG:4326", "epsg:3857"))
+        self.assertEqual(get_transformer("EPSG:3857", "EPSG:3857").transform([1.5], [2.5]), ([1.5], [2.5]))
+        with patch.object(crs, "Transformer", None), self.assertRaises(ValueError):
+            CrsTransformer("EPSG:4326", "EPSG:32634")
+
+    def test_geometries_and_bbox(self):
+        """Test points, polygons and None are transformed with their structure, and envelopes stay envelopes"""
+        transformer = get_transformer("EPSG:4326", "EPSG:3857")
+        polygon = [[(10.0, 50.0), (10.0, 51.0), (11.0, 51.0), (10.0, 50.0)],
+                   [(10.2, 50.2), (10.3, 50.3), (10.2, 50.2)]]
+        point, transformed, missing = transformer.transform_geometries([(10.0, 50.0), polygon, None])
+        self.assertAlmostEqual(point[0], 1113194.9079, places=3)
+        self.assertEqual([len(ring) for ring in transformed], [4, 3])
+        self.assertEqual(transformed[0][0], point)
+        self.assertIsNone(missing)
+
+        min_x, min_y, max_x, max_y = transformer.transform_bbox((10.0, 50.0, 11.0, 51.0))
+        self.assertEqual((min_x, min_y), point)
+        self.assertAlmostEqual(max_y, transformer.transform_point(11.0, 51.0)[1], places=6)
+
+
+class TestReprojectingAccessor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        network = generate_network(NetworkSpec(stations=16, rooms_per_station=40, error_rate=0.1, nested_rate=0.3))
+        cls.expected = LogicChecker(CONFIG, network.to_memory_accessor()).check_all_relationships(True, True)
+        # Rooms and room details in WGS84, the stations stay in Web Mercator
+        to_wgs84 = get_transformer("EPSG:3857", "EPSG:4326")
+        cls.accessor = InMemoryAccessor()
+        for name, rows in network.layers.items():
+            if name in ("main.Room", "main.RoomDetail"):
+                geometries = to_wgs84.transform_geometries([row[-1] for row in rows])
+                rows = [row[:-1] + (geometry,) for row, geometry in zip(rows, geometries)]
+            cls.accessor.add_layer(name, LAYER_FIELDS[name], rows, GEOMETRY_TYPES[name])
+
+    def test_same_result_as_one_crs(self):
+        """Test the combined and the tiled checks on mixed CRSs find the same relationships as on one CRS"""
+        accessor = ReprojectingAccessor.wrap(self.accessor, CONFIG)
+        self.assertIsInstance(accessor, ReprojectingAccessor)
+        self.assertEqual(accessor.target_crs, "EPSG:3857")
+        results = LogicChecker(CONFIG, accessor).check_all_relationships(True, True)
+        self.assertEqual({key: sorted(value) for key, value in results.items()},
+                         {key: sorted(value) for key, value in self.expected.items()})
+        tiled = TiledChecker(LogicChecker(CONFIG, accessor), 0.1).check_all_relationships(True, True)
+        self.assertEqual({key: sorted(value) for key, value in tiled.items()},
+                         {key: sorted(value) for key, value in self.expected.items()})
+
+    def test_intersect_refused(self):
+        """Test the intersect of layers in different CRSs is refused, and one CRS is not wrapped"""
+        accessor = ReprojectingAccessor.wrap(self.accessor, CONFIG)
+        with self.assertRaises(ValueError):
+            accessor.intersect(["main.Room", "main.StationDetail"], "in_memory\\intersected")
+        same_crs = SimpleNamespace(**{**vars(CONFIG), "layer_crs": {"main.Room": "3857"}, "target_crs": "EPSG:3857"})
+        self.assertIs(ReprojectingAccessor.wrap(self.accessor, same_crs), self.accessor)
+
+    def test_validate_config(self):
+        """Test mixed CRSs need a check that reads the layers, and a target CRS"""
+        config = SimpleNamespace(**vars(CONFIG), accessor="memory", report_format="csv", log_level="INFO", workers=1)
+        self.assertEqual(len(validate_config(config)), 1)
+        config.combined_checks = True
+        self.assertEqual(validate_config(config), [])
+        config.layer_crs = {"main.Room": "EPSG:4326"}
+        self.assertEqual(len(validate_config(config)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import csv
+import os
+import tempfile
+import unittest
+from utils.csv_generator import CsvGenerator
+
+
+class TestCsvGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.generator = CsvGenerator(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.reader(f))
+
+    def test_generate_csv_consumes_generator(self):
+        """Test rows produced by a generator are written after the header"""
+        rows = ((f"{{R-{i}}}", "{S-A}", "{S-B}") for i in range(3))
+        path = self.generator.generate_csv("invalid_relations", ["RoomId", "Current", "Correct"], rows)
+        self.assertEqual(self.read(path), [
+            ["RoomId", "Current", "Correct"],
+            ["{R-0}", "{S-A}", "{S-B}"],
+            ["{R-1}", "{S-A}", "{S-B}"],
+            ["{R-2}", "{S-A}", "{S-B}"],
+        ])
+        self.assertEqual(os.listdir(self.directory.name), ["invalid_relations.csv"])
+
+    def test_generate_csv_failed_rows_leave_no_file(self):
+        """Test a failing generator leaves neither the CSV nor the partial file"""
+        def rows():
+            yield "{R-1}", "{S-A}", "{S-B}"
+            raise RuntimeError("cursor failed")
+
+        with self.assertRaises(RuntimeError):
+            self.generator.generate_csv("invalid_relations", ["RoomId", "Current", "Correct"], rows())
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_generate_csv_unique_name(self):
+        """Test an existing report is not overwritten"""
+        first = self.generator.generate_csv("invalid_relations", ["RoomId"], [])
+        second = self.generator.generate_csv("invalid_relations", ["RoomId"], [])
+        self.assertNotEqual(first, second)
+        self.assertTrue(second.endswith("invalid_relations_1.csv"))
+
+
+if __name__ == "__main__":
+    unittest.main()
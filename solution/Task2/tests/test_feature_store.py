@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from geo_access import feature_store
+from geo_access.feature_store import FeatureStore, GuidColumn
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from logic_checker import LogicChecker, ROOM_TO_STATION
+from parallel_checker import check_feature_store_parallel
+from store_checker import StoreChecker, write_feature_store
+
+GUID_A = "{0A1B2C3D-0000-4000-8000-00000000000A}"
+GUID_B = "{0A1B2C3D-0000-4000-8000-00000000000B}"
+
+
+def build_config(directory):
+    return network_config(feature_store=os.path.join(directory, "features.gfst"))
+
+
+class TestGuidColumn(unittest.TestCase):
+
+    def test_values_round_trip(self):
+        """Test GUIDs are stored as 16 bytes and other values are kept as they are"""
+        column = GuidColumn()
+        column.extend([GUID_A, GUID_B])
+        column.extend([GUID_A, None, GUID_A.lower(), "{S-1}"])
+        self.assertEqual(len(column.data), 6 * 16)
+        self.assertEqual([column[row] for row in range(6)], [GUID_A, GUID_B, GUID_A, None, GUID_A.lower(), "{S-1}"])
+        self.assertEqual(column.irregular, {3: None, 4: GUID_A.lower(), 5: "{S-1}"})
+
+    def test_differ(self):
+        """Test the comparison gives the same result as comparing the strings, with and without numpy"""
+        column = GuidColumn()
+        column.extend([GUID_A, GUID_B, None, GUID_A.lower(), "{S-1}"])
+        other = GuidColumn()
+        other.extend([GUID_A, GUID_A, None, GUID_A, "{S-1}"])
+        rows = [0, 1, 2, 3, 4, 0]
+        other_rows = [0, 0, 2, 3, 4, 2]
+        expected = [k for k, (row, other_row) in enumerate(zip(rows, other_rows)) if column[row] != other[other_row]]
+        self.assertEqual(expected, [1, 3, 5])
+        self.assertEqual(column.differ(rows, other, other_rows), expected)
+        with patch.object(feature_store, "np", None):
+            self.assertEqual(column.differ(rows, other, other_rows), expected)
+
+
+class TestFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = build_config(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_and_map(self):
+        """Test the layers are written as flat buffers and read back from the mapped file"""
+        accessor = InMemoryAccessor()
+        with_hole = [[(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)], [(4, 4), (4, 6), (6, 6), (6, 4), (4, 4)]]
+        accessor.add_layer("main.StationDetail", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"],
+                           [(3, GUID_A, GUID_B, with_hole), (7, GUID_B, None, [[(20, 0), (20, 5), (25, 0)]])], POLYGON)
+        accessor.add_layer("main.Room", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"],
+                           [(1, GUID_A, GUID_B, (1.5, 2.5))], POINT)
+        accessor.layers["main.Room"].rows.append((2, GUID_B, GUID_B, None))
+
+        store = FeatureStore.write(self.config.feature_store, accessor,
+                                   {"main.Room": ["GLOBALID", "STATION_GUID"], "main.StationDetail": ["STATION_GUID"]})
+        rooms, details = store.layer("main.Room"), store.layer("main.StationDetail")
+        self.assertIsInstance(rooms.coordinates, memoryview)
+        self.assertEqual((len(rooms), list(rooms.oids)), (1, [1]))  # the room without a geometry is skipped
+        self.assertEqual([tuple(point) for point in rooms.points()], [(1.5, 2.5)])
+        self.assertEqual(list(details.oids), [3, 7])
+        self.assertEqual(list(details.polygons()), [with_hole, [[(20, 0), (20, 5), (25, 0)]]])
+        self.assertEqual([details.guids["STATION_GUID"][row] for row in range(2)], [GUID_B, None])
+        with self.assertRaises(KeyError):
+            store.layer("main.Station")
+
+    def test_checks_match_logic_checker(self):
+        """Test the store checks return the combined check results, with nested and overlapping station details"""
+        network = generate_network(NetworkSpec(stations=16, rooms_per_station=40, error_rate=0.05,
+                                               overlap_rate=0.3, nested_rate=0.3, vertices_per_side=3))
+        accessor = network.to_memory_accessor()
+        expected = LogicChecker(self.config, accessor).check_all_relationships(True, True)
+        self.assertEqual({key: len(entries) for key, entries in expected.items()}, network.expected_invalid)
+
+        store = write_feature_store(self.config, accessor, True, True)
+        for use_numpy in (True, False):
+            with self.subTest(use_numpy=use_numpy):
+                self.assertEqual(StoreChecker(self.config, store, use_numpy).check_all_relationships(True, True),
+                                 expected)
+
+        checker = StoreChecker(self.config, store)
+        shards = [checker.check_all_relationships(True, False, rooms)[ROOM_TO_STATION]
+                  for rooms in (range(0, 300), range(300, 640))]
+        self.assertEqual(shards[0] + shards[1], expected[ROOM_TO_STATION])
+
+    def test_parallel_workers_map_the_store(self):
+        """Test the parallel store check returns the serial result in the serial order"""
+        network = generate_network(NetworkSpec(stations=9, rooms_per_station=20, error_rate=0.1, nested_rate=0.3))
+        store = write_feature_store(self.config, network.to_memory_accessor(), True, True)
+        expected = StoreChecker(self.config, store).check_all_relationships(True, True)
+        self.assertEqual(check_feature_store_parallel(self.config, 2, True, True), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import math
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from geo_access.geo_accessor import GeoDataAccessor, oid_chunks
+from geo_access.memory_accessor import InMemoryAccessor
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from logic_checker import LogicChecker
+
+
+class CountingAccessor(GeoDataAccessor):
+    """A backend with only search_cursor, on the rows of an in-memory layer. Counts the queries"""
+
+    def __init__(self, accessor: InMemoryAccessor):
+        self.accessor = accessor
+        self.wheres = []
+
+    def search_cursor(self, layer, fields, where=None):
+        self.wheres.append(where)
+        return self.accessor.search_cursor(layer, fields, where)
+
+
+class TestFetchByOids(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = generate_network(NetworkSpec(stations=4, rooms_per_station=50))
+        cls.accessor = cls.network.to_memory_accessor()
+        cls.rooms = {row[0]: (row[1], row[2]) for row in cls.network.layers["main.Room"]}
+
+    def test_chunks(self):
+        """Test the OBJECTIDs are deduplicated, sorted and split into chunks"""
+        self.assertEqual(list(oid_chunks([5, 1, 3, 1, 2], 2)), [[1, 2], [3, 5]])
+        self.assertEqual(list(oid_chunks([], 2)), [])
+        with self.assertRaises(ValueError):
+            list(oid_chunks([1], 0))
+
+    def test_query_count_of_a_new_backend(self):
+        """Test the interface implementation runs ceil(n/chunk) IN queries"""
+        oids = list(range(1, 200, 3)) + [1, 10_000]
+        for chunk_size in (1, 7, 1000):
+            with self.subTest(chunk_size=chunk_size):
+                accessor = CountingAccessor(self.accessor)
+                rows = accessor.fetch_by_oids("main.Room", oids, ["GLOBALID", "STATION_GUID"], chunk_size)
+                self.assertEqual(len(accessor.wheres), math.ceil(len(set(oids)) / chunk_size))
+                self.assertTrue(all(where.startswith("OBJECTID IN (") for where in accessor.wheres))
+                self.assertEqual(rows, {oid: self.rooms[oid] for oid in oids if oid in self.rooms})
+
+    def test_memory_accessor(self):
+        """Test the in-memory backend returns the same rows with a single pass"""
+        rows = self.accessor.fetch_by_oids("main.Room", [3, 1, 10_000], "GLOBALID")
+        self.assertEqual(rows, {1: (self.rooms[1][0],), 3: (self.rooms[3][0],)})
+
+    def test_mobile_geodatabase_query_count(self):
+        """Test the mobile geodatabase runs ceil(n/chunk) SQL queries"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network.geodatabase")
+            self.network.save_mobile_geodatabase(path)
+            accessor = MobileGeodatabaseAccessor()
+            accessor.set_workspace(path)
+            try:
+                queries = []
+                accessor._table_fields("main.Room")  # the schema query is not part of the fetch
+                accessor.connection.set_trace_callback(queries.append)
+                oids = range(1, 151)
+                rows = accessor.fetch_by_oids("main.Room", oids, ["GLOBALID", "STATION_GUID"], chunk_size=40)
+                self.assertEqual(len(queries), math.ceil(150 / 40))
+                self.assertEqual(rows, {oid: self.rooms[oid] for oid in oids})
+            finally:
+                accessor.connection.close()
+
+    def test_logic_checker_reads_only_the_invalid_rooms(self):
+        """Test the subset check fetches the GUIDs of its invalid rooms instead of indexing the whole layer"""
+        config = network_config(fetch_chunk_size=2)
+        network = generate_network(NetworkSpec(stations=4, rooms_per_station=50, error_rate=0.1))
+        accessor = network.to_memory_accessor()
+        checker = LogicChecker(config, accessor)
+        with patch.object(accessor, "fetch_by_oids", wraps=accessor.fetch_by_oids) as fetch_by_oids:
+            entries = checker.check_room_to_station_subset()
+
+        self.assertEqual(len(entries), network.expected_invalid["room_to_station"])
+        invalid_rooms = {fid_room for fid_room, _, _ in entries}
+        fetch_by_oids.assert_called_once_with("main.Room", invalid_rooms, ["GLOBALID"], 2)
+        room_guids = {row[0]: row[1] for row in network.layers["main.Room"]}
+        self.assertEqual([entry[2][0] for entry in entries], [room_guids[fid_room] for fid_room, _, _ in entries])
+        self.assertEqual(checker._guid_indexes, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
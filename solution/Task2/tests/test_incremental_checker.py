@@ -0,0 +1,120 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+from benchmarks.synthetic_network import network_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from incremental_checker import IncrementalChecker
+from logic_checker import LogicChecker
+from tests.geometry_helpers import square
+
+ROOM_FIELDS = ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"]
+DETAIL_FIELDS = ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"]
+
+
+class TestIncrementalChecker(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.details = [(i + 1, f"{{SD-{i}}}", f"{{S-{i}}}", square((i % 4) * 10, (i // 4) * 10, 10)) for i in range(16)]
+        self.rooms = []
+        for i in range(200):
+            x, y = rng.uniform(0, 40), rng.uniform(0, 40)
+            station = int(y // 10) * 4 + int(x // 10)
+            if i % 9 == 0:
+                station = (station + 1) % 16
+            self.rooms.append((i + 1, f"{{R-{i}}}", f"{{S-{station}}}", (x, y)))
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = network_config()
+        self.manifest_path = os.path.join(self.directory.name, "manifest.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build_checker(self):
+        accessor = InMemoryAccessor()
+        accessor.add_layer("main.Room", ROOM_FIELDS, self.rooms, POINT)
+        accessor.add_layer("main.StationDetail", DETAIL_FIELDS, self.details, POLYGON)
+        return LogicChecker(self.config, accessor)
+
+    def run_incremental(self):
+        checker = self.build_checker()
+        with patch.object(checker.accessor, "intersect", wraps=checker.accessor.intersect) as intersect:
+            result = IncrementalChecker(checker, self.manifest_path).check_room_to_station_relationships()
+        full = self.build_checker().check_room_to_station_relationships()
+        self.assertEqual(result, full)
+        return result, intersect.call_count
+
+    def test_first_run_is_full_check(self):
+        """Test without a manifest every room is checked and the manifest is written"""
+        result, _ = self.run_incremental()
+        self.assertTrue(result)
+        self.assertTrue(os.path.exists(self.manifest_path))
+
+    def test_unchanged_data_is_not_rechecked(self):
+        """Test a second run without edits returns the previous report without any intersect"""
+        first, _ = self.run_incremental()
+        second, intersect_calls = self.run_incremental()
+        self.assertEqual(first, second)
+        self.assertEqual(intersect_calls, 0)
+
+    def test_changed_rooms(self):
+        """Test fixed, broken, moved and deleted rooms update the report"""
+        self.run_incremental()
+        self.rooms[0] = (1, "{R-0}", "{S-9}", self.rooms[0][3])        # broken relationship
+        self.rooms[9] = self.rooms[9][:2] + ("{S-0}", (5.0, 5.0))      # moved and fixed
+        self.rooms[1] = self.rooms[1][:3] + ((35.0, 35.0),)            # moved
+        del self.rooms[18]                                             # deleted (was invalid)
+        self.run_incremental()
+
+    def test_changed_station_details(self):
+        """Test rooms inside changed, moved and deleted station details are re-checked"""
+        self.run_incremental()
+        self.details[0] = (1, "{SD-0}", "{S-5}", self.details[0][3])   # relationship of the detail changed
+        self.details[1] = self.details[1][:3] + (square(100, 100, 1),)  # moved away
+        del self.details[2]                                            # deleted
+        self.details.append((17, "{SD-16}", "{S-16}", square(30, 30, 10)))  # new, overlapping
+        self.run_incremental()
+
+    def test_edit_date_field(self):
+        """Test the edit date is used as the change marker instead of the geometry"""
+        self.rooms = [room[:3] + (room[3], "2024-01-01") for room in self.rooms]
+        fields = ROOM_FIELDS + ["last_edited_date"]
+
+        def build_checker():
+            accessor = InMemoryAccessor()
+            accessor.add_layer("main.Room", fields, self.rooms, POINT)
+            accessor.add_layer("main.StationDetail", DETAIL_FIELDS + ["last_edited_date"],
+                               [detail + ("2024-01-01",) for detail in self.details], POLYGON)
+            return LogicChecker(self.config, accessor)
+
+        def run():
+            checker = build_checker()
+            return IncrementalChecker(checker, self.manifest_path, "last_edited_date").check_room_to_station_relationships()
+
+        first = run()
+        self.rooms[1] = (2, "{R-1}", "{S-99}", self.rooms[1][3], "2024-01-02")
+        second = run()
+        self.assertEqual(second, build_checker().check_room_to_station_relationships())
+        self.assertEqual(len(second), len(first) + 1)
+
+    def test_manifest_of_other_database_is_ignored(self):
+        """Test a manifest written for another database triggers a full check"""
+        self.run_incremental()
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest["database_path"] = "other.geodatabase"
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+        checker = self.build_checker()
+        with patch.object(checker, "check_room_to_station_subset", wraps=checker.check_room_to_station_subset) as subset:
+            IncrementalChecker(checker, self.manifest_path).check_room_to_station_relationships()
+        subset.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from logic_checker import LogicChecker
+from relationship_checker import RelationshipChecker
+from spatial import index_cache
+from spatial.index_cache import IndexCache, layer_fingerprint
+from spatial.join import PolygonSet, PolygonIndex
+from tests.geometry_helpers import square
+
+POINTS = [(5, 5), (10, 5), (25, 5), (2, 8), (8, 8), (100, 100)]
+
+
+def polygons():
+    l_shape = [[(0, 0), (0, 10), (5, 10), (5, 5), (10, 5), (10, 0)]]
+    return [square(0, 0, 10), square(10, 0, 10), l_shape, square(20, 0, 10) + square(24, 4, 2)]
+
+
+def build_accessor(cache, details=None, workspace=None, edit_date_field=None):
+    """The layers added in memory, or saved to the JSON workspace file and loaded from it"""
+    accessor = InMemoryAccessor(index_cache=cache, edit_date_field=edit_date_field)
+    rows = [(i + 1, f"{{SD-{i}}}", "2024-01-01", rings) for i, rings in enumerate(details or polygons())]
+    accessor.add_layer("main.StationDetail", ["OBJECTID", "GLOBALID", "EDITED", "SHAPE"], rows, POLYGON)
+    accessor.add_layer("main.Room", ["OBJECTID", "GLOBALID", "SHAPE"],
+                       [(i + 1, f"{{R-{i}}}", point) for i, point in enumerate(POINTS)], POINT)
+    if workspace is None:
+        return accessor
+    accessor.save(workspace)
+    loaded = InMemoryAccessor(index_cache=cache, edit_date_field=edit_date_field)
+    loaded.set_workspace(workspace)
+    return loaded
+
+
+def intersect_rows(accessor):
+    accessor.intersect(["main.Room", "main.StationDetail"], "in_memory\\intersected")
+    return list(accessor.search_cursor("in_memory\\intersected", ["FID_Room", "FID_StationDetail"]))
+
+
+class TestIndexCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = IndexCache(self.directory.name)
+        self.workspace_directory = tempfile.TemporaryDirectory()
+        self.workspace = os.path.join(self.workspace_directory.name, "workspace.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+        self.workspace_directory.cleanup()
+
+    def test_round_trip(self):
+        """Test a stored index is memory-mapped back and joins the same as the built one"""
+        for use_numpy in ([False, True] if PolygonSet is not None else [False]):
+            with self.subTest(use_numpy=use_numpy):
+                index = PolygonIndex(polygons(), use_numpy)
+                self.cache.store(f"key-{use_numpy}", *index.to_arrays())
+                meta, arrays = self.cache.load(f"key-{use_numpy}")
+                self.assertTrue(all(isinstance(array, memoryview) for array in arrays.values()))
+                loaded = PolygonIndex.from_arrays(polygons(), meta, arrays)
+                self.assertEqual(list(loaded.join(POINTS)), list(index.join(POINTS)))
+
+    def test_accessor_reuses_cached_index(self):
+        """Test a second run on an unchanged workspace file does not build the index, nor hash the geometries"""
+        expected = intersect_rows(build_accessor(self.cache, workspace=self.workspace))
+        accessor = InMemoryAccessor(index_cache=IndexCache(self.directory.name))
+        accessor.set_workspace(self.workspace)
+        with patch.object(PolygonIndex, "__init__", side_effect=AssertionError("index rebuilt")), \
+                patch.object(index_cache, "geometry_bytes", side_effect=AssertionError("geometries hashed")):
+            self.assertEqual(intersect_rows(accessor), expected)
+
+    def test_changed_layer_is_rebuilt(self):
+        """Test a changed workspace file gives another key, so the stale index is not used"""
+        intersect_rows(build_accessor(self.cache, workspace=self.workspace))
+        moved = polygons()
+        moved[0] = square(50, 50, 10)
+        accessor = build_accessor(self.cache, moved, workspace=self.workspace)
+        self.assertEqual([row for row in intersect_rows(accessor) if row[1] == 1], [])
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+    def test_layers_added_in_memory(self):
+        """Test layers without a workspace file are keyed by their edit dates, else only with content_hash"""
+        intersect_rows(build_accessor(self.cache))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+        intersect_rows(build_accessor(self.cache, edit_date_field="EDITED"))
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+        hashing_cache = IndexCache(self.directory.name, content_hash=True)
+        expected = intersect_rows(build_accessor(hashing_cache))
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+        with patch.object(PolygonIndex, "__init__", side_effect=AssertionError("index rebuilt")):
+            self.assertEqual(intersect_rows(build_accessor(hashing_cache)), expected)
+
+    def test_mobile_geodatabase_tables(self):
+        """Test the indexes of geodatabase tables are reused until the file changes"""
+        network = generate_network(NetworkSpec(stations=9, rooms_per_station=10))
+        path = os.path.join(self.workspace_directory.name, "network.geodatabase")
+        network.save_mobile_geodatabase(path)
+
+        def detail_index():
+            accessor = MobileGeodatabaseAccessor(index_cache=IndexCache(self.directory.name))
+            accessor.set_workspace(path)
+            try:
+                details = [row[0] for row in accessor.geometry_cursor("main.StationDetail", [])]
+                return accessor.polygon_index("main.StationDetail", details)
+            finally:
+                accessor.connection.close()
+
+        detail_index()
+        with patch.object(PolygonIndex, "__init__", side_effect=AssertionError("index rebuilt")):
+            detail_index()
+        os.utime(path, ns=(1, 1))
+        detail_index()
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+    def test_checks_reading_whole_layers(self):
+        """Test the combined and relationship class checks get their indexes from the accessor's cache"""
+        network = generate_network(NetworkSpec(stations=9, rooms_per_station=10, error_rate=0.2))
+        network.save_json(self.workspace)
+        config = network_config(self.workspace, relationships=True)
+
+        def run_checks():
+            accessor = InMemoryAccessor(index_cache=IndexCache(self.directory.name))
+            accessor.set_workspace(self.workspace)
+            return (LogicChecker(config, accessor).check_all_relationships(True, True),
+                    RelationshipChecker(config, accessor).check_all_relationships(True, True))
+
+        expected = run_checks()
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+        with patch.object(PolygonIndex, "__init__", side_effect=AssertionError("index rebuilt")):
+            self.assertEqual(run_checks(), expected)
+
+    def test_fingerprint(self):
+        """Test the fingerprint depends on the geometry, the OBJECTIDs and the latest edit date"""
+        rows = [(1, (0.0, 0.0), "2024-01-01"), (2, (1.0, 1.0), "2024-03-01")]
+        fingerprint = layer_fingerprint(rows, 1, 0, 2)
+        self.assertEqual(fingerprint["row_count"], 2)
+        self.assertEqual(fingerprint["max_edit_date"], "2024-03-01")
+        self.assertNotEqual(fingerprint, layer_fingerprint([rows[0], (3, (1.0, 1.0), "2024-03-01")], 1, 0, 2))
+        self.assertNotEqual(fingerprint, layer_fingerprint([rows[0], (2, (1.0, 1.0), "2024-04-01")], 1, 0, 2))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entries are removed above max_bytes"""
+        meta, arrays = PolygonIndex(polygons(), use_numpy=False).to_arrays()
+        self.cache.store("a", meta, arrays)
+        entry_size = os.path.getsize(os.path.join(self.directory.name, "a.idx"))
+        cache = IndexCache(self.directory.name, max_bytes=2 * entry_size)
+        cache.store("b", meta, arrays)
+        os.utime(os.path.join(self.directory.name, "a.idx"), (1, 1))
+        os.utime(os.path.join(self.directory.name, "b.idx"), (2, 2))
+        self.assertIsNotNone(cache.load("a"))  # a is now the most recently used
+        cache.store("c", meta, arrays)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["a.idx", "c.idx"])
+
+    def test_invalidate_and_corrupt_entries(self):
+        """Test the invalidate flag clears the cache and corrupt entries are dropped"""
+        self.cache.store("a", *PolygonIndex(polygons(), use_numpy=False).to_arrays())
+        IndexCache(self.directory.name, invalidate=True)
+        self.assertIsNone(self.cache.load("a"))
+
+        with open(os.path.join(self.directory.name, "b.idx"), "wb") as f:
+            f.write(b"not an index")
+        self.assertIsNone(self.cache.load("b"))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from benchmarks.synthetic_network import network_config
+from geo_access.instrumented_accessor import InstrumentedAccessor, percentile
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from logic_checker import LogicChecker
+
+SQUARE = [[(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)]]
+
+
+class TestInstrumentedAccessor(unittest.TestCase):
+
+    def setUp(self):
+        memory = InMemoryAccessor()
+        memory.add_layer("main.StationDetail", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], [
+            (1, "{SD-A}", "{S-A}", SQUARE),
+        ], POLYGON)
+        memory.add_layer("main.Room", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], [
+            (1, "{R-1}", "{S-A}", (1, 1)),
+            (2, "{R-2}", "{S-B}", (2, 2)),
+            (3, "{R-3}", "{S-A}", (50, 50)),
+        ], POINT)
+        self.accessor = InstrumentedAccessor(memory)
+        self.config = network_config()
+
+    def test_records_calls_and_rows(self):
+        """Test a check through the wrapper records every accessor call and the rows of the cursors"""
+        checker = LogicChecker(self.config, self.accessor)
+        self.assertEqual(checker.check_room_to_station_relationships(), [("{R-2}", "{S-B}", "{S-A}")])
+
+        methods = self.accessor.summary()["methods"]
+        self.assertEqual(methods["intersect"]["calls"], 1)
+        self.assertEqual(methods["delete"]["calls"], 1)
+        self.assertEqual(methods["search_cursor"]["calls"], 2)
+        # 2 intersect rows + 3 rows of the GUID index
+        self.assertEqual(methods["search_cursor"]["rows"], 5)
+
+    def test_abandoned_cursor_is_recorded(self):
+        """Test a cursor that is not read to the end is recorded when it is closed"""
+        rows = self.accessor.search_cursor("main.Room", ["GLOBALID"])
+        next(rows)
+        rows.close()
+        self.assertEqual(self.accessor.stats["search_cursor"].rows, 1)
+
+    def test_write_summary(self):
+        """Test the summary is written as JSON and other attributes are passed through"""
+        self.accessor.get_count("main.Room")
+        self.assertIn("main.Room", self.accessor.layers)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "timings.json")
+            self.accessor.write_summary(path)
+            with open(path, encoding="utf-8") as f:
+                summary = json.load(f)
+        self.assertEqual(summary["accessor"], "InMemoryAccessor")
+        self.assertEqual(summary["methods"]["get_count"]["calls"], 1)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
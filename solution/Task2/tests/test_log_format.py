@@ -0,0 +1,108 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from utils.log_format import CustomFormatter, SamplingFilter, configure_logging, stop_logging
+
+
+def invalid_record(message="Invalid relationship found: poly_guid={P}", level=logging.DEBUG):
+    return logging.LogRecord("root", level, __file__, 1, message, None, None)
+
+
+class TestLogFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, "log.txt")
+        self.root_handlers = logging.getLogger().handlers[:]
+        self.root_level = logging.getLogger().level
+        logging.getLogger().handlers = []
+
+    def tearDown(self):
+        stop_logging()
+        logging.getLogger().handlers = self.root_handlers
+        logging.getLogger().setLevel(self.root_level)
+        self.directory.cleanup()
+
+    def read_log(self):
+        with open(self.log_file, encoding="utf-8") as f:
+            return f.read()
+
+    def test_formatter(self):
+        """Test the formatters are created once per level and keep the colors"""
+        formatter = CustomFormatter()
+        with patch("logging.Formatter", side_effect=AssertionError("Formatter created per record")):
+            warning = formatter.format(invalid_record("careful", logging.WARNING))
+            debug = formatter.format(invalid_record("details"))
+        self.assertTrue(warning.startswith(CustomFormatter.yellow))
+        self.assertIn("careful", warning)
+        self.assertTrue(debug.startswith(CustomFormatter.grey))
+
+    def test_sampling(self):
+        """Test one in sample_rate per-row messages of each type is logged, and the other messages always"""
+        sampling_filter = SamplingFilter(10)
+        logged = [sampling_filter.filter(invalid_record()) for _ in range(25)]
+        self.assertEqual([i for i, passed in enumerate(logged) if passed], [0, 10, 20])
+        self.assertTrue(sampling_filter.filter(invalid_record("Invalid room-station relationship: room_guid={R}")))
+        self.assertTrue(sampling_filter.filter(invalid_record("Invalid input", logging.ERROR)))
+        self.assertTrue(sampling_filter.filter(invalid_record("Read 5 features")))
+        self.assertEqual(sampling_filter.summary(), ["Logged 3 of 25 'Invalid relationship found' messages",
+                                                     "Logged 1 of 1 'Invalid room-station relationship' messages"])
+        none_filter = SamplingFilter(0)
+        self.assertFalse(any(none_filter.filter(invalid_record()) for _ in range(5)))
+        self.assertEqual(none_filter.summary(), ["Logged 0 of 5 'Invalid relationship found' messages"])
+
+    def test_pipeline(self):
+        """Test every record is written once the pipeline stops, the per-row ones sampled, with the summary"""
+        with patch("sys.stdout"):
+            configure_logging(self.log_file, "DEBUG", queue_size=4, sample_rate=100)
+            for i in range(1000):
+                logging.debug(f"Invalid relationship found: poly_guid={{P{i}}}")
+                logging.info(f"Checked row {i}")
+            stop_logging()
+        log = self.read_log()
+        self.assertEqual(log.count("Checked row"), 1000)
+        self.assertEqual(log.count("Invalid relationship found: poly_guid"), 10)
+        self.assertIn("Logged 10 of 1000 'Invalid relationship found' messages", log)
+        self.assertNotIn(CustomFormatter.grey, log)
+
+    def test_rotation(self):
+        """Test the log file is rotated at max_mb and at most backup_count old files are kept"""
+        with patch("sys.stdout"):
+            configure_logging(self.log_file, "INFO", max_mb=0.001, backup_count=2)
+            for i in range(200):
+                logging.info(f"Checked row {i}")
+            stop_logging()
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["log.txt", "log.txt.1", "log.txt.2"])
+        self.assertLessEqual(os.path.getsize(self.log_file), 1100)
+
+    def test_drop_when_full(self):
+        """Test the records that do not fit in a full queue are dropped and counted instead of waited for"""
+        with patch("sys.stdout"):
+            pipeline = configure_logging(self.log_file, "INFO", queue_size=2, drop_when_full=True)
+            pipeline.listener.stop()
+            for i in range(5):
+                logging.info(f"Checked row {i}")
+            self.assertEqual(pipeline.handler.dropped, 3)
+            pipeline.listener.start()
+            stop_logging()
+        log = self.read_log()
+        self.assertEqual(log.count("Checked row"), 2)
+        self.assertIn("Dropped 3 log records: the log queue was full", log)
+
+    def test_forked_process(self):
+        """Test a process without the listener thread writes its records directly"""
+        with patch("sys.stdout"):
+            pipeline = configure_logging(self.log_file, "INFO", queue_size=1)
+            pipeline.listener.stop()
+            with patch("os.getpid", return_value=pipeline.handler.pid + 1):
+                for i in range(3):
+                    logging.info(f"Checked row {i} in a worker")
+            pipeline.handler.handlers[1].flush()
+            self.assertEqual(self.read_log().count("in a worker"), 3)
+            pipeline.listener.start()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from unittest.mock import Mock, patch
-from logic_checker import LogicChecker
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
 from config import Config
 from geo_access.geo_accessor import GeoDataAccessor
 import logging
@@ -99,6 +99,66 @@ class TestLogicChecker(unittest.TestCase):
 
         self.assertIn("Expected exactly 1 feature", str(context.exception))
 
+    def test_get_guid_index_single_cursor_pass(self):
+        """Test get_guid_index reads the layer once and caches the mapping"""
+        self.mock_accessor.search_cursor.return_value = [(1, "guid-1"), (2, "guid-2")]
+
+        first = self.logic_checker.get_guid_index("test_layer")
+        second = self.logic_checker.get_guid_index("test_layer")
+
+        self.assertEqual(first, {1: "guid-1", 2: "guid-2"})
+        self.assertIs(first, second)
+        self.mock_accessor.search_cursor.assert_called_once_with("test_layer", ["OBJECTID", "GLOBALID"])
+        self.mock_accessor.select_layer_by_attribute.assert_not_called()
+        self.mock_accessor.get_count.assert_not_called()
+
+    def test_get_guid_by_oid_success(self):
+        """Test get_guid_by_oid resolves the GUID from the index"""
+        self.mock_accessor.search_cursor.return_value = [(1, "guid-1"), (2, "guid-2")]
+
+        self.assertEqual(self.logic_checker.get_guid_by_oid("test_layer", 2), "guid-2")
+
+    def test_get_guid_by_oid_missing_error(self):
+        """Test get_guid_by_oid throws error when the OBJECTID is not in the layer"""
+        self.mock_accessor.search_cursor.return_value = [(1, "guid-1")]
+
+        with self.assertRaises(RuntimeError) as context:
+            self.logic_checker.get_guid_by_oid("test_layer", 5)
+
+        self.assertIn("Expected exactly 1 feature", str(context.exception))
+
+    def test_iter_room_to_station_relationships_is_lazy(self):
+        """Test the generator check yields entries while reading and deletes the intersect when closed"""
+        self.mock_accessor.search_cursor.side_effect = lambda layer, fields, where=None: (
+            [(1, "room-1"), (2, "room-2")] if fields == ["OBJECTID", "GLOBALID"]
+            else [("logical-1", "geometrical-1", 1, 1), ("logical-2", "geometrical-2", 2, 2)]
+        )
+
+        entries = self.logic_checker.iter_room_to_station_relationships()
+        self.mock_accessor.intersect.assert_not_called()
+
+        self.assertEqual(next(entries), ("room-1", "logical-1", "geometrical-1"))
+        self.mock_accessor.delete.assert_not_called()
+
+        entries.close()
+        self.mock_accessor.delete.assert_called_once_with("in_memory\\intersected")
+
+    def test_check_room_to_station_relationships_constant_accessor_calls(self):
+        """Test the number of accessor calls does not depend on the number of invalid rows"""
+        def run(row_count):
+            accessor = Mock(spec=GeoDataAccessor)
+            intersect_rows = [(f"logical-{i}", f"geometrical-{i}", i, i) for i in range(row_count)]
+            room_rows = [(i, f"room-{i}") for i in range(row_count)]
+            accessor.search_cursor.side_effect = lambda layer, fields, where=None: (
+                room_rows if fields == ["OBJECTID", "GLOBALID"] else intersect_rows
+            )
+            checker = LogicChecker(self.config, accessor)
+            result = checker.check_room_to_station_relationships()
+            self.assertEqual(len(result), row_count)
+            return len(accessor.method_calls)
+
+        self.assertEqual(run(10), run(1000))
+
     def test_check_point_to_poly_relationship_valid(self):
         """Test valid point-to-polygon relationship"""
         # Mock intersect to create temporary feature class
@@ -109,8 +169,8 @@ class TestLogicChecker(unittest.TestCase):
             (1, 1, "point-guid-123")  # FID_Point, FID_Poly, logical_GUID
         ]
 
-        # Mock get_guid to return matching GUIDs
-        with patch.object(self.logic_checker, 'get_guid') as mock_get_guid:
+        # Mock get_guid_by_oid to return matching GUIDs
+        with patch.object(self.logic_checker, 'get_guid_by_oid') as mock_get_guid:
             mock_get_guid.return_value = "point-guid-123"
 
             result = self.logic_checker._check_point_to_poly_relationship(
@@ -137,8 +197,8 @@ class TestLogicChecker(unittest.TestCase):
             (1, 1, "logical-guid-123")  # logical GUID doesn't match geometrical
         ]
 
-        # Mock get_guid to return different GUIDs
-        with patch.object(self.logic_checker, 'get_guid') as mock_get_guid:
+        # Mock get_guid_by_oid to return different GUIDs
+        with patch.object(self.logic_checker, 'get_guid_by_oid') as mock_get_guid:
             mock_get_guid.side_effect = [
                 "geometrical-guid-456",  # For point layer
                 "poly-guid-789"  # For poly layer
@@ -188,11 +248,11 @@ class TestLogicChecker(unittest.TestCase):
 
         # Mock search_cursor with matching GUIDs
         self.mock_accessor.search_cursor.return_value = [
-            ("station-guid-123", "station-guid-123", 1)  # Matching GUIDs
+            ("station-guid-123", "station-guid-123", 1, 1)  # Matching GUIDs
         ]
 
-        # Mock get_guid for room
-        with patch.object(self.logic_checker, 'get_guid') as mock_get_guid:
+        # Mock get_guid_by_oid for room
+        with patch.object(self.logic_checker, 'get_guid_by_oid') as mock_get_guid:
             mock_get_guid.return_value = "room-guid-456"
 
             result = self.logic_checker.check_room_to_station_relationships()
@@ -212,11 +272,11 @@ class TestLogicChecker(unittest.TestCase):
 
         # Mock search_cursor with mismatched GUIDs
         self.mock_accessor.search_cursor.return_value = [
-            ("logical-station-guid", "geometrical-station-guid", 1)
+            ("logical-station-guid", "geometrical-station-guid", 1, 1)
         ]
 
-        # Mock get_guid for room
-        with patch.object(self.logic_checker, 'get_guid') as mock_get_guid:
+        # Mock get_guid_by_oid for room
+        with patch.object(self.logic_checker, 'get_guid_by_oid') as mock_get_guid:
             mock_get_guid.return_value = "room-guid-456"
 
             result = self.logic_checker.check_room_to_station_relationships()
@@ -233,14 +293,14 @@ class TestLogicChecker(unittest.TestCase):
 
         # Mock search_cursor with multiple rows, some valid, some invalid
         self.mock_accessor.search_cursor.return_value = [
-            ("match-1", "match-1", 1),  # Valid
-            ("logical-2", "geometrical-2", 2),  # Invalid
-            ("match-3", "match-3", 3),  # Valid
-            ("logical-4", "geometrical-4", 4),  # Invalid
+            ("match-1", "match-1", 1, 1),  # Valid
+            ("logical-2", "geometrical-2", 2, 2),  # Invalid
+            ("match-3", "match-3", 3, 3),  # Valid
+            ("logical-4", "geometrical-4", 4, 4),  # Invalid
         ]
 
-        # Mock get_guid for rooms
-        with patch.object(self.logic_checker, 'get_guid') as mock_get_guid:
+        # Mock get_guid_by_oid for rooms
+        with patch.object(self.logic_checker, 'get_guid_by_oid') as mock_get_guid:
             mock_get_guid.side_effect = ["room-2", "room-4"]
 
             result = self.logic_checker.check_room_to_station_relationships()
@@ -254,6 +314,32 @@ class TestLogicChecker(unittest.TestCase):
         self.assertEqual(len(result), 2)
         self.mock_accessor.delete.assert_called_once_with("in_memory\\intersected")
 
+    def test_check_all_relationships_reads_every_layer_once(self):
+        """Test the single-pass mode reads each layer once and never intersects"""
+        square = [[(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)]]
+        layers = {
+            "Rooms": [((5, 5), "room-1", "station-2")],
+            "RoomDetails": [(square, "room-detail-1", "room-1")],
+            "Stations": [((1, 1), "station-1")],
+            "StationDetails": [(square, "station-detail-1", "station-1")],
+        }
+        self.mock_accessor.geometry_cursor.side_effect = lambda layer, fields, where=None: layers[layer]
+        self.mock_accessor.polygon_index.side_effect = lambda layer, polygons: GeoDataAccessor.polygon_index(
+            self.mock_accessor, layer, polygons)
+
+        results = self.logic_checker.check_all_relationships(check_rooms=True, check_stations=True)
+
+        self.assertEqual(results[ROOM_TO_STATION], [("room-1", "station-2", "station-1")])
+        self.assertEqual(results[ROOM_TO_ROOMDETAIL], [])
+        self.assertEqual(results[STATION_TO_STATIONDETAIL], [])
+        self.assertEqual(
+            sorted(call.args[0] for call in self.mock_accessor.geometry_cursor.call_args_list),
+            ["RoomDetails", "Rooms", "StationDetails", "Stations"]
+        )
+        self.assertEqual(sorted(call.args[0] for call in self.mock_accessor.polygon_index.call_args_list),
+                         ["RoomDetails", "StationDetails"])
+        self.mock_accessor.intersect.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,180 @@
+import unittest
+from benchmarks.synthetic_network import network_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from geo_access.relationship_class import RelationshipClass
+from geo_access.where_clause import compile_where
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+from tests.geometry_helpers import add_two_stations, square
+
+
+def build_network():
+    """
+    Two stations side by side with one room each, plus a room outside of any station.
+    Room 2 is inside station B but is related to station A, room 3's detail is related to room 1.
+    """
+    accessor = InMemoryAccessor()
+    add_two_stations(accessor)
+    accessor.add_layer("main.Room", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], [
+        (1, "{R-1}", "{S-A}", (2, 2)),
+        (2, "{R-2}", "{S-A}", (30, 10)),
+        (3, "{R-3}", None, (100, 100)),
+    ], POINT)
+    accessor.add_layer("main.RoomDetail", ["OBJECTID", "GLOBALID", "ROOM_GUID", "SHAPE"], [
+        (1, "{RD-1}", "{R-1}", square(1, 1, 2)),
+        (2, "{RD-2}", "{R-2}", square(29, 9, 2)),
+        (3, "{RD-3}", "{R-1}", square(99, 99, 2)),
+    ], POLYGON)
+    return accessor
+
+
+def build_config():
+    return network_config()
+
+
+class TestWhereClause(unittest.TestCase):
+
+    def setUp(self):
+        self.fields = ["OBJECTID", "GLOBALID", "STATION_GUID"]
+
+    def test_comparisons(self):
+        """Test comparison operators and case-insensitive field names"""
+        self.assertTrue(compile_where("objectid = 5", self.fields)((5, "a", "b")))
+        self.assertTrue(compile_where("OBJECTID >= 5 AND OBJECTID < 6", self.fields)((5, "a", "b")))
+        self.assertFalse(compile_where("OBJECTID <> 5", self.fields)((5, "a", "b")))
+
+    def test_in_and_null(self):
+        """Test IN lists, quoted strings and NULL checks"""
+        predicate = compile_where("GLOBALID IN ('{A}', 'it''s') OR STATION_GUID IS NULL", self.fields)
+        self.assertTrue(predicate((1, "{A}", "x")))
+        self.assertTrue(predicate((1, "it's", "x")))
+        self.assertTrue(predicate((1, "{B}", None)))
+        self.assertFalse(predicate((1, "{B}", "x")))
+
+    def test_not_and_parentheses(self):
+        """Test NOT, NOT IN and grouping"""
+        predicate = compile_where("NOT (OBJECTID = 1 OR OBJECTID = 2) AND OBJECTID NOT IN (3)", self.fields)
+        self.assertFalse(predicate((1, "a", "b")))
+        self.assertFalse(predicate((3, "a", "b")))
+        self.assertTrue(predicate((4, "a", "b")))
+
+    def test_invalid_clause(self):
+        """Test unknown fields and broken syntax are rejected"""
+        with self.assertRaises(ValueError):
+            compile_where("MISSING = 1", self.fields)
+        with self.assertRaises(ValueError):
+            compile_where("OBJECTID = ", self.fields)
+
+
+class TestInMemoryAccessor(unittest.TestCase):
+
+    def setUp(self):
+        self.accessor = build_network()
+
+    def test_search_cursor_with_where(self):
+        """Test search_cursor returns the requested fields of the matching rows"""
+        rows = list(self.accessor.search_cursor("main.Room", ["GLOBALID", "SHAPE@XY"], where="OBJECTID > 1"))
+        self.assertEqual(rows, [("{R-2}", (30, 10)), ("{R-3}", (100, 100))])
+
+    def test_search_cursor_single_field(self):
+        """Test a single field can be passed as a string"""
+        rows = list(self.accessor.search_cursor("main.Room", "GLOBALID", where="OBJECTID = 1"))
+        self.assertEqual(rows, [("{R-1}",)])
+
+    def test_search_cursor_order_by(self):
+        """Test the rows are sorted by the order_by field, which does not have to be read"""
+        rows = list(self.accessor.search_cursor("main.Room", "GLOBALID", where="OBJECTID > 1", order_by="STATION_GUID"))
+        self.assertEqual(rows, [("{R-3}",), ("{R-2}",)])  # NULLs first, as in SQL
+        self.accessor.add_layer("in_memory\\intersected", ["OBJECTID", "FID_Room"], [(1, 3), (2, 1), (3, 2)])
+        rows = list(self.accessor.search_cursor("in_memory\\intersected", ["OBJECTID", "FID_Room"], order_by="FID_Room"))
+        self.assertEqual(rows, [(2, 1), (3, 2), (1, 3)])
+
+    def test_select_layer_by_attribute(self):
+        """Test the selection is a new layer that can be counted and read"""
+        selection = self.accessor.select_layer_by_attribute("main.Room", "STATION_GUID = '{S-A}'")
+        self.assertEqual(self.accessor.get_count(selection), 2)
+        self.assertEqual(self.accessor.get_count("main.Room"), 3)
+
+    def test_intersect_field_names(self):
+        """Test the intersect output is named the same way as arcpy's Intersect output"""
+        out = self.accessor.intersect(["main.Room", "main.StationDetail"], "in_memory\\intersected")
+        rows = list(self.accessor.search_cursor(out, ["FID_Room", "STATION_GUID", "FID_StationDetail", "STATION_GUID_1"]))
+        self.assertEqual(rows, [(1, "{S-A}", 1, "{S-A}"), (2, "{S-A}", 2, "{S-B}")])
+
+    def test_intersect_without_numpy(self):
+        """Test the STR tree join gives the same output as the NumPy kernel"""
+        expected = list(self.accessor.search_cursor(
+            self.accessor.intersect(["main.StationDetail", "main.Room"], "out"), ["FID_Room", "FID_StationDetail"]
+        ))
+        accessor = build_network()
+        accessor.use_numpy = False
+        rows = list(accessor.search_cursor(
+            accessor.intersect(["main.StationDetail", "main.Room"], "out"), ["FID_Room", "FID_StationDetail"]
+        ))
+        self.assertEqual(rows, [(1, 1), (2, 2)])
+        self.assertEqual(rows, expected)
+
+    def test_intersect_requires_point_and_polygon(self):
+        """Test intersecting two point layers is rejected"""
+        with self.assertRaises(ValueError):
+            self.accessor.intersect(["main.Room", "main.Station"], "out")
+
+    def test_delete(self):
+        """Test a deleted layer cannot be read anymore"""
+        out = self.accessor.intersect(["main.Room", "main.StationDetail"], "in_memory\\intersected")
+        self.accessor.delete(out)
+        with self.assertRaises(KeyError):
+            self.accessor.get_count(out)
+
+    def test_save_and_load(self):
+        """Test layers and relationship classes survive a round trip through a JSON workspace"""
+        import os
+        import tempfile
+        relationship = RelationshipClass("main.Station__Room", "main.Station", "main.Room",
+                                         "esriRelCardinalityOneToMany", "GLOBALID", "STATION_GUID")
+        self.accessor.add_relationship_class(relationship)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "workspace.json")
+            self.accessor.save(path)
+            loaded = InMemoryAccessor()
+            loaded.set_workspace(path)
+        self.assertEqual(list(loaded.search_cursor("main.Room", ["OBJECTID", "SHAPE@XY"]))[0], (1, (2, 2)))
+        self.assertEqual(loaded.get_count("main.RoomDetail"), 3)
+        self.assertEqual(loaded.relationship_classes(), {"main.Station__Room": relationship})
+        self.assertEqual(list(loaded.relationship_pairs(relationship)), [("{S-A}", "{R-1}"), ("{S-A}", "{R-2}")])
+
+
+class TestLogicCheckerWithInMemoryAccessor(unittest.TestCase):
+
+    def setUp(self):
+        self.checker = LogicChecker(build_config(), build_network())
+
+    def test_room_to_station(self):
+        """Test the room inside station B but related to station A is reported"""
+        self.assertEqual(self.checker.check_room_to_station_relationships(), [("{R-2}", "{S-A}", "{S-B}")])
+
+    def test_room_to_roomdetail(self):
+        """Test the room detail related to the wrong room is reported"""
+        self.assertEqual(self.checker.check_room_to_roomdetail_relationships(), [("{RD-3}", "{R-1}", "{R-3}")])
+
+    def test_station_to_stationdetail(self):
+        """Test consistent stations produce no entries"""
+        self.assertEqual(self.checker.check_station_to_stationdetail_relationships(), [])
+
+    def test_check_all_relationships_matches_single_checks(self):
+        """Test the single-pass mode returns the same entries as the three separate checks"""
+        results = self.checker.check_all_relationships(check_rooms=True, check_stations=True)
+
+        self.assertEqual(results, {
+            ROOM_TO_STATION: self.checker.check_room_to_station_relationships(),
+            ROOM_TO_ROOMDETAIL: self.checker.check_room_to_roomdetail_relationships(),
+            STATION_TO_STATIONDETAIL: self.checker.check_station_to_stationdetail_relationships(),
+        })
+
+    def test_check_all_relationships_optional_checks(self):
+        """Test only the room-to-station entries are returned when the optional checks are off"""
+        results = self.checker.check_all_relationships()
+        self.assertEqual(results, {ROOM_TO_STATION: [("{R-2}", "{S-A}", "{S-B}")]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import struct
+import tempfile
+import unittest
+from benchmarks.synthetic_network import network_config
+from geo_access.gdb_geometry import decode_geometry, encode_shape_buffer
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from logic_checker import LogicChecker
+from tests.geometry_helpers import square, two_stations
+
+STATION_ROOM_DEFINITION = """<DERelationshipClassInfo xsi:type="typens:DERelationshipClassInfo"
+    xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:typens="http://www.esri.com/schemas/ArcGIS/10.1">
+  <Name>main.Station__Room</Name>
+  <Cardinality>esriRelCardinalityOneToMany</Cardinality>
+  <IsAttributed>false</IsAttributed>
+  <OriginClassNames><Name>main.Station</Name></OriginClassNames>
+  <DestinationClassNames><Name>main.Room</Name></DestinationClassNames>
+  <OriginClassKeys>
+    <RelationshipClassKey><ObjectKeyName>GLOBALID</ObjectKeyName><KeyRole>esriRelKeyRoleOriginPrimary</KeyRole></RelationshipClassKey>
+    <RelationshipClassKey><ObjectKeyName>STATION_GUID</ObjectKeyName><KeyRole>esriRelKeyRoleOriginForeign</KeyRole></RelationshipClassKey>
+  </OriginClassKeys>
+</DERelationshipClassInfo>"""
+
+
+def wkb_point(x, y):
+    return struct.pack("<BIdd", 1, 1, x, y)
+
+
+def build_mobile_geodatabase(path):
+    """
+    Small SQLite file with the tables of the task's mobile geodatabase.
+    Room 2 is inside station B but is related to station A. Points are WKB, polygons are shape buffers.
+    """
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE GDB_Items (ObjectID INTEGER PRIMARY KEY, Name TEXT, Definition TEXT);
+        CREATE TABLE Station (OBJECTID INTEGER PRIMARY KEY, GLOBALID TEXT, SHAPE BLOB);
+        CREATE TABLE StationDetail (OBJECTID INTEGER PRIMARY KEY, GLOBALID TEXT, STATION_GUID TEXT, SHAPE BLOB);
+        CREATE TABLE Room (OBJECTID INTEGER PRIMARY KEY, GLOBALID TEXT, STATION_GUID TEXT, SHAPE BLOB);
+    """)
+    connection.execute("INSERT INTO GDB_Items VALUES (1, 'main.Station__Room', ?)", (STATION_ROOM_DEFINITION,))
+    stations, details = two_stations()
+    connection.executemany("INSERT INTO Station VALUES (?, ?, ?)",
+                           [(oid, guid, wkb_point(*point)) for oid, guid, point in stations])
+    connection.executemany("INSERT INTO StationDetail VALUES (?, ?, ?, ?)",
+                           [(oid, guid, station, encode_shape_buffer(rings)) for oid, guid, station, rings in details])
+    connection.executemany("INSERT INTO Room VALUES (?, ?, ?, ?)", [
+        (1, "{R-1}", "{S-A}", wkb_point(2, 2)),
+        (2, "{R-2}", "{S-A}", wkb_point(30, 10)),
+        (3, "{R-3}", None, encode_shape_buffer((100.0, 100.0))),
+    ])
+    connection.commit()
+    connection.close()
+
+
+class TestGeometryDecoding(unittest.TestCase):
+
+    def test_wkb_point(self):
+        """Test little and big endian WKB points"""
+        self.assertEqual(decode_geometry(wkb_point(1.5, 2.5)), (1.5, 2.5))
+        self.assertEqual(decode_geometry(struct.pack(">BIdd", 0, 1, 3, 4)), (3, 4))
+
+    def test_wkb_point_z(self):
+        """Test the Z value of an ISO WKB point is dropped"""
+        self.assertEqual(decode_geometry(struct.pack("<BIddd", 1, 1001, 1, 2, 3)), (1, 2))
+
+    def test_wkb_polygon(self):
+        """Test a WKB polygon with one ring"""
+        ring = [(0, 0), (0, 1), (1, 1), (0, 0)]
+        blob = struct.pack("<BIII", 1, 3, 1, len(ring)) + struct.pack("<8d", *(v for p in ring for v in p))
+        self.assertEqual(decode_geometry(blob), [ring])
+
+    def test_gpkg_point(self):
+        """Test a GeoPackage binary header with an envelope"""
+        header = b"GP" + bytes([0, 0b0011]) + struct.pack("<i", 4326) + struct.pack("<4d", 1, 1, 2, 2)
+        self.assertEqual(decode_geometry(header + wkb_point(1, 2)), (1, 2))
+
+    def test_shape_buffer_round_trip(self):
+        """Test shape buffer points and polygons with holes"""
+        polygon = square(0, 0, 10) + square(2, 2, 1)
+        self.assertEqual(decode_geometry(encode_shape_buffer(polygon)), polygon)
+        self.assertEqual(decode_geometry(encode_shape_buffer((7.0, 8.0))), (7.0, 8.0))
+
+    def test_shape_buffer_point_not_taken_for_wkb(self):
+        """Test a shape buffer point whose bytes look like a WKB header with an unknown geometry type"""
+        self.assertEqual(decode_geometry(encode_shape_buffer((120.7, 3.0))), (120.7, 3.0))
+
+
+class TestMobileGeodatabaseAccessor(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "Task2.geodatabase")
+        build_mobile_geodatabase(self.path)
+        self.accessor = MobileGeodatabaseAccessor(batch_size=2)
+        self.accessor.set_workspace(self.path)
+
+    def tearDown(self):
+        self.accessor.connection.close()
+        self.directory.cleanup()
+
+    def test_search_cursor_streams_batches(self):
+        """Test all rows come back over several fetchmany batches, with decoded geometries"""
+        rows = list(self.accessor.search_cursor("main.Room", ["OBJECTID", "SHAPE@XY"]))
+        self.assertEqual(rows, [(1, (2, 2)), (2, (30, 10)), (3, (100, 100))])
+
+    def test_search_cursor_where(self):
+        """Test the where clause is passed to SQLite"""
+        rows = list(self.accessor.search_cursor("main.Room", "GLOBALID", where="STATION_GUID IS NULL"))
+        self.assertEqual(rows, [("{R-3}",)])
+
+    def test_search_cursor_order_by(self):
+        """Test order_by is passed to SQLite"""
+        rows = list(self.accessor.search_cursor("main.Room", "GLOBALID", where="OBJECTID > 1", order_by="STATION_GUID"))
+        self.assertEqual(rows, [("{R-3}",), ("{R-2}",)])
+
+    def test_set_workspace_again(self):
+        """Test the tables and polygon indexes loaded from a geodatabase are not used after switching to another"""
+        def intersect_rows():
+            self.accessor.intersect(["main.Room", "main.StationDetail"], "in_memory\\intersected")
+            return list(self.accessor.search_cursor("in_memory\\intersected", ["GLOBALID", "GLOBALID_1"]))
+
+        self.assertEqual(intersect_rows(), [("{R-1}", "{SD-A}"), ("{R-2}", "{SD-B}")])
+        moved_path = os.path.join(self.directory.name, "Moved.geodatabase")
+        build_mobile_geodatabase(moved_path)
+        connection = sqlite3.connect(moved_path)
+        connection.execute("UPDATE StationDetail SET SHAPE = ? WHERE OBJECTID = 2",
+                           (encode_shape_buffer(square(90, 90, 20)),))
+        connection.commit()
+        connection.close()
+
+        self.accessor.set_workspace(moved_path)
+        self.assertEqual(intersect_rows(), [("{R-1}", "{SD-A}"), ("{R-3}", "{SD-B}")])
+
+    def test_get_count_and_selection(self):
+        """Test counting source tables and selections"""
+        self.assertEqual(self.accessor.get_count("main.Room"), 3)
+        selection = self.accessor.select_layer_by_attribute("main.Room", "STATION_GUID = '{S-A}'")
+        self.assertEqual(self.accessor.get_count(selection), 2)
+
+    def test_relationship_classes(self):
+        """Test the relationship class definition and its pairs are read"""
+        relationship = self.accessor.relationship_classes()["main.Station__Room"]
+        self.assertEqual(relationship.origin, "main.Station")
+        self.assertEqual(relationship.destination, "main.Room")
+        self.assertEqual(relationship.origin_foreign_key, "STATION_GUID")
+        self.assertEqual(list(self.accessor.relationship_pairs(relationship)), [("{S-A}", "{R-1}"), ("{S-A}", "{R-2}")])
+
+    def test_workspace_is_read_only(self):
+        """Test the geodatabase is opened read-only"""
+        with self.assertRaises(Exception):
+            self.accessor.connection.execute("DELETE FROM Room")
+
+    def test_logic_checker(self):
+        """Test the room-to-station check runs end to end on the SQLite file"""
+        config = network_config(self.path)
+        checker = LogicChecker(config, self.accessor)
+        self.assertEqual(checker.check_room_to_station_relationships(), [("{R-2}", "{S-A}", "{S-B}")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import random
+import tempfile
+import unittest
+from benchmarks.synthetic_network import network_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from logic_checker import LogicChecker
+from parallel_checker import check_room_to_station_relationships_parallel, split_into_shards
+
+
+def build_workspace(path, seed=5):
+    """5x5 grid of stations, rooms on random positions (some on shared borders), every 7th related to a wrong station"""
+    rng = random.Random(seed)
+    accessor = InMemoryAccessor()
+    details = []
+    for i in range(25):
+        x, y = (i % 5) * 10, (i // 5) * 10
+        details.append((i + 1, f"{{SD-{i}}}", f"{{S-{i}}}", [[(x, y), (x, y + 10), (x + 10, y + 10), (x + 10, y), (x, y)]]))
+    rooms = []
+    for i in range(300):
+        x, y = rng.choice([rng.uniform(0, 50), 10.0, 20.0]), rng.uniform(0, 50)
+        station = int(min(y, 49.9) // 10) * 5 + int(min(x, 49.9) // 10)
+        if i % 7 == 0:
+            station = (station + 3) % 25
+        rooms.append((i + 1, f"{{R-{i}}}", f"{{S-{station}}}", (x, y)))
+    accessor.add_layer("main.StationDetail", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], details, POLYGON)
+    accessor.add_layer("main.Room", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], rooms, POINT)
+    accessor.save(path)
+
+
+class TestSplitIntoShards(unittest.TestCase):
+
+    def test_even_split(self):
+        """Test shards are contiguous and their sizes differ by at most one"""
+        self.assertEqual(split_into_shards([1, 2, 3, 4, 5], 2), [[1, 2, 3], [4, 5]])
+
+    def test_more_shards_than_oids(self):
+        """Test empty shards are not created"""
+        self.assertEqual(split_into_shards([1, 2], 8), [[1], [2]])
+        self.assertEqual(split_into_shards([], 4), [])
+
+
+class TestParallelChecker(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, "workspace.json")
+        build_workspace(path)
+        self.config = network_config(path, accessor="memory", index_cache=False, edit_date_field=None)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_matches_serial_check(self):
+        """Test every worker count returns the serial result in the serial order"""
+        expected = LogicChecker(self.config, InMemoryAccessor()).check_room_to_station_relationships()
+        self.assertTrue(expected)
+
+        for workers in (1, 3):
+            with self.subTest(workers=workers):
+                self.assertEqual(check_room_to_station_relationships_parallel(self.config, workers), expected)
+
+    def test_shard(self):
+        """Test a shard only reports rooms inside its own station details"""
+        checker = LogicChecker(self.config, InMemoryAccessor())
+        shard = checker.check_room_to_station_subset(station_detail_oids=[1, 2])
+        self.assertTrue(all(fid_detail in (1, 2) for _, fid_detail, _ in shard))
+        self.assertEqual(shard, sorted(shard, key=lambda entry: entry[:2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import random
+import unittest
+from unittest.mock import patch
+from spatial.geometry import PackedPolygons
+from spatial.join import point_in_polygon_join
+from tests.geometry_helpers import square
+
+try:
+    import numpy as np
+    from spatial.pip_kernel import PolygonSet, locate_points
+except ImportError:  # numpy is optional
+    np = None
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestPolygonSet(unittest.TestCase):
+
+    def test_rectangles_fast_path(self):
+        """Test rectangles are detected and points on shared edges belong to both"""
+        polygons = [square(0, 0, 10), square(10, 0, 10)]
+        polygon_set = PolygonSet(polygons)
+        self.assertTrue(polygon_set.is_rectangle.all())
+
+        points, polys = polygon_set.pairs(np.array([[5, 5], [10, 5], [25, 5]]))
+        self.assertEqual(list(zip(points.tolist(), polys.tolist())), [(0, 0), (1, 0), (1, 1)])
+
+    def test_locate(self):
+        """Test the lowest polygon wins and uncovered points get -1"""
+        result = locate_points(np.array([[5, 5], [10, 5], [25, 5]]), [square(0, 0, 10), square(10, 0, 10)])
+        self.assertEqual(result.tolist(), [0, 0, -1])
+
+    def test_general_polygons(self):
+        """Test holes and concave rings go through the crossing-number path"""
+        l_shape = [[(0, 0), (0, 10), (5, 10), (5, 5), (10, 5), (10, 0)]]
+        with_hole = square(20, 0, 10) + square(24, 4, 2)
+        polygon_set = PolygonSet([l_shape, with_hole])
+        self.assertFalse(polygon_set.is_rectangle.any())
+
+        result = polygon_set.locate(np.array([[2, 8], [8, 8], [25, 5], [24, 5], [21, 1], [5, 7]]))
+        self.assertEqual(result.tolist(), [0, -1, -1, 1, 1, 0])
+
+    def test_empty_inputs(self):
+        """Test no polygons or no points"""
+        self.assertEqual(locate_points(np.array([[1, 1]]), []).tolist(), [-1])
+        self.assertEqual(PolygonSet([square(0, 0, 1)]).locate(np.zeros((0, 2))).tolist(), [])
+
+    def test_matches_per_feature_join(self):
+        """Test the kernel returns exactly the pairs of the per-feature STR tree join"""
+        rng = random.Random(7)
+        polygons = []
+        for i in range(200):
+            x, y, size = rng.uniform(0, 500), rng.uniform(0, 500), rng.choice([5, 10, 20])
+            if i % 3:
+                polygons.append(square(x, y, size))
+            else:
+                polygons.append([[(x, y), (x + size, y + size / 2), (x + size / 2, y + size), (x - size / 3, y + size / 2)]])
+        points = [(rng.uniform(0, 520), rng.uniform(0, 520)) for _ in range(5000)]
+        points += [polygons[i][0][1] for i in range(0, 200, 7)]  # vertices
+        points += [((p[0][0][0] + p[0][1][0]) / 2, (p[0][0][1] + p[0][1][1]) / 2) for p in polygons[1::5]]  # edges
+
+        expected = list(point_in_polygon_join(points, polygons))
+        point_positions, polygon_positions = PolygonSet(polygons).pairs(np.array(points))
+
+        self.assertEqual(list(zip(point_positions.tolist(), polygon_positions.tolist())), expected)
+
+        # Built from packed buffers and tested in chunks of a few edges, including chunks of a single pair
+        with patch.object(PolygonSet, "CHUNK_EDGES", 3):
+            point_positions, polygon_positions = PolygonSet(PackedPolygons.pack(polygons)).pairs(np.array(points))
+        self.assertEqual(list(zip(point_positions.tolist(), polygon_positions.tolist())), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
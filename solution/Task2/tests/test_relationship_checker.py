@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from benchmarks.synthetic_network import RELATIONSHIP_CLASSES, NetworkSpec, generate_network, network_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from geo_access.relationship_class import RelationshipClass
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+from relationship_checker import (MANY_TO_ONE, RelationshipChecker, ROOM_TO_ROOMDETAIL_ANOMALIES,
+                                  ROOM_TO_STATION_ANOMALIES, STATION_TO_STATIONDETAIL_ANOMALIES, UNRELATED)
+from tests.geometry_helpers import add_two_stations
+
+CONFIG = network_config(relationships=True)
+
+
+def build_accessor():
+    """
+    Two stations side by side. R-1 is valid, R-2 is inside station B but related to A, R-3 has no station,
+    R-4 (outside every station) has no station either and R-5 is related to both stations
+    """
+    accessor = InMemoryAccessor()
+    add_two_stations(accessor)
+    accessor.add_layer("main.Room", ["OBJECTID", "GLOBALID", "SHAPE"], [
+        (1, "{R-1}", (2, 2)), (2, "{R-2}", (30, 10)), (3, "{R-3}", (12, 12)), (4, "{R-4}", (100, 100)),
+        (5, "{R-5}", (35, 15)),
+    ], POINT)
+    # Station__Room is attributed: its pairs are the rows of the relationship table
+    accessor.add_layer("main.Station__Room", ["OBJECTID", "STATION_GUID", "ROOM_GUID"], [
+        (1, "{S-A}", "{R-1}"), (2, "{S-A}", "{R-2}"), (3, "{S-A}", "{R-5}"), (4, "{S-B}", "{R-5}"),
+    ])
+    accessor.add_relationship_class(RelationshipClass(
+        "main.Station__Room", "main.Station", "main.Room", "esriRelCardinalityOneToMany", "GLOBALID", "STATION_GUID",
+        is_attributed=True, destination_primary_key="GLOBALID", destination_foreign_key="ROOM_GUID",
+    ))
+    accessor.add_relationship_class(RELATIONSHIP_CLASSES[2])
+    return accessor
+
+
+class TestRelationshipChecker(unittest.TestCase):
+
+    def test_matches_logic_checker_on_a_network(self):
+        """Test the relationship classes give the results of the GUID field checks, in the same order"""
+        network = generate_network(NetworkSpec(stations=16, rooms_per_station=30, error_rate=0.05,
+                                               overlap_rate=0.3, nested_rate=0.3, vertices_per_side=3))
+        accessor = network.to_memory_accessor()
+        expected = LogicChecker(CONFIG, accessor).check_all_relationships(True, True)
+
+        results = RelationshipChecker(CONFIG, accessor).check_all_relationships(True, True)
+        for key in (ROOM_TO_STATION, ROOM_TO_ROOMDETAIL, STATION_TO_STATIONDETAIL):
+            self.assertEqual(results[key], expected[key])
+        for key in (ROOM_TO_STATION_ANOMALIES, ROOM_TO_ROOMDETAIL_ANOMALIES, STATION_TO_STATIONDETAIL_ANOMALIES):
+            self.assertEqual(results[key], [])
+
+    def test_reads_the_mobile_geodatabase_definitions(self):
+        """Test the relationship classes written to GDB_Items are read back and give the same results"""
+        network = generate_network(NetworkSpec(stations=9, rooms_per_station=10, error_rate=0.1, nested_rate=0.3))
+        expected = RelationshipChecker(CONFIG, network.to_memory_accessor()).check_all_relationships(True, True)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network.geodatabase")
+            network.save_mobile_geodatabase(path)
+            accessor = MobileGeodatabaseAccessor()
+            accessor.set_workspace(path)
+            try:
+                self.assertEqual(list(accessor.relationship_classes().values()), RELATIONSHIP_CLASSES)
+                self.assertEqual(RelationshipChecker(CONFIG, accessor).check_all_relationships(True, True), expected)
+            finally:
+                accessor.connection.close()
+
+    def test_anomalies(self):
+        """Test unrelated rooms and rooms related to several stations are reported with the station they are in"""
+        checker = RelationshipChecker(CONFIG, build_accessor())
+        results = checker.check_all_relationships(check_stations=True)
+
+        self.assertEqual(results[ROOM_TO_STATION], [("{R-2}", "{S-A}", "{S-B}")])
+        self.assertEqual(results[ROOM_TO_STATION_ANOMALIES], [
+            ("{R-3}", UNRELATED, None, "{S-A}"),
+            ("{R-4}", UNRELATED, None, None),
+            ("{R-5}", MANY_TO_ONE, "{S-A};{S-B}", "{S-B}"),
+        ])
+        self.assertEqual(results[STATION_TO_STATIONDETAIL], [])
+        self.assertEqual(checker.relationship_index("main.Station__Room").related("{R-5}"), ["{S-A}", "{S-B}"])
+
+    def test_missing_relationship_class(self):
+        """Test a relationship class missing from the workspace is reported by name"""
+        with self.assertRaisesRegex(KeyError, "main.Room__RoomDetail"):
+            RelationshipChecker(CONFIG, build_accessor()).check_all_relationships(check_rooms=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import csv
+import importlib.util
+import os
+import tempfile
+import unittest
+from utils.columnar_writer import ColumnarWriter, read_columnar
+from utils.csv_generator import CsvGenerator
+from utils.ndjson_writer import NdjsonWriter, read_ndjson
+from utils.report_factory import create_report_writer
+
+HEADER = ["RoomId", "CurrentStationId", "CorrectStationId"]
+STATION_A = "{5A000000-0000-4000-8000-00000000000A}"
+STATION_B = "{5B000000-0000-4000-8000-00000000000B}"
+ROWS = [
+    ("{0A1B2C3D-0000-4000-8000-000000000001}", STATION_A, STATION_B),
+    ("{0A1B2C3D-0000-4000-8000-000000000002}", STATION_A, STATION_B),
+    ("{0A1B2C3D-0000-4000-8000-000000000003}", None, STATION_B),
+]
+
+
+class TestReportWriters(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_ndjson_gzip_round_trip(self):
+        """Test the gzip NDJSON report has one object per row, keyed by the header"""
+        path = NdjsonWriter(self.directory.name).generate_report("invalid_relations", HEADER, iter(ROWS))
+        self.assertTrue(path.endswith("invalid_relations.ndjson.gz"))
+        self.assertEqual(list(read_ndjson(path)), [dict(zip(HEADER, row)) for row in ROWS])
+
+    def test_columnar_round_trip(self):
+        """Test the columnar report decodes to the written rows, including NULLs"""
+        path = ColumnarWriter(self.directory.name).generate_report("invalid_relations", HEADER, iter(ROWS))
+        names, columns = read_columnar(path)
+        self.assertEqual(names, HEADER)
+        self.assertEqual(list(zip(*(columns[name] for name in names))), ROWS)
+
+    def test_columnar_non_guid_values(self):
+        """Test columns with values that are not GUIDs are stored as strings"""
+        rows = [("{r-1}", "Station A"), ("{r-2}", "Station A"), ("{r-3}", "Станция Б")]
+        path = ColumnarWriter(self.directory.name).generate_report("report", ["Room", "Station"], rows)
+        _, columns = read_columnar(path)
+        self.assertEqual(columns, {"Room": ["{r-1}", "{r-2}", "{r-3}"], "Station": ["Station A", "Station A", "Станция Б"]})
+
+    def test_columnar_smaller_than_csv(self):
+        """Test GUIDs as 16-byte values and dictionary encoded stations make the report smaller than CSV"""
+        rows = [(f"{{0A1B2C3D-0000-4000-8000-{i:012X}}}", STATION_A, STATION_B) for i in range(1000)]
+        csv_path = CsvGenerator(self.directory.name).generate_csv("report", HEADER, rows)
+        columnar_path = ColumnarWriter(self.directory.name).generate_report("report", HEADER, rows)
+        self.assertLess(os.path.getsize(columnar_path) * 4, os.path.getsize(csv_path))
+
+    def test_create_report_writer(self):
+        """Test the factory returns the configured writer and rejects unknown formats"""
+        self.assertIsInstance(create_report_writer("csv", self.directory.name), CsvGenerator)
+        self.assertIsInstance(create_report_writer("ndjson.gz", self.directory.name), NdjsonWriter)
+        self.assertIsInstance(create_report_writer("columnar", self.directory.name), ColumnarWriter)
+        with self.assertRaises(ValueError):
+            create_report_writer("xlsx", self.directory.name)
+
+    def test_csv_report_unchanged(self):
+        """Test the CSV writer still writes the header and rows as plain CSV"""
+        path = create_report_writer("csv", self.directory.name).generate_report("invalid_relations", HEADER, ROWS)
+        with open(path, newline="", encoding="utf-8") as f:
+            self.assertEqual(list(csv.reader(f)), [HEADER] + [[value or "" for value in row] for row in ROWS])
+
+    @unittest.skipIf(importlib.util.find_spec("pyarrow") is None, "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        """Test the Parquet report decodes to the written GUIDs"""
+        import pyarrow.parquet as pq
+        from utils.columnar_writer import bytes_to_guid
+        path = create_report_writer("parquet", self.directory.name).generate_report("invalid_relations", HEADER, ROWS)
+        table = pq.read_table(path)
+        decoded = [[bytes_to_guid(value) if value is not None else None for value in table.column(name).to_pylist()]
+                   for name in HEADER]
+        self.assertEqual(list(zip(*decoded)), ROWS)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow") is None, "pyarrow is installed")
+    def test_parquet_without_pyarrow(self):
+        """Test the Parquet format without pyarrow fails with a message naming the package"""
+        with self.assertRaisesRegex(ImportError, "The parquet report format needs the 'pyarrow' package"):
+            create_report_writer("parquet", self.directory.name)
+
+    @unittest.skipUnless(importlib.util.find_spec("zstandard") is None, "zstandard is installed")
+    def test_ndjson_zstd_without_zstandard(self):
+        """Test the zstd NDJSON format without zstandard fails with a message naming the package"""
+        with self.assertRaisesRegex(ImportError, "The zstd report format needs the 'zstandard' package"):
+            create_report_writer("ndjson.zst", self.directory.name)
+
+    @unittest.skipIf(importlib.util.find_spec("zstandard") is None, "zstandard is not installed")
+    def test_ndjson_zstd_round_trip(self):
+        """Test the zstd NDJSON report round-trips"""
+        writer = create_report_writer("ndjson.zst", self.directory.name)
+        path = writer.generate_report("invalid_relations", HEADER, ROWS)
+        self.assertEqual(list(read_ndjson(path)), [dict(zip(HEADER, row)) for row in ROWS])
+
+
+if __name__ == "__main__":
+    unittest.main()
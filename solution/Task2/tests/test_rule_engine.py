@@ -0,0 +1,125 @@
+import unittest
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import patch
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from cli import validate_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from geo_access.relationship_class import RelationshipClass
+from logic_checker import ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+from relationship_checker import RelationshipChecker, UNRELATED
+from rule_engine import MISMATCH, ONE_TO_MANY, Rule, RuleEngine, load_rules
+from tests.geometry_helpers import square
+
+CONFIG = network_config(relationships=True)
+
+NETWORK_RULES = [
+    Rule("room_station", "main.Room", "main.StationDetail", "main.Station__Room", via="main.Station__StationDetail"),
+    Rule("room_detail", "main.Room", "main.RoomDetail", "main.Room__RoomDetail"),
+    Rule("station_detail", "main.Station", "main.StationDetail", "main.Station__StationDetail"),
+    Rule("room_station_many", "main.Room", "main.StationDetail", "main.Station__Room", "ManyToMany",
+         "main.Station__StationDetail"),
+]
+
+
+def build_accessor():
+    """
+    Equipment in rooms: a room is a point inside its RoomDetail. E-1 is valid, E-2 is inside RD-1 but related to R-2,
+    E-3 has no room, E-4 is valid and E-5 is inside RD-3, which has no room
+    """
+    accessor = InMemoryAccessor()
+    accessor.add_layer("main.Room", ["OBJECTID", "GLOBALID", "SHAPE"], [(1, "{R-1}", (5, 5)), (2, "{R-2}", (25, 5))],
+                       POINT)
+    accessor.add_layer("main.RoomDetail", ["OBJECTID", "GLOBALID", "ROOM_GUID", "SHAPE"], [
+        (1, "{RD-1}", "{R-1}", square(0, 0, 10)), (2, "{RD-2}", "{R-2}", square(20, 0, 10)),
+        (3, "{RD-3}", None, square(40, 0, 10)),
+    ], POLYGON)
+    accessor.add_layer("main.Equipment", ["OBJECTID", "GLOBALID", "ROOM_GUID", "SHAPE"], [
+        (1, "{E-1}", "{R-1}", (2, 2)), (2, "{E-2}", "{R-2}", (8, 8)), (3, "{E-3}", None, (22, 2)),
+        (4, "{E-4}", "{R-2}", (28, 8)), (5, "{E-5}", "{R-1}", (45, 5)),
+    ], POINT)
+    for origin, destination in [("Room", "RoomDetail"), ("Room", "Equipment")]:
+        accessor.add_relationship_class(RelationshipClass(
+            f"main.{origin}__{destination}", f"main.{origin}", f"main.{destination}", "esriRelCardinalityOneToMany",
+            "GLOBALID", "ROOM_GUID",
+        ))
+    return accessor
+
+
+class TestRuleEngine(unittest.TestCase):
+
+    def test_matches_relationship_checker_with_shared_reads(self):
+        """Test rules give the relationship class results, reading every layer and indexing every polygon layer once"""
+        network = generate_network(NetworkSpec(stations=16, rooms_per_station=30, error_rate=0.1, overlap_rate=0.3,
+                                               nested_rate=0.3, vertices_per_side=3))
+        expected = RelationshipChecker(CONFIG, network.to_memory_accessor()).check_all_relationships(True, True)
+
+        accessor = network.to_memory_accessor()
+        reads = Counter()
+        geometry_cursor = accessor.geometry_cursor
+        accessor.geometry_cursor = lambda layer, *args, **kwargs: reads.update([layer]) or geometry_cursor(
+            layer, *args, **kwargs)
+        accessor.relationship_pairs = None
+        with patch.object(accessor, "polygon_index", wraps=accessor.polygon_index) as polygon_index:
+            results = RuleEngine(CONFIG, accessor).check(NETWORK_RULES)
+
+        for name, key in [("room_station", ROOM_TO_STATION), ("room_detail", ROOM_TO_ROOMDETAIL),
+                          ("station_detail", STATION_TO_STATIONDETAIL)]:
+            self.assertEqual(results[name], [(guid, MISMATCH, logical, geometrical)
+                                             for guid, logical, geometrical in expected[key]])
+        self.assertGreater(len(results["room_station"]), 0)
+        self.assertEqual(results["room_station_many"], results["room_station"])
+        self.assertEqual(list(results), [rule.name for rule in NETWORK_RULES])
+        self.assertEqual(reads, Counter(["main.Room", "main.RoomDetail", "main.Station", "main.StationDetail"]))
+        self.assertEqual(polygon_index.call_count, 2)
+
+    def test_equipment_in_room(self):
+        """Test a rule whose polygons are related to the origin through `via`, with a OneToOne cardinality"""
+        engine = RuleEngine(CONFIG, build_accessor())
+        rules = [Rule("equipment_in_room", "main.Equipment", "main.RoomDetail", "main.Room__Equipment", "OneToOne",
+                      "main.Room__RoomDetail")]
+        plan = engine.plan(rules)
+        self.assertEqual(plan.layer_fields, {"main.Equipment": ["GLOBALID", "ROOM_GUID"],
+                                             "main.RoomDetail": ["GLOBALID", "ROOM_GUID"]})
+
+        self.assertEqual(engine.check(rules)["equipment_in_room"], [
+            ("{E-2}", MISMATCH, "{R-2}", "{R-1}"),
+            ("{E-5}", MISMATCH, "{R-1}", None),
+            ("{E-3}", UNRELATED, None, "{R-2}"),
+            ("{E-1}", ONE_TO_MANY, "{R-1}", None),
+            ("{E-2}", ONE_TO_MANY, "{R-2}", None),
+            ("{E-4}", ONE_TO_MANY, "{R-2}", None),
+            ("{E-5}", ONE_TO_MANY, "{R-1}", None),
+        ])
+
+    def test_invalid_rules(self):
+        """Test invalid rule entries and rules that do not fit their relationship classes are refused"""
+        for values in [{"name": "a", "point_layer": "main.Room", "polygon_layer": "main.RoomDetail"},
+                       {"name": "a", "point_layer": "p", "polygon_layer": "q", "relationship": "r", "layer": "x"},
+                       {"name": "a/b", "point_layer": "p", "polygon_layer": "q", "relationship": "r"},
+                       {"name": "a", "point_layer": "p", "polygon_layer": "q", "relationship": "r",
+                        "cardinality": "ManyToOne"}]:
+            with self.assertRaises(ValueError):
+                Rule.from_dict(values)
+        rule = Rule.from_dict({"name": "a", "point_layer": "p", "polygon_layer": "q", "relationship": "r",
+                               "cardinality": "esriRelCardinalityOneToOne"})
+        self.assertEqual(rule.cardinality, "OneToOne")
+
+        engine = RuleEngine(CONFIG, build_accessor())
+        with self.assertRaisesRegex(KeyError, "main.Room__Station"):
+            engine.plan([Rule("a", "main.Equipment", "main.RoomDetail", "main.Room__Station")])
+        with self.assertRaisesRegex(ValueError, "via"):
+            engine.plan([Rule("a", "main.Equipment", "main.RoomDetail", "main.Room__Equipment")])
+
+        rules = [{"name": "a", "point_layer": "p", "polygon_layer": "q", "relationship": "r"}] * 2
+        with self.assertRaisesRegex(ValueError, "unique"):
+            load_rules(SimpleNamespace(rules=rules))
+        config = SimpleNamespace(**vars(CONFIG), accessor="memory", report_format="csv", log_level="INFO", workers=1,
+                                 rules=rules)
+        self.assertEqual(len(validate_config(config)), 1)
+        config.rules = rules[:1]
+        self.assertEqual(validate_config(config), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
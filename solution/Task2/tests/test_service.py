@@ -0,0 +1,174 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from logic_checker import LogicChecker
+from service import CheckService
+from spatial.join import PolygonIndex
+
+FIELDS = ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"]
+
+
+def write_workspace(path, moved_room=None):
+    """3x3 grid of stations with 4 rooms each, every 5th room related to the next station"""
+    accessor = InMemoryAccessor()
+    details, rooms = [], []
+    for i in range(9):
+        x, y = (i % 3) * 10, (i // 3) * 10
+        details.append((i + 1, f"{{SD-{i}}}", f"{{S-{i}}}", [[(x, y), (x, y + 10), (x + 10, y + 10), (x + 10, y), (x, y)]]))
+        for k, (dx, dy) in enumerate([(2, 2), (8, 2), (2, 8), (10, 5)]):
+            number = len(rooms)
+            station = (i + 1) % 9 if number % 5 == 0 else i
+            rooms.append((number + 1, f"{{R-{number}}}", f"{{S-{station}}}", (x + dx, y + dy)))
+    if moved_room is not None:
+        oid, guid, station, _ = rooms[moved_room[0]]
+        rooms[moved_room[0]] = (oid, guid, station, moved_room[1])
+    accessor.add_layer("main.StationDetail", FIELDS, details, POLYGON)
+    accessor.add_layer("main.Room", FIELDS, rooms, POINT)
+    accessor.save(path)
+
+
+async def request(port, target, method="GET"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), json.loads(body)
+
+
+class TestCheckService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "workspace.json")
+        write_workspace(self.path)
+        self.config = network_config(
+            self.path,
+            accessor="memory",
+            index_cache=False,
+            edit_date_field=None,
+            check_rooms_relationships=False,
+            check_stations_relationships=False,
+        )
+        self.service = CheckService(self.config, poll_seconds=0)
+        await self.service.start("127.0.0.1", 0)
+
+    async def asyncTearDown(self):
+        await self.service.stop()
+        self.directory.cleanup()
+
+    def full_check(self):
+        return [list(entry) for entry in LogicChecker(self.config, InMemoryAccessor()).check_room_to_station_relationships()]
+
+    async def test_check_station(self):
+        """Test a station check returns the invalid rooms related to the station or inside its StationDetail"""
+        full = self.full_check()
+        accessor = InMemoryAccessor()
+        accessor.load(self.path)
+        related = {guid for guid, station in accessor.search_cursor("main.Room", ["GLOBALID", "STATION_GUID"])
+                   if station == "{S-4}"}
+        candidates = related | {entry[0] for entry in full if entry[2] == "{S-4}"}
+        expected = [entry for entry in full if entry[0] in candidates]
+        self.assertTrue(expected)
+
+        status, body = await request(self.service.port, "/check/station?guid=%7BS-4%7D")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["invalid"], expected)
+
+    async def test_check_bbox(self):
+        """Test a bbox check returns the invalid rooms inside the box, in the order of the full check"""
+        status, body = await request(self.service.port, "/check/bbox?min_x=0&min_y=0&max_x=10&max_y=30")
+        self.assertEqual(status, 200)
+        accessor = InMemoryAccessor()
+        accessor.load(self.path)
+        rooms_in_box = {guid for guid, (x, y) in accessor.search_cursor("main.Room", ["GLOBALID", "SHAPE"])
+                        if 0 <= x <= 10 and 0 <= y <= 30}
+        self.assertEqual(body["invalid"], [entry for entry in self.full_check() if entry[0] in rooms_in_box])
+
+    async def test_report_and_errors(self):
+        """Test the full report and the status of invalid requests"""
+        status, body = await request(self.service.port, "/report")
+        self.assertEqual((status, body["invalid"]["room_to_station"]), (200, self.full_check()))
+        self.assertEqual((await request(self.service.port, "/unknown"))[0], 404)
+        self.assertEqual((await request(self.service.port, "/check/bbox?min_x=a"))[0], 400)
+        self.assertEqual((await request(self.service.port, "/check/station"))[0], 400)
+        self.assertEqual((await request(self.service.port, "/report", method="POST"))[0], 405)
+
+    async def test_report_on_the_loaded_layers(self):
+        """Test /report runs every enabled check on the layers held in memory, without reading or indexing them again"""
+        path = os.path.join(self.directory.name, "network.json")
+        generate_network(NetworkSpec(stations=9, rooms_per_station=10, error_rate=0.2)).save_json(path)
+        config = SimpleNamespace(**vars(self.config))
+        config.database_path = path
+        config.check_rooms_relationships = config.check_stations_relationships = True
+        service = CheckService(config, poll_seconds=0)
+        await service.start("127.0.0.1", 0)
+        try:
+            with patch.object(InMemoryAccessor, "geometry_cursor", side_effect=AssertionError("layer read")), \
+                    patch.object(PolygonIndex, "__init__", side_effect=AssertionError("index built")):
+                status, body = await request(service.port, "/report")
+        finally:
+            await service.stop()
+        expected = LogicChecker(config, InMemoryAccessor()).check_all_relationships(True, True)
+        self.assertEqual(status, 200)
+        self.assertEqual(body["invalid"], {key: [list(entry) for entry in entries] for key, entries in expected.items()})
+        self.assertEqual(len(body["invalid"]), 3)
+
+    async def test_reload_when_the_workspace_changes(self):
+        """Test the layers are read again when the workspace file changes"""
+        self.assertFalse(await self.service.reload_if_changed())
+        write_workspace(self.path, moved_room=(1, (25.0, 25.0)))  # {R-1} of {S-0} moved into {S-8}
+        mtime = os.path.getmtime(self.path) + 10
+        os.utime(self.path, (mtime, mtime))
+
+        self.assertTrue(await self.service.reload_if_changed())
+        _, body = await request(self.service.port, "/check/station?guid=%7BS-8%7D")
+        self.assertIn(["{R-1}", "{S-0}", "{S-8}"], body["invalid"])
+
+    async def test_health_is_answered_during_a_check(self):
+        """Test the event loop is not blocked while a check runs on the worker thread"""
+        started = threading.Event()
+        original = CheckService.check_bbox
+
+        def slow_check(service, *args):
+            started.set()
+            time.sleep(0.5)
+            return original(service, *args)
+
+        with patch.object(CheckService, "check_bbox", slow_check):
+            check = asyncio.create_task(request(self.service.port, "/check/bbox?min_x=0&min_y=0&max_x=1&max_y=1"))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            start = time.perf_counter()
+            status, body = await request(self.service.port, "/health")
+            self.assertLess(time.perf_counter() - start, 0.4)
+            self.assertEqual((status, body["rooms"]), (200, 36))
+            self.assertEqual((await check)[0], 200)
+
+    @unittest.skipIf(sys.platform == "win32", "Unix sockets are not available")
+    async def test_unix_socket(self):
+        """Test the service also answers on a Unix socket"""
+        socket_path = os.path.join(self.directory.name, "service.sock")
+        service = CheckService(self.config, poll_seconds=0)
+        await service.start(socket_path=socket_path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(b"GET /health HTTP/1.1\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            self.assertIn(b'"status": "ok"', response)
+        finally:
+            await service.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import random
+import unittest
+from spatial.geometry import point_in_polygon, point_on_boundary, polygon_area, polygon_bbox, polygon_perimeter
+from spatial.join import point_in_polygon_join
+from spatial.strtree import STRtree
+from spatial.sweep import intersecting_pairs, segments_cross, segments_intersect
+from tests.geometry_helpers import square
+
+
+class TestPointInPolygon(unittest.TestCase):
+
+    def test_inside_and_outside(self):
+        """Test points clearly inside and outside a rectangle"""
+        polygon = square(0, 0, 10)
+        self.assertTrue(point_in_polygon(5, 5, polygon))
+        self.assertFalse(point_in_polygon(15, 5, polygon))
+        self.assertFalse(point_in_polygon(5, -1, polygon))
+
+    def test_boundary_counts_as_inside(self):
+        """Test points on edges and vertices are inside, as with arcpy's Intersect"""
+        polygon = square(0, 0, 10)
+        self.assertTrue(point_in_polygon(0, 5, polygon))
+        self.assertTrue(point_in_polygon(10, 10, polygon))
+        self.assertTrue(point_in_polygon(5, 0, polygon))
+
+    def test_hole(self):
+        """Test a point inside a hole is outside, a point on the hole boundary is inside"""
+        polygon = square(0, 0, 10) + square(4, 4, 2)
+        self.assertFalse(point_in_polygon(5, 5, polygon))
+        self.assertTrue(point_in_polygon(4, 5, polygon))
+        self.assertTrue(point_in_polygon(1, 1, polygon))
+
+    def test_concave_polygon(self):
+        """Test a point in the notch of an L-shaped polygon"""
+        polygon = [[(0, 0), (0, 10), (5, 10), (5, 5), (10, 5), (10, 0)]]
+        self.assertTrue(point_in_polygon(2, 8, polygon))
+        self.assertFalse(point_in_polygon(8, 8, polygon))
+
+    def test_polygon_bbox(self):
+        """Test the envelope covers all rings"""
+        self.assertEqual(polygon_bbox(square(1, 2, 3)), (1, 2, 4, 5))
+
+    def test_area_and_perimeter(self):
+        """Test the area subtracts the holes and the perimeter counts every ring"""
+        hole = [list(reversed(square(1, 1, 2)[0]))]
+        self.assertEqual(polygon_area(square(0, 0, 4)), 16)
+        self.assertEqual(polygon_area(square(0, 0, 4) + hole), 12)
+        self.assertEqual(polygon_perimeter(square(0, 0, 4) + hole), 24)
+        self.assertTrue(point_on_boundary(4, 2, square(0, 0, 4)))
+        self.assertFalse(point_on_boundary(2, 2, square(0, 0, 4)))
+
+
+class TestSTRtree(unittest.TestCase):
+
+    def test_empty_tree(self):
+        """Test querying an empty tree"""
+        self.assertEqual(list(STRtree([]).query(0, 0, 1, 1)), [])
+
+    def test_query_matches_brute_force(self):
+        """Test the tree returns exactly the boxes a linear scan finds"""
+        rng = random.Random(42)
+        boxes = []
+        for _ in range(1000):
+            x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+            boxes.append((x, y, x + rng.uniform(0, 50), y + rng.uniform(0, 50)))
+        tree = STRtree(boxes, node_capacity=8)
+
+        for _ in range(100):
+            x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+            query = (x, y, x + 30, y + 30)
+            expected = [i for i, b in enumerate(boxes)
+                        if b[0] <= query[2] and b[2] >= query[0] and b[1] <= query[3] and b[3] >= query[1]]
+            self.assertEqual(sorted(tree.query(*query)), expected)
+
+    def test_touching_box_is_returned(self):
+        """Test a point on the edge of a box is a candidate"""
+        tree = STRtree([(0, 0, 10, 10), (20, 20, 30, 30)])
+        self.assertEqual(list(tree.query_point(10, 5)), [0])
+
+    def test_invalid_capacity(self):
+        """Test node capacity below 2 is rejected"""
+        with self.assertRaises(ValueError):
+            STRtree([(0, 0, 1, 1)], node_capacity=1)
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_intersecting_pairs_match_brute_force(self):
+        """Test the sweep line finds the same intersecting segments as comparing every pair"""
+        rng = random.Random(3)
+        segments = [((rng.uniform(0, 50), rng.uniform(0, 50)), (rng.uniform(0, 50), rng.uniform(0, 50)))
+                    for _ in range(60)]
+        segments.append(((0.0, 0.0), (10.0, 0.0)))
+        segments.append(((10.0, 0.0), (10.0, 10.0)))  # touches the previous segment at its end point
+        brute_force = set()
+        for i in range(len(segments)):
+            for j in range(i + 1, len(segments)):
+                if segments_intersect(segments[i], segments[j]):
+                    brute_force.add((i, j))
+        self.assertEqual(set(intersecting_pairs(segments)), brute_force)
+        self.assertIn((len(segments) - 2, len(segments) - 1), brute_force)
+
+    def test_cross(self):
+        """Test only segments crossing inside both of them cross"""
+        self.assertTrue(segments_cross(((0, 0), (2, 2)), ((0, 2), (2, 0))))
+        self.assertFalse(segments_cross(((0, 0), (2, 0)), ((2, 0), (2, 2))))
+        self.assertFalse(segments_cross(((0, 0), (2, 0)), ((1, 0), (3, 0))))
+
+
+class TestPointInPolygonJoin(unittest.TestCase):
+
+    def test_join(self):
+        """Test every point is paired with the polygons containing it, including shared edges"""
+        polygons = [square(0, 0, 10), square(10, 0, 10), square(100, 100, 1)]
+        points = [(5, 5), (10, 5), (50, 50), (15, 1)]
+
+        pairs = list(point_in_polygon_join(points, polygons))
+
+        self.assertEqual(pairs, [(0, 0), (1, 0), (1, 1), (3, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
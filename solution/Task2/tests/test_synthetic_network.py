@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from benchmarks.run_suite import compare, run_case
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+
+CONFIG = network_config()
+
+
+def run_checks(checker):
+    return {
+        ROOM_TO_STATION: len(checker.check_room_to_station_relationships()),
+        ROOM_TO_ROOMDETAIL: len(checker.check_room_to_roomdetail_relationships()),
+        STATION_TO_STATIONDETAIL: len(checker.check_station_to_stationdetail_relationships()),
+    }
+
+
+class TestSyntheticNetwork(unittest.TestCase):
+
+    def test_layer_sizes(self):
+        """Test the network has one detail per station and per room"""
+        network = generate_network(NetworkSpec(stations=12, rooms_per_station=30, nested_rate=0.5))
+        layers = network.layers
+        self.assertEqual(len(layers["main.Room"]), 360)
+        self.assertEqual(len(layers["main.RoomDetail"]), 360)
+        self.assertEqual(len(layers["main.Station"]), len(layers["main.StationDetail"]))
+        self.assertGreater(len(layers["main.Station"]), 12)
+
+    def test_expected_invalid_matches_checks(self):
+        """Test the checks find exactly the injected errors, with overlapping and nested borders"""
+        for spec in (NetworkSpec(stations=20, rooms_per_station=50, error_rate=0.05),
+                     NetworkSpec(stations=20, rooms_per_station=50, error_rate=0.1, overlap_rate=0.5,
+                                 nested_rate=0.5, vertices_per_side=3, seed=7)):
+            with self.subTest(spec=spec):
+                network = generate_network(spec)
+                checker = LogicChecker(CONFIG, network.to_memory_accessor())
+                self.assertEqual(run_checks(checker), network.expected_invalid)
+                self.assertGreater(sum(network.expected_invalid.values()), 0)
+
+    def test_same_seed_same_network(self):
+        """Test networks are reproducible"""
+        spec = NetworkSpec(stations=5, rooms_per_station=5, nested_rate=0.5)
+        self.assertEqual(generate_network(spec).layers, generate_network(spec).layers)
+
+    def test_mobile_geodatabase(self):
+        """Test a network written as a mobile geodatabase gives the same results"""
+        network = generate_network(NetworkSpec(stations=9, rooms_per_station=40, error_rate=0.1, nested_rate=0.3))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network.geodatabase")
+            network.save_mobile_geodatabase(path)
+            accessor = MobileGeodatabaseAccessor()
+            checker = LogicChecker(network_config(path), accessor)
+            try:
+                self.assertEqual(run_checks(checker), network.expected_invalid)
+            finally:
+                accessor.connection.close()
+
+    def test_run_case(self):
+        """Test a benchmark case reports a correct result and the accessor calls"""
+        result = run_case(500, ROOM_TO_STATION)
+        self.assertTrue(result["correct"])
+        self.assertEqual(result["accessor_calls"]["intersect"]["calls"], 1)
+        self.assertIn("wall_seconds", result)
+        self.assertEqual(len(compare({"results": [result]}, {"results": [result]})), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
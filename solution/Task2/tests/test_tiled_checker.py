@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from geo_access.gdb_geometry import decode_envelope, encode_shape_buffer
+from geo_access.mobile_gdb_accessor import MobileGeodatabaseAccessor
+from logic_checker import LogicChecker
+from tiled_checker import FEATURE_BYTES, TiledChecker, Tile
+
+CONFIG = network_config()
+# Overlapping and nested StationDetails, so that polygons cross the tile edges
+SPEC = NetworkSpec(stations=16, rooms_per_station=40, error_rate=0.1, overlap_rate=0.5, nested_rate=0.3)
+
+
+def sorted_results(results):
+    return {key: sorted(entries) for key, entries in results.items()}
+
+
+class TestTiledChecker(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.network = generate_network(SPEC)
+        checker = LogicChecker(CONFIG, cls.network.to_memory_accessor())
+        cls.expected = sorted_results(checker.check_all_relationships(True, True))
+
+    def test_every_point_has_one_tile(self):
+        """Test the points on the tile edges and on the extent edges are owned by exactly one tile"""
+        tiles = [child for tile in Tile(0.0, 0.0, 4.0, 4.0).split() for child in tile.split()]
+        for point in [(x, y) for x in range(5) for y in range(5)] + [(0.5, 3.9), (2.0, 1.5)]:
+            with self.subTest(point=point):
+                self.assertEqual(sum(tile.owns(point) for tile in tiles), 1)
+
+    def test_same_result_as_the_combined_check(self):
+        """Test the tiled checks find every invalid relationship exactly once, whatever the budget"""
+        for memory_mb in (1000, 0.2):
+            with self.subTest(memory_mb=memory_mb):
+                checker = TiledChecker(LogicChecker(CONFIG, self.network.to_memory_accessor()), memory_mb)
+                self.assertEqual(sorted_results(checker.check_all_relationships(True, True)), self.expected)
+                self.assertEqual(checker.tile_count > 1, memory_mb < 1000)
+
+    def test_uses_the_given_checker(self):
+        """Test the tiled checks run with the checker they are given, without opening its workspace again"""
+        logic_checker = LogicChecker(CONFIG, self.network.to_memory_accessor())
+        with patch.object(logic_checker.accessor, "set_workspace") as set_workspace:
+            checker = TiledChecker(logic_checker, 1000)
+            with patch.object(logic_checker, "check_features", wraps=logic_checker.check_features) as check_features:
+                checker.check_all_relationships(True, True)
+        set_workspace.assert_not_called()
+        self.assertEqual(check_features.call_count, checker.tile_count)
+
+    def test_tiles_stay_under_the_budget(self):
+        """Test no checked tile holds more features than the budget allows"""
+        memory_mb = 0.05
+        checker = TiledChecker(LogicChecker(CONFIG, self.network.to_memory_accessor()), memory_mb)
+        with patch.object(checker.checker, "check_features", wraps=checker.checker.check_features) as check_features:
+            checker.check_all_relationships(True, True)
+        self.assertGreater(check_features.call_count, 4)
+        for call in check_features.call_args_list:
+            feature_count = sum(len(rows) for rows in call.args if rows is not None)
+            self.assertLessEqual(feature_count * FEATURE_BYTES, memory_mb * 2 ** 20)
+
+    def test_mobile_geodatabase(self):
+        """Test the mobile geodatabase filters the tiles with its envelope index and gives the same result"""
+        polygon = [[(1.0, 2.0), (5.0, 2.0), (5.0, 7.0), (1.0, 2.0)]]
+        self.assertEqual(decode_envelope(encode_shape_buffer(polygon)), (1.0, 2.0, 5.0, 7.0))
+        self.assertEqual(decode_envelope(encode_shape_buffer((3.0, 4.0))), (3.0, 4.0, 3.0, 4.0))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network.geodatabase")
+            self.network.save_mobile_geodatabase(path)
+            accessor = MobileGeodatabaseAccessor()
+            try:
+                checker = TiledChecker(LogicChecker(network_config(path), accessor), 0.1)
+                bbox = (0.0, 0.0, 60.0, 60.0)
+                memory = self.network.to_memory_accessor()
+                self.assertEqual(list(accessor.geometry_cursor("main.StationDetail", ["OBJECTID"], bbox=bbox)),
+                                 list(memory.geometry_cursor("main.StationDetail", ["OBJECTID"], bbox=bbox)))
+                self.assertEqual(accessor.extent("main.Room"), memory.extent("main.Room"))
+                self.assertEqual(sorted_results(checker.check_all_relationships(True, True)), self.expected)
+                self.assertGreater(checker.tile_count, 1)
+            finally:
+                accessor.connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from benchmarks.synthetic_network import NetworkSpec, generate_network, network_config
+from geo_access.memory_accessor import InMemoryAccessor, POINT, POLYGON
+from logic_checker import LogicChecker, ROOM_TO_STATION
+from spatial.geometry import point_in_polygon, polygon_area
+from tests.geometry_helpers import square
+from topology_checker import (INVALID_RING, MULTIPLE_STATIONS, OVERLAP, SELF_INTERSECTION, SLIVER, TopologyChecker,
+                              choose_station_detail)
+
+CONFIG = network_config(sliver_ratio=0.05)
+
+
+def build_accessor():
+    accessor = InMemoryAccessor()
+    accessor.add_layer("main.StationDetail", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], [
+        (1, "{A}", "{STATION-A}", square(0, 0, 10)),
+        (2, "{B}", "{STATION-B}", square(10, 0, 10)),  # shares a border with A
+        (3, "{C}", "{STATION-C}", square(2, 2, 4)),  # nested in A
+        (4, "{D}", "{STATION-D}", square(10, 0, 10)),  # duplicate of B
+        (5, "{E}", "{STATION-E}", [[(30, 0), (40, 10), (40, 0), (30, 10), (30, 0)]]),  # bow tie
+        (6, "{F}", "{STATION-F}", [[(50, 0), (50, 1), (150, 1), (150, 0), (50, 0)]]),  # 1 x 100
+        (7, "{G}", "{STATION-G}", [[(60, 60), (61, 61), (60, 60)]]),
+    ], POLYGON)
+    accessor.add_layer("main.RoomDetail", ["OBJECTID", "GLOBALID", "ROOM_GUID", "SHAPE"], [
+        (1, "{RD1}", "{R1}", square(2.5, 2.5, 1)),
+    ], POLYGON)
+    accessor.add_layer("main.Room", ["OBJECTID", "GLOBALID", "STATION_GUID", "SHAPE"], [
+        (1, "{R1}", "{STATION-C}", (3.0, 3.0)),  # in A and C
+        (2, "{R2}", "{STATION-A}", (5.0, 8.0)),  # in A only
+        (3, "{R3}", "{STATION-B}", (15.0, 5.0)),  # in B and D
+        (4, "{R4}", "{STATION-A}", (10.0, 5.0)),  # on the border of A, B and D
+    ], POINT)
+    return accessor
+
+
+class TestTopologyChecker(unittest.TestCase):
+
+    def test_issues(self):
+        """Test every kind of issue is found once, and shared borders are not overlaps"""
+        issues, station_choices = TopologyChecker(CONFIG, build_accessor()).check_all_topology()
+
+        self.assertCountEqual(issues, [
+            ("main.StationDetail", "{A}", OVERLAP, "{C}"),
+            ("main.StationDetail", "{B}", OVERLAP, "{D}"),
+            ("main.StationDetail", "{E}", SELF_INTERSECTION, None),
+            ("main.StationDetail", "{E}", SLIVER, None),  # the two triangles of a bow tie cancel out
+            ("main.StationDetail", "{F}", SLIVER, None),
+            ("main.StationDetail", "{G}", INVALID_RING, None),
+            ("main.Room", "{R1}", MULTIPLE_STATIONS, "{C};{A}"),
+            ("main.Room", "{R3}", MULTIPLE_STATIONS, "{B};{D}"),
+            ("main.Room", "{R4}", MULTIPLE_STATIONS, "{A};{B};{D}"),
+        ])
+        self.assertEqual(station_choices, {1: "{STATION-C}", 3: "{STATION-B}", 4: "{STATION-A}"})
+
+    def test_rule(self):
+        """Test the smallest StationDetail wins, then the lowest GLOBALID"""
+        self.assertEqual(choose_station_detail([(100.0, "{A}", "a"), (16.0, "{C}", "c")]), "c")
+        self.assertEqual(choose_station_detail([(100.0, "{D}", "d"), (100.0, "{B}", "b")]), "b")
+
+    def test_checks_report_one_station_per_room(self):
+        """Test the intersect and the combined checks compare a room in nested stations only with the innermost"""
+        network = generate_network(NetworkSpec(stations=16, rooms_per_station=60, error_rate=0.1, nested_rate=0.5))
+        accessor = network.to_memory_accessor()
+        issues, station_choices = TopologyChecker(CONFIG, accessor).check_all_topology()
+        details = network.layers["main.StationDetail"]
+        expected = []
+        for _, room_guid, related, (x, y) in network.layers["main.Room"]:
+            containing = [detail for detail in details if point_in_polygon(x, y, detail[3])]
+            chosen = choose_station_detail((polygon_area(detail[3]), detail[1], detail[2]) for detail in containing)
+            if chosen != related:
+                expected.append((room_guid, related, chosen))
+        self.assertEqual(len(station_choices), sum(1 for issue in issues if issue[2] == MULTIPLE_STATIONS))
+        self.assertGreater(len(station_choices), 0)
+        self.assertLess(len(expected), network.expected_invalid[ROOM_TO_STATION])
+
+        checker = LogicChecker(CONFIG, accessor)
+        checker.station_choices = station_choices
+        self.assertCountEqual(checker.check_room_to_station_relationships(), expected)
+        self.assertCountEqual(checker.check_all_relationships()[ROOM_TO_STATION], expected)
+        first_rooms = {room[1] for room in network.layers["main.Room"][:199]}
+        subset = checker.check_room_to_station_subset(room_oids=range(1, 200))
+        self.assertCountEqual([entry for _, _, entry in subset], [entry for entry in expected if entry[0] in first_rooms])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from logic_checker import LogicChecker, ROOM_TO_ROOMDETAIL, ROOM_TO_STATION, STATION_TO_STATIONDETAIL
+from spatial.geometry import BBox, bbox_union
+
+# Estimated memory of the features of a tile, measured with tracemalloc on CPython 3.11: a geometry_cursor row
+# with its GUIDs (~350 bytes) and every polygon vertex, in its ring and in the polygon index (~220 bytes)
+FEATURE_BYTES = 512
+VERTEX_BYTES = 224
+# A tile is not split further than this, e.g. when more points than the budget allows share the same coordinates
+MAX_TILE_DEPTH = 16
+
+
+@dataclass(frozen=True)
+class Tile:
+    """
+    A cell of the quadtree over the extent of the point layers. A tile owns the points with
+    min_x <= x < max_x and min_y <= y < max_y, and also the points on its max edges when they are the edges of
+    the whole extent, so every point belongs to exactly one tile.
+    """
+    min_x: float
+    min_y: float
+    max_x: float
+    max_y: float
+    last_column: bool = True
+    last_row: bool = True
+    depth: int = 0
+
+    @property
+    def bbox(self) -> BBox:
+        return self.min_x, self.min_y, self.max_x, self.max_y
+
+    def owns(self, point: Tuple[float, float]) -> bool:
+        x, y = point
+        return (self.min_x <= x and (x < self.max_x or (self.last_column and x == self.max_x))
+                and self.min_y <= y and (y < self.max_y or (self.last_row and y == self.max_y)))
+
+    def split(self) -> List["Tile"]:
+        """The four quadrants, in the order lower left, lower right, upper left, upper right"""
+        mid_x = (self.min_x + self.max_x) / 2
+        mid_y = (self.min_y + self.max_y) / 2
+        depth = self.depth + 1
+        return [
+            Tile(self.min_x, self.min_y, mid_x, mid_y, False, False, depth),
+            Tile(mid_x, self.min_y, self.max_x, mid_y, self.last_column, False, depth),
+            Tile(self.min_x, mid_y, mid_x, self.max_y, False, self.last_row, depth),
+            Tile(mid_x, mid_y, self.max_x, self.max_y, self.last_column, self.last_row, depth),
+        ]
+
+
+class TiledChecker:
+    """
+    Out-of-core version of LogicChecker.check_all_relationships for workspaces that do not fit in memory.
+    The extent of the Room (and Station) points is split into a quadtree of tiles. Every tile reads only its
+    own points and the polygons whose envelope intersects it, with bbox filtered geometry_cursor calls, and runs the
+    checks of LogicChecker.check_features on them. A tile whose features would exceed the memory budget is split
+    into four and read again, so only one tile's features are held at a time.
+
+    A polygon that crosses tile edges is read by every tile it touches, but a (point, polygon) pair is checked only
+    by the tile that owns the point (see Tile.owns), so every invalid relationship is reported exactly once.
+    """
+
+    def __init__(self, checker: LogicChecker, memory_mb: float):
+        """
+        Args:
+            checker: the checker of the workspace, with its station_choices when the topology pre-pass ran
+            memory_mb: the memory budget of the features of a tile
+        """
+        self.checker = checker
+        self.config = checker.config
+        self.accessor = checker.accessor
+        self.max_bytes = memory_mb * 2 ** 20
+        self.tile_count = 0
+
+    def check_all_relationships(self, check_rooms: bool = False, check_stations: bool = False) -> Dict[str, List[Tuple]]:
+        """
+        Args:
+            check_rooms: also check the Room-RoomDetail relationships
+            check_stations: also check the Station-StationDetail relationships
+
+        Returns:
+            The invalid entries of every enabled check, in the format of LogicChecker.check_all_relationships.
+            The entries are in tile order instead of layer order
+        """
+        results = {ROOM_TO_STATION: []}
+        if check_rooms:
+            results[ROOM_TO_ROOMDETAIL] = []
+        if check_stations:
+            results[STATION_TO_STATIONDETAIL] = []
+
+        extent = self.point_extent(check_stations)
+        if extent is None:
+            return results
+        for tile_results in self.iter_tiles(Tile(*extent), check_rooms, check_stations):
+            for key, entries in tile_results.items():
+                results[key].extend(entries)
+        logging.info(f"Checked {self.tile_count} tiles with a budget of {self.max_bytes / 2 ** 20:g} MB per tile")
+        return results
+
+    def point_extent(self, check_stations: bool) -> Optional[BBox]:
+        """The extent of the points to check: the rooms and, with the station check, the stations"""
+        extent = self.accessor.extent(self.config.room_layer_name)
+        if check_stations:
+            station_extent = self.accessor.extent(self.config.station_layer_name)
+            if extent is None or station_extent is None:
+                extent = extent or station_extent
+            else:
+                extent = bbox_union(extent, station_extent)
+        return extent
+
+    def iter_tiles(self, root: Tile, check_rooms: bool, check_stations: bool) -> Iterator[Dict[str, List[Tuple]]]:
+        """The results of every tile of the quadtree under `root`, in depth-first order"""
+        pending = [root]
+        while pending:
+            tile = pending.pop()
+            features = self.read_tile(tile, check_rooms, check_stations)
+            if features is None:
+                logging.debug(f"Tile {tile.bbox} exceeds the memory budget, splitting it")
+                pending.extend(reversed(tile.split()))
+                continue
+            self.tile_count += 1
+            yield self.checker.check_features(*features)
+
+    def read_tile(self, tile: Tile, check_rooms: bool, check_stations: bool) -> Optional[Tuple]:
+        """
+        The features of a tile in the argument order of LogicChecker.check_features: the points the tile owns and
+        the polygons that intersect it. None if they exceed the memory budget and the tile is worth splitting:
+        it owns more than one point and is above MAX_TILE_DEPTH
+        """
+        # The points are read first: a tile that owns a single point is not split however large its polygons are
+        layers = [(self.config.room_layer_name, ["GLOBALID", "STATION_GUID"], True)]
+        if check_stations:
+            layers.append((self.config.station_layer_name, ["GLOBALID"], True))
+        layers.append((self.config.station_detail_layer_name, ["GLOBALID", "STATION_GUID"], False))
+        if check_rooms:
+            layers.append((self.config.room_detail_layer_name, ["GLOBALID", "ROOM_GUID"], False))
+
+        features = {}
+        used = 0
+        point_count = 0
+        for layer, fields, points in layers:
+            rows = []
+            for row in self.accessor.geometry_cursor(layer, fields, bbox=tile.bbox):
+                if row[0] is None or (points and not tile.owns(row[0])):
+                    continue
+                used += estimated_bytes(row[0])
+                if used > self.max_bytes and point_count + len(rows) > 1 and tile.depth < MAX_TILE_DEPTH:
+                    return None
+                rows.append(row)
+            features[layer] = rows
+            if points:
+                point_count += len(rows)
+        if used > self.max_bytes:
+            logging.warning(f"Tile {tile.bbox} uses about {used / 2 ** 20:.1f} MB, over the memory budget, "
+                            f"and cannot be split further")
+        logging.debug(f"Read tile {tile.bbox}: {point_count} points, {used / 2 ** 20:.1f} MB")
+
+        return (features[self.config.room_layer_name], features[self.config.station_detail_layer_name],
+                features.get(self.config.room_detail_layer_name) if check_rooms else None,
+                features.get(self.config.station_layer_name) if check_stations else None)
+
+
+def estimated_bytes(geometry) -> int:
+    """The estimated memory of a feature read for a tile: its row and, for polygons, its vertices"""
+    if isinstance(geometry[0], (int, float)):
+        return FEATURE_BYTES
+    return FEATURE_BYTES + VERTEX_BYTES * sum(len(ring) for ring in geometry)
@@ -0,0 +1,224 @@
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+from config import Config
+from geo_access.geo_accessor import GeoDataAccessor
+from spatial.geometry import Ring, point_in_polygon, point_on_boundary, polygon_area, polygon_bbox, polygon_perimeter
+from spatial.strtree import STRtree
+from spatial.sweep import Segment, intersecting_pairs, orientation, segments_cross
+
+INVALID_RING = "INVALID_RING"
+SELF_INTERSECTION = "SELF_INTERSECTION"
+SLIVER = "SLIVER"
+OVERLAP = "OVERLAP"
+MULTIPLE_STATIONS = "MULTIPLE_STATIONS"
+# Report name and fields of the topology issues
+TOPOLOGY_REPORT = ("topology_issues", ["Layer", "GLOBALID", "Issue", "Related_GLOBALID"])
+# Polygons whose thinness 4*pi*area/perimeter^2 (1 for a circle, ~0.03 for a 1x100 rectangle) is below this are slivers
+DEFAULT_SLIVER_RATIO = 0.05
+
+T = TypeVar("T")
+
+
+def choose_station_detail(candidates: Iterable[Tuple[float, str, T]]) -> T:
+    """
+    The deterministic rule for a room inside several StationDetails: the smallest one wins (the innermost of nested
+    StationDetails), then the one with the lowest GLOBALID.
+    Args:
+        candidates: (area, GLOBALID, value) of every StationDetail containing the room
+
+    Returns: the value of the chosen StationDetail
+    """
+    return min(candidates, key=lambda candidate: candidate[:2])[2]
+
+
+class TopologyChecker:
+    """
+    Pre-validation of the polygon layers, before the relationship checks. It finds:
+        - INVALID_RING: rings with fewer than 3 distinct vertices
+        - SELF_INTERSECTION: polygons whose edges cross or touch each other (rings included), found with a sweep line
+        - SLIVER: polygons thinner than `sliver_ratio`
+        - OVERLAP: pairs of polygons of the same layer whose interiors overlap. Only the pairs with intersecting
+          envelopes (found with an STR tree) are compared
+        - MULTIPLE_STATIONS: rooms inside several StationDetails, which the intersect reports several times.
+          Only the rooms in the envelope intersections of neighbouring StationDetails are tested
+    For every room inside several StationDetails, it also chooses one with choose_station_detail. LogicChecker
+    compares those rooms only with the chosen station (LogicChecker.station_choices).
+    """
+
+    def __init__(self, config: Config, accessor: GeoDataAccessor):
+        self.config = config
+        self.accessor = accessor
+        self.sliver_ratio = getattr(config, "sliver_ratio", DEFAULT_SLIVER_RATIO)
+
+    def check_all_topology(self) -> Tuple[List[Tuple], Dict[int, str]]:
+        """
+        Returns:
+            The issues, as (layer, GLOBALID, issue, related GLOBALID) rows. The related GLOBALID is the other
+            polygon of an OVERLAP and, for MULTIPLE_STATIONS, the ";" separated GLOBALIDs of the StationDetails
+            containing the room, the chosen one first.
+            The STATION_GUID of the chosen StationDetail of every room inside several StationDetails, keyed by the
+            room OBJECTID
+        """
+        station_details = self.read_polygons(self.config.station_detail_layer_name, ["GLOBALID", "STATION_GUID"])
+        issues = self.check_polygons(self.config.station_detail_layer_name, station_details)
+        room_details = self.read_polygons(self.config.room_detail_layer_name, ["GLOBALID"])
+        issues.extend(self.check_polygons(self.config.room_detail_layer_name, room_details))
+        room_issues, station_choices = self.check_rooms(station_details)
+        issues.extend(room_issues)
+        logging.info(f"Found {len(issues)} topology issues and {len(station_choices)} rooms in several stations")
+        return issues, station_choices
+
+    def read_polygons(self, layer: str, fields: List[str]) -> List[Tuple]:
+        polygons = [row for row in self.accessor.geometry_cursor(layer, fields) if row[0]]
+        logging.debug(f"Read {len(polygons)} polygons from layer '{layer}'")
+        return polygons
+
+    def check_polygons(self, layer: str, polygons: Sequence[Tuple]) -> List[Tuple]:
+        """The issues of one polygon layer. `polygons` are geometry_cursor rows (rings, GLOBALID, ...)"""
+        issues = []
+        valid = []
+        for position, (rings, guid, *_) in enumerate(polygons):
+            if any(len(_distinct_vertices(ring)) < 3 for ring in rings):
+                issues.append((layer, guid, INVALID_RING, None))
+                continue
+            valid.append(position)
+            if self.self_intersects(rings):
+                issues.append((layer, guid, SELF_INTERSECTION, None))
+            perimeter = polygon_perimeter(rings)
+            if 4 * math.pi * polygon_area(rings) < self.sliver_ratio * perimeter * perimeter:
+                issues.append((layer, guid, SLIVER, None))
+
+        boxes = [polygon_bbox(polygons[position][0]) for position in valid]
+        tree = STRtree(boxes)
+        for i, box in enumerate(boxes):
+            for j in tree.query(*box):
+                if j > i and interiors_overlap(polygons[valid[i]][0], polygons[valid[j]][0]):
+                    issues.append((layer, polygons[valid[i]][1], OVERLAP, polygons[valid[j]][1]))
+        logging.debug(f"Found {len(issues)} topology issues in layer '{layer}'")
+        return issues
+
+    def check_rooms(self, station_details: Sequence[Tuple]) -> Tuple[List[Tuple], Dict[int, str]]:
+        """
+        The rooms inside several StationDetails, read with one pass over the Room layer.
+        Returns: the MULTIPLE_STATIONS issues and the chosen STATION_GUID by room OBJECTID (see check_all_topology)
+        """
+        boxes = [polygon_bbox(detail[0]) for detail in station_details]
+        detail_tree = STRtree(boxes)
+        # A room can only be inside two StationDetails where their envelopes intersect
+        regions = []
+        for i, box in enumerate(boxes):
+            for j in detail_tree.query(*box):
+                if j > i:
+                    other = boxes[j]
+                    regions.append((max(box[0], other[0]), max(box[1], other[1]),
+                                    min(box[2], other[2]), min(box[3], other[3])))
+        issues = []
+        station_choices = {}
+        if not regions:
+            return issues, station_choices
+        region_tree = STRtree(regions)
+        areas = {}
+
+        for point, oid, guid in self.accessor.geometry_cursor(self.config.room_layer_name, ["OBJECTID", "GLOBALID"]):
+            if point is None or next(region_tree.query_point(*point), None) is None:
+                continue
+            containing = [position for position in detail_tree.query_point(*point)
+                          if point_in_polygon(point[0], point[1], station_details[position][0])]
+            if len(containing) < 2:
+                continue
+            for position in containing:
+                if position not in areas:
+                    areas[position] = polygon_area(station_details[position][0])
+            chosen = choose_station_detail((areas[position], station_details[position][1], position)
+                                           for position in containing)
+            station_choices[oid] = station_details[chosen][2]
+            related = [station_details[chosen][1]] + sorted(station_details[position][1] for position in containing
+                                                            if position != chosen)
+            issues.append((self.config.room_layer_name, guid, MULTIPLE_STATIONS, ";".join(related)))
+        return issues, station_choices
+
+    @staticmethod
+    def self_intersects(rings: Sequence[Ring]) -> bool:
+        """True if two edges of the polygon that are not consecutive in a ring share a point, or consecutive edges fold back"""
+        segments, rings_of_segments = _segments(rings)
+        for i, j in intersecting_pairs(segments):
+            ring_i, index_i, size = rings_of_segments[i]
+            ring_j, index_j, _ = rings_of_segments[j]
+            if ring_i == ring_j and (index_j - index_i) % size in (1, size - 1):
+                first, second = (i, j) if (index_j - index_i) % size == 1 else (j, i)
+                if not _folds_back(segments[first], segments[second]):
+                    continue
+            return True
+        return False
+
+
+def interiors_overlap(a: Sequence[Ring], b: Sequence[Ring]) -> bool:
+    """
+    True if the interiors of two polygons overlap. Polygons that only share a border or touch at a vertex do not.
+    The interiors overlap if two edges cross, if a vertex of one polygon is strictly inside the other, or, for
+    polygons whose vertices are all on the other's border (e.g. duplicates), if the centroid of one is strictly inside both
+    """
+    segments_a, _ = _segments(a)
+    segments_b, _ = _segments(b)
+    segments = segments_a + segments_b
+    for i, j in intersecting_pairs(segments):
+        if i < len(segments_a) <= j and segments_cross(segments[i], segments[j]):
+            return True
+    for inner, outer in ((a, b), (b, a)):
+        for ring in inner:
+            for x, y in ring:
+                if point_in_polygon(x, y, outer) and not point_on_boundary(x, y, outer):
+                    return True
+    for inner, outer in ((a, b), (b, a)):
+        centroid = _centroid(inner[0])
+        if centroid is not None and all(point_in_polygon(*centroid, polygon) and not point_on_boundary(*centroid, polygon)
+                                        for polygon in (inner, outer)):
+            return True
+    return False
+
+
+def _distinct_vertices(ring: Ring) -> List[Tuple[float, float]]:
+    """The vertices of a ring without consecutive duplicates and without the closing vertex"""
+    vertices = []
+    for vertex in ring:
+        if not vertices or vertex != vertices[-1]:
+            vertices.append(tuple(vertex))
+    if len(vertices) > 1 and vertices[0] == vertices[-1]:
+        vertices.pop()
+    return vertices
+
+
+def _segments(rings: Sequence[Ring]) -> Tuple[List[Segment], List[Tuple[int, int, int]]]:
+    """The edges of every ring and, for every edge, (ring, position in the ring, edge count of the ring)"""
+    segments, positions = [], []
+    for ring_index, ring in enumerate(rings):
+        vertices = _distinct_vertices(ring)
+        for index, vertex in enumerate(vertices):
+            segments.append((vertex, vertices[(index + 1) % len(vertices)]))
+            positions.append((ring_index, index, len(vertices)))
+    return segments, positions
+
+
+def _folds_back(first: Segment, second: Segment) -> bool:
+    """True if the edge following `first` goes back over it (a spike)"""
+    start, shared = first
+    end = second[1]
+    if orientation(start, shared, end) != 0:
+        return False
+    return (end[0] - shared[0]) * (start[0] - shared[0]) + (end[1] - shared[1]) * (start[1] - shared[1]) > 0
+
+
+def _centroid(ring: Ring) -> Optional[Tuple[float, float]]:
+    """The centroid of the area of a ring, None for a ring without area"""
+    area = cx = cy = 0.0
+    x_prev, y_prev = ring[-1]
+    for x_cur, y_cur in ring:
+        cross = x_prev * y_cur - x_cur * y_prev
+        area += cross
+        cx += (x_prev + x_cur) * cross
+        cy += (y_prev + y_cur) * cross
+        x_prev, y_prev = x_cur, y_cur
+    if area == 0:
+        return None
+    return cx / (3 * area), cy / (3 * area)
@@ -0,0 +1,148 @@
+import json
+import re
+import struct
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.report_writer import ReportWriter
+
+MAGIC = b"GCOL1\n"
+NULL_INDEX = -1
+GUID_SIZE = 16
+GUID_PATTERN = re.compile(r"\{[0-9A-F]{8}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{12}\}")
+
+
+class DictionaryColumn:
+    """
+    A dictionary-encoded column built while the rows stream in: the distinct values in order of appearance
+    and one int32 index per row (NULL_INDEX for None).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.values: List[str] = []
+        self.indices = array("i")
+        self._positions: Dict[str, int] = {}
+
+    def append(self, value: Optional[str]) -> None:
+        if value is None:
+            self.indices.append(NULL_INDEX)
+            return
+        position = self._positions.get(value)
+        if position is None:
+            position = self._positions[value] = len(self.values)
+            self.values.append(value)
+        self.indices.append(position)
+
+    def is_guid(self) -> bool:
+        """True if every value is an upper-case Esri GUID {XXXXXXXX-...}, which round-trips through 16 bytes"""
+        return bool(self.values) and all(isinstance(value, str) and GUID_PATTERN.fullmatch(value)
+                                         for value in self.values)
+
+
+def build_columns(header_row: list[str], rows: Iterable[tuple]) -> List[DictionaryColumn]:
+    columns = [DictionaryColumn(name) for name in header_row]
+    appends = [column.append for column in columns]
+    for row in rows:
+        for append, value in zip(appends, row):
+            append(value)
+    return columns
+
+
+def guid_to_bytes(guid: str) -> bytes:
+    return bytes.fromhex(guid[1:-1].replace("-", ""))
+
+
+def bytes_to_guid(value: bytes) -> str:
+    digits = value.hex().upper()
+    return f"{{{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}}}"
+
+
+class ColumnarWriter(ReportWriter):
+    """
+    Compact columnar reports without extra dependencies. Every column is dictionary encoded
+    (repeated station GUIDs are stored once) and GUID dictionaries are stored as 16-byte binary values.
+    Layout:
+        MAGIC
+        uint32 length + JSON header {"row_count": n, "columns": [{"name", "encoding", "dictionary_size"}]}
+        per column: the dictionary (16 bytes per GUID, or uint32 offsets + UTF-8 data),
+                    then row_count int32 indices (-1 for NULL)
+    Read it back with read_columnar.
+    """
+
+    extension = "gcol"
+
+    def write_rows(self, path: str, header_row: list[str], rows: Iterable[tuple]) -> None:
+        columns = build_columns(header_row, rows)
+        row_count = len(columns[0].indices) if columns else 0
+        header = {"row_count": row_count, "columns": [
+            {"name": column.name, "encoding": "guid" if column.is_guid() else "utf8",
+             "dictionary_size": len(column.values)}
+            for column in columns
+        ]}
+
+        with open(path, "wb") as file:
+            encoded_header = json.dumps(header).encode("utf-8")
+            file.write(MAGIC)
+            file.write(struct.pack("<I", len(encoded_header)))
+            file.write(encoded_header)
+            for column, column_header in zip(columns, header["columns"]):
+                if column_header["encoding"] == "guid":
+                    file.write(b"".join(guid_to_bytes(value) for value in column.values))
+                else:
+                    _write_strings(file, column.values)
+                file.write(_little_endian(column.indices).tobytes())
+
+
+def read_columnar(path: str) -> Tuple[List[str], Dict[str, List[Optional[str]]]]:
+    """
+    Reads a report written by ColumnarWriter
+    Returns: the column names and the decoded columns, keyed by name
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a columnar report")
+    offset = len(MAGIC)
+    (header_size,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    header = json.loads(data[offset:offset + header_size])
+    offset += header_size
+
+    row_count = header["row_count"]
+    names, columns = [], {}
+    for column in header["columns"]:
+        size = column["dictionary_size"]
+        if column["encoding"] == "guid":
+            values = [bytes_to_guid(data[start:start + GUID_SIZE])
+                      for start in range(offset, offset + size * GUID_SIZE, GUID_SIZE)]
+            offset += size * GUID_SIZE
+        else:
+            values, offset = _read_strings(data, offset, size)
+        indices = _little_endian(array("i", data[offset:offset + row_count * 4]))
+        offset += row_count * 4
+        names.append(column["name"])
+        columns[column["name"]] = [values[index] if index != NULL_INDEX else None for index in indices]
+    return names, columns
+
+
+def _write_strings(file, values: List[str]) -> None:
+    encoded = [str(value).encode("utf-8") for value in values]
+    offsets = array("I", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    file.write(_little_endian(offsets).tobytes())
+    file.write(b"".join(encoded))
+
+
+def _read_strings(data: bytes, offset: int, size: int) -> Tuple[List[str], int]:
+    offsets = _little_endian(array("I", data[offset:offset + (size + 1) * 4]))
+    offset += (size + 1) * 4
+    values = [data[offset + start:offset + end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+    return values, offset + offsets[-1]
+
+
+def _little_endian(values: array) -> array:
+    """The file is little-endian, swap in place on big-endian machines (a no-op on x86/ARM)"""
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        values.byteswap()
+    return values
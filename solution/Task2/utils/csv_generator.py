@@ -1,27 +1,20 @@
-import os
 import csv
+from typing import Iterable
+from utils.report_writer import ReportWriter
 
+WRITE_BUFFER_SIZE = 1024 * 1024
 
-class CsvGenerator:
 
-    def __init__(self, directory: str):
-        self.directory = os.path.abspath(directory)
-        os.makedirs(self.directory, exist_ok=True)
+class CsvGenerator(ReportWriter):
+    """Plain CSV reports. The rows are written as they are produced, so a generator is never materialized"""
 
-    def generate_csv(self, name_no_extension: str, header_row: list[str], rows: list[tuple]):
-        csv_path = self.get_unique_name(name_no_extension)
+    extension = "csv"
 
-        with open(csv_path, mode="w", newline="", encoding="utf-8") as file:
+    def generate_csv(self, name_no_extension: str, header_row: list[str], rows: Iterable[tuple]):
+        return self.generate_report(name_no_extension, header_row, rows)
+
+    def write_rows(self, path: str, header_row: list[str], rows: Iterable[tuple]) -> None:
+        with open(path, mode="w", newline="", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as file:
             writer = csv.writer(file)
             writer.writerow(header_row)
             writer.writerows(rows)
-
-        return csv_path
-
-    def get_unique_name(self, name_no_extension):
-        csv_path = os.path.join(self.directory, f"{name_no_extension}.csv")
-        counter = 1
-        while os.path.exists(csv_path):
-            csv_path = os.path.join(self.directory, f"{name_no_extension}_{counter}.csv")
-            counter += 1
-        return csv_path
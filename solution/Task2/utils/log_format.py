@@ -1,5 +1,15 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+from typing import Dict, Iterable, List, Optional
+
+# Messages logged once per checked row. They are sampled by SamplingFilter, the other messages are always logged
+ROW_MESSAGE_PREFIXES = ("Invalid ",)
+# The queue handler, listener and sampling filter set up by configure_logging
+_pipeline: Optional["LoggingPipeline"] = None
 
 
 class CustomFormatter(logging.Formatter):
@@ -22,13 +32,130 @@ class CustomFormatter(logging.Formatter):
         logging.CRITICAL: bold_red + format_str + reset,  # Bold red critical errors
     }
 
+    def __init__(self):
+        super().__init__()
+        # One formatter per level, created once instead of for every record
+        self.formatters = {level: logging.Formatter(log_fmt) for level, log_fmt in self.FORMATS.items()}
+        self.default_formatter = logging.Formatter(self.grey + self.format_str + self.reset)
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno, self.grey + self.format_str + self.reset)
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
+        return self.formatters.get(record.levelno, self.default_formatter).format(record)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Logs only one in `sample_rate` of the per-row messages (ROW_MESSAGE_PREFIXES) of each message type, the text
+    before the first ":". A sample_rate of 0 logs none of them. Every message is counted, see summary.
+    """
+
+    def __init__(self, sample_rate: int, prefixes: Iterable[str] = ROW_MESSAGE_PREFIXES):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.prefixes = tuple(prefixes)
+        self.counts: Dict[str, int] = {}
+
+    def filter(self, record):
+        if record.levelno != logging.DEBUG or self.sample_rate == 1 or not isinstance(record.msg, str) \
+                or not record.msg.startswith(self.prefixes):
+            return True
+        message_type = record.msg.split(":", 1)[0]
+        count = self.counts.get(message_type, 0) + 1
+        self.counts[message_type] = count
+        return self.sample_rate > 0 and count % self.sample_rate == 1 % self.sample_rate
+
+    def summary(self) -> List[str]:
+        """One line for every sampled message type"""
+        logged = (lambda count: 0) if self.sample_rate == 0 else (lambda count: -(-count // self.sample_rate))
+        return [f"Logged {logged(count)} of {count} '{message_type}' messages"
+                for message_type, count in self.counts.items()]
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that, by default, waits while the queue is full, so a slow disk slows the checks down instead of
+    losing records or filling the memory: the logging only stops blocking the checks while the queue has room. With
+    `drop_when_full`, the records that do not fit are dropped instead and counted in `dropped`. In a forked worker
+    process, which has a copy of the queue but no listener thread, the records are written directly to the handlers.
+    """
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler], drop_when_full: bool = False):
+        super().__init__(log_queue)
+        self.handlers = handlers
+        self.drop_when_full = drop_when_full
+        self.dropped = 0
+        self.pid = os.getpid()
+
+    def prepare(self, record):
+        # The queue stays in this process, so the record is not formatted and copied to be pickled. The messages are
+        # f-strings, so formatting them later in the listener thread gives the same text
+        return record
+
+    def enqueue(self, record):
+        if os.getpid() == self.pid:
+            if not self.drop_when_full:
+                self.queue.put(record)
+                return
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+            return
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
 
+class BoundedQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop waits for room in a full queue"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class LoggingPipeline:
+    """The root logger's queue handler and the background listener writing the records to the console and the file"""
+
+    def __init__(self, handler: BoundedQueueHandler, listener: BoundedQueueListener,
+                 sampling_filter: SamplingFilter):
+        self.handler = handler
+        self.listener = listener
+        self.sampling_filter = sampling_filter
+
+    def stop(self):
+        """Logs the sampling summary and the dropped records, writes the queued records and closes the handlers"""
+        # The summary waits for room in the queue
+        self.handler.drop_when_full = False
+        for line in self.sampling_filter.summary():
+            logging.info(line)
+        if self.handler.dropped:
+            logging.warning(f"Dropped {self.handler.dropped} log records: the log queue was full")
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        for handler in self.handler.handlers:
+            handler.close()
+
+
+def configure_logging(log_file, log_level, queue_size: int = 10000, sample_rate: int = 100,
+                      max_mb: Optional[float] = None, backup_count: int = 5,
+                      drop_when_full: bool = False) -> LoggingPipeline:
+    """
+    Sets up the root logger: records are put on a queue of at most `queue_size` records and written to stdout and
+    to `log_file` by a background thread, so the checks do not wait for the console and the disk.
+    Args:
+        log_file: path of the log file
+        log_level: level of the root logger and of both outputs
+        queue_size: the most records waiting to be written
+        sample_rate: log one in `sample_rate` of the per-row "Invalid ..." messages of each type, 0 for none of them,
+            1 for all of them (full logging)
+        max_mb: rotate the log file when it reaches this size, None to never rotate
+        backup_count: the most rotated log files kept (log.txt.1, log.txt.2, ...)
+        drop_when_full: drop and count the records that do not fit in a full queue instead of waiting for room
+
+    Returns: the pipeline, stopped by stop_logging (also at exit)
+    """
+    global _pipeline
+    stop_logging()
 
-def configure_logging(log_file, log_level):
     # Create root logger
     logger = logging.getLogger()
     logger.setLevel(log_level)
@@ -38,11 +165,33 @@ def configure_logging(log_file, log_level):
     console_handler.setLevel(log_level)
     console_handler.setFormatter(CustomFormatter())
 
-    # File handler (UTF-8 encoding)
-    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    # File handler (UTF-8 encoding), rotated at max_mb
+    max_bytes = int(max_mb * 2 ** 20) if max_mb else 0
+    file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                                        encoding="utf-8")
     file_handler.setLevel(log_level)
     file_handler.setFormatter(logging.Formatter(CustomFormatter.format_str))  # No color in file logs
 
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # The handlers are written by the listener thread, the root logger only puts records on the queue
+    handlers = [console_handler, file_handler]
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = BoundedQueueHandler(log_queue, handlers, drop_when_full)
+    sampling_filter = SamplingFilter(sample_rate)
+    queue_handler.addFilter(sampling_filter)
+    listener = BoundedQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(queue_handler)
+
+    _pipeline = LoggingPipeline(queue_handler, listener, sampling_filter)
+    return _pipeline
+
+
+def stop_logging():
+    """Stops the pipeline of configure_logging, after every queued record is written"""
+    global _pipeline
+    if _pipeline is not None and _pipeline.handler.pid == os.getpid():
+        _pipeline.stop()
+    _pipeline = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,52 @@
+import gzip
+import importlib.util
+import io
+import json
+from typing import Iterable
+from utils.report_writer import ReportWriter
+
+COMPRESSIONS = ("gzip", "zstd")
+
+
+class NdjsonWriter(ReportWriter):
+    """
+    Compressed newline-delimited JSON reports: one JSON object per row, keyed by the header.
+    gzip uses the standard library, zstd needs the optional `zstandard` package.
+    """
+
+    def __init__(self, directory: str, compression: str = "gzip", level: int = 6):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}'. Expected 'gzip' or 'zstd'")
+        # zstandard is imported when a report is written, here it is only looked up
+        if compression == "zstd" and importlib.util.find_spec("zstandard") is None:
+            raise ImportError("The zstd report format needs the 'zstandard' package")
+        super().__init__(directory)
+        self.compression = compression
+        self.level = level
+        self.extension = "ndjson.gz" if compression == "gzip" else "ndjson.zst"
+
+    def write_rows(self, path: str, header_row: list[str], rows: Iterable[tuple]) -> None:
+        with self._open(path) as file:
+            encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+            for row in rows:
+                file.write(encode(dict(zip(header_row, row))))
+                file.write("\n")
+
+    def _open(self, path: str):
+        if self.compression == "gzip":
+            return gzip.open(path, "wt", encoding="utf-8", compresslevel=self.level)
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        return io.TextIOWrapper(compressor.stream_writer(open(path, "wb")), encoding="utf-8")
+
+
+def read_ndjson(path: str) -> Iterable[dict]:
+    """Reads back a report written by NdjsonWriter"""
+    if path.endswith(".gz"):
+        file = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        import zstandard
+        file = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8")
+    with file:
+        for line in file:
+            yield json.loads(line)
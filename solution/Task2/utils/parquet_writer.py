@@ -0,0 +1,33 @@
+from typing import Iterable
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError as ex:
+    raise ImportError("The parquet report format needs the 'pyarrow' package") from ex
+from utils.columnar_writer import build_columns, guid_to_bytes
+from utils.report_writer import ReportWriter
+
+
+class ParquetWriter(ReportWriter):
+    """
+    Parquet reports for Arrow-based dashboards (needs the optional `pyarrow` package).
+    Every column is a dictionary array, GUID dictionaries are fixed_size_binary(16).
+    """
+
+    extension = "parquet"
+
+    def __init__(self, directory: str, compression: str = "zstd"):
+        super().__init__(directory)
+        self.compression = compression
+
+    def write_rows(self, path: str, header_row: list[str], rows: Iterable[tuple]) -> None:
+        arrays = []
+        for column in build_columns(header_row, rows):
+            if column.is_guid():
+                dictionary = pa.array([guid_to_bytes(value) for value in column.values], pa.binary(16))
+            else:
+                dictionary = pa.array(column.values, pa.string())
+            indices = pa.array(column.indices, pa.int32(), mask=pa.array([index < 0 for index in column.indices]))
+            arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+        table = pa.Table.from_arrays(arrays, names=header_row)
+        pq.write_table(table, path, compression=self.compression)
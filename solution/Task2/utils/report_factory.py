@@ -0,0 +1,23 @@
+from utils.report_writer import ReportWriter
+
+REPORT_FORMATS = ("csv", "ndjson.gz", "ndjson.zst", "columnar", "parquet")
+
+
+def create_report_writer(report_format: str, directory: str) -> ReportWriter:
+    """
+    Creates the report writer selected with `report_format` in the config.
+    The writers are imported only when selected, so pyarrow and zstandard are needed only for their formats.
+    """
+    if report_format == "csv":
+        from utils.csv_generator import CsvGenerator
+        return CsvGenerator(directory)
+    if report_format in ("ndjson.gz", "ndjson.zst"):
+        from utils.ndjson_writer import NdjsonWriter
+        return NdjsonWriter(directory, "gzip" if report_format == "ndjson.gz" else "zstd")
+    if report_format == "columnar":
+        from utils.columnar_writer import ColumnarWriter
+        return ColumnarWriter(directory)
+    if report_format == "parquet":
+        from utils.parquet_writer import ParquetWriter
+        return ParquetWriter(directory)
+    raise ValueError(f"Unknown report format '{report_format}'. Expected one of {', '.join(REPORT_FORMATS)}")
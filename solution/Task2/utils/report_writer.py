@@ -0,0 +1,64 @@
+import os
+from typing import Iterable, Iterator
+
+
+class ReportWriter:
+    """
+    Base of the report writers. Picks a unique file name in the output directory and writes the report
+    to a .part file that is renamed to the final name once all rows are written:
+    a report with the final name is always complete.
+    """
+
+    extension = ""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def generate_report(self, name_no_extension: str, header_row: list[str], rows: Iterable[tuple]) -> str:
+        """
+        Args:
+            name_no_extension: the name of the report file. A counter is appended if the file exists
+            header_row: the column names
+            rows: the rows, any iterable (a list or a generator of a check)
+
+        Returns: the path to the report file
+
+        """
+        report_path = self.get_unique_name(name_no_extension)
+        partial_path = f"{report_path}.part"
+
+        try:
+            self.write_rows(partial_path, header_row, rows)
+            os.replace(partial_path, report_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+        return report_path
+
+    def write_rows(self, path: str, header_row: list[str], rows: Iterable[tuple]) -> None:
+        """Write the header and the rows to `path` in the format of the writer"""
+        raise NotImplementedError
+
+    def get_unique_name(self, name_no_extension):
+        report_path = os.path.join(self.directory, f"{name_no_extension}.{self.extension}")
+        counter = 1
+        while os.path.exists(report_path):
+            report_path = os.path.join(self.directory, f"{name_no_extension}_{counter}.{self.extension}")
+            counter += 1
+        return report_path
+
+
+class CountingRows:
+    """Passes the rows through and counts them, so the size of a report is known without materializing a generator"""
+
+    def __init__(self, rows: Iterable[tuple]):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self) -> Iterator[tuple]:
+        for row in self.rows:
+            self.count += 1
+            yield row